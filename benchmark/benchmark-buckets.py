@@ -0,0 +1,152 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def cargar_modulo(ruta, nombre):
+    """Importa un script del repo (los nombres con guiones no son importables)"""
+    sys.path.insert(0, str(ruta.parent))
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def medir(funcion, repeticiones):
+    """Mediana en ms de repeticiones ejecuciones, tras una de calentamiento"""
+    resultado = funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        start_time = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - start_time) * 1000)
+    return resultado, round(statistics.median(tiempos), 3)
+
+
+def coinciden(obtenido, esperado):
+    """Mismas filas y mismos valores tras ordenar (la primera columna es la clave)"""
+    def ordenado(df):
+        return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+    return len(obtenido) == len(esperado) and np.allclose(
+        ordenado(obtenido).iloc[:, 1:].astype(float), ordenado(esperado).iloc[:, 1:].astype(float)
+    )
+
+
+def medir_dataset(analyzer, tabla, repeticiones, columnas_dinero):
+    """
+    Búsqueda de un valor de la clave leyendo todo el dataset frente a solo su
+    bucket, y agregación y self-join por la clave en una consulta frente a
+    bucket a bucket en paralelo
+    """
+    columna = analyzer.buckets[tabla]['columna']
+    archivos = analyzer.datasets[tabla]['count']
+    valor = analyzer.conn.execute(f'SELECT "{columna}" FROM {tabla} LIMIT 1').fetchone()[0]
+    filas = []
+
+    # Búsqueda puntual: todo el dataset frente al bucket del valor
+    sql_completo = f'SELECT * FROM {tabla} WHERE "{columna}" = {analyzer.literal_sql(valor)}'
+    _, buckets = analyzer.sql_por_clave(tabla, valor)
+    esperado, base = medir(lambda: analyzer.conn.execute(sql_completo).fetchdf(), repeticiones)
+    with contextlib.redirect_stdout(io.StringIO()):
+        obtenido, ms = medir(lambda: analyzer.consulta_por_clave(tabla, valor), repeticiones)
+    filas.append({
+        'tabla': tabla,
+        'consulta': f"{columna} = {valor}",
+        'sin_buckets_ms': base,
+        'con_buckets_ms': ms,
+        'archivos': f"{sum(len(analyzer.archivos_bucket(tabla, b)) for b in buckets)}/{archivos}",
+        'coincide': len(obtenido) == len(esperado)
+    })
+
+    # Agregación y self-join por la clave: una consulta frente a bucket a bucket
+    esquema = analyzer.obtener_esquema(tabla)['column_name'].values
+    numericas = [c for c in columnas_dinero.get(tabla) or [] if c in esquema]
+    medida = f'SUM("{numericas[0]}")' if numericas else 'COUNT(*)'
+    consultas = {
+        f"GROUP BY {columna}": f'SELECT "{columna}", COUNT(*) AS n, {medida} AS total FROM {tabla} GROUP BY "{columna}"',
+        f"self-join por {columna}": f"""
+        SELECT a."{columna}", COUNT(*) AS pares
+        FROM {tabla} a JOIN {tabla} b ON a."{columna}" = b."{columna}"
+        GROUP BY a."{columna}"
+        """
+    }
+    for nombre, sql in consultas.items():
+        esperado, base = medir(lambda: analyzer.conn.execute(sql).fetchdf(), repeticiones)
+        with contextlib.redirect_stdout(io.StringIO()):
+            obtenido, ms = medir(lambda: analyzer.consulta_por_buckets(sql, [tabla]), repeticiones)
+        filas.append({
+            'tabla': tabla,
+            'consulta': nombre,
+            'sin_buckets_ms': base,
+            'con_buckets_ms': ms,
+            'archivos': f"{archivos}/{archivos}",
+            'coincide': coinciden(obtenido, esperado)
+        })
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Búsquedas por clave y agregaciones/joins bucket a bucket en datasets con bucketing")
+    parser.add_argument("--parquet-dir", default="parquet_buckets", help="Directorio con los datasets Parquet (convertidos con buckets)")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Ejecuciones por consulta")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto con timestamp)")
+    args = parser.parse_args()
+
+    print("🪣 BENCHMARK DE BUCKETING")
+    print("=" * 40)
+
+    analizador_mod = cargar_modulo(ROOT / "duckdb" / "data-duckdb.py", "analizador")
+    from dinero import COLUMNAS_DINERO
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = analizador_mod.DuckDBParquetAnalyzer(
+            parquet_dir=args.parquet_dir, usar_rollups=False, cache_dir=None, block_cache_dir=None
+        )
+        analyzer.crear_vistas(analyzer.detectar_datasets())
+
+    tablas = [tabla for tabla in analyzer.datasets if analyzer.buckets.get(tabla)]
+    if not tablas:
+        print("⚠️  Ningún dataset tiene bucketing (convertir con buckets=BUCKETS_POR_DEFECTO)")
+        return 1
+
+    filas = []
+    for tabla in tablas:
+        filas += medir_dataset(analyzer, tabla, args.repeticiones, COLUMNAS_DINERO)
+    print(pd.DataFrame(filas).to_string(index=False))
+    print(f"\n💡 Buckets en paralelo hasta {analyzer.perfil['threads']} threads del perfil")
+
+    resultados = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'parquet_dir': args.parquet_dir,
+        'consultas': filas
+    }
+    salida = args.salida or f"benchmark_buckets_{datetime.now().strftime('%Y%m%d_%H%M')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False, default=str)
+    print(f"\n📄 Resultados: {salida}")
+
+    errores = [f for f in filas if not f['coincide']]
+    if errores:
+        print(f"\n❌ {len(errores)} resultados distintos entre la consulta completa y bucket a bucket")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pyarrow.dataset as pads
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def cargar_modulo(ruta, nombre):
+    """Importa un script del repo (los nombres con guiones no son importables)"""
+    sys.path.insert(0, str(ruta.parent))
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def medir(funcion, repeticiones):
+    """Mediana en ms de repeticiones ejecuciones, tras una de calentamiento"""
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        start_time = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - start_time) * 1000)
+    return round(statistics.median(tiempos), 1)
+
+
+def medir_dataset(conn, tabla, info, filas, repeticiones):
+    """
+    Memoria y GROUP BY de las columnas categóricas (metadata 'categorias')
+    como category frente a str en pandas y como ENUM frente a VARCHAR en
+    tablas nativas DuckDB. Los datos se replican hasta ~filas
+    """
+    metadata = info.get('metadata', {})
+    particiones = {p['name'] for p in metadata.get('partitioning') or []}
+    columnas = [c for c in metadata.get('categorias', {}) if c not in particiones]
+    if not columnas:
+        return None
+
+    # pandas: el esquema Arrow del Parquet devuelve las columnas como category
+    categorico = pads.dataset(info['files'], format='parquet').to_table(columns=columnas).to_pandas()
+    copias = max(1, filas // max(1, len(categorico)))
+    categorico = pd.concat([categorico] * copias, ignore_index=True)
+    texto = categorico.astype({col: 'str' for col in columnas})
+    agrupar = columnas[:2]
+
+    # DuckDB: la misma tabla nativa con VARCHAR y con ENUM
+    lista = ', '.join(f"'{a}'" for a in info['files'])
+    cols_sql = ', '.join(f'"{c}"' for c in columnas)
+    conn.execute(f"""
+    CREATE OR REPLACE TABLE categorias_varchar AS
+    SELECT {cols_sql} FROM read_parquet([{lista}], hive_partitioning = false), range({copias})
+    """)
+    casts = []
+    for i, col in enumerate(columnas):
+        conn.execute(f"""
+        CREATE OR REPLACE TYPE enum_{i} AS ENUM (
+            SELECT DISTINCT "{col}" FROM categorias_varchar WHERE "{col}" IS NOT NULL ORDER BY 1
+        )""")
+        casts.append(f'"{col}"::enum_{i} AS "{col}"')
+    conn.execute(f"CREATE OR REPLACE TABLE categorias_enum AS SELECT {', '.join(casts)} FROM categorias_varchar")
+
+    group_sql = ', '.join(f'"{c}"' for c in agrupar)
+    consulta = f"SELECT {group_sql}, COUNT(*) FROM {{}} GROUP BY ALL"
+    fila = {
+        'tabla': tabla,
+        'columnas': len(columnas),
+        'filas': len(categorico),
+        'group_by': ', '.join(agrupar),
+        'pandas_str_MB': round(texto.memory_usage(deep=True).sum() / 1024**2, 1),
+        'pandas_cat_MB': round(categorico.memory_usage(deep=True).sum() / 1024**2, 1),
+        'pandas_str_ms': medir(lambda: texto.groupby(agrupar).size(), repeticiones),
+        'pandas_cat_ms': medir(lambda: categorico.groupby(agrupar, observed=True).size(), repeticiones),
+        'duckdb_varchar_ms': medir(lambda: conn.execute(consulta.format('categorias_varchar')).fetchall(), repeticiones),
+        'duckdb_enum_ms': medir(lambda: conn.execute(consulta.format('categorias_enum')).fetchall(), repeticiones)
+    }
+
+    conn.execute("DROP TABLE categorias_enum")
+    conn.execute("DROP TABLE categorias_varchar")
+    for i in range(len(columnas)):
+        conn.execute(f"DROP TYPE enum_{i}")
+    return fila
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnas categóricas como diccionario (category/ENUM) frente a string")
+    parser.add_argument("--parquet-dir", default="parquet_data", help="Directorio con los datasets Parquet")
+    parser.add_argument("--filas", type=int, default=1_000_000, help="Filas a las que se replica cada dataset")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Ejecuciones por medición")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto con timestamp)")
+    args = parser.parse_args()
+
+    print("🏷️  BENCHMARK DE COLUMNAS CATEGÓRICAS")
+    print("=" * 40)
+
+    analizador_mod = cargar_modulo(ROOT / "duckdb" / "data-duckdb.py", "analizador")
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = analizador_mod.DuckDBParquetAnalyzer(parquet_dir=args.parquet_dir, cache_dir=None, block_cache_dir=None)
+        datasets = analyzer.detectar_datasets()
+
+    # Conexión propia: las tablas y tipos temporales no tocan el catálogo del analizador
+    conn = duckdb.connect()
+    filas = []
+    for tabla, info in datasets.items():
+        if info.get('remoto'):
+            continue
+        fila = medir_dataset(conn, tabla, info, args.filas, args.repeticiones)
+        if fila is not None:
+            filas.append(fila)
+    conn.close()
+
+    if not filas:
+        print("⚠️  Ningún dataset declara columnas categóricas (reconvertir con categorias=True)")
+        return 1
+    print(pd.DataFrame(filas).to_string(index=False))
+
+    resultados = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'parquet_dir': args.parquet_dir,
+        'datasets': filas
+    }
+    salida = args.salida or f"benchmark_categorias_{datetime.now().strftime('%Y%m%d_%H%M')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False, default=str)
+    print(f"\n📄 Resultados: {salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Escritura de cada variante y expresión de lectura (None = reconstruir el DECIMAL desde céntimos)
+VARIANTES = {
+    'double': ('CAST("{c}" AS DOUBLE)', '"{c}"'),
+    'decimal': ('CAST("{c}" AS DECIMAL(18, 2))', '"{c}"'),
+    'centimos': ('CAST(round("{c}" * 100) AS BIGINT)', None)
+}
+
+
+def cargar_modulo(ruta, nombre):
+    """Importa un script del repo (los nombres con guiones no son importables)"""
+    sys.path.insert(0, str(ruta.parent))
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def medir(funcion, repeticiones):
+    """Mediana en ms de repeticiones ejecuciones, tras una de calentamiento"""
+    resultado = funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        start_time = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - start_time) * 1000)
+    return resultado, round(statistics.median(tiempos), 1)
+
+
+def medir_dataset(analyzer, tabla, columnas, filas, repeticiones, tmp_dir, valor_dinero):
+    """
+    Escribe las columnas monetarias del dataset como DOUBLE, DECIMAL(18,2) y
+    céntimos (BIGINT, leído como DECIMAL igual que en las vistas) y compara
+    tamaño, tiempo de SUM/AVG y error de la suma frente a DECIMAL. Los datos
+    se replican hasta ~filas desplazando cada copia un céntimo para que los
+    valores no se repitan
+
+    Args:
+        valor_dinero: Función columna -> expresión DECIMAL de una columna en céntimos
+    """
+    conteo = analyzer.conteos.get(tabla) or 1
+    copias = max(1, filas // conteo)
+    base = f"""
+    SELECT {', '.join(f'CAST("{c}" AS DECIMAL(18, 2)) + r.range * 0.01 AS "{c}"' for c in columnas)}
+    FROM {tabla}, range({copias}) r
+    """
+
+    resultado = []
+    for variante, (escritura, lectura) in VARIANTES.items():
+        archivo = Path(tmp_dir) / f"{tabla}_{variante}.parquet"
+        select = ', '.join(f'{escritura.format(c=c)} AS "{c}"' for c in columnas)
+        analyzer.conn.execute(f"COPY (SELECT {select} FROM ({base})) TO '{archivo}' (FORMAT PARQUET, COMPRESSION SNAPPY)")
+
+        agregados = []
+        for c in columnas:
+            valor = lectura.format(c=c) if lectura else valor_dinero(c)
+            agregados += [f"SUM({valor})", f"AVG({valor})"]
+        sql = f"SELECT {', '.join(agregados)} FROM read_parquet('{archivo}')"
+        valores, ms = medir(lambda: analyzer.conn.execute(sql).fetchone(), repeticiones)
+
+        resultado.append({
+            'tabla': tabla,
+            'columnas': ', '.join(columnas),
+            'variante': variante,
+            'filas': conteo * copias,
+            'MB': round(archivo.stat().st_size / 1024**2, 2),
+            'sum_avg_ms': ms,
+            'suma': Decimal(str(valores[0]))
+        })
+
+    # Error de la suma de la primera columna frente a la suma exacta en DECIMAL
+    exacta = next(f['suma'] for f in resultado if f['variante'] == 'decimal')
+    for fila in resultado:
+        fila['error_suma'] = float(abs(fila.pop('suma') - exacta))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnas monetarias en DOUBLE, DECIMAL y céntimos: tamaño, SUM/AVG y exactitud")
+    parser.add_argument("--parquet-dir", default="parquet_data", help="Directorio con los datasets Parquet")
+    parser.add_argument("--filas", type=int, default=5_000_000, help="Filas a las que se replica cada dataset")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Ejecuciones por medición")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto con timestamp)")
+    args = parser.parse_args()
+
+    print("💶 BENCHMARK DE COLUMNAS MONETARIAS")
+    print("=" * 40)
+
+    analizador_mod = cargar_modulo(ROOT / "duckdb" / "data-duckdb.py", "analizador")
+    from dinero import COLUMNAS_DINERO, sql_valor_dinero
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = analizador_mod.DuckDBParquetAnalyzer(parquet_dir=args.parquet_dir, cache_dir=None, block_cache_dir=None)
+        analyzer.crear_vistas(analyzer.detectar_datasets())
+
+    filas = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for tabla in analyzer.datasets:
+            esquema = analyzer.obtener_esquema(tabla)['column_name'].values
+            columnas = [c for c in COLUMNAS_DINERO.get(tabla, []) if c in esquema]
+            if columnas:
+                filas += medir_dataset(analyzer, tabla, columnas, args.filas, args.repeticiones, tmp_dir, sql_valor_dinero)
+
+    if not filas:
+        print("⚠️  Ningún dataset tiene columnas monetarias")
+        return 1
+    print(pd.DataFrame(filas).to_string(index=False))
+
+    resultados = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'parquet_dir': args.parquet_dir,
+        'variantes': filas
+    }
+    salida = args.salida or f"benchmark_dinero_{datetime.now().strftime('%Y%m%d_%H%M')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados: {salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
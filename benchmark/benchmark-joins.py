@@ -0,0 +1,252 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Claves foráneas del modelo estrella: (hechos, columna, dimensión, clave primaria)
+CLAVES_FORANEAS = [
+    ('ventas', 'cliente_id', 'clientes', 'cliente_id'),
+    ('ventas', 'producto_id', 'productos', 'producto_id'),
+    ('ventas', 'tienda_id', 'tiendas', 'tienda_id'),
+    ('ventas', 'campaña_id', 'marketing', 'campaña_id'),
+    ('ventas', 'vendedor_id', 'empleados', 'empleado_id')
+]
+
+# Layouts Parquet comparados: directorio y si se distribuye en buckets
+# (buckets.BUCKETS_POR_DEFECTO: ventas y clientes por cliente_id)
+LAYOUTS = {
+    'particionado': ('parquet_data', False),
+    'buckets': ('parquet_buckets', True)
+}
+
+# Join y agregación por la clave de bucketing de ventas y clientes: en el
+# layout con buckets se ejecuta también bucket a bucket
+CONSULTA_POR_CLIENTE = """
+    SELECT c.cliente_id, c.segmento, COUNT(*) AS pedidos, SUM(v.total) AS revenue
+    FROM ventas v JOIN clientes c ON v.{v_cliente} = c.{c_cliente}
+    GROUP BY c.cliente_id, c.segmento
+"""
+
+
+def cargar_modulo(ruta, nombre):
+    """Importa un script del repo (los nombres con guiones no son importables)"""
+    sys.path.insert(0, str(ruta.parent))
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def consultas_join(analyzer):
+    """
+    Consultas multi-tabla de referencia. Los joins usan la versión entera de
+    las claves compactadas (<col>_num) cuando existe
+    """
+    k = analyzer.columna_id
+    return {
+        'ventas_por_segmento': f"""
+            SELECT c.segmento, COUNT(*) AS ventas, SUM(v.total) AS revenue
+            FROM ventas v JOIN clientes c ON v.{k('ventas', 'cliente_id')} = c.{k('clientes', 'cliente_id')}
+            GROUP BY c.segmento
+        """,
+        'revenue_marca_canal': f"""
+            SELECT p.marca, t.canal, SUM(v.total) AS revenue, SUM(v.cantidad) AS unidades
+            FROM ventas v
+            JOIN productos p ON v.{k('ventas', 'producto_id')} = p.{k('productos', 'producto_id')}
+            JOIN tiendas t ON v.{k('ventas', 'tienda_id')} = t.{k('tiendas', 'tienda_id')}
+            GROUP BY p.marca, t.canal
+        """,
+        'roas_real_por_canal': f"""
+            WITH atribuidas AS (
+                SELECT {k('ventas', 'campaña_id')} AS campaña, SUM(total) AS revenue
+                FROM ventas WHERE {k('ventas', 'campaña_id')} IS NOT NULL GROUP BY 1
+            )
+            SELECT m.canal, SUM(a.revenue) / SUM(m.gasto_real) AS roas_real, COUNT(*) AS campañas
+            FROM marketing m JOIN atribuidas a ON m.{k('marketing', 'campaña_id')} = a.campaña
+            GROUP BY m.canal
+        """,
+        'ventas_por_departamento': f"""
+            SELECT e.departamento, COUNT(DISTINCT e.{k('empleados', 'empleado_id')}) AS empleados,
+                   COUNT(v.orden_id) AS ventas_realizadas, SUM(v.total) AS revenue_total
+            FROM empleados e LEFT JOIN ventas v ON e.{k('empleados', 'empleado_id')} = v.{k('ventas', 'vendedor_id')}
+            GROUP BY e.departamento
+        """,
+        'revenue_por_cliente': CONSULTA_POR_CLIENTE.format(
+            v_cliente=k('ventas', 'cliente_id'), c_cliente=k('clientes', 'cliente_id')
+        )
+    }
+
+
+def huella_resultado(df):
+    """Filas y suma de las columnas numéricas, para comparar resultados entre layouts"""
+    numericas = df.select_dtypes('number')
+    return len(df), round(float(numericas.astype(float).sum().sum()), 2)
+
+
+def integridad(analyzer):
+    """Claves foráneas huérfanas por relación (0 = integridad referencial)"""
+    huerfanas = {}
+    for hechos, columna, dimension, clave in CLAVES_FORANEAS:
+        if hechos not in analyzer.datasets or dimension not in analyzer.datasets:
+            continue
+        fk, pk = analyzer.columna_id(hechos, columna), analyzer.columna_id(dimension, clave)
+        huerfanas[f"{hechos}.{columna} → {dimension}"] = analyzer.conn.execute(f"""
+            SELECT COUNT(*) FROM {hechos} h
+            WHERE h.{fk} IS NOT NULL AND NOT EXISTS (SELECT 1 FROM {dimension} d WHERE d.{pk} = h.{fk})
+        """).fetchone()[0]
+    return huerfanas
+
+
+def medir(funcion, repeticiones):
+    """Mediana en ms de repeticiones ejecuciones, tras una de calentamiento"""
+    resultado = funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        start_time = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - start_time) * 1000)
+    return resultado, round(statistics.median(tiempos), 3)
+
+
+def preparar_escala(escala):
+    """Genera el modelo estrella y lo convierte a cada layout (si no existe ya)"""
+    generador_mod = cargar_modulo(ROOT / "data-synthetic-producer" / "data-synthetic-producer.py", "generador")
+    conversor_mod = cargar_modulo(ROOT / "parquet" / "data-parquet.py", "conversor")
+    from buckets import BUCKETS_POR_DEFECTO
+
+    metricas = {}
+    if not list(Path('.').glob("ventas_ecommerce_*.csv")):
+        start_time = time.time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            generador_mod.DatasetGeneratorFaker().generar_modelo_estrella(escala)
+        metricas['generacion_s'] = round(time.time() - start_time, 3)
+
+    for layout, (salida, con_buckets) in LAYOUTS.items():
+        if Path(salida).exists():
+            continue
+        start_time = time.time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            conversor = conversor_mod.RobustCSVToParquetConverter(
+                output_dir=salida, buckets=BUCKETS_POR_DEFECTO if con_buckets else None
+            )
+            conversor.convertir_todos_robustamente()
+        metricas[f"conversion_{layout}_s"] = round(time.time() - start_time, 3)
+        metricas[f"parquet_{layout}_mb"] = round(
+            sum(p.stat().st_size for p in Path(salida).rglob("*.parquet")) / 1024**2, 2
+        )
+
+    return metricas
+
+
+def ejecutar_escala(escala, work_dir, repeticiones):
+    """Genera, convierte y mide las consultas de join en cada layout"""
+    directorio = Path(work_dir) / f"estrella_{escala}"
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    print(f"\n⭐ ESCALA {escala} ({int(100_000 * escala):,} ventas)")
+    print("=" * 40)
+
+    anterior = os.getcwd()
+    os.chdir(directorio)
+    try:
+        resultado = {'escala': escala, **preparar_escala(escala), 'consultas': []}
+        analizador_mod = cargar_modulo(ROOT / "duckdb" / "data-duckdb.py", "analizador")
+
+        huellas = {}
+        for layout, (salida, _) in LAYOUTS.items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                analyzer = analizador_mod.DuckDBParquetAnalyzer(parquet_dir=salida, usar_rollups=False, cache_dir=None)
+                analyzer.crear_vistas(analyzer.detectar_datasets())
+
+            huerfanas = integridad(analyzer)
+            resultado[f"huerfanas_{layout}"] = huerfanas
+            if any(huerfanas.values()):
+                print(f"❌ {layout}: claves huérfanas {huerfanas}")
+
+            for nombre, sql in consultas_join(analyzer).items():
+                df, ms = medir(lambda: analyzer.conn.execute(sql).fetchdf(), repeticiones)
+                huella = huella_resultado(df)
+                fila = {
+                    'layout': layout,
+                    'consulta': nombre,
+                    'filas': huella[0],
+                    'ms': ms,
+                    'coincide': huellas.setdefault(nombre, huella) == huella
+                }
+                resultado['consultas'].append(fila)
+                print(f"   {'✅' if fila['coincide'] else '❌'} {layout:<13} {nombre:<24} {ms:>10.2f}ms  {huella[0]:,} filas")
+
+            # Join co-particionado: ventas y clientes con la misma clave y buckets
+            if analyzer.buckets.get('ventas') and analyzer.buckets.get('clientes'):
+                sql = consultas_join(analyzer)['revenue_por_cliente']
+                with contextlib.redirect_stdout(io.StringIO()):
+                    df, ms = medir(lambda: analyzer.consulta_por_buckets(sql, ['ventas', 'clientes']), repeticiones)
+                huella = huella_resultado(df)
+                resultado['consultas'].append({
+                    'layout': f"{layout} (bucket a bucket)",
+                    'consulta': 'revenue_por_cliente',
+                    'filas': huella[0],
+                    'ms': ms,
+                    'coincide': huellas['revenue_por_cliente'] == huella
+                })
+                print(f"   {'✅' if huellas['revenue_por_cliente'] == huella else '❌'} {'bucket a bucket':<13} "
+                      f"{'revenue_por_cliente':<24} {ms:>10.2f}ms  {huella[0]:,} filas")
+
+            analyzer.conn.close()
+    finally:
+        os.chdir(anterior)
+
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de joins sobre el modelo estrella")
+    parser.add_argument("--escalas", type=float, nargs="+", default=[0.1, 1, 10],
+                        help="Factores de escala del modelo estrella (1 = 100.000 ventas)")
+    parser.add_argument("--work-dir", default="benchmark_joins", help="Directorio de trabajo (CSV y Parquet generados)")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Ejecuciones por consulta")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto con timestamp)")
+    args = parser.parse_args()
+
+    print("🏁 BENCHMARK DE JOINS (MODELO ESTRELLA)")
+    print("=" * 40)
+
+    resultados = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'escalas': [ejecutar_escala(escala, args.work_dir, args.repeticiones) for escala in args.escalas]
+    }
+
+    tabla = pd.DataFrame([{'escala': e['escala'], **c} for e in resultados['escalas'] for c in e['consultas']])
+    if not tabla.empty:
+        print(f"\n📊 RESUMEN (mediana en ms)")
+        print("=" * 40)
+        print(tabla.pivot_table(index=['escala', 'consulta'], columns='layout', values='ms').to_string())
+
+    salida = args.salida or f"benchmark_joins_{datetime.now().strftime('%Y%m%d_%H%M')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados: {salida}")
+
+    errores = [c for e in resultados['escalas'] for c in e['consultas'] if not c['coincide']]
+    huerfanas = [e for e in resultados['escalas'] for k, v in e.items() if k.startswith('huerfanas_') and any(v.values())]
+    if errores or huerfanas:
+        print(f"\n❌ {len(errores)} resultados distintos entre layouts, {len(huerfanas)} escalas con claves huérfanas")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# (tabla, condición WHERE) sobre columnas de partición de cada dataset
+FILTROS = [
+    ('ventas', "año = 2025 AND categoria = 'ropa'"),
+    ('ventas', "categoria = 'electrónicos'"),
+    ('empleados', "departamento = 'it'"),
+    ('marketing', "canal = 'email'")
+]
+
+
+def cargar_modulo(ruta, nombre):
+    """Importa un script del repo (los nombres con guiones no son importables)"""
+    sys.path.insert(0, str(ruta.parent))
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def archivos_abiertos(plan):
+    """Archivos leídos según el plan de EXPLAIN ANALYZE"""
+    abiertos = sum(int(n) for n in re.findall(r'Total Files Read:\s*(\d+)', plan))
+    if not abiertos:
+        abiertos = sum(int(n) for n in re.findall(r'Scanning Files:\s*(\d+)/', plan))
+    return abiertos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivos abiertos por consultas filtradas por columnas de partición")
+    parser.add_argument("--parquet-dir", default="parquet_data", help="Directorio con los datasets Parquet")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto con timestamp)")
+    args = parser.parse_args()
+
+    print("📂 BENCHMARK DE PODA DE PARTICIONES")
+    print("=" * 40)
+
+    analizador_mod = cargar_modulo(ROOT / "duckdb" / "data-duckdb.py", "analizador")
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = analizador_mod.DuckDBParquetAnalyzer(parquet_dir=args.parquet_dir, cache_dir=None, block_cache_dir=None)
+        analyzer.crear_vistas(analyzer.detectar_datasets())
+
+    filas = []
+    for tabla, condicion in FILTROS:
+        if tabla not in analyzer.datasets:
+            continue
+        # EXPLAIN ANALYZE descarta las filas; SELECT * evita respuestas solo desde metadata
+        sql = f"SELECT * FROM {tabla} WHERE {condicion}"
+        try:
+            start_time = time.perf_counter()
+            plan = '\n'.join(fila[1] for fila in analyzer.conn.execute(f"EXPLAIN ANALYZE {sql}").fetchall())
+            elapsed = time.perf_counter() - start_time
+        except Exception as e:
+            print(f"❌ {tabla} WHERE {condicion}: {e}")
+            continue
+        filas.append({
+            'tabla': tabla,
+            'filtro': condicion,
+            'archivos_abiertos': archivos_abiertos(plan),
+            'archivos_total': analyzer.datasets[tabla]['count'],
+            'tiempo_ms': round(elapsed * 1000, 2)
+        })
+
+    if filas:
+        print(pd.DataFrame(filas).to_string(index=False))
+
+    resultados = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'parquet_dir': args.parquet_dir,
+        'consultas': filas
+    }
+    salida = args.salida or f"benchmark_particiones_{datetime.now().strftime('%Y%m%d_%H%M')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados: {salida}")
+
+
+if __name__ == "__main__":
+    main()
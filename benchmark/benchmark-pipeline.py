@@ -0,0 +1,288 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Métricas comparadas contra el baseline: True si más alto es mejor
+METRICAS = {
+    'generacion_filas_s': True,
+    'generacion_rss_mb': False,
+    'conversion_filas_s': True,
+    'conversion_rss_mb': False,
+    'reduccion_pct': True,
+    'parquet_mb': False,
+    'compresion_filas_s': True,
+    'compresion_mb': False,
+    'consulta_p50_ms': False,
+    'consulta_p95_ms': False,
+    'consulta_p99_ms': False,
+    'consulta_rss_mb': False
+}
+
+# Consultas sobre los datos crudos (sin rollups ni caché) medidas en cada escala
+CONSULTAS = [
+    "SELECT COUNT(*) FROM ventas",
+    "SELECT categoria, SUM(total) AS revenue FROM ventas GROUP BY categoria",
+    "SELECT strftime(fecha, '%Y-%m') AS mes, COUNT(*), SUM(total) FROM ventas GROUP BY 1 ORDER BY 1",
+    "SELECT producto, SUM(total) AS revenue FROM ventas GROUP BY producto ORDER BY revenue DESC LIMIT 10",
+    "SELECT COUNT(DISTINCT cliente_id) FROM ventas",
+    "SELECT departamento, AVG(salario_anual), AVG(performance_score) FROM empleados GROUP BY departamento",
+    "SELECT canal, SUM(gasto_real), AVG(roas) FROM marketing GROUP BY canal"
+]
+
+
+def cargar_modulo(ruta, nombre):
+    """Importa un script del repo (los nombres con guiones no son importables)"""
+    sys.path.insert(0, str(ruta.parent))
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def tamaño_mb(patron, auxiliares=False):
+    """
+    Tamaño total en MB de los archivos que cumplen un patrón glob. Los que
+    cuelgan de un directorio con prefijo '_' (rollups, muestras, estado de la
+    ingesta) son auxiliares: solo se cuentan con auxiliares=True
+    """
+    return sum(
+        p.stat().st_size for p in Path('.').glob(patron)
+        if p.is_file() and any(parte.startswith('_') for parte in p.parts[:-1]) == auxiliares
+    ) / 1024**2
+
+
+def etapa_generacion(filas):
+    """Genera los tres CSV con DatasetGeneratorFaker"""
+    generador_mod = cargar_modulo(ROOT / "data-synthetic-producer" / "data-synthetic-producer.py", "generador")
+    generador = generador_mod.DatasetGeneratorFaker()
+
+    start_time = time.time()
+    generador.guardar_csv(generador.generar_dataset_ventas(filas), "ventas_ecommerce_bench")
+    generador.guardar_csv(generador.generar_dataset_empleados(filas), "empleados_rrhh_bench")
+    generador.guardar_csv(generador.generar_dataset_marketing(filas), "campañas_marketing_bench")
+    elapsed = time.time() - start_time
+
+    return {
+        'generacion_s': round(elapsed, 3),
+        'generacion_filas_s': round(3 * filas / elapsed, 1),
+        'csv_mb': round(tamaño_mb("*.csv"), 2)
+    }
+
+
+def etapa_conversion(filas):
+    """Convierte los CSV con RobustCSVToParquetConverter"""
+    conversor_mod = cargar_modulo(ROOT / "parquet" / "data-parquet.py", "conversor")
+    conversor = conversor_mod.RobustCSVToParquetConverter(output_dir="parquet_data")
+
+    start_time = time.time()
+    conversor.convertir_todos_robustamente()
+    elapsed = time.time() - start_time
+
+    csv_mb = tamaño_mb("*.csv")
+    parquet_mb = tamaño_mb("parquet_data/**/*.parquet")
+    return {
+        'conversion_s': round(elapsed, 3),
+        'conversion_filas_s': round(3 * filas / elapsed, 1),
+        'parquet_mb': round(parquet_mb, 2),
+        'reduccion_pct': round((1 - parquet_mb / csv_mb) * 100, 2) if csv_mb else None,
+        'auxiliares_mb': round(tamaño_mb("parquet_data/**/*", auxiliares=True), 2)
+    }
+
+
+def etapa_compresion(filas, compression):
+    """Convierte los CSV con ParquetCompressionConverter"""
+    compresor_mod = cargar_modulo(ROOT / "parquet" / "data-parquet-comprimido.py", "compresor")
+    compresor = compresor_mod.ParquetCompressionConverter(output_dir="parquet_compressed", compression=compression)
+
+    start_time = time.time()
+    compresor.convertir_todos_con_compression()
+    elapsed = time.time() - start_time
+
+    return {
+        'compresion_s': round(elapsed, 3),
+        'compresion_filas_s': round(3 * filas / elapsed, 1),
+        'compresion_mb': round(tamaño_mb("parquet_compressed/**/*.parquet"), 2),
+        'compresion_auxiliares_mb': round(tamaño_mb("parquet_compressed/**/*", auxiliares=True), 2)
+    }
+
+
+def etapa_consultas(filas, repeticiones):
+    """Latencia de las consultas de referencia sobre los Parquet convertidos"""
+    analizador_mod = cargar_modulo(ROOT / "duckdb" / "data-duckdb.py", "analizador")
+    analyzer = analizador_mod.DuckDBParquetAnalyzer(parquet_dir="parquet_data", usar_rollups=False, cache_dir=None)
+    analyzer.crear_vistas(analyzer.detectar_datasets())
+
+    latencias = []
+    por_consulta = {}
+    for sql in CONSULTAS:
+        analyzer.conn.execute(sql).fetchall()  # calentamiento
+        tiempos = []
+        for _ in range(repeticiones):
+            start_time = time.perf_counter()
+            analyzer.conn.execute(sql).fetchall()
+            tiempos.append((time.perf_counter() - start_time) * 1000)
+        latencias += tiempos
+        por_consulta[sql] = round(statistics.median(tiempos), 3)
+
+    percentiles = statistics.quantiles(latencias, n=100, method='inclusive')
+    return {
+        'consulta_p50_ms': round(statistics.median(latencias), 3),
+        'consulta_p95_ms': round(percentiles[94], 3),
+        'consulta_p99_ms': round(percentiles[98], 3),
+        'consultas_ms': por_consulta
+    }
+
+
+def ejecutar_en_proceso(cola, directorio, etapa, args):
+    """Ejecuta una etapa en un proceso hijo para medir su RSS pico por separado"""
+    os.chdir(directorio)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado = etapa(*args)
+        # ru_maxrss está en KB en Linux y en bytes en macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        resultado['rss_mb'] = round(rss / (1024**2 if sys.platform == 'darwin' else 1024), 1)
+        cola.put(resultado)
+    except Exception as e:
+        cola.put({'error': f"{type(e).__name__}: {e}"})
+
+
+def medir(nombre, directorio, etapa, *args):
+    """Lanza una etapa en un proceso aislado y devuelve sus métricas"""
+    contexto = multiprocessing.get_context('spawn')
+    cola = contexto.Queue()
+    proceso = contexto.Process(target=ejecutar_en_proceso, args=(cola, str(directorio), etapa, args))
+    proceso.start()
+    resultado = cola.get()
+    proceso.join()
+
+    if 'error' in resultado:
+        raise RuntimeError(f"Etapa {nombre}: {resultado['error']}")
+    resultado[f"{nombre}_rss_mb"] = resultado.pop('rss_mb')
+    return resultado
+
+
+def ejecutar_escala(filas, work_dir, repeticiones, compression):
+    """Genera, convierte y consulta los tres datasets con filas registros cada uno"""
+    directorio = Path(work_dir) / f"escala_{filas}"
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    print(f"\n📏 ESCALA {filas:,} filas por dataset")
+    print("=" * 40)
+
+    resultado = {'filas': filas}
+    for nombre, etapa, args in [
+        ('generacion', etapa_generacion, (filas,)),
+        ('conversion', etapa_conversion, (filas,)),
+        ('compresion', etapa_compresion, (filas, compression)),
+        ('consulta', etapa_consultas, (filas, repeticiones))
+    ]:
+        print(f"⏱️  {nombre}...", end=" ", flush=True)
+        start_time = time.time()
+        resultado.update(medir(nombre, directorio, etapa, *args))
+        print(f"{time.time() - start_time:.1f}s")
+
+    return resultado
+
+
+def comparar_con_baseline(resultados, baseline, umbral):
+    """
+    Compara cada métrica con el baseline de la misma escala.
+    Devuelve la lista de regresiones que superan el umbral relativo.
+    """
+    previos = {r['filas']: r for r in baseline.get('escalas', [])}
+    regresiones = []
+
+    print(f"\n📊 COMPARACIÓN CON BASELINE (umbral {umbral:.0%})")
+    print("=" * 40)
+
+    for actual in resultados['escalas']:
+        previo = previos.get(actual['filas'])
+        if previo is None:
+            print(f"⚠️  Escala {actual['filas']:,}: sin baseline")
+            continue
+
+        for metrica, mayor_mejor in METRICAS.items():
+            if actual.get(metrica) is None or not previo.get(metrica):
+                continue
+            cambio = (actual[metrica] - previo[metrica]) / previo[metrica]
+            empeora = -cambio if mayor_mejor else cambio
+            marca = "❌" if empeora > umbral else ("✅" if empeora < -umbral else "  ")
+            print(f"{marca} {actual['filas']:>10,} {metrica:<22} {previo[metrica]:>12} → {actual[metrica]:>12} ({cambio:+.1%})")
+            if empeora > umbral:
+                regresiones.append({
+                    'filas': actual['filas'],
+                    'metrica': metrica,
+                    'baseline': previo[metrica],
+                    'actual': actual[metrica],
+                    'cambio_pct': round(cambio * 100, 2)
+                })
+
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de regresión generar → convertir → consultar")
+    parser.add_argument("--escalas", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000],
+                        help="Filas por dataset en cada escala")
+    parser.add_argument("--work-dir", default="benchmark_runs", help="Directorio de trabajo (CSV y Parquet generados)")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Ejecuciones por consulta")
+    parser.add_argument("--compression", default="snappy", help="Compresión del conversor comprimido")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto con timestamp)")
+    parser.add_argument("--baseline", default=str(Path(__file__).resolve().parent / "baseline.json"),
+                        help="Baseline con el que comparar")
+    parser.add_argument("--umbral", type=float, default=0.10, help="Empeoramiento relativo tolerado (0.10 = 10%%)")
+    parser.add_argument("--guardar-baseline", action="store_true", help="Guardar los resultados como nuevo baseline")
+    args = parser.parse_args()
+
+    print("🏁 BENCHMARK DEL PIPELINE")
+    print("=" * 40)
+
+    resultados = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'escalas': [ejecutar_escala(filas, args.work_dir, args.repeticiones, args.compression) for filas in args.escalas]
+    }
+
+    salida = args.salida or f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados: {salida}")
+
+    if args.guardar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"📌 Baseline guardado: {args.baseline}")
+        return 0
+
+    if not Path(args.baseline).exists():
+        print(f"⚠️  Sin baseline en {args.baseline} (usa --guardar-baseline)")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regresiones = comparar_con_baseline(resultados, baseline, args.umbral)
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones por encima del {args.umbral:.0%}")
+        return 1
+
+    print(f"\n✅ Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def cargar_modulo(ruta, nombre):
+    """Importa un script del repo (los nombres con guiones no son importables)"""
+    sys.path.insert(0, str(ruta.parent))
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def consultas_por_defecto():
+    return {
+        'ventas_por_categoria': "SELECT categoria, SUM(total) AS total, COUNT(*) AS n FROM ventas GROUP BY categoria",
+        'ventas_un_año': f"SELECT COUNT(*), AVG(total) FROM ventas WHERE año = {datetime.now().year}",
+        'salario_por_departamento': "SELECT departamento, AVG(salario_anual) FROM empleados GROUP BY departamento",
+        'gasto_por_canal': "SELECT canal, SUM(gasto_real) FROM marketing GROUP BY canal"
+    }
+
+
+def medir_fase(analyzer, fase, consultas):
+    """
+    Abre los datasets (listado, metadata y footers) y ejecuta las consultas
+    contando tiempo, peticiones al almacén y MB descargados de cada paso
+    """
+    almacen = analyzer.almacen
+    filas = []
+
+    def paso(nombre, funcion):
+        almacen.stats.update(peticiones=0, bytes=0)
+        start_time = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado = funcion()
+        filas.append({
+            'fase': fase,
+            'consulta': nombre,
+            'ms': round((time.perf_counter() - start_time) * 1000, 1),
+            'peticiones': almacen.stats['peticiones'],
+            'MB': round(almacen.stats['bytes'] / 1024**2, 3)
+        })
+        return resultado
+
+    paso('abrir datasets', lambda: analyzer.crear_vistas(analyzer.detectar_datasets()))
+    for nombre, sql in consultas.items():
+        if paso(nombre, lambda: analyzer.consulta_arrow(sql)) is None:
+            print(f"❌ {nombre}: la consulta falló")
+            filas.pop()
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas al almacén de objetos con la caché de bloques fría y caliente")
+    parser.add_argument("--parquet-dir", required=True,
+                        help="Almacén de objetos (s3://bucket/prefijo o local:///ruta?latencia_ms=20)")
+    parser.add_argument("--block-cache-dir", help="Caché de bloques (por defecto un directorio temporal: no se vacía la del usuario)")
+    parser.add_argument("--block-cache-mb", type=int, default=1024, help="Tamaño máximo de la caché de bloques")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto con timestamp)")
+    args = parser.parse_args()
+
+    analizador_mod = cargar_modulo(ROOT / "duckdb" / "data-duckdb.py", "analizador")
+    if not analizador_mod.es_uri_remota(args.parquet_dir):
+        print("⚠️  --parquet-dir no es un almacén de objetos (s3://... o local:///...)")
+        return 1
+
+    with tempfile.TemporaryDirectory(prefix="block_cache_") as tmp_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer = analizador_mod.DuckDBParquetAnalyzer(
+                parquet_dir=args.parquet_dir, cache_dir=None,
+                block_cache_dir=args.block_cache_dir or tmp_dir, block_cache_mb=args.block_cache_mb
+            )
+
+        print(f"☁️  BENCHMARK DEL ALMACÉN DE OBJETOS ({analyzer.almacen!r})")
+        print("=" * 40)
+
+        consultas = consultas_por_defecto()
+        analyzer.block_cache.limpiar()
+        filas = medir_fase(analyzer, 'fría', consultas) + medir_fase(analyzer, 'caliente', consultas)
+        resumen = analyzer.block_cache.resumen()
+        analyzer.block_cache.cerrar()
+
+    print(pd.DataFrame(filas).to_string(index=False))
+    print(f"\n💾 Caché de bloques: {resumen['bloques']} bloques, {resumen['size_mb']:.2f}MB, "
+          f"hit rate {resumen['hit_rate']:.1%}, {resumen['peticiones']} peticiones agrupadas")
+
+    resultados = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'almacen': repr(analyzer.almacen),
+        'pasos': filas,
+        'block_cache': resumen
+    }
+    salida = args.salida or f"benchmark_remoto_{datetime.now().strftime('%Y%m%d_%H%M')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False, default=str)
+    print(f"\n📄 Resultados: {salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def cargar_modulo(ruta, nombre):
+    """Importa un script del repo (los nombres con guiones no son importables)"""
+    sys.path.insert(0, str(ruta.parent))
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def sql_por_defecto(analyzer, filas):
+    """SELECT de ~filas: ventas replicada hasta alcanzarlas o, sin ventas, un rango sintético"""
+    if 'ventas' in analyzer.datasets:
+        copias = max(1, -(-filas // max(1, analyzer.conteos.get('ventas') or 1)))
+        return f"SELECT * FROM ventas, range({copias}) LIMIT {filas}"
+    return f"SELECT range AS id, 'item_' || (range % 1000) AS nombre, range * 0.5 AS valor FROM range({filas})"
+
+
+def medir_rutas(analyzer, sql, batch_size):
+    """
+    Latencia y memoria del resultado retenido en cada ruta: DataFrame con
+    memory_usage(deep=True), Arrow con los bytes de sus buffers y, en
+    streaming, el lote más grande
+    """
+    filas = []
+
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = analyzer.ejecutar_consulta(sql)
+    filas.append({
+        'ruta': 'fetchdf (pandas)',
+        'primer_lote_ms': None,
+        'total_ms': round((time.perf_counter() - start_time) * 1000, 2),
+        'memoria_mb': round(df.memory_usage(deep=True).sum() / 1024**2, 2),
+        'filas': len(df)
+    })
+    del df
+
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        tabla = analyzer.consulta_arrow(sql)
+    filas.append({
+        'ruta': 'arrow (Table)',
+        'primer_lote_ms': None,
+        'total_ms': round((time.perf_counter() - start_time) * 1000, 2),
+        'memoria_mb': round(tabla.nbytes / 1024**2, 2),
+        'filas': tabla.num_rows
+    })
+    del tabla
+
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        reader = analyzer.consulta_stream(sql, batch_size=batch_size)
+    primer_lote = None
+    max_lote = total = 0
+    for lote in reader:
+        if primer_lote is None:
+            primer_lote = time.perf_counter() - start_time
+        max_lote = max(max_lote, lote.nbytes)
+        total += lote.num_rows
+    filas.append({
+        'ruta': f'stream ({batch_size:,}/lote)',
+        'primer_lote_ms': round((primer_lote or 0) * 1000, 2),
+        'total_ms': round((time.perf_counter() - start_time) * 1000, 2),
+        'memoria_mb': round(max_lote / 1024**2, 2),
+        'filas': total
+    })
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia y memoria de un SELECT grande como DataFrame, pyarrow.Table o stream")
+    parser.add_argument("--parquet-dir", default="parquet_data", help="Directorio con los datasets Parquet")
+    parser.add_argument("--filas", type=int, default=1_000_000, help="Filas del SELECT")
+    parser.add_argument("--batch-size", type=int, default=100_000, help="Filas por lote en streaming")
+    parser.add_argument("--sql", help="Consulta a medir (por defecto ventas replicada hasta --filas)")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto con timestamp)")
+    args = parser.parse_args()
+
+    print(f"🏹 BENCHMARK DE RESULTADOS ({args.filas:,} filas)")
+    print("=" * 40)
+
+    analizador_mod = cargar_modulo(ROOT / "duckdb" / "data-duckdb.py", "analizador")
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = analizador_mod.DuckDBParquetAnalyzer(
+            parquet_dir=args.parquet_dir, cache_dir=None, block_cache_dir=None
+        )
+        analyzer.crear_vistas(analyzer.detectar_datasets())
+
+    sql = args.sql or sql_por_defecto(analyzer, args.filas)
+    filas = medir_rutas(analyzer, sql, args.batch_size)
+    print(pd.DataFrame(filas).to_string(index=False))
+
+    resultados = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'sql': sql,
+        'rutas': filas
+    }
+    salida = args.salida or f"benchmark_resultados_{datetime.now().strftime('%Y%m%d_%H%M')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados: {salida}")
+
+
+if __name__ == "__main__":
+    main()
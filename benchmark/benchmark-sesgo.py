@@ -0,0 +1,200 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Escenarios comparados: preset de distribuciones del generador (distribuciones.py)
+ESCENARIOS = {
+    'uniforme': 'uniformes',
+    'sesgado': 'sesgadas'
+}
+
+# GROUP BY sobre la clave sesgada de cada dimensión
+CONSULTAS = {
+    'por_categoria': "SELECT categoria, COUNT(*) AS n, SUM(total) AS revenue FROM ventas GROUP BY categoria",
+    'por_cliente': "SELECT cliente_id, COUNT(*) AS n, SUM(total) AS revenue FROM ventas GROUP BY cliente_id",
+    'por_mes': "SELECT strftime(fecha, '%Y-%m') AS mes, COUNT(*) AS n, SUM(total) AS revenue FROM ventas GROUP BY 1",
+    'top_productos': "SELECT producto, SUM(total) AS revenue FROM ventas GROUP BY producto ORDER BY revenue DESC LIMIT 10",
+    'cliente_categoria': "SELECT cliente_id, categoria, SUM(cantidad) AS unidades FROM ventas GROUP BY 1, 2"
+}
+
+
+def cargar_modulo(ruta, nombre):
+    """Importa un script del repo (los nombres con guiones no son importables)"""
+    sys.path.insert(0, str(ruta.parent))
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def medir(funcion, repeticiones):
+    """Mediana en ms de repeticiones ejecuciones, tras una de calentamiento"""
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        start_time = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - start_time) * 1000)
+    return round(statistics.median(tiempos), 3)
+
+
+def sesgo(valores):
+    """Máximo / media de una lista de tamaños (1 = reparto perfecto)"""
+    return round(max(valores) / statistics.mean(valores), 2) if valores else None
+
+
+def filas_por_archivo(directorio):
+    """Filas de cada archivo Parquet del directorio (desde los footers)"""
+    return {str(p): pq.ParquetFile(p).metadata.num_rows for p in sorted(Path(directorio).rglob("*.parquet"))}
+
+
+def etapa_generacion(filas, preset):
+    """Genera el CSV de ventas con las distribuciones del preset (vectorizado)"""
+    generador_mod = cargar_modulo(ROOT / "data-synthetic-producer" / "data-synthetic-producer.py", "generador")
+    from distribuciones import cargar_distribuciones
+
+    generador = generador_mod.DatasetGeneratorFaker(distribuciones=cargar_distribuciones(preset))
+    start_time = time.time()
+    generador.guardar_csv(generador.generar_dataset_ventas(filas), "ventas_ecommerce_sesgo")
+    elapsed = time.time() - start_time
+    return {'generacion_s': round(elapsed, 3), 'generacion_filas_s': round(filas / elapsed, 1)}
+
+
+def etapa_conversion(con_buckets):
+    """
+    Convierte con el layout particionado (año=/categoria=) o además con
+    buckets por cliente_id, y mide el reparto de filas entre archivos
+    """
+    conversor_mod = cargar_modulo(ROOT / "parquet" / "data-parquet.py", "conversor")
+    from buckets import BUCKETS_POR_DEFECTO
+
+    salida = "parquet_buckets" if con_buckets else "parquet_data"
+    conversor = conversor_mod.RobustCSVToParquetConverter(
+        output_dir=salida, buckets=BUCKETS_POR_DEFECTO if con_buckets else None
+    )
+    start_time = time.time()
+    conversor.convertir_todos_robustamente()
+    elapsed = time.time() - start_time
+
+    archivos = filas_por_archivo(Path(salida) / "ventas")
+    nombre = 'buckets' if con_buckets else 'particiones'
+    metricas = {
+        f"conversion_{nombre}_s": round(elapsed, 3),
+        f"archivos_{nombre}": len(archivos),
+        f"sesgo_archivos_{nombre}": sesgo(list(archivos.values()))
+    }
+    if con_buckets:
+        # Filas por bucket sumando todas las particiones: el cliente caliente cae en uno
+        por_bucket = {}
+        for archivo, filas in archivos.items():
+            por_bucket[Path(archivo).name] = por_bucket.get(Path(archivo).name, 0) + filas
+        metricas['sesgo_buckets'] = sesgo(list(por_bucket.values()))
+    else:
+        por_particion = {}
+        for archivo, filas in archivos.items():
+            por_particion[Path(archivo).parent.name] = por_particion.get(Path(archivo).parent.name, 0) + filas
+        metricas['sesgo_categorias'] = sesgo(list(por_particion.values()))
+    return metricas
+
+
+def etapa_consultas(repeticiones):
+    """
+    GROUP BY de referencia y scan de cada partición por separado: la
+    partición más lenta frente a la mediana es el straggler que limita un
+    scatter-gather por particiones
+    """
+    analizador_mod = cargar_modulo(ROOT / "duckdb" / "data-duckdb.py", "analizador")
+    analyzer = analizador_mod.DuckDBParquetAnalyzer(parquet_dir="parquet_data", usar_rollups=False, cache_dir=None)
+    analyzer.crear_vistas(analyzer.detectar_datasets())
+
+    metricas = {f"{nombre}_ms": medir(lambda: analyzer.conn.execute(sql).fetchall(), repeticiones)
+                for nombre, sql in CONSULTAS.items()}
+
+    info = analyzer.datasets['ventas']
+    tiempos = []
+    for archivos in analyzer.particiones_dataset('ventas').values():
+        lista = ', '.join("'" + a.replace("'", "''") + "'" for a in archivos)
+        sql = f"SELECT cliente_id, SUM(total) FROM read_parquet([{lista}], {info['opciones_lectura']}) GROUP BY 1"
+        tiempos.append(medir(lambda: analyzer.conn.execute(sql).fetchall(), repeticiones))
+    metricas['particion_mediana_ms'] = round(statistics.median(tiempos), 3)
+    metricas['particion_max_ms'] = max(tiempos)
+    analyzer.conn.close()
+    return metricas
+
+
+def ejecutar_escenario(escenario, preset, filas, work_dir, repeticiones):
+    """Genera, convierte y consulta un escenario en su propio directorio"""
+    directorio = Path(work_dir) / f"{escenario}_{filas}"
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    print(f"\n🎲 ESCENARIO {escenario} ({preset}, {filas:,} filas)")
+    print("=" * 40)
+
+    anterior = os.getcwd()
+    os.chdir(directorio)
+    resultado = {'escenario': escenario, 'filas': filas}
+    try:
+        for nombre, etapa, args in [
+            ('generacion', etapa_generacion, (filas, preset)),
+            ('conversion', etapa_conversion, (False,)),
+            ('conversion buckets', etapa_conversion, (True,)),
+            ('consultas', etapa_consultas, (repeticiones,))
+        ]:
+            print(f"⏱️  {nombre}...", end=" ", flush=True)
+            start_time = time.time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                resultado.update(etapa(*args))
+            print(f"{time.time() - start_time:.1f}s")
+    finally:
+        os.chdir(anterior)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escrituras particionadas y GROUP BY con datos sesgados")
+    parser.add_argument("--filas", type=int, default=500_000, help="Ventas por escenario")
+    parser.add_argument("--work-dir", default="benchmark_sesgo", help="Directorio de trabajo (CSV y Parquet generados)")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Ejecuciones por consulta")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto con timestamp)")
+    args = parser.parse_args()
+
+    print("🏁 BENCHMARK DE SESGO (UNIFORME VS ZIPF/ESTACIONAL)")
+    print("=" * 40)
+
+    resultados = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'escenarios': [
+            ejecutar_escenario(escenario, preset, args.filas, args.work_dir, args.repeticiones)
+            for escenario, preset in ESCENARIOS.items()
+        ]
+    }
+
+    tabla = pd.DataFrame(resultados['escenarios']).set_index('escenario').T
+    print(f"\n📊 RESUMEN")
+    print("=" * 40)
+    print(tabla.to_string())
+
+    salida = args.salida or f"benchmark_sesgo_{datetime.now().strftime('%Y%m%d_%H%M')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados: {salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import resource
+import shutil
+import socket
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Fuentes comparadas: (formato de los eventos, transporte)
+ESCENARIOS = {
+    'ndjson_directorio': ('ndjson', 'directorio'),
+    'csv_directorio': ('csv', 'directorio'),
+    'ndjson_socket': ('ndjson', 'socket')
+}
+
+# Eventos que el productor escribe o envía de una vez
+EVENTOS_POR_ESCRITURA = 5_000
+
+
+def cargar_modulo(ruta, nombre):
+    """Importa un script del repo (los nombres con guiones no son importables)"""
+    sys.path.insert(0, str(ruta.parent))
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def rss_mb():
+    """RSS actual del proceso (VmRSS en Linux; pico de ru_maxrss en otros sistemas)"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for linea in f:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024**2 if sys.platform == 'darwin' else 1024)
+
+
+class MuestreadorRSS:
+    """Muestrea el RSS en un hilo y guarda el pico (memoria acotada de la ingesta)"""
+
+    def __init__(self, intervalo_s=0.05):
+        self.intervalo_s = intervalo_s
+        self.base = rss_mb()
+        self.pico = self.base
+        self.detener_evento = threading.Event()
+        self.hilo = threading.Thread(target=self.ciclo, daemon=True)
+
+    def ciclo(self):
+        while not self.detener_evento.wait(self.intervalo_s):
+            self.pico = max(self.pico, rss_mb())
+
+    def __enter__(self):
+        self.hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.detener_evento.set()
+        self.hilo.join()
+
+
+def preparar(filas_semilla, eventos):
+    """
+    Genera y convierte un dataset de ventas semilla (esquema, metadata y
+    rollups) y serializa los eventos a ingerir como líneas NDJSON y CSV
+    """
+    generador_mod = cargar_modulo(ROOT / "data-synthetic-producer" / "data-synthetic-producer.py", "generador")
+    conversor_mod = cargar_modulo(ROOT / "parquet" / "data-parquet.py", "conversor")
+
+    generador = generador_mod.DatasetGeneratorFaker(distribuciones={'ventas': {}})
+    if not Path("parquet_semilla").exists():
+        with contextlib.redirect_stdout(io.StringIO()):
+            generador.guardar_csv(generador.generar_dataset_ventas(filas_semilla), "ventas_ecommerce_semilla")
+            conversor_mod.RobustCSVToParquetConverter(output_dir="parquet_semilla").convertir_todos_robustamente()
+
+    start_time = time.time()
+    df = generador.generar_dataset_ventas(eventos)
+    df['orden_id'] = [f"ORD-{i:05d}" for i in range(filas_semilla + 1, filas_semilla + len(df) + 1)]
+    lineas = {
+        'ndjson': df.to_json(orient='records', lines=True, force_ascii=False, date_format='iso').splitlines(keepends=True),
+        'csv': df.to_csv(index=False).splitlines(keepends=True)
+    }
+    return lineas, round(time.time() - start_time, 3)
+
+
+def producir(lineas, formato, transporte, destino, eventos_por_segundo=None):
+    """Escribe (append) o envía los eventos por bloques; con eventos_por_segundo limita el ritmo"""
+    cabecera, cuerpo = (lineas[formato][0], lineas[formato][1:]) if formato == 'csv' else ('', lineas[formato])
+    start_time = time.time()
+
+    if transporte == 'socket':
+        host, puerto = destino.rsplit(':', 1)
+        conexion = socket.create_connection((host, int(puerto)))
+        escribir = lambda datos: conexion.sendall(datos.encode('utf-8'))
+    else:
+        archivo = open(destino, 'w', encoding='utf-8')
+
+        def escribir(datos):
+            archivo.write(datos)
+            archivo.flush()
+
+    try:
+        if cabecera:
+            escribir(cabecera)
+        for i in range(0, len(cuerpo), EVENTOS_POR_ESCRITURA):
+            escribir(''.join(cuerpo[i:i + EVENTOS_POR_ESCRITURA]))
+            if eventos_por_segundo:
+                retraso = start_time + (i + EVENTOS_POR_ESCRITURA) / eventos_por_segundo - time.time()
+                if retraso > 0:
+                    time.sleep(retraso)
+    finally:
+        if transporte == 'socket':
+            conexion.close()
+        else:
+            archivo.close()
+
+
+def ejecutar_escenario(escenario, lineas, args, puerto):
+    """
+    Ingiere los eventos desde una fuente sobre una copia del dataset semilla
+    mientras un analizador consulta el conteo, y mide eventos/s, latencia de
+    visibilidad (fin del productor -> conteo completo en el analizador) y RSS
+    """
+    formato, transporte = ESCENARIOS[escenario]
+    sys.path.insert(0, str(ROOT / "parquet"))
+    from streaming import MicroBatchIngestor
+    analizador_mod = cargar_modulo(ROOT / "duckdb" / "data-duckdb.py", "analizador")
+
+    salida = Path(f"parquet_{escenario}")
+    entrada = Path(f"entrada_{escenario}")
+    for directorio in (salida, entrada):
+        shutil.rmtree(directorio, ignore_errors=True)
+    shutil.copytree("parquet_semilla", salida)
+    entrada.mkdir()
+
+    analyzer = analizador_mod.DuckDBParquetAnalyzer(parquet_dir=str(salida), cache_dir=None)
+    analyzer.crear_vistas(analyzer.detectar_datasets())
+    base = analyzer.conn.execute("SELECT COUNT(*) FROM ventas").fetchone()[0]
+    esperado = base + len(lineas['ndjson'])
+
+    ingestor = MicroBatchIngestor(
+        salida / "ventas", max_filas=args.max_filas, max_mb=args.max_mb,
+        max_segundos=args.max_segundos, max_cola=args.max_cola
+    )
+    destino = f"127.0.0.1:{puerto}" if transporte == 'socket' else entrada / f"eventos.{formato}"
+    if transporte == 'socket':
+        ingestor.escuchar_socket(destino)
+    else:
+        ingestor.seguir_directorio(entrada, intervalo_s=0.05)
+
+    with MuestreadorRSS() as muestreador:
+        ingestor.iniciar()
+        start_time = time.time()
+        producir(lineas, formato, transporte, destino, args.eventos_por_segundo)
+        fin_productor = time.time()
+
+        visibles, visible_at = base, None
+        while time.time() - fin_productor < args.timeout:
+            analyzer.sincronizar_archivos('ventas', forzar=True)
+            visibles = analyzer.conn.execute("SELECT COUNT(*) FROM ventas").fetchone()[0]
+            if visibles >= esperado:
+                visible_at = time.time()
+                break
+            time.sleep(0.05)
+        ingestor.detener()
+
+    # El rollup más los parciales de los archivos nuevos debe cuadrar con el conteo
+    por_categoria = analyzer.consulta_agregada('ventas', {'categoria': 'categoria'}, [('n', 'count', '*')])
+    analyzer.conn.close()
+
+    resumen = ingestor.resumen()
+    return {
+        'escenario': escenario,
+        'eventos': len(lineas['ndjson']),
+        'productor_s': round(fin_productor - start_time, 3),
+        'eventos_s': resumen.get('eventos_s'),
+        'capacidad_eventos_s': resumen.get('capacidad_eventos_s'),
+        'visibilidad_s': round(visible_at - fin_productor, 3) if visible_at else None,
+        'max_latencia_lote_s': resumen['max_latencia_s'],
+        'lotes': resumen['lotes'],
+        'archivos': resumen['archivos'],
+        'rechazados': resumen['rechazados'],
+        'max_buffer_mb': resumen['max_buffer_mb'],
+        'rss_pico_mb': round(muestreador.pico - muestreador.base, 1),
+        'conteo_ok': visibles == esperado and int(por_categoria['n'].sum()) == esperado
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la ingesta en micro-lotes (eventos/s, latencia y memoria)")
+    parser.add_argument("--eventos", type=int, default=500_000, help="Eventos a ingerir por escenario")
+    parser.add_argument("--filas-semilla", type=int, default=10_000, help="Ventas del dataset convertido de partida")
+    parser.add_argument("--eventos-por-segundo", type=int, help="Ritmo del productor (por defecto lo más rápido posible)")
+    parser.add_argument("--max-filas", type=int, default=200_000, help="Filas por lote")
+    parser.add_argument("--max-mb", type=float, default=64, help="MB acumulados por lote")
+    parser.add_argument("--max-segundos", type=float, default=2.0, help="Latencia máxima de un lote")
+    parser.add_argument("--max-cola", type=int, default=32, help="Bloques pendientes antes de frenar a las fuentes")
+    parser.add_argument("--timeout", type=float, default=120, help="Espera máxima hasta ver todos los eventos")
+    parser.add_argument("--work-dir", default="benchmark_streaming", help="Directorio de trabajo")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto con timestamp)")
+    args = parser.parse_args()
+
+    print("🏁 BENCHMARK DE INGESTA EN MICRO-LOTES")
+    print("=" * 40)
+
+    directorio = Path(args.work_dir)
+    directorio.mkdir(parents=True, exist_ok=True)
+    anterior = os.getcwd()
+    os.chdir(directorio)
+    try:
+        print(f"🎲 Generando {args.eventos:,} eventos...", end=" ", flush=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            lineas, generacion_s = preparar(args.filas_semilla, args.eventos)
+        print(f"{generacion_s:.1f}s")
+
+        escenarios = []
+        for i, escenario in enumerate(ESCENARIOS):
+            print(f"⏱️  {escenario}...", end=" ", flush=True)
+            start_time = time.time()
+            with contextlib.redirect_stdout(io.StringIO()):
+                escenarios.append(ejecutar_escenario(escenario, lineas, args, 9600 + i))
+            print(f"{time.time() - start_time:.1f}s")
+    finally:
+        os.chdir(anterior)
+
+    resultados = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'configuracion': {k: v for k, v in vars(args).items() if k not in ('work_dir', 'salida')},
+        'escenarios': escenarios
+    }
+
+    print(f"\n📊 RESUMEN")
+    print("=" * 40)
+    print(pd.DataFrame(escenarios).set_index('escenario').T.to_string())
+
+    salida = args.salida or f"benchmark_streaming_{datetime.now().strftime('%Y%m%d_%H%M')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados: {salida}")
+
+    if not all(e['conteo_ok'] for e in escenarios):
+        print(f"\n❌ Algún escenario no ve todos los eventos en el analizador")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def cargar_modulo(ruta, nombre):
+    """Importa un script del repo (los nombres con guiones no son importables)"""
+    sys.path.insert(0, str(ruta.parent))
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def niveles_threads(max_threads):
+    """1, las potencias de 2 intermedias y max_threads"""
+    return sorted({1, max_threads} | {2**i for i in range(1, max_threads.bit_length()) if 2**i < max_threads})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escalado de los análisis predefinidos de 1 a N threads")
+    parser.add_argument("--parquet-dir", default="parquet_data", help="Directorio con los datasets Parquet")
+    parser.add_argument("--max-threads", type=int, help="Máximo de threads (por defecto el del perfil de recursos)")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Ejecuciones por nivel (se toma la mediana)")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto con timestamp)")
+    args = parser.parse_args()
+
+    # Sin rollups ni caché de resultados: cada ejecución lee los Parquet
+    analizador_mod = cargar_modulo(ROOT / "duckdb" / "data-duckdb.py", "analizador")
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = analizador_mod.DuckDBParquetAnalyzer(
+            parquet_dir=args.parquet_dir, usar_rollups=False, cache_dir=None, block_cache_dir=None
+        )
+        analyzer.crear_vistas(analyzer.detectar_datasets())
+
+    perfil = dict(analyzer.perfil)
+    max_threads = args.max_threads or perfil['threads']
+    print(f"🧵 BENCHMARK DE THREADS (1 → {max_threads})")
+    print("=" * 40)
+
+    secciones = analyzer.secciones_analisis()
+    filas = []
+    for threads in niveles_threads(max_threads):
+        analyzer.aplicar_perfil({**perfil, 'threads': threads})
+        tiempos = []
+        for _ in range(args.repeticiones):
+            start_time = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for titulo, consultas in secciones:
+                    analyzer.ejecutar_seccion(titulo, consultas)
+            tiempos.append(time.perf_counter() - start_time)
+        filas.append({'threads': threads, 'tiempo_s': round(statistics.median(tiempos), 3)})
+        print(f"   {threads:>3} threads {filas[-1]['tiempo_s']:>10.3f}s")
+
+    tabla = pd.DataFrame(filas)
+    tabla['speedup'] = (tabla['tiempo_s'].iloc[0] / tabla['tiempo_s']).round(2)
+    print(f"\n📊 RESUMEN (mediana en s)")
+    print("=" * 40)
+    print(tabla.to_string(index=False))
+
+    resultados = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'parquet_dir': args.parquet_dir,
+        'perfil': perfil,
+        'niveles': tabla.to_dict(orient='records')
+    }
+    salida = args.salida or f"benchmark_threads_{datetime.now().strftime('%Y%m%d_%H%M')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False, default=str)
+    print(f"\n📄 Resultados: {salida}")
+
+
+if __name__ == "__main__":
+    main()
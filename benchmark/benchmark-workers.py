@@ -0,0 +1,134 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Consultas agregadas de referencia: (tabla, dimensiones, medidas)
+CONSULTAS = [
+    ('ventas', {'categoria': 'categoria'}, [('revenue', 'sum', 'total'), ('ticket', 'avg', 'total'),
+                                            ('ordenes', 'count', '*'), ('maximo', 'max', 'total')]),
+    ('ventas', {'mes': "strftime(fecha, '%Y-%m')"}, [('revenue', 'sum', 'total'), ('clientes', 'count_distinct', 'cliente_id')]),
+    ('empleados', {'departamento': 'departamento'}, [('salario', 'avg', 'salario_anual'), ('empleados', 'count', '*')]),
+    ('marketing', {'canal': 'canal'}, [('gasto', 'sum', 'gasto_real'), ('roas', 'avg', 'roas')])
+]
+
+
+def cargar_modulo(ruta, nombre):
+    """Importa un script del repo (los nombres con guiones no son importables)"""
+    sys.path.insert(0, str(ruta.parent))
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def medir(funcion, repeticiones):
+    """Mediana en ms de repeticiones ejecuciones, tras una de calentamiento"""
+    resultado = funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        start_time = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - start_time) * 1000)
+    return resultado, round(statistics.median(tiempos), 3)
+
+
+def coincide(obtenido, esperado, medidas):
+    """Mismos grupos y mismos valores de cada medida (COUNT(DISTINCT) incluido, es exacto)"""
+    return len(obtenido) == len(esperado) and all(
+        np.allclose(obtenido[alias].astype(float), esperado[alias].astype(float), rtol=1e-9)
+        for alias, _, _ in medidas
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del scatter-gather por particiones (1 a N procesos worker)")
+    parser.add_argument("--parquet-dir", default="parquet_data", help="Directorio con los datasets Parquet")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Máximo de procesos worker")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Ejecuciones por configuración")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto con timestamp)")
+    args = parser.parse_args()
+
+    print(f"🔀 BENCHMARK SCATTER-GATHER (1 → {args.workers} workers)")
+    print("=" * 40)
+
+    analizador_mod = cargar_modulo(ROOT / "duckdb" / "data-duckdb.py", "analizador")
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = analizador_mod.DuckDBParquetAnalyzer(
+            parquet_dir=args.parquet_dir, usar_rollups=False, cache_dir=None, block_cache_dir=None
+        )
+        analyzer.crear_vistas(analyzer.detectar_datasets())
+
+    filas = []
+    for tabla, dimensiones, medidas in CONSULTAS:
+        if tabla not in analyzer.datasets:
+            continue
+        orden = ', '.join(dimensiones)
+        with contextlib.redirect_stdout(io.StringIO()):
+            esperado, base = medir(lambda: analyzer.consulta_agregada(tabla, dimensiones, medidas, order_by=orden),
+                                   args.repeticiones)
+
+        for workers in range(1, args.workers + 1):
+            analyzer.executor_distribuido(workers).calentar()
+            with contextlib.redirect_stdout(io.StringIO()):
+                obtenido, ms = medir(
+                    lambda: analyzer.consulta_distribuida(tabla, dimensiones, medidas, order_by=orden, workers=workers),
+                    args.repeticiones
+                )
+            fila = {
+                'tabla': tabla,
+                'grupos': orden,
+                'workers': workers,
+                'conexion_unica_ms': base,
+                'scatter_gather_ms': ms,
+                'coincide': coincide(obtenido, esperado, medidas)
+            }
+            filas.append(fila)
+            print(f"   {'✅' if fila['coincide'] else '❌'} {tabla:<10} {orden:<13} {workers:>2} workers "
+                  f"{ms:>10.2f}ms  (conexión única {base:.2f}ms)")
+
+    for executor in analyzer.executors.values():
+        executor.cerrar()
+    analyzer.executors.clear()
+
+    tabla = pd.DataFrame(filas)
+    if not tabla.empty:
+        uno = tabla[tabla['workers'] == 1].set_index(['tabla', 'grupos'])['scatter_gather_ms']
+        tabla['speedup'] = [round(uno[(f.tabla, f.grupos)] / f.scatter_gather_ms, 2) for f in tabla.itertuples()]
+        print(f"\n📊 RESUMEN (mediana en ms)")
+        print("=" * 40)
+        print(tabla.to_string(index=False))
+
+    resultados = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'parquet_dir': args.parquet_dir,
+        'consultas': tabla.to_dict(orient='records')
+    }
+    salida = args.salida or f"benchmark_workers_{datetime.now().strftime('%Y%m%d_%H%M')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados: {salida}")
+
+    errores = [f for f in filas if not f['coincide']]
+    if errores:
+        print(f"\n❌ {len(errores)} resultados distintos de la conexión única")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def cargar_modulo(ruta, nombre):
+    """Importa un script del repo (los nombres con guiones no son importables)"""
+    sys.path.insert(0, str(ruta.parent))
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def filtros_por_defecto():
+    """(tabla, condiciones) sobre las expresiones derivadas de cada dataset"""
+    return [
+        ('ventas', [('mes', '=', datetime.now().strftime('%Y-%m'))]),
+        ('empleados', [('performance_nivel', '=', 'Excelente (4.5+)'), ('banda_salario', '>=', 6)]),
+        ('marketing', [('banda_gasto', '>=', 5)])
+    ]
+
+
+def medir(funcion, repeticiones):
+    """Mediana en ms de repeticiones ejecuciones, tras una de calentamiento"""
+    resultado = funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        start_time = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - start_time) * 1000)
+    return resultado, round(statistics.median(tiempos), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="COUNT(*) filtrado por expresiones derivadas: scan completo frente a poda por zone maps")
+    parser.add_argument("--parquet-dir", default="parquet_data", help="Directorio con los datasets Parquet")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Ejecuciones por consulta")
+    parser.add_argument("--salida", help="Archivo JSON de resultados (por defecto con timestamp)")
+    args = parser.parse_args()
+
+    print("🗺️  BENCHMARK DE ZONE MAPS")
+    print("=" * 40)
+
+    # Sin rollups: el COUNT(*) filtrado tiene que leer los Parquet en ambos casos
+    analizador_mod = cargar_modulo(ROOT / "duckdb" / "data-duckdb.py", "analizador")
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = analizador_mod.DuckDBParquetAnalyzer(
+            parquet_dir=args.parquet_dir, usar_rollups=False, cache_dir=None, block_cache_dir=None
+        )
+        analyzer.crear_vistas(analyzer.detectar_datasets())
+
+    filas = []
+    for tabla, condiciones in filtros_por_defecto():
+        expresiones = (analyzer.zonas.get(tabla) or {}).get('expresiones')
+        if not expresiones:
+            continue
+        filtro = ' AND '.join(f"{alias} {op} {valor!r}" for alias, op, valor in condiciones)
+        where = ' AND '.join(analyzer.condicion_sql(expresiones[alias], op, valor) for alias, op, valor in condiciones)
+        try:
+            conteo, completo = medir(
+                lambda: analyzer.conn.execute(f"SELECT COUNT(*) FROM {tabla} WHERE {where}").fetchone()[0],
+                args.repeticiones
+            )
+            with contextlib.redirect_stdout(io.StringIO()):
+                podado, zonas = medir(
+                    lambda: analyzer.consulta_agregada(tabla, {}, [('filas', 'count', '*')], filtros=condiciones),
+                    args.repeticiones
+                )
+        except Exception as e:
+            print(f"❌ {tabla} {filtro}: {e}")
+            continue
+
+        fila = {
+            'tabla': tabla,
+            'filtro': filtro,
+            'filas': int(conteo),
+            'coincide': int(podado['filas'].iloc[0]) == conteo,
+            'completo_ms': completo,
+            'zonas_ms': zonas,
+            'speedup': round(completo / zonas, 2) if zonas else None
+        }
+        filas.append(fila)
+        print(f"   {'✅' if fila['coincide'] else '❌'} {tabla:<10} {filtro:<50} "
+              f"{completo:>9.2f}ms → {zonas:>9.2f}ms  {conteo:,} filas")
+
+    if filas:
+        print(f"\n📊 RESUMEN (mediana en ms)")
+        print("=" * 40)
+        print(pd.DataFrame(filas).to_string(index=False))
+    else:
+        print("⚠️  Ningún dataset tiene zone maps de expresiones derivadas")
+
+    resultados = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'cpus': os.cpu_count(),
+        'parquet_dir': args.parquet_dir,
+        'consultas': filas
+    }
+    salida = args.salida or f"benchmark_zonas_{datetime.now().strftime('%Y%m%d_%H%M')}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados: {salida}")
+
+    errores = [f for f in filas if not f['coincide']]
+    if errores:
+        print(f"\n❌ {len(errores)} conteos distintos entre el scan completo y la vista podada")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
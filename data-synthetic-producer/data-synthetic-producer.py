@@ -1,49 +1,81 @@
 import pandas as pd
+import numpy as np
 import random
 from faker import Faker
 from datetime import datetime, timedelta
+import argparse
 import os
 
+from distribuciones import (cargar_distribuciones, elegir, enteros, fechas, indices, numeros,
+                            validar_distribuciones, PRESETS)
+
+# Categorías de producto con su rango de precios (ventas y dimensión productos)
+CATEGORIAS = {
+    'Electrónicos': {
+        'productos': ['Smartphone', 'Laptop', 'Tablet', 'Auriculares', 'Smart TV', 'Cámara Digital'],
+        'precio_range': (50, 2000)
+    },
+    'Ropa': {
+        'productos': ['Camiseta', 'Jeans', 'Vestido', 'Zapatos', 'Chaqueta', 'Falda'],
+        'precio_range': (15, 300)
+    },
+    'Hogar': {
+        'productos': ['Sofá', 'Mesa', 'Lámpara', 'Cojines', 'Cortinas', 'Espejo'],
+        'precio_range': (20, 800)
+    },
+    'Deportes': {
+        'productos': ['Zapatillas Running', 'Pelota Fútbol', 'Raqueta Tenis', 'Bicicleta', 'Pesas'],
+        'precio_range': (25, 600)
+    },
+    'Libros': {
+        'productos': ['Novela', 'Manual Técnico', 'Biografía', 'Comic', 'Libro Cocina'],
+        'precio_range': (10, 80)
+    }
+}
+
+METODOS_PAGO = ['Tarjeta Crédito', 'Tarjeta Débito', 'PayPal', 'Transferencia', 'Efectivo']
+CANALES_VENTA = ['Web', 'Móvil', 'Tienda Física']
+
+# Filas de cada tabla del modelo estrella a escala 1 (se multiplican por el factor de escala)
+TAMAÑOS_ESTRELLA = {
+    'clientes': 10_000,
+    'productos': 500,
+    'tiendas': 50,
+    'campañas': 300,
+    'empleados': 200,
+    'ventas': 100_000
+}
+
+# Fracción de ventas atribuidas a una campaña
+FRACCION_VENTAS_CAMPAÑA = 0.3
+
 class DatasetGeneratorFaker:
-    def __init__(self, locale='es_ES'):
+    def __init__(self, locale='es_ES', distribuciones=None):
         """
         Inicializa el generador con Faker
         locale: 'es_ES' para español, 'en_US' para inglés
+        distribuciones: Dict dataset -> {campo: spec} (ver distribuciones.py). Las
+            ventas con spec se generan vectorizadas y los campos sin spec son uniformes;
+            solo se admiten los campos de ventas (ValueError con otros datasets)
         """
         self.fake = Faker(locale)
         Faker.seed(42)  # Para reproducibilidad
         random.seed(42)
+        self.rng = np.random.default_rng(42)
+        self.distribuciones = validar_distribuciones(distribuciones or {})
         print(f"✅ Generador Faker inicializado con locale: {locale}")
 
     def generar_dataset_ventas(self, registros=500):
         """Dataset 1: Ventas de e-commerce"""
         print(f"🛍️  Generando dataset de ventas ({registros} registros)...")
         
-        categorias = {
-            'Electrónicos': {
-                'productos': ['Smartphone', 'Laptop', 'Tablet', 'Auriculares', 'Smart TV', 'Cámara Digital'],
-                'precio_range': (50, 2000)
-            },
-            'Ropa': {
-                'productos': ['Camiseta', 'Jeans', 'Vestido', 'Zapatos', 'Chaqueta', 'Falda'],
-                'precio_range': (15, 300)
-            },
-            'Hogar': {
-                'productos': ['Sofá', 'Mesa', 'Lámpara', 'Cojines', 'Cortinas', 'Espejo'],
-                'precio_range': (20, 800)
-            },
-            'Deportes': {
-                'productos': ['Zapatillas Running', 'Pelota Fútbol', 'Raqueta Tenis', 'Bicicleta', 'Pesas'],
-                'precio_range': (25, 600)
-            },
-            'Libros': {
-                'productos': ['Novela', 'Manual Técnico', 'Biografía', 'Comic', 'Libro Cocina'],
-                'precio_range': (10, 80)
-            }
-        }
+        if 'ventas' in self.distribuciones:
+            return self.generar_ventas_vectorizado(registros, self.distribuciones['ventas'])
+        
+        categorias = CATEGORIAS
         
-        metodos_pago = ['Tarjeta Crédito', 'Tarjeta Débito', 'PayPal', 'Transferencia', 'Efectivo']
-        canales = ['Web', 'Móvil', 'Tienda Física']
+        metodos_pago = METODOS_PAGO
+        canales = CANALES_VENTA
         
         datos = []
         
@@ -78,6 +110,60 @@ class DatasetGeneratorFaker:
         
         return datos
 
+    def pool_faker(self, generador, tamaño):
+        """Valores de Faker pre-generados para elegirlos vectorizados (ciudades, países...)"""
+        return [generador() for _ in range(max(1, tamaño))]
+
+    def generar_ventas_vectorizado(self, registros, specs):
+        """
+        Ventas con numpy: cada campo se muestrea en bloque con la distribución
+        de specs (Zipf, lognormal, curva estacional...) o uniforme si no tiene.
+        Mismas columnas que generar_dataset_ventas; ciudades y países se eligen
+        de un pool de valores de Faker
+        
+        Returns:
+            DataFrame
+        """
+        rng = self.rng
+        nombres = list(CATEGORIAS.keys())
+        hoy = datetime.now().date()
+        
+        categoria_idx = indices(rng, nombres, registros, specs.get('categoria'))
+        producto = np.empty(registros, dtype=object)
+        precio_unitario = np.empty(registros)
+        for i, nombre in enumerate(nombres):
+            mascara = categoria_idx == i
+            n = int(mascara.sum())
+            producto[mascara] = elegir(rng, CATEGORIAS[nombre]['productos'], n, specs.get('producto'))
+            precio_unitario[mascara] = numeros(rng, n, specs.get('precio_unitario'), *CATEGORIAS[nombre]['precio_range'])
+        precio_unitario = np.round(precio_unitario, 2)
+        
+        cantidad = enteros(rng, registros, specs.get('cantidad'), 1, 5)
+        descuento = np.round(numeros(rng, registros, specs.get('descuento_porcentaje'), 0, 25), 1)
+        clientes = enteros(rng, registros, specs.get('cliente_id'), 1, 1000)
+        
+        datos = pd.DataFrame({
+            'orden_id': pd.Series(np.arange(1, registros + 1)).map('ORD-{:05d}'.format),
+            'fecha': fechas(rng, registros, hoy - timedelta(days=365), hoy, specs.get('fecha')),
+            'cliente_id': pd.Series(clientes).map('CUST-{:05d}'.format),
+            'producto': producto,
+            'categoria': np.asarray(nombres, dtype=object)[categoria_idx],
+            'precio_unitario': precio_unitario,
+            'cantidad': cantidad,
+            'descuento_porcentaje': descuento,
+            'total': np.round(precio_unitario * cantidad * (1 - descuento / 100), 2),
+            'metodo_pago': elegir(rng, METODOS_PAGO, registros, specs.get('metodo_pago')),
+            'ciudad': elegir(rng, self.pool_faker(self.fake.city, min(registros, 1000)), registros, specs.get('ciudad')),
+            'pais': elegir(rng, self.pool_faker(self.fake.country, min(registros, 250)), registros, specs.get('pais')),
+            'edad_cliente': enteros(rng, registros, specs.get('edad_cliente'), 18, 70),
+            'genero': elegir(rng, ['M', 'F'], registros, specs.get('genero')),
+            'canal': elegir(rng, CANALES_VENTA, registros, specs.get('canal')),
+            'tiempo_envio_dias': enteros(rng, registros, specs.get('tiempo_envio_dias'), 1, 7)
+        })
+        datos['fecha'] = datos['fecha'].dt.date
+        
+        return datos
+
     def generar_dataset_empleados(self, registros=200):
         """Dataset 2: Empleados para análisis de RRHH"""
         print(f"👥 Generando dataset de empleados ({registros} registros)...")
@@ -198,9 +284,154 @@ class DatasetGeneratorFaker:
         
         return datos
 
+    def generar_dim_clientes(self, registros=10_000):
+        """Dimensión clientes del modelo estrella"""
+        print(f"🧑 Generando dimensión clientes ({registros} registros)...")
+        
+        segmentos = ['Nuevo', 'Ocasional', 'Frecuente', 'VIP']
+        
+        datos = []
+        
+        for i in range(registros):
+            registro = {
+                'cliente_id': f"CUST-{i+1:05d}",
+                'nombre': self.fake.first_name(),
+                'apellido': self.fake.last_name(),
+                'ciudad': self.fake.city(),
+                'pais': self.fake.country(),
+                'edad': random.randint(18, 70),
+                'genero': random.choice(['M', 'F']),
+                'segmento': random.choice(segmentos),
+                'fecha_alta': self.fake.date_between(start_date='-5y', end_date='-12M')
+            }
+            datos.append(registro)
+        
+        return datos
+
+    def generar_dim_productos(self, registros=500):
+        """Dimensión productos del modelo estrella: variantes de marca de los productos de CATEGORIAS"""
+        print(f"📦 Generando dimensión productos ({registros} registros)...")
+        
+        marcas = [self.fake.unique.last_name() for _ in range(40)]
+        self.fake.unique.clear()
+        
+        datos = []
+        
+        for i in range(registros):
+            categoria = random.choice(list(CATEGORIAS.keys()))
+            producto = random.choice(CATEGORIAS[categoria]['productos'])
+            precio_min, precio_max = CATEGORIAS[categoria]['precio_range']
+            marca = random.choice(marcas)
+            
+            registro = {
+                'producto_id': f"PROD-{i+1:05d}",
+                'producto': producto,
+                'modelo': f"{producto} {marca} {random.randint(100, 999)}",
+                'categoria': categoria,
+                'marca': marca,
+                'precio_lista': round(random.uniform(precio_min, precio_max), 2)
+            }
+            datos.append(registro)
+        
+        return datos
+
+    def generar_dim_tiendas(self, registros=50):
+        """Dimensión tiendas del modelo estrella: la web y la app más tiendas físicas"""
+        print(f"🏬 Generando dimensión tiendas ({registros} registros)...")
+        
+        datos = []
+        
+        for i in range(max(registros, len(CANALES_VENTA))):
+            # Las dos primeras son los canales online
+            canal = CANALES_VENTA[i] if i < 2 else 'Tienda Física'
+            fisica = canal == 'Tienda Física'
+            ciudad = self.fake.city()
+            
+            registro = {
+                'tienda_id': f"TIEN-{i+1:05d}",
+                'nombre_tienda': f"Tienda {ciudad}" if fisica else f"Tienda {canal}",
+                'canal': canal,
+                'ciudad': ciudad if fisica else None,
+                'pais': self.fake.country() if fisica else None,
+                'metros_cuadrados': random.randint(80, 2500) if fisica else None,
+                'fecha_apertura': self.fake.date_between(start_date='-15y', end_date='-1y')
+            }
+            datos.append(registro)
+        
+        return datos
+
+    def generar_hechos_ventas(self, registros, clientes, productos, tiendas, campañas, empleados):
+        """
+        Tabla de hechos de ventas del modelo estrella: cada venta referencia
+        un cliente, un producto y una tienda existentes; una fracción se
+        atribuye a una campaña (con la fecha dentro de su vigencia) y las de
+        tienda física a un vendedor del departamento de Ventas. Los atributos
+        de las dimensiones se copian con los mismos valores para que las
+        consultas sin join sigan funcionando.
+        
+        Vectorizada: las claves foráneas, fechas y medidas siguen las
+        distribuciones de self.distribuciones['ventas'] (p.ej. clientes
+        calientes con Zipf) o son uniformes
+        
+        Returns:
+            DataFrame
+        """
+        print(f"🛍️  Generando hechos de ventas ({registros} registros)...")
+        
+        rng = self.rng
+        specs = self.distribuciones.get('ventas', {})
+        hoy = datetime.now().date()
+        
+        cliente = pd.DataFrame(clientes).iloc[indices(rng, clientes, registros, specs.get('cliente_id'))].reset_index(drop=True)
+        producto = pd.DataFrame(productos).iloc[indices(rng, productos, registros, specs.get('producto_id'))].reset_index(drop=True)
+        tienda = pd.DataFrame(tiendas).iloc[indices(rng, tiendas, registros, specs.get('tienda_id'))].reset_index(drop=True)
+        campaña = pd.DataFrame(campañas).iloc[indices(rng, campañas, registros, specs.get('campaña_id'))].reset_index(drop=True)
+        atribuida = rng.random(registros) < FRACCION_VENTAS_CAMPAÑA
+        fisica = (tienda['canal'] == 'Tienda Física').to_numpy()
+        
+        # Ventas atribuidas: día uniforme dentro de la vigencia de la campaña
+        fecha = pd.Series(fechas(rng, registros, hoy - timedelta(days=365), hoy, specs.get('fecha')))
+        inicio = pd.to_datetime(campaña['fecha_inicio'])
+        vigencia = (pd.to_datetime(campaña['fecha_fin']) - inicio).dt.days + 1
+        fecha_campaña = inicio + pd.to_timedelta(np.floor(rng.random(registros) * vigencia), unit='D')
+        fecha = fecha.where(~atribuida, fecha_campaña).dt.date
+        
+        vendedores = [e['empleado_id'] for e in empleados if e['departamento'] == 'Ventas'] \
+            or [e['empleado_id'] for e in empleados]
+        vendedor = elegir(rng, vendedores, registros, specs.get('vendedor_id'))
+        
+        precio_unitario = producto['precio_lista'].to_numpy()
+        cantidad = enteros(rng, registros, specs.get('cantidad'), 1, 5)
+        descuento = np.round(numeros(rng, registros, specs.get('descuento_porcentaje'), 0, 25), 1)
+        
+        datos = pd.DataFrame({
+            'orden_id': pd.Series(np.arange(1, registros + 1)).map('ORD-{:05d}'.format),
+            'fecha': fecha,
+            'cliente_id': cliente['cliente_id'],
+            'producto_id': producto['producto_id'],
+            'tienda_id': tienda['tienda_id'],
+            'campaña_id': campaña['campaña_id'].where(atribuida),
+            'vendedor_id': pd.Series(vendedor).where(fisica),
+            'producto': producto['producto'],
+            'categoria': producto['categoria'],
+            'precio_unitario': precio_unitario,
+            'cantidad': cantidad,
+            'descuento_porcentaje': descuento,
+            'total': np.round(precio_unitario * cantidad * (1 - descuento / 100), 2),
+            'metodo_pago': elegir(rng, METODOS_PAGO, registros, specs.get('metodo_pago')),
+            'ciudad': cliente['ciudad'],
+            'pais': cliente['pais'],
+            'edad_cliente': cliente['edad'],
+            'genero': cliente['genero'],
+            'canal': tienda['canal'],
+            'tiempo_envio_dias': np.where(fisica, 0, enteros(rng, registros, specs.get('tiempo_envio_dias'), 1, 7))
+        })
+        
+        return datos
+
     def guardar_csv(self, datos, nombre_archivo):
-        """Guarda los datos como CSV"""
-        if not datos:
+        """Guarda los datos (lista de registros o DataFrame) como CSV"""
+        if datos is None or len(datos) == 0:
             print(f"❌ No hay datos para guardar en {nombre_archivo}")
             return None
             
@@ -325,17 +556,79 @@ class DatasetGeneratorFaker:
         
         return datasets_info
 
+    def generar_modelo_estrella(self, escala=1.0):
+        """
+        Genera el modelo estrella con integridad referencial: dimensiones
+        clientes, productos, tiendas, campañas (dataset de marketing) y
+        empleados, y la tabla de hechos de ventas
+        
+        Args:
+            escala: Factor de escala sobre TAMAÑOS_ESTRELLA (1 = 100.000 ventas)
+        """
+        print(f"⭐ Generando modelo estrella (escala {escala})...")
+        print("=" * 60)
+        
+        tamaños = {tabla: max(1, int(filas * escala)) for tabla, filas in TAMAÑOS_ESTRELLA.items()}
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+        
+        # Los nombres de archivo determinan el dataset en los conversores
+        clientes = self.generar_dim_clientes(tamaños['clientes'])
+        productos = self.generar_dim_productos(tamaños['productos'])
+        tiendas = self.generar_dim_tiendas(tamaños['tiendas'])
+        campañas = self.generar_dataset_marketing(tamaños['campañas'])
+        empleados = self.generar_dataset_empleados(tamaños['empleados'])
+        ventas = self.generar_hechos_ventas(tamaños['ventas'], clientes, productos, tiendas, campañas, empleados)
+        
+        tablas = [
+            ('Dimensión Clientes', clientes, f"dim_clientes_{timestamp}"),
+            ('Dimensión Productos', productos, f"dim_productos_{timestamp}"),
+            ('Dimensión Tiendas', tiendas, f"dim_tiendas_{timestamp}"),
+            ('Campañas Marketing', campañas, f"campañas_marketing_{timestamp}"),
+            ('Empleados RRHH', empleados, f"empleados_rrhh_{timestamp}"),
+            ('Ventas E-commerce', ventas, f"ventas_ecommerce_{timestamp}")
+        ]
+        
+        datasets_info = []
+        for nombre, datos, archivo in tablas:
+            df = self.guardar_csv(datos, archivo)
+            if df is not None:
+                datasets_info.append({
+                    'nombre': nombre,
+                    'archivo': f"{archivo}.csv",
+                    'registros': len(datos),
+                    'columnas': list(df.columns)
+                })
+        
+        if datasets_info:
+            self.generar_reporte_resumen(datasets_info)
+        
+        total_registros = sum(d['registros'] for d in datasets_info)
+        print(f"\n⭐ Modelo estrella: {total_registros:,} registros en {len(datasets_info)} tablas")
+        
+        return datasets_info
+
 def main():
     """Función principal"""
     try:
         print("🐍 Generador de Datasets con Faker")
         print("=" * 40)
         
+        parser = argparse.ArgumentParser(description="Generador de datasets sintéticos")
+        parser.add_argument("--estrella", type=float, nargs="?", const=1.0, metavar="ESCALA",
+                            help="Generar el modelo estrella (dimensiones + hechos de ventas) con un factor de escala")
+        parser.add_argument("--distribuciones", metavar="PRESET|JSON",
+                            help=f"Distribuciones por campo: {', '.join(PRESETS)} o un JSON {{dataset: {{campo: spec}}}}")
+        args = parser.parse_args()
+        
         # Crear generador (puedes cambiar el locale)
-        generador = DatasetGeneratorFaker(locale='es_ES')  # Cambia a 'en_US' si prefieres inglés
+        distribuciones = cargar_distribuciones(args.distribuciones) if args.distribuciones else None
+        generador = DatasetGeneratorFaker(locale='es_ES', distribuciones=distribuciones)  # Cambia a 'en_US' si prefieres inglés
         
         # Generar todos los datasets
-        info = generador.generar_todos_los_datasets()
+        if args.estrella is not None:
+            info = generador.generar_modelo_estrella(args.estrella)
+        else:
+            info = generador.generar_todos_los_datasets()
         
         # Ejemplo de código para análisis
         print(f"\n" + "🔍 CÓDIGO PARA ANÁLISIS:" + "="*30)
@@ -0,0 +1,186 @@
+import json
+from datetime import date, timedelta
+
+import numpy as np
+
+# Tipos de distribución de un campo:
+#   discretos (elegir/indices): 'uniforme', 'zipf' (s), 'categorica' (pesos)
+#   continuos (numeros): 'uniforme', 'lognormal' (sigma, mediana), 'normal' (media, desviacion)
+#   fechas (fechas): 'uniforme', 'estacional' (meses, dias_semana, picos)
+TIPOS = ('uniforme', 'zipf', 'categorica', 'lognormal', 'normal', 'estacional')
+
+# Curva de ventas minorista: más en noviembre/diciembre y fines de semana,
+# con picos de Black Friday (4 días) y de las semanas previas a Navidad
+CURVA_RETAIL = {
+    'tipo': 'estacional',
+    'meses': {1: 0.8, 2: 0.75, 3: 0.85, 4: 0.9, 5: 0.95, 6: 0.9, 7: 0.85, 8: 0.8, 9: 0.9, 10: 1.0, 11: 1.3, 12: 1.6},
+    'dias_semana': [0.9, 0.9, 0.95, 1.0, 1.15, 1.3, 1.1],
+    'picos': [
+        {'fecha': 'black_friday', 'factor': 6.0, 'dias': 4},
+        {'fecha': '12-15', 'factor': 2.0, 'dias': 10}
+    ]
+}
+
+# Presets por dataset y campo (--distribuciones en el generador)
+DISTRIBUCIONES_UNIFORMES = {'ventas': {}}
+DISTRIBUCIONES_SESGADAS = {
+    'ventas': {
+        # Una categoría con ~60% de las ventas y productos estrella dentro de cada una
+        'categoria': {'tipo': 'categorica', 'pesos': {
+            'Electrónicos': 0.60, 'Ropa': 0.15, 'Hogar': 0.12, 'Deportes': 0.08, 'Libros': 0.05
+        }},
+        'producto': {'tipo': 'zipf', 's': 1.2},
+        # Clientes y productos calientes (hot keys) en el modelo estrella
+        'cliente_id': {'tipo': 'zipf', 's': 1.1},
+        'producto_id': {'tipo': 'zipf', 's': 1.2},
+        'tienda_id': {'tipo': 'zipf', 's': 1.0},
+        'precio_unitario': {'tipo': 'lognormal', 'sigma': 0.6},
+        'cantidad': {'tipo': 'zipf', 's': 2.0},
+        'descuento_porcentaje': {'tipo': 'lognormal', 'sigma': 0.8, 'mediana': 5},
+        'metodo_pago': {'tipo': 'zipf', 's': 1.0},
+        'canal': {'tipo': 'categorica', 'pesos': {'Web': 0.55, 'Móvil': 0.35, 'Tienda Física': 0.10}},
+        'fecha': CURVA_RETAIL
+    }
+}
+
+PRESETS = {'uniformes': DISTRIBUCIONES_UNIFORMES, 'sesgadas': DISTRIBUCIONES_SESGADAS}
+
+# Campos que leen los generadores vectorizados (ventas y hechos del modelo
+# estrella). Empleados y marketing se generan fila a fila y no usan specs
+CAMPOS = {
+    'ventas': {
+        'fecha', 'cliente_id', 'producto', 'categoria', 'precio_unitario', 'cantidad', 'descuento_porcentaje',
+        'metodo_pago', 'ciudad', 'pais', 'edad_cliente', 'genero', 'canal', 'tiempo_envio_dias',
+        'producto_id', 'tienda_id', 'campaña_id', 'vendedor_id'
+    }
+}
+
+
+def validar_distribuciones(distribuciones):
+    """
+    Comprueba que cada dataset, campo y tipo de las distribuciones se usa al
+    generar: una spec que no se aplica produciría datos uniformes sin avisar
+
+    Raises:
+        ValueError: Dataset, campo o tipo no soportado
+    """
+    for dataset, specs in distribuciones.items():
+        if dataset not in CAMPOS:
+            raise ValueError(f"Distribuciones no soportadas para el dataset '{dataset}' (soportados: {', '.join(CAMPOS)})")
+        desconocidos = sorted(set(specs) - CAMPOS[dataset])
+        if desconocidos:
+            raise ValueError(f"Campos sin distribución en '{dataset}': {', '.join(desconocidos)}")
+        for campo, spec in specs.items():
+            if spec.get('tipo', 'uniforme') not in TIPOS:
+                raise ValueError(f"Tipo de distribución desconocido en {dataset}.{campo}: {spec['tipo']}")
+    return distribuciones
+
+
+def cargar_distribuciones(valor):
+    """Preset por nombre (uniformes, sesgadas) o archivo JSON {dataset: {campo: spec}}"""
+    if valor in PRESETS:
+        return PRESETS[valor]
+    with open(valor, 'r', encoding='utf-8') as f:
+        return validar_distribuciones(json.load(f))
+
+
+def pesos_zipf(k, s):
+    """Probabilidades de Zipf con exponente s para k elementos (el primero es el más frecuente)"""
+    pesos = np.arange(1, k + 1, dtype='float64') ** -float(s)
+    return pesos / pesos.sum()
+
+
+def indices(rng, valores, n, spec=None):
+    """
+    Índices de n elecciones entre valores según la spec: 'uniforme', 'zipf'
+    (en el orden de valores) o 'categorica' ('pesos' como dict valor -> peso,
+    los valores sin peso no se eligen, o lista alineada con valores)
+    """
+    k = len(valores)
+    tipo = (spec or {}).get('tipo', 'uniforme')
+    if tipo == 'uniforme':
+        return rng.integers(0, k, size=n)
+    if tipo == 'zipf':
+        return rng.choice(k, size=n, p=pesos_zipf(k, spec.get('s', 1.0)))
+    if tipo == 'categorica':
+        pesos = spec['pesos']
+        if isinstance(pesos, dict):
+            pesos = [pesos.get(valor, 0.0) for valor in valores]
+        pesos = np.asarray(pesos, dtype='float64')
+        return rng.choice(k, size=n, p=pesos / pesos.sum())
+    raise ValueError(f"Distribución no soportada para elegir valores: {tipo}")
+
+
+def elegir(rng, valores, n, spec=None):
+    """n valores elegidos según la spec (ver indices)"""
+    return np.asarray(valores, dtype=object)[indices(rng, valores, n, spec)]
+
+
+def numeros(rng, n, spec, minimo, maximo):
+    """
+    n números en [minimo, maximo]: 'uniforme', 'lognormal' (mediana por
+    defecto la media geométrica del rango) o 'normal'; se recortan al rango
+    """
+    tipo = (spec or {}).get('tipo', 'uniforme')
+    if tipo == 'uniforme':
+        return rng.uniform(minimo, maximo, size=n)
+    if tipo == 'lognormal':
+        mediana = spec.get('mediana', np.sqrt(max(minimo, 1e-9) * maximo))
+        valores = rng.lognormal(np.log(mediana), spec.get('sigma', 0.5), size=n)
+    elif tipo == 'normal':
+        valores = rng.normal(spec.get('media', (minimo + maximo) / 2), spec.get('desviacion', (maximo - minimo) / 6), size=n)
+    else:
+        raise ValueError(f"Distribución no soportada para números: {tipo}")
+    return np.clip(valores, minimo, maximo)
+
+
+def enteros(rng, n, spec, minimo, maximo):
+    """n enteros en [minimo, maximo]: zipf/categorica sobre los valores del rango o redondeo de numeros"""
+    tipo = (spec or {}).get('tipo', 'uniforme')
+    if tipo in ('uniforme', 'zipf', 'categorica'):
+        rango = np.arange(minimo, maximo + 1)
+        return rango[indices(rng, rango, n, spec)]
+    return np.round(numeros(rng, n, spec, minimo, maximo)).astype('int64')
+
+
+def black_friday(año):
+    """Cuarto viernes de noviembre"""
+    primero = date(año, 11, 1)
+    return primero + timedelta(days=(4 - primero.weekday()) % 7 + 21)
+
+
+def pesos_estacionales(dias, spec):
+    """Peso de cada día según los factores por mes, día de la semana y picos"""
+    pesos = np.ones(len(dias))
+    meses = np.array([d.month for d in dias])
+    semana = np.array([d.weekday() for d in dias])
+
+    for mes, factor in (spec.get('meses') or {}).items():
+        pesos[meses == int(mes)] *= factor
+    if spec.get('dias_semana'):
+        pesos *= np.asarray(spec['dias_semana'], dtype='float64')[semana]
+
+    for pico in spec.get('picos') or []:
+        for año in sorted({d.year for d in dias}):
+            if pico['fecha'] == 'black_friday':
+                inicio = black_friday(año)
+            else:
+                mes, dia = (int(x) for x in pico['fecha'].split('-'))
+                inicio = date(año, mes, dia)
+            fin = inicio + timedelta(days=pico.get('dias', 1) - 1)
+            pesos[[inicio <= d <= fin for d in dias]] *= pico['factor']
+
+    return pesos / pesos.sum()
+
+
+def fechas(rng, n, inicio, fin, spec=None):
+    """n fechas (datetime64[D]) entre inicio y fin, uniformes o con curva 'estacional'"""
+    dias = [inicio + timedelta(days=i) for i in range((fin - inicio).days + 1)]
+    tipo = (spec or {}).get('tipo', 'uniforme')
+    if tipo == 'uniforme':
+        elegidos = rng.integers(0, len(dias), size=n)
+    elif tipo == 'estacional':
+        elegidos = rng.choice(len(dias), size=n, p=pesos_estacionales(dias, spec))
+    else:
+        raise ValueError(f"Distribución no soportada para fechas: {tipo}")
+    return np.datetime64(inicio, 'D') + elegidos.astype('timedelta64[D]')
@@ -1,37 +1,926 @@
 import duckdb
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.dataset as pads
+import pyarrow.fs as pafs
 import os
+import sys
+import re
 import json
+import time
+import hashlib
+import math
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from statistics import NormalDist
 import glob
 
+from servidor import ServidorConsultas
+from distribuido import ScatterGatherExecutor, sql_parcial, HLL_P
+
+# Módulos compartidos con los conversores (almacén de objetos)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "parquet"))
+from almacenamiento import (abrir_almacenamiento, es_uri_remota, BlockCache,
+                            AlmacenFileSystemHandler, precargar_footers)
+from dinero import sql_valor_dinero
+from streaming import es_archivo_stream, es_archivo_de_bucket
+
+# Segundos entre re-listados de los archivos de un dataset local: los
+# archivos de la ingesta en micro-lotes aparecen como mucho con este retraso
+INTERVALO_SINCRONIZACION = 1.0
+
+# Tipos enteros de DuckDB: sus SUM desde un rollup vuelven a ser enteros
+# (el parcial se guarda como DOUBLE porque Parquet no tiene HUGEINT)
+TIPOS_ENTEROS = {'TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT',
+                 'UTINYINT', 'USMALLINT', 'UINTEGER', 'UBIGINT'}
+
+def huella_archivos(archivos):
+    """Huella de la versión de un conjunto de archivos (ruta, tamaño, mtime)"""
+    partes = []
+    for archivo in sorted(set(str(a) for a in archivos)):
+        try:
+            stat = os.stat(archivo)
+            partes.append(f"{archivo}|{stat.st_size}|{stat.st_mtime_ns}")
+        except OSError:
+            partes.append(f"{archivo}|missing")
+    return hashlib.sha256('\n'.join(partes).encode('utf-8')).hexdigest()
+
+def lector_arrow(resultado, batch_size=100_000):
+    """RecordBatchReader de un resultado DuckDB (to_arrow_reader en versiones recientes)"""
+    if hasattr(resultado, 'to_arrow_reader'):
+        return resultado.to_arrow_reader(batch_size)
+    return resultado.fetch_record_batch(batch_size)
+
+def leer_limites_cgroup():
+    """
+    Lee los límites de CPU y memoria del contenedor (cgroup v2 o v1).
+    Devuelve (cpus, memoria_bytes); None si no hay límite declarado.
+    """
+    cpus = None
+    memoria = None
+    
+    try:
+        # cgroup v2: "<quota> <period>" o "max <period>"
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != 'max':
+            cpus = int(quota) / int(period)
+    except (OSError, ValueError):
+        try:
+            quota = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+            period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+            if quota > 0:
+                cpus = quota / period
+        except (OSError, ValueError):
+            pass
+    
+    for archivo in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            valor = Path(archivo).read_text().strip()
+            # cgroup v1 reporta un valor enorme cuando no hay límite
+            if valor != 'max' and int(valor) < 2**60:
+                memoria = int(valor)
+            break
+        except (OSError, ValueError):
+            continue
+    
+    return cpus, memoria
+
+def crear_perfil_recursos(config=None):
+    """
+    Calcula el perfil de recursos de DuckDB (threads, memory_limit, directorio
+    de spill y caché de objetos) a partir de los límites del cgroup o de la
+    máquina. Los valores de config (dict o archivo JSON) tienen prioridad.
+    
+    Claves de config: threads, memory_limit, memoria_fraccion, temp_directory,
+    max_temp_directory_size, object_cache
+    """
+    if isinstance(config, (str, Path)):
+        with open(config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    config = dict(config or {})
+    
+    cpus, memoria = leer_limites_cgroup()
+    
+    cpus_disponibles = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    if cpus is not None:
+        cpus_disponibles = min(cpus_disponibles, cpus)
+    
+    if memoria is None:
+        try:
+            memoria = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+        except (ValueError, OSError, AttributeError):
+            memoria = 2 * 1024**3
+    
+    # Dejar margen para Python/pandas fuera del límite de DuckDB
+    fraccion = config.get('memoria_fraccion', 0.75)
+    
+    return {
+        'threads': int(config.get('threads') or max(1, int(cpus_disponibles))),
+        'memory_limit': config.get('memory_limit') or f"{max(256, int(memoria * fraccion / 1024**2))}MB",
+        'temp_directory': config.get('temp_directory', '.duckdb_tmp'),
+        'max_temp_directory_size': config.get('max_temp_directory_size'),
+        'object_cache': config.get('object_cache', True)
+    }
+
+class QueryResultCache:
+    """
+    Caché de resultados de consultas en archivos Arrow IPC con expulsión LRU por bytes.
+    
+    Cada entrada se indexa por el SQL normalizado y guarda la huella
+    (ruta, tamaño, mtime) de los archivos Parquet que lee la consulta; si un
+    conversor reescribe alguno de ellos la entrada se invalida en la siguiente lectura.
+    """
+    
+    def __init__(self, cache_dir=".duckdb_cache", max_mb=512):
+        """
+        Args:
+            cache_dir: Directorio donde se guardan los resultados (.arrow) y el índice
+            max_mb: Tamaño máximo de la caché antes de expulsar entradas (LRU)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_mb * 1024**2
+        self.index_file = self.cache_dir / "index.json"
+        self.index = self.cargar_indice()
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0, 'time_saved': 0.0}
+
+    def cargar_indice(self):
+        """Carga el índice persistido de ejecuciones anteriores"""
+        if not self.index_file.exists():
+            return {}
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def guardar_indice(self):
+        """Persiste el índice de forma atómica"""
+        tmp_file = self.index_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_file, self.index_file)
+
+    def clave(self, sql):
+        """Clave de la entrada: hash del SQL con espacios normalizados"""
+        return hashlib.sha256(' '.join(sql.split()).encode('utf-8')).hexdigest()[:32]
+
+    def eliminar(self, key):
+        """Elimina una entrada y su archivo Arrow"""
+        entry = self.index.pop(key, None)
+        if entry:
+            Path(entry['file']).unlink(missing_ok=True)
+
+    def obtener(self, sql, archivos):
+        """Devuelve la tabla Arrow cacheada o None si no hay entrada válida"""
+        key = self.clave(sql)
+        entry = self.index.get(key)
+        
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        
+        if entry['huella'] != huella_archivos(archivos):
+            # Algún archivo fuente cambió: la entrada ya no es válida
+            self.eliminar(key)
+            self.guardar_indice()
+            self.stats['invalidations'] += 1
+            self.stats['misses'] += 1
+            return None
+        
+        try:
+            start_time = time.time()
+            with pa.memory_map(entry['file'], 'r') as source:
+                tabla = pa.ipc.open_file(source).read_all()
+            load_time = time.time() - start_time
+        except Exception:
+            self.eliminar(key)
+            self.guardar_indice()
+            self.stats['misses'] += 1
+            return None
+        
+        entry['last_access'] = time.time()
+        entry['hits'] = entry.get('hits', 0) + 1
+        self.guardar_indice()
+        
+        self.stats['hits'] += 1
+        self.stats['time_saved'] += max(0.0, entry['exec_time'] - load_time)
+        return tabla
+
+    def guardar(self, sql, archivos, tabla, exec_time):
+        """Guarda el resultado de una consulta como archivo Arrow IPC"""
+        key = self.clave(sql)
+        cache_file = self.cache_dir / f"{key}.arrow"
+        
+        with pa.OSFile(str(cache_file), 'wb') as sink:
+            with pa.ipc.new_file(sink, tabla.schema) as writer:
+                writer.write_table(tabla)
+        
+        self.index[key] = {
+            'file': str(cache_file),
+            'huella': huella_archivos(archivos),
+            'bytes': cache_file.stat().st_size,
+            'exec_time': exec_time,
+            'last_access': time.time(),
+            'hits': 0
+        }
+        self.expulsar()
+        self.guardar_indice()
+
+    def expulsar(self):
+        """Expulsa las entradas menos usadas hasta respetar el tamaño máximo"""
+        total = sum(e['bytes'] for e in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            total -= self.index[key]['bytes']
+            self.eliminar(key)
+            self.stats['evictions'] += 1
+
+    def limpiar(self):
+        """Elimina todas las entradas de la caché"""
+        for key in list(self.index):
+            self.eliminar(key)
+        self.guardar_indice()
+
+    def resumen(self):
+        """Estadísticas de uso de la caché en esta ejecución"""
+        consultas = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'hit_rate': self.stats['hits'] / consultas if consultas else 0.0,
+            'entries': len(self.index),
+            'size_mb': sum(e['bytes'] for e in self.index.values()) / 1024**2
+        }
+
+class HotDatasetMaterializer:
+    """
+    Materializa en tablas nativas DuckDB los datasets más consultados.
+    
+    Cuenta los accesos por dataset; al superar el umbral carga el dataset en
+    materializado.<dataset> (opcionalmente ordenado y con índices ART) y
+    redefine la vista para leer de la tabla. Respeta un presupuesto de memoria
+    expulsando los datasets materializados menos usados y refresca de forma
+    incremental los archivos Parquet que cambian.
+    """
+    
+    def __init__(self, conn, politica=None):
+        """
+        Args:
+            conn: Conexión DuckDB del analizador
+            politica: Dict con 'min_accesos', 'memoria_mb', 'orden' {dataset: [cols]}
+                e 'indices' {dataset: [cols]}. None desactiva la materialización
+                (las tablas de ejecuciones anteriores se descartan)
+        """
+        self.conn = conn
+        self.activo = politica is not None
+        politica = politica or {}
+        self.min_accesos = politica.get('min_accesos', 3)
+        self.memoria_bytes = politica.get('memoria_mb', 1024) * 1024**2
+        self.orden = politica.get('orden', {})
+        self.indices = politica.get('indices', {})
+        self.accesos = {}
+        
+        self.conn.execute("CREATE SCHEMA IF NOT EXISTS materializado")
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS materializado.datasets (
+            dataset VARCHAR PRIMARY KEY,
+            bytes BIGINT,
+            created_at TIMESTAMP
+        )
+        """)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS materializado.archivos (
+            dataset VARCHAR,
+            archivo VARCHAR,
+            size BIGINT,
+            mtime_ns BIGINT
+        )
+        """)
+
+    def materializados(self):
+        """Datasets materializados y su tamaño estimado"""
+        return dict(self.conn.execute("SELECT dataset, bytes FROM materializado.datasets").fetchall())
+
+    def estado_archivos(self, info):
+        """Tamaño y mtime actuales de los archivos Parquet de un dataset"""
+        estado = {}
+        for archivo in glob.glob(f"{info['path']}/**/*.parquet", recursive=True):
+            stat = os.stat(archivo)
+            estado[archivo] = (stat.st_size, stat.st_mtime_ns)
+        return estado
+
+    def estado_guardado(self, dataset):
+        """Estado de los archivos en el momento de la última carga"""
+        filas = self.conn.execute(
+            "SELECT archivo, size, mtime_ns FROM materializado.archivos WHERE dataset = ?", [dataset]
+        ).fetchall()
+        return {archivo: (size, mtime) for archivo, size, mtime in filas}
+
+    def guardar_estado(self, dataset, estado):
+        self.conn.execute("DELETE FROM materializado.archivos WHERE dataset = ?", [dataset])
+        if estado:
+            self.conn.executemany(
+                "INSERT INTO materializado.archivos VALUES (?, ?, ?, ?)",
+                [[dataset, archivo, size, mtime] for archivo, (size, mtime) in estado.items()]
+            )
+
+    def tamaño_estimado(self, archivos):
+        """Tamaño descomprimido según los footers Parquet (aprox. memoria en DuckDB)"""
+        if not archivos:
+            return 0
+        return self.conn.execute(
+            "SELECT COALESCE(SUM(total_uncompressed_size), 0) FROM parquet_metadata(?)", [archivos]
+        ).fetchone()[0]
+
+    def sql_carga(self, info, select_sql, archivos):
+        """SELECT que lee archivos concretos conservando el nombre de archivo de origen"""
+        lista = ', '.join(f"'{a}'" for a in archivos)
+        opciones = info.get('opciones_lectura', 'hive_partitioning = false')
+        return f"{select_sql}, filename FROM read_parquet([{lista}], {opciones}, filename = true)"
+
+    def reemplazos_enum(self, dataset, info, carga):
+        """
+        Crea un tipo ENUM por columna categórica declarada por el conversor
+        (metadata 'categorias') con los valores presentes en los datos, y
+        devuelve las expresiones REPLACE que las convierten. Las columnas de
+        partición hive se dejan en VARCHAR: su valor sale del directorio
+        """
+        metadata = info.get('metadata', {})
+        particiones = {p['name'] for p in metadata.get('partitioning') or []}
+        reemplazos = []
+        for col in metadata.get('categorias', {}):
+            if col in particiones:
+                continue
+            tipo = f'materializado."enum_{dataset}_{col}"'
+            self.conn.execute(f"""
+            CREATE OR REPLACE TYPE {tipo} AS ENUM (
+                SELECT DISTINCT "{col}" FROM ({carga}) WHERE "{col}" IS NOT NULL ORDER BY 1
+            )""")
+            reemplazos.append(f'"{col}"::{tipo} AS "{col}"')
+        return reemplazos
+
+    def registrar_acceso(self, dataset, info, select_sql):
+        """Cuenta un acceso; refresca o materializa el dataset según la política"""
+        if not self.activo:
+            return
+        
+        self.accesos[dataset] = self.accesos.get(dataset, 0) + 1
+        if dataset in self.materializados():
+            self.refrescar(dataset, info, select_sql)
+        elif self.accesos[dataset] >= self.min_accesos:
+            self.materializar(dataset, info, select_sql)
+
+    def materializar(self, dataset, info, select_sql):
+        """Carga el dataset en una tabla nativa si cabe en el presupuesto de memoria"""
+        estado = self.estado_archivos(info)
+        estimado = self.tamaño_estimado(list(estado))
+        
+        materializados = self.materializados()
+        usado = sum(materializados.values())
+        if usado + estimado > self.memoria_bytes:
+            # Expulsar datasets materializados menos consultados que este
+            for candidato in sorted(materializados, key=lambda d: self.accesos.get(d, 0)):
+                if usado + estimado <= self.memoria_bytes:
+                    break
+                if self.accesos.get(candidato, 0) >= self.accesos[dataset]:
+                    break
+                self.desmaterializar(candidato)
+                usado -= materializados[candidato]
+        
+        if usado + estimado > self.memoria_bytes:
+            print(f"   ⚠️  '{dataset}' no cabe en el presupuesto de materialización ({estimado / 1024**2:.1f}MB)")
+            return
+        
+        start_time = time.time()
+        orden = self.orden.get(dataset)
+        order_sql = f" ORDER BY {', '.join(orden)}" if orden else ""
+        
+        # Columnas categóricas como ENUM: group by y joins sobre enteros pequeños
+        self.conn.execute(f"DROP TABLE IF EXISTS materializado.{dataset}")
+        carga = self.sql_carga(info, select_sql, list(estado))
+        reemplazos = self.reemplazos_enum(dataset, info, carga)
+        if reemplazos:
+            carga = f"SELECT * REPLACE ({', '.join(reemplazos)}) FROM ({carga})"
+        self.conn.execute(f"CREATE TABLE materializado.{dataset} AS {carga}{order_sql}")
+        for col in self.indices.get(dataset, []):
+            self.conn.execute(f"CREATE INDEX idx_{dataset}_{col} ON materializado.{dataset} ({col})")
+        
+        self.guardar_estado(dataset, estado)
+        self.conn.execute("DELETE FROM materializado.datasets WHERE dataset = ?", [dataset])
+        self.conn.execute("INSERT INTO materializado.datasets VALUES (?, ?, now())", [dataset, estimado])
+        self.conn.execute(f"CREATE OR REPLACE VIEW {dataset} AS SELECT * EXCLUDE (filename) FROM materializado.{dataset}")
+        
+        print(f"   🔥 '{dataset}' materializado ({estimado / 1024**2:.1f}MB, {time.time() - start_time:.2f}s)")
+
+    def refrescar(self, dataset, info, select_sql):
+        """Recarga solo los archivos Parquet nuevos, modificados o eliminados"""
+        actual = self.estado_archivos(info)
+        guardado = self.estado_guardado(dataset)
+        
+        cambiados = [a for a, e in actual.items() if guardado.get(a) != e]
+        eliminados = [a for a in guardado if a not in actual]
+        if not cambiados and not eliminados:
+            return
+        
+        obsoletos = cambiados + eliminados
+        try:
+            self.conn.execute("BEGIN TRANSACTION")
+            self.conn.execute(f"DELETE FROM materializado.{dataset} WHERE filename IN (SELECT UNNEST(?))", [obsoletos])
+            if cambiados:
+                self.conn.execute(f"INSERT INTO materializado.{dataset} {self.sql_carga(info, select_sql, cambiados)}")
+            self.conn.execute("COMMIT")
+        except duckdb.ConversionException:
+            # Valores nuevos en una columna ENUM: recargar con los tipos recalculados
+            self.conn.execute("ROLLBACK")
+            print(f"   🏷️  '{dataset}' tiene categorías nuevas, rematerializando")
+            self.materializar(dataset, info, select_sql)
+            return
+        
+        self.guardar_estado(dataset, actual)
+        self.conn.execute(
+            "UPDATE materializado.datasets SET bytes = ? WHERE dataset = ?",
+            [self.tamaño_estimado(list(actual)), dataset]
+        )
+        print(f"   🔄 '{dataset}' refrescado ({len(cambiados)} archivo(s) recargados, {len(eliminados)} eliminados)")
+
+    def desmaterializar(self, dataset, view_sql=None):
+        """Elimina la tabla materializada y devuelve la vista a los archivos Parquet"""
+        if view_sql is None:
+            fila = self.conn.execute("SELECT view_sql FROM catalogo.datasets WHERE dataset = ?", [dataset]).fetchone()
+            view_sql = fila[0] if fila else None
+        if view_sql:
+            self.conn.execute(view_sql)
+        
+        self.conn.execute(f"DROP TABLE IF EXISTS materializado.{dataset}")
+        self.conn.execute("DELETE FROM materializado.datasets WHERE dataset = ?", [dataset])
+        self.conn.execute("DELETE FROM materializado.archivos WHERE dataset = ?", [dataset])
+        print(f"   ❄️  '{dataset}' desmaterializado")
+
+    def restaurar(self, dataset, info, select_sql, view_sql):
+        """
+        Al (re)crear las vistas: mantiene y refresca los datasets materializados
+        en ejecuciones anteriores o los descarta si la materialización está desactivada
+        """
+        if dataset not in self.materializados():
+            return
+        
+        if self.activo:
+            self.refrescar(dataset, info, select_sql)
+            self.conn.execute(f"CREATE OR REPLACE VIEW {dataset} AS SELECT * EXCLUDE (filename) FROM materializado.{dataset}")
+        else:
+            self.desmaterializar(dataset, view_sql)
+
+class QueryProfiler:
+    """
+    Captura el perfil JSON de DuckDB de cada consulta y lo agrega a un log
+    estructurado (una línea JSON por consulta).
+    
+    Cada registro incluye tiempo total, filas devueltas y escaneadas, bytes
+    leídos, archivos y row groups leídos frente al total, bytes de spill,
+    memoria pico y el tiempo por operador.
+    """
+    
+    # Métricas adicionales del perfil (DuckDB >= 1.1); si la versión no las
+    # conoce se usa el perfil JSON por defecto
+    METRICAS = [
+        'QUERY_NAME', 'LATENCY', 'CPU_TIME', 'ROWS_RETURNED', 'RESULT_SET_SIZE', 'CUMULATIVE_ROWS_SCANNED',
+        'OPERATOR_TYPE', 'OPERATOR_TIMING', 'OPERATOR_CARDINALITY', 'OPERATOR_ROWS_SCANNED',
+        'EXTRA_INFO', 'TOTAL_BYTES_READ', 'SYSTEM_PEAK_BUFFER_MEMORY', 'SYSTEM_PEAK_TEMP_DIR_SIZE'
+    ]
+    
+    def __init__(self, log_file="duckdb_profile.jsonl", archivos_consulta=None):
+        """
+        Args:
+            log_file: Archivo JSONL donde se agregan los registros
+            archivos_consulta: Función sql -> lista de Parquet candidatos, para
+                calcular los row groups podados
+        """
+        self.log_file = Path(log_file)
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        # Se borra con cerrar() o, en su defecto, al recolectar el perfilador
+        self.directorio_temporal = tempfile.TemporaryDirectory(prefix="duckdb_perfil_")
+        self.perfil_dir = Path(self.directorio_temporal.name)
+        self.archivos_consulta = archivos_consulta
+        self.row_groups = {}
+        self.registros = []
+        self.salidas = 0
+        self.lock = threading.Lock()
+    
+    def cerrar(self):
+        """Borra el directorio de los perfiles (después de cerrar las conexiones que lo usan)"""
+        self.directorio_temporal.cleanup()
+    
+    def salida(self):
+        """Archivo de perfil nuevo para una conexión o cursor (cada uno escribe el suyo)"""
+        with self.lock:
+            self.salidas += 1
+            return self.perfil_dir / f"perfil_{self.salidas}.json"
+    
+    def configurar(self, conn, ruta=None):
+        """
+        Activa el perfilado JSON en una conexión o cursor
+        
+        Returns:
+            Archivo donde escribe su perfil, que se pasa a registrar(): el hilo
+            que ejecuta con el cursor no tiene por qué ser el que lo configuró
+        """
+        ruta = Path(ruta) if ruta else self.salida()
+        conn.execute("PRAGMA enable_profiling = 'json'")
+        conn.execute(f"SET profiling_output = '{ruta.as_posix()}'")
+        try:
+            metricas = json.dumps({m: 'true' for m in self.METRICAS})
+            conn.execute(f"SET custom_profiling_settings = '{metricas}'")
+        except duckdb.Error:
+            pass
+        return ruta
+    
+    def contar_row_groups(self, archivos):
+        """Row groups de una lista de Parquet (cacheado por archivo)"""
+        total = 0
+        for archivo in archivos:
+            if archivo not in self.row_groups:
+                try:
+                    self.row_groups[archivo] = pq.ParquetFile(archivo).metadata.num_row_groups
+                except Exception:
+                    self.row_groups[archivo] = 0
+            total += self.row_groups[archivo]
+        return total
+    
+    def operadores(self, nodo, lista=None):
+        """Aplana el árbol de operadores del perfil"""
+        lista = [] if lista is None else lista
+        for hijo in nodo.get('children', []):
+            lista.append(hijo)
+            self.operadores(hijo, lista)
+        return lista
+    
+    def registrar(self, sql, wall_s, ruta, origen="parquet"):
+        """Lee el perfil de la última consulta del cursor (ruta de configurar) y lo agrega al log"""
+        registro = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'sql': ' '.join(sql.split()),
+            'origen': origen,
+            'wall_ms': round(wall_s * 1000, 3)
+        }
+        
+        perfil = {}
+        salida = Path(ruta)
+        if origen != 'caché' and salida.exists():
+            try:
+                with open(salida, 'r', encoding='utf-8') as f:
+                    perfil = json.load(f)
+                salida.unlink()
+            except (OSError, ValueError):
+                perfil = {}
+            
+            # DuckDB no escribe perfil para algunas consultas (p.ej. COUNT(*) resuelto
+            # desde metadata); no atribuir a esta consulta el perfil de otra
+            if perfil.get('query_name') and ' '.join(perfil['query_name'].split()) != registro['sql']:
+                perfil = {}
+        
+        if perfil:
+            operadores = self.operadores(perfil)
+            archivos_leidos = archivos_total = 0
+            leidos = []
+            for op in operadores:
+                extra = op.get('extra_info') or {}
+                if not isinstance(extra, dict):
+                    continue
+                escaneo = re.match(r'(\d+)/(\d+)', str(extra.get('Scanning Files', '')))
+                if escaneo:
+                    archivos_leidos += int(escaneo.group(1))
+                    archivos_total += int(escaneo.group(2))
+                elif extra.get('Total Files Read'):
+                    archivos_leidos += int(extra['Total Files Read'])
+                # Lista de archivos o el patrón glob, truncada con '...' si es larga
+                for nombre in str(extra.get('Filename(s)', '')).split(','):
+                    nombre = nombre.strip()
+                    if nombre and nombre != '...':
+                        leidos += glob.glob(nombre, recursive=True) if '*' in nombre else [nombre]
+            
+            if not archivos_total:
+                # Sin poda de archivos el scan lee todo lo que abre
+                archivos_total = archivos_leidos
+            
+            leidos = sorted(set(leidos))
+            rg_leidos = self.contar_row_groups(leidos) if leidos and len(leidos) == archivos_leidos else None
+            rg_total = rg_leidos if archivos_leidos == archivos_total else None
+            candidatos = None
+            if rg_total is None or len(leidos) != archivos_leidos:
+                # El total solo se conoce si los candidatos de la consulta coinciden con el scan
+                candidatos = self.archivos_consulta(sql) if self.archivos_consulta else None
+                if rg_total is None and candidatos and len(candidatos) == archivos_total:
+                    rg_total = self.contar_row_groups(candidatos)
+            
+            # Archivos leídos (estadísticas de acceso para el tiering de particiones)
+            if len(leidos) != archivos_leidos:
+                leidos = sorted(candidatos) if candidatos and archivos_leidos == archivos_total == len(candidatos) else None
+            
+            registro.update({
+                'latency_ms': round(perfil.get('latency', 0) * 1000, 3),
+                'cpu_ms': round(perfil.get('cpu_time', 0) * 1000, 3),
+                'rows_returned': perfil.get('rows_returned'),
+                'rows_scanned': perfil.get('cumulative_rows_scanned'),
+                'bytes_read': perfil.get('total_bytes_read'),
+                'peak_memory_bytes': perfil.get('system_peak_buffer_memory'),
+                'spill_bytes': perfil.get('system_peak_temp_dir_size'),
+                'files_read': archivos_leidos,
+                'files_total': archivos_total,
+                'row_groups_read': rg_leidos,
+                'row_groups_total': rg_total,
+                'files': leidos,
+                'operators': [
+                    {
+                        'operator': op.get('operator_type') or op.get('operator_name'),
+                        'timing_ms': round(op.get('operator_timing', 0) * 1000, 3),
+                        'cardinality': op.get('operator_cardinality'),
+                        'rows_scanned': op.get('operator_rows_scanned')
+                    }
+                    for op in operadores
+                ]
+            })
+        
+        with self.lock:
+            self.registros.append(registro)
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(registro, ensure_ascii=False, default=str) + '\n')
+        return registro
+    
+    def consultas_lentas(self, n=10):
+        """Consultas con mayor tiempo total"""
+        if not self.registros:
+            return pd.DataFrame()
+        columnas = ['wall_ms', 'origen', 'rows_scanned', 'bytes_read', 'files_read', 'files_total',
+                    'row_groups_read', 'row_groups_total', 'spill_bytes', 'peak_memory_bytes', 'sql']
+        df = pd.DataFrame(self.registros).reindex(columns=columnas)
+        enteros = columnas[2:-1]
+        df[enteros] = df[enteros].astype('Int64')
+        df['sql'] = df['sql'].str.slice(0, 60)
+        return df.sort_values('wall_ms', ascending=False).head(n)
+    
+    def operadores_lentos(self, n=10):
+        """Operadores con mayor tiempo acumulado en todas las consultas"""
+        filas = [op for registro in self.registros for op in registro.get('operators', [])]
+        if not filas:
+            return pd.DataFrame()
+        return (pd.DataFrame(filas)
+                .groupby('operator', as_index=False)
+                .agg(veces=('timing_ms', 'size'), timing_ms=('timing_ms', 'sum'), filas=('cardinality', 'sum'))
+                .sort_values('timing_ms', ascending=False)
+                .head(n))
+    
+    def mostrar_resumen(self, n=10):
+        """Imprime las consultas y operadores más lentos"""
+        print(f"\n🔬 PERFILADO ({len(self.registros)} consultas, log: {self.log_file})")
+        print("=" * 40)
+        lentas = self.consultas_lentas(n)
+        if not lentas.empty:
+            print("Consultas más lentas:")
+            print(lentas.to_string(index=False))
+        operadores = self.operadores_lentos(n)
+        if not operadores.empty:
+            print("\nOperadores más lentos:")
+            print(operadores.round(3).to_string(index=False))
+
+class ConcurrentReportExecutor:
+    """
+    Ejecuta consultas independientes en paralelo, cada una en su propio
+    cursor de una conexión DuckDB compartida, con un pool acotado.
+    Los resultados se devuelven en el orden de envío.
+    """
+    
+    def __init__(self, conn, max_workers=4, perfilador=None):
+        """conn: conexión DuckDB, o el analizador (sus cursores registran los datasets remotos)"""
+        self.conn = conn
+        self.max_workers = max(1, int(max_workers))
+        self.perfilador = perfilador
+    
+    def ejecutar_una(self, sql, enviado):
+        """Ejecuta una consulta en un cursor propio y mide cola y ejecución"""
+        inicio = time.time()
+        cursor = self.conn.cursor()
+        try:
+            if self.perfilador is not None:
+                ruta_perfil = self.perfilador.configurar(cursor)
+            tabla = lector_arrow(cursor.execute(sql)).read_all()
+            error = None
+        except Exception as e:
+            tabla = None
+            error = str(e)
+        finally:
+            cursor.close()
+        
+        if self.perfilador is not None and error is None:
+            self.perfilador.registrar(sql, time.time() - inicio, ruta_perfil)
+        
+        return {
+            'tabla': tabla,
+            'error': error,
+            'cola_s': inicio - enviado,
+            'ejecucion_s': time.time() - inicio
+        }
+    
+    def ejecutar(self, consultas):
+        """
+        Ejecuta una lista de SQL y devuelve, en el mismo orden, dicts con
+        tabla (pyarrow.Table), error, cola_s y ejecucion_s
+        """
+        if not consultas:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(consultas))) as pool:
+            futuros = [pool.submit(self.ejecutar_una, sql, time.time()) for sql in consultas]
+            return [futuro.result() for futuro in futuros]
+
 class DuckDBParquetAnalyzer:
     """
     Analizador de datos Parquet usando DuckDB para consultas rápidas y eficientes
     """
     
-    def __init__(self, parquet_dir="parquet_data", db_file=":memory:"):
+    def __init__(self, parquet_dir="parquet_data", db_file=":memory:", usar_rollups=True,
+                 cache_dir=".duckdb_cache", cache_max_mb=512, materializacion=None, perfil=None,
+                 max_concurrencia=4, compartir_scans=True, log_perfilado=None,
+                 modo_aproximado=False, fraccion_muestreo=0.01, block_cache_dir=".block_cache",
+                 block_cache_mb=1024):
         """
         Inicializa el analizador DuckDB
         
         Args:
-            parquet_dir: Directorio con archivos Parquet
-            db_file: Archivo de base de datos (:memory: para en memoria)
+            parquet_dir: Directorio con archivos Parquet, o URI de un almacén de
+                objetos (s3://bucket/prefijo, local:///ruta?latencia_ms=20)
+            db_file: Archivo de base de datos (:memory: para en memoria). Con un
+                archivo el catálogo de vistas y estadísticas persiste entre ejecuciones
+            usar_rollups: Responder consultas agregadas desde los rollups pre-calculados
+            cache_dir: Directorio de la caché de resultados (None para desactivarla)
+            cache_max_mb: Tamaño máximo de la caché de resultados
+            materializacion: Política para cargar datasets calientes en tablas nativas
+                (ver HotDatasetMaterializer). None la desactiva
+            perfil: Perfil de recursos (dict o JSON, ver crear_perfil_recursos).
+                None lo calcula desde los límites del cgroup/máquina
+            max_concurrencia: Consultas simultáneas del análisis completo (1 = secuencial)
+            compartir_scans: Combinar las consultas del análisis sobre una misma vista
+                en un único scan con GROUPING SETS
+            log_perfilado: Archivo JSONL para el perfil de cada consulta (ver
+                QueryProfiler). None lo desactiva
+            modo_aproximado: Responder las consultas agregadas desde muestras y
+                sketches con márgenes de error (ver consulta_aproximada)
+            fraccion_muestreo: Fracción del muestreo por bloques cuando el dataset
+                no tiene muestra persistida
+            block_cache_dir: Caché local de bloques de los datasets remotos
+            block_cache_mb: Tamaño máximo de la caché de bloques
         """
-        self.parquet_dir = Path(parquet_dir)
+        self.parquet_dir = parquet_dir if es_uri_remota(parquet_dir) else Path(parquet_dir)
         self.conn = duckdb.connect(db_file)
+        self.usar_rollups = usar_rollups
+        self.cache = QueryResultCache(cache_dir, cache_max_mb) if cache_dir else None
+        self.datasets = {}
+        self.conteos = {}
+        self.id_columns = {}
+        self.rollups = {}
+        self.aproximados = {}
+        self.zonas = {}
+        self.buckets = {}
+        self.sincronizados = {}
+        self.tipos = {}
+        self.executors = {}
+        self.objetos_arrow = {}
+        self.modo_aproximado = modo_aproximado
+        self.fraccion_muestreo = fraccion_muestreo
+        self.max_concurrencia = max_concurrencia
+        self.compartir_scans = compartir_scans
+        
+        # Configurar DuckDB según los recursos disponibles
+        self.perfil = crear_perfil_recursos(perfil)
+        self.aplicar_perfil(self.perfil)
+        
+        # Datasets en un almacén de objetos: lecturas por rango a través de la caché de bloques
+        self.almacen = abrir_almacenamiento(parquet_dir) if es_uri_remota(parquet_dir) else None
+        self.block_cache = BlockCache(block_cache_dir, max_mb=block_cache_mb) if self.almacen else None
+        self.objetos_remotos = {}
         
-        # Configurar DuckDB para mejor rendimiento
-        self.conn.execute("SET threads TO 4")
-        self.conn.execute("SET memory_limit = '2GB'")
+        self.perfilador = QueryProfiler(log_perfilado, self.archivos_consulta) if log_perfilado else None
+        self.ruta_perfil = self.perfilador.configurar(self.conn) if self.perfilador is not None else None
+        
+        self.inicializar_catalogo()
+        self.materializador = HotDatasetMaterializer(self.conn, materializacion)
         
         print(f"✅ DuckDB inicializado")
-        print(f"📁 Directorio Parquet: {self.parquet_dir}")
+        print(f"📁 Directorio Parquet: {self.almacen!r}" if self.almacen else f"📁 Directorio Parquet: {self.parquet_dir}")
         print(f"💾 Base de datos: {'En memoria' if db_file == ':memory:' else db_file}")
+        print(f"⚙️  Recursos: {self.perfil['threads']} threads, {self.perfil['memory_limit']}, spill en {self.perfil['temp_directory']}")
+
+    def aplicar_perfil(self, perfil):
+        """Aplica un perfil de recursos a la conexión DuckDB"""
+        self.conn.execute(f"SET threads TO {int(perfil['threads'])}")
+        self.conn.execute(f"SET memory_limit = '{perfil['memory_limit']}'")
+        if perfil.get('temp_directory'):
+            self.conn.execute(f"SET temp_directory = '{perfil['temp_directory']}'")
+        if perfil.get('max_temp_directory_size'):
+            self.conn.execute(f"SET max_temp_directory_size = '{perfil['max_temp_directory_size']}'")
+        
+        # La caché de metadata Parquet se llama distinto según la versión de DuckDB
+        disponibles = {fila[0] for fila in self.conn.execute("SELECT name FROM duckdb_settings()").fetchall()}
+        for setting in ('enable_object_cache', 'parquet_metadata_cache'):
+            if setting in disponibles:
+                self.conn.execute(f"SET {setting} = {'true' if perfil.get('object_cache') else 'false'}")
+        
+        self.perfil = perfil
+
+    def cursor(self):
+        """
+        Cursor de la conexión para consultas concurrentes. Los datasets Arrow
+        registrados (almacén de objetos) no son visibles desde otros cursores,
+        así que se registran también en cada uno
+        """
+        cursor = self.conn.cursor()
+        for nombre, objeto in self.objetos_arrow.items():
+            cursor.register(nombre, objeto)
+        return cursor
+
+    def inicializar_catalogo(self):
+        """Crea las tablas del catálogo (vistas, conteos y estadísticas por columna)"""
+        self.conn.execute("CREATE SCHEMA IF NOT EXISTS catalogo")
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS catalogo.datasets (
+            dataset VARCHAR PRIMARY KEY,
+            path VARCHAR,
+            huella VARCHAR,
+            view_sql VARCHAR,
+            row_count BIGINT,
+            files INTEGER,
+            updated_at TIMESTAMP
+        )
+        """)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS catalogo.columnas (
+            dataset VARCHAR,
+            columna VARCHAR,
+            tipo VARCHAR,
+            min_value VARCHAR,
+            max_value VARCHAR,
+            null_count BIGINT
+        )
+        """)
+
+    def huella_dataset(self, info):
+        """Huella de un dataset: sus archivos Parquet y la metadata de los conversores"""
+        archivos = info['files'] + [str(f) for f in Path(info['path']).glob("*metadata*.json")]
+        return huella_archivos(archivos)
+
+    def registrar_en_catalogo(self, dataset_name, info, view_sql, huella):
+        """Calcula conteo y estadísticas por columna desde los footers Parquet y los guarda"""
+        patron = f"{info['path']}/**/*.parquet"
+        
+        row_count = self.conn.execute(f"""
+        SELECT COALESCE(SUM(row_group_num_rows), 0) FROM (
+            SELECT DISTINCT file_name, row_group_id, row_group_num_rows
+            FROM parquet_metadata('{patron}')
+        )
+        """).fetchone()[0]
+        
+        self.conn.execute("DELETE FROM catalogo.columnas WHERE dataset = ?", [dataset_name])
+        self.conn.execute(f"""
+        INSERT INTO catalogo.columnas
+        SELECT
+            ? AS dataset,
+            path_in_schema AS columna,
+            ANY_VALUE(type) AS tipo,
+            CASE WHEN COUNT(TRY_CAST(COALESCE(stats_min_value, stats_min) AS DOUBLE)) = COUNT(COALESCE(stats_min_value, stats_min))
+                 THEN MIN(TRY_CAST(COALESCE(stats_min_value, stats_min) AS DOUBLE))::VARCHAR
+                 ELSE MIN(COALESCE(stats_min_value, stats_min)) END AS min_value,
+            CASE WHEN COUNT(TRY_CAST(COALESCE(stats_max_value, stats_max) AS DOUBLE)) = COUNT(COALESCE(stats_max_value, stats_max))
+                 THEN MAX(TRY_CAST(COALESCE(stats_max_value, stats_max) AS DOUBLE))::VARCHAR
+                 ELSE MAX(COALESCE(stats_max_value, stats_max)) END AS max_value,
+            SUM(stats_null_count) AS null_count
+        FROM parquet_metadata('{patron}')
+        GROUP BY path_in_schema
+        """, [dataset_name])
+        
+        self.conn.execute("DELETE FROM catalogo.datasets WHERE dataset = ?", [dataset_name])
+        self.conn.execute(
+            "INSERT INTO catalogo.datasets VALUES (?, ?, ?, ?, ?, ?, now())",
+            [dataset_name, info['path'], huella, view_sql, row_count, info['count']]
+        )
+        return row_count
+
+    def obtener_estadisticas(self, tabla):
+        """Estadísticas por columna guardadas en el catálogo"""
+        return self.conn.execute(
+            "SELECT columna, tipo, min_value, max_value, null_count FROM catalogo.columnas WHERE dataset = ? ORDER BY columna",
+            [tabla]
+        ).fetchdf()
 
     def detectar_datasets(self):
         """Detecta automáticamente los datasets Parquet disponibles"""
+        if self.almacen is not None:
+            return self.detectar_datasets_remotos()
+        
         datasets = {}
         
         if not self.parquet_dir.exists():
@@ -39,14 +928,16 @@ class DuckDBParquetAnalyzer:
             return datasets
         
         for item in self.parquet_dir.iterdir():
-            if item.is_dir():
+            # Directorios con prefijo '_' son auxiliares (p.ej. _rollups)
+            if item.is_dir() and not item.name.startswith('_'):
                 # Buscar archivos .parquet en el directorio
                 parquet_files = list(item.rglob("*.parquet"))
                 if parquet_files:
                     datasets[item.name] = {
                         'path': str(item),
                         'files': [str(f) for f in parquet_files],
-                        'count': len(parquet_files)
+                        'count': len(parquet_files),
+                        'metadata': self.cargar_metadata_dataset(item)
                     }
         
         print(f"🔍 Datasets encontrados: {len(datasets)}")
@@ -55,25 +946,243 @@ class DuckDBParquetAnalyzer:
         
         return datasets
 
+    def detectar_datasets_remotos(self):
+        """
+        Detecta los datasets de un almacén de objetos con un único listado.
+        La metadata se lee a través de la caché de bloques; rollups, muestras
+        y zone maps apuntan a rutas locales y no se usan en remoto
+        """
+        self.objetos_remotos = self.almacen.listar()
+        datasets = {}
+        
+        for clave in self.objetos_remotos:
+            partes = clave.split('/')
+            if len(partes) < 2 or partes[0].startswith('_') or not clave.endswith('.parquet'):
+                continue
+            info = datasets.setdefault(partes[0], {'path': f"{self.almacen!r}/{partes[0]}", 'prefijo': partes[0],
+                                                   'files': [], 'remoto': True})
+            info['files'].append(clave)
+        
+        for nombre, info in datasets.items():
+            info['count'] = len(info['files'])
+            metadatas = sorted(c for c in self.objetos_remotos
+                               if c.startswith(f"{nombre}/") and c.count('/') == 1 and 'metadata' in c and c.endswith('.json'))
+            metadata = {}
+            if metadatas:
+                objeto = self.objetos_remotos[metadatas[-1]]
+                try:
+                    metadata = json.loads(self.block_cache.leer(
+                        self.almacen, metadatas[-1], objeto['version'], objeto['tamaño'], 0, objeto['tamaño']
+                    ))
+                except Exception as e:
+                    print(f"⚠️  No se pudo leer {metadatas[-1]}: {e}")
+            for clave in ('rollups', 'aproximado', 'zone_maps'):
+                metadata.pop(clave, None)
+            info['metadata'] = metadata
+        
+        print(f"🔍 Datasets encontrados en {self.almacen!r}: {len(datasets)}")
+        for name, info in datasets.items():
+            print(f"   📊 {name}: {info['count']} archivo(s)")
+        
+        return datasets
+
+    def cargar_metadata_dataset(self, dataset_dir):
+        """Carga la metadata JSON más reciente escrita por los conversores"""
+        archivos = sorted(Path(dataset_dir).glob("*metadata*.json"), key=lambda f: f.stat().st_mtime)
+        if not archivos:
+            return {}
+        
+        try:
+            with open(archivos[-1], 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️  No se pudo leer {archivos[-1]}: {e}")
+            return {}
+
+    def select_vista(self, info, excluir=None):
+        """
+        Genera el SELECT de la vista de un dataset. Las columnas de ID compactadas
+        (prefijo + entero) se reconstruyen como string y el entero queda
+        disponible como <col>_num para joins y COUNT(DISTINCT). Las columnas
+        monetarias guardadas en céntimos se exponen como DECIMAL y el entero
+        queda como <col>_centimos
+        """
+        estrella = f"* EXCLUDE ({', '.join(excluir)})" if excluir else "*"
+        metadata = info.get('metadata', {})
+        
+        reemplazos = []
+        extras = []
+        for col, spec in metadata.get('id_columns', {}).items():
+            prefix = spec['prefix'].replace("'", "''")
+            reemplazos.append(f"printf('{prefix}%0{spec['width']}d', {col}) AS {col}")
+            extras.append(f"{col} AS {col}_num")
+        for col, spec in (metadata.get('dinero') or {}).items():
+            if spec['modo'] == 'centimos':
+                reemplazos.append(f"{sql_valor_dinero(col, spec['escala'])} AS {col}")
+                extras.append(f"{col} AS {col}_centimos")
+        
+        if not reemplazos:
+            return f"SELECT {estrella}"
+        return f"SELECT {estrella} REPLACE ({', '.join(reemplazos)}), {', '.join(extras)}"
+
+    def inferir_particiones(self, info):
+        """Infiere las columnas hive desde los nombres de directorio (datasets sin metadata)"""
+        valores = {}
+        for archivo in info['files']:
+            for parte in Path(archivo).relative_to(info['path']).parts[:-1]:
+                if '=' in parte:
+                    clave, valor = parte.split('=', 1)
+                    valores.setdefault(clave, []).append(valor)
+        
+        # Hive exige que todos los archivos tengan las mismas claves
+        particiones = []
+        for clave, vals in valores.items():
+            if len(vals) != len(info['files']):
+                return []
+            entero = all(v.lstrip('-').isdigit() for v in vals)
+            particiones.append({'name': clave, 'type': 'INTEGER' if entero else 'VARCHAR'})
+        return particiones
+
+    def opciones_lectura(self, info):
+        """
+        Opciones de read_parquet para un dataset: columnas de partición hive
+        tipadas según la especificación declarada por el conversor, de modo que
+        filtros como año = 2024 AND categoria = 'ropa' poden directorios
+        """
+        particiones = info.get('metadata', {}).get('partitioning')
+        if particiones is None:
+            particiones = self.inferir_particiones(info)
+        if not particiones:
+            return "hive_partitioning = false"
+        
+        tipos = ', '.join(f"'{p['name']}': {p['type']}" for p in particiones)
+        return f"hive_partitioning = true, hive_types = {{{tipos}}}"
+
+    def columna_id(self, tabla, columna):
+        """Devuelve la versión entera de una columna de ID si está compactada"""
+        if columna in self.id_columns.get(tabla, {}):
+            return f"{columna}_num"
+        return columna
+
+    def crear_vista_remota(self, dataset_name, info):
+        """
+        Vista sobre un dataset del almacén de objetos: un dataset pyarrow por
+        partición, leído con lecturas por rango agrupadas (pre_buffer) a través
+        de la caché de bloques, y la columna de partición tomada del directorio
+        igual que con hive_partitioning en local
+        
+        Returns:
+            Número de registros
+        """
+        precargar_footers(self.almacen, self.block_cache, self.objetos_remotos, info['files'])
+        
+        particiones = info.get('metadata', {}).get('partitioning')
+        if particiones is None:
+            particiones = self.inferir_particiones({**info, 'path': info['prefijo']})
+        tipos = {p['name']: p['type'] for p in particiones}
+        
+        grupos = {}
+        for clave in info['files']:
+            grupos.setdefault(clave.rsplit('/', 1)[0], []).append(clave)
+        
+        filesystem = pafs.PyFileSystem(AlmacenFileSystemHandler(self.almacen, self.block_cache, self.objetos_remotos))
+        formato = pads.ParquetFileFormat(default_fragment_scan_options=pads.ParquetFragmentScanOptions(
+            pre_buffer=True,
+            cache_options=pa.CacheOptions(hole_size_limit=self.block_cache.tamaño_bloque * 2,
+                                          range_size_limit=32 * 1024**2, lazy=True)
+        ))
+        
+        for nombre in [n for n in self.objetos_arrow if n.startswith(f"__remoto_{dataset_name}_")]:
+            self.conn.unregister(nombre)
+            del self.objetos_arrow[nombre]
+        
+        selects = []
+        count = 0
+        for i, (directorio, archivos) in enumerate(sorted(grupos.items())):
+            dataset = pads.dataset(archivos, format=formato, filesystem=filesystem)
+            nombre = f"__remoto_{dataset_name}_{i}"
+            self.conn.register(nombre, dataset)
+            self.objetos_arrow[nombre] = dataset
+            count += dataset.count_rows()
+            
+            claves = dict(parte.split('=', 1) for parte in directorio.split('/')[1:] if '=' in parte)
+            reemplazos = [
+                f"CAST({self.literal_sql(valor)} AS {tipos[clave]}) AS {clave}"
+                for clave, valor in claves.items() if clave in tipos
+            ]
+            selects.append(f"SELECT * REPLACE ({', '.join(reemplazos)}) FROM {nombre}" if reemplazos else f"SELECT * FROM {nombre}")
+        
+        info['opciones_lectura'] = "hive_partitioning = false"
+        union = '\nUNION ALL BY NAME\n'.join(selects)
+        self.conn.execute(f"CREATE OR REPLACE VIEW {dataset_name} AS {self.select_vista(info)} FROM ({union})")
+        return count
+
+    def ruta_auxiliar(self, ruta):
+        """
+        Ruta local de un rollup, muestra o sketch de la metadata. Se guardan
+        relativas al directorio de los datasets, así que se resuelven contra
+        parquet_dir y no contra el directorio de trabajo; las metadatas
+        anteriores guardaban la ruta tal cual
+        """
+        resuelta = Path(self.parquet_dir) / ruta
+        return str(resuelta if resuelta.exists() else Path(ruta))
+
     def crear_vistas(self, datasets):
         """Crea vistas DuckDB para cada dataset"""
         print(f"\n📋 Creando vistas DuckDB...")
         
         for dataset_name, info in datasets.items():
             try:
-                # Crear vista que lea todos los archivos Parquet del dataset
+                if info.get('remoto'):
+                    self.datasets[dataset_name] = info
+                    self.id_columns[dataset_name] = info.get('metadata', {}).get('id_columns', {})
+                    start_time = time.time()
+                    count = self.conteos[dataset_name] = self.crear_vista_remota(dataset_name, info)
+                    print(f"   ☁️  Vista '{dataset_name}': {count:,} registros ({time.time() - start_time:.2f}s)")
+                    continue
+                
+                # Crear vista que lea todos los archivos Parquet del dataset,
+                # con las columnas de partición hive tipadas
+                info['opciones_lectura'] = self.opciones_lectura(info)
                 view_sql = f"""
                 CREATE OR REPLACE VIEW {dataset_name} AS 
-                SELECT * FROM read_parquet('{info['path']}/**/*.parquet')
+                {self.select_vista(info)} FROM read_parquet('{info['path']}/**/*.parquet', {info['opciones_lectura']})
                 """
                 
-                self.conn.execute(view_sql)
+                self.datasets[dataset_name] = info
+                self.tipos.pop(dataset_name, None)
+                self.id_columns[dataset_name] = info.get('metadata', {}).get('id_columns', {})
+                self.rollups[dataset_name] = [
+                    {**rollup, 'file': self.ruta_auxiliar(rollup['file'])}
+                    for rollup in info.get('metadata', {}).get('rollups', [])
+                ]
+                self.aproximados[dataset_name] = {
+                    clave: {**descriptor, 'file': self.ruta_auxiliar(descriptor['file'])} if descriptor else descriptor
+                    for clave, descriptor in (info.get('metadata', {}).get('aproximado') or {}).items()
+                }
+                self.zonas[dataset_name] = info.get('metadata', {}).get('zone_maps', {})
+                self.buckets[dataset_name] = info.get('metadata', {}).get('bucketing') or {}
+                
+                # Reutilizar la vista del catálogo si ni los archivos ni la metadata cambiaron
+                huella = self.huella_dataset(info)
+                cached = self.conn.execute("""
+                SELECT d.huella, d.view_sql, d.row_count
+                FROM catalogo.datasets d JOIN duckdb_views() v ON v.view_name = d.dataset AND v.schema_name = 'main'
+                WHERE d.dataset = ?
+                """, [dataset_name]).fetchone()
                 
-                # Obtener información de la vista
-                count_result = self.conn.execute(f"SELECT COUNT(*) FROM {dataset_name}").fetchone()
-                count = count_result[0] if count_result else 0
+                if cached and cached[0] == huella and cached[1] == view_sql:
+                    count = cached[2]
+                    print(f"   ⚡ Vista '{dataset_name}': {count:,} registros (catálogo)")
+                else:
+                    self.conn.execute(view_sql)
+                    count = self.registrar_en_catalogo(dataset_name, info, view_sql, huella)
+                    print(f"   ✅ Vista '{dataset_name}': {count:,} registros")
                 
-                print(f"   ✅ Vista '{dataset_name}': {count:,} registros")
+                self.conteos[dataset_name] = count
+                self.materializador.restaurar(
+                    dataset_name, info, self.select_vista(info, excluir=['filename']), view_sql
+                )
                 
             except Exception as e:
                 print(f"   ❌ Error creando vista '{dataset_name}': {e}")
@@ -87,220 +1196,1208 @@ class DuckDBParquetAnalyzer:
             print(f"❌ Error obteniendo esquema de {tabla}: {e}")
             return None
 
-    def ejecutar_consulta(self, sql, descripcion=""):
-        """Ejecuta una consulta SQL y devuelve el resultado"""
+    def datasets_consulta(self, sql):
+        """Datasets cuyas vistas referencia una consulta"""
+        return [nombre for nombre in self.datasets if re.search(rf'\b{re.escape(nombre)}\b', sql)]
+
+    def archivos_consulta(self, sql):
+        """
+        Archivos Parquet que lee una consulta: los de las vistas de datasets que
+        referencia y los de read_parquet() explícitos (p.ej. rollups).
+        Devuelve None si la consulta no es cacheable.
+        """
+        if not re.match(r'^\s*(SELECT|WITH|FROM)\b', sql, re.IGNORECASE):
+            return None
+        if re.search(r'\b(random|uuid|now|current_timestamp|current_date)\b', sql, re.IGNORECASE):
+            return None
+        
+        archivos = []
+        for nombre in self.datasets_consulta(sql):
+            archivos += glob.glob(f"{self.datasets[nombre]['path']}/**/*.parquet", recursive=True)
+        for patron in re.findall(r"read_parquet\('([^']+)'", sql):
+            archivos += glob.glob(patron, recursive=True)
+        
+        return archivos or None
+
+    def sincronizar_archivos(self, tabla, forzar=False):
+        """
+        Vuelve a listar los archivos de un dataset local (como mucho cada
+        INTERVALO_SINCRONIZACION segundos). La vista lee con un glob y ya ve
+        los archivos nuevos; esto actualiza la lista que usan los buckets, el
+        conteo de archivos y la detección de archivos de la ingesta
+        """
+        info = self.datasets.get(tabla)
+        if info is None or info.get('remoto'):
+            return
+        ahora = time.time()
+        if not forzar and ahora - self.sincronizados.get(tabla, 0) < INTERVALO_SINCRONIZACION:
+            return
+        
+        self.sincronizados[tabla] = ahora
+        archivos = glob.glob(f"{info['path']}/**/*.parquet", recursive=True)
+        if len(archivos) != info['count'] or set(archivos) != set(info['files']):
+            info['files'] = archivos
+            info['count'] = len(archivos)
+
+    def archivos_stream(self, tabla):
+        """Archivos escritos por la ingesta en micro-lotes (posteriores a los rollups del conversor)"""
+        self.sincronizar_archivos(tabla)
+        return sorted(a for a in self.datasets[tabla]['files'] if es_archivo_stream(a))
+
+    def ejecutar_consulta(self, sql, descripcion="", formato="pandas", batch_size=100_000):
+        """
+        Ejecuta una consulta SQL y devuelve el resultado
+        
+        Args:
+            formato: 'pandas' (DataFrame), 'arrow' (pyarrow.Table, sin copia a pandas)
+                o 'reader' (pyarrow.RecordBatchReader en lotes de batch_size filas,
+                sin materializar el resultado ni pasar por la caché)
+        """
         try:
             if descripcion:
                 print(f"🔍 {descripcion}")
             
             print(f"📝 SQL: {sql}")
-            resultado = self.conn.execute(sql).fetchdf()
-            print(f"✅ Resultado: {len(resultado)} filas")
-            return resultado
+            
+            for nombre in self.datasets_consulta(sql):
+                info = self.datasets[nombre]
+                if not info.get('remoto'):
+                    self.sincronizar_archivos(nombre)
+                    self.materializador.registrar_acceso(nombre, info, self.select_vista(info, excluir=['filename']))
+            
+            if formato == 'reader':
+                return lector_arrow(self.conn.execute(sql), batch_size)
+            
+            start_time = time.time()
+            archivos = self.archivos_consulta(sql) if self.cache is not None else None
+            tabla = self.cache.obtener(sql, archivos) if archivos is not None else None
+            
+            if tabla is not None:
+                print(f"♻️  Resultado desde caché: {tabla.num_rows} filas")
+                origen = 'caché'
+            else:
+                tabla = lector_arrow(self.conn.execute(sql), batch_size).read_all()
+                if archivos is not None:
+                    self.cache.guardar(sql, archivos, tabla, time.time() - start_time)
+                print(f"✅ Resultado: {tabla.num_rows} filas")
+                origen = 'parquet'
+            
+            if self.perfilador is not None:
+                self.perfilador.registrar(sql, time.time() - start_time, self.ruta_perfil, origen)
+            
+            return tabla if formato == 'arrow' else tabla.to_pandas()
             
         except Exception as e:
             print(f"❌ Error en consulta: {e}")
             return None
 
-    def analisis_exploratorio_ventas(self):
-        """Análisis exploratorio específico para ventas"""
-        print(f"\n🛍️  ANÁLISIS DE VENTAS")
-        print("=" * 40)
+    def consulta_arrow(self, sql, descripcion=""):
+        """Ejecuta una consulta y devuelve un pyarrow.Table"""
+        return self.ejecutar_consulta(sql, descripcion, formato='arrow')
+
+    def consulta_stream(self, sql, batch_size=100_000):
+        """Ejecuta una consulta y devuelve un RecordBatchReader para consumirla por lotes"""
+        return self.ejecutar_consulta(sql, formato='reader', batch_size=batch_size)
+
+    def normalizar_sql(self, sql):
+        """Normaliza espacios para comparar expresiones SQL"""
+        return ' '.join(sql.split())
+
+    def rollup_cubre_medida(self, rollup, funcion, columna, aproximado=False):
+        """
+        Indica si un rollup tiene los parciales necesarios para una medida.
+        COUNT(DISTINCT) solo es exacto si la columna es una dimensión del
+        rollup; desde su sketch HLL únicamente en modo aproximado
+        """
+        if funcion == 'count':
+            return True
+        if funcion in ('sum', 'avg', 'min', 'max'):
+            return columna in rollup['medidas']
+        if funcion == 'count_distinct':
+            es_dimension = self.normalizar_sql(rollup['dimensiones'].get(columna, '')) == columna
+            return es_dimension or (aproximado and columna in rollup['distintos'])
+        return False
+
+    def buscar_rollup(self, tabla, dimensiones, medidas, aproximado=None):
+        """
+        Busca el rollup más pequeño que cubre las dimensiones y medidas pedidas.
+        aproximado (por defecto modo_aproximado) admite COUNT(DISTINCT) desde HLL
+        """
+        if aproximado is None:
+            aproximado = self.modo_aproximado
+        candidatos = []
+        
+        for rollup in self.rollups.get(tabla, []):
+            dims_rollup = {d: self.normalizar_sql(e) for d, e in rollup['dimensiones'].items()}
+            if any(dims_rollup.get(d) != self.normalizar_sql(e) for d, e in dimensiones.items()):
+                continue
+            if not all(self.rollup_cubre_medida(rollup, f, c, aproximado) for _, f, c in medidas):
+                continue
+            if not Path(rollup['file']).exists():
+                continue
+            candidatos.append(rollup)
+        
+        return min(candidatos, key=lambda r: r['rows'], default=None)
+
+    def sql_hll(self, rollup, dims, columna):
+        """SQL que combina los sketches HLL de un rollup y estima la cardinalidad por grupo"""
+        m = 2 ** rollup['hll_p']
+        alpha = 0.7213 / (1 + 1.079 / m)
+        dims_sql = ''.join(f"{d}, " for d in dims)
+        
+        return f"""
+            SELECT {dims_sql}COALESCE(ROUND(CASE WHEN e <= {2.5 * m} AND v > 0 THEN {m} * ln({m} / v) ELSE e END), 0)::BIGINT AS est
+            FROM (
+                SELECT {dims_sql}{alpha * m * m} / (SUM(pow(2.0, -r)) + {m} - COUNT(*)) AS e, {m} - COUNT(*) AS v
+                FROM (
+                    SELECT {dims_sql}reg.i AS i, MAX(reg.r) AS r
+                    FROM (SELECT {dims_sql}UNNEST(hll_{columna}) AS reg FROM r)
+                    GROUP BY ALL
+                )
+                GROUP BY ALL
+            )"""
+
+    def tipos_columnas(self, tabla):
+        """Tipos DuckDB de las columnas de una vista (cacheados hasta que se recrea)"""
+        if tabla not in self.tipos:
+            cursor = self.conn.cursor()
+            try:
+                self.tipos[tabla] = dict(cursor.execute(f"SELECT column_name, column_type FROM (DESCRIBE {tabla})").fetchall())
+            finally:
+                cursor.close()
+        return self.tipos[tabla]
+
+    def sql_desde_rollup(self, rollup, dimensiones, medidas, order_by=None, limit=None, fuente=None, tipos=None,
+                         confianza=0.95):
+        """
+        Reescribe una consulta agregada para combinar los parciales de un rollup.
+        fuente reemplaza el archivo del rollup (p.ej. los parciales de los workers).
+        tipos (columna -> tipo de la vista) devuelve los SUM de columnas enteras
+        como BIGINT. Los COUNT(DISTINCT) estimados con HLL llevan además
+        <alias>_margen, como en el modo aproximado
+        """
+        dims = list(dimensiones)
+        select = list(dims)
+        fuente = fuente or f"read_parquet('{Path(rollup['file']).as_posix()}')"
+        ctes = [f"r AS (SELECT * FROM {fuente})"]
+        joins = []
+        # Error estándar relativo de HLL: 1.04 / sqrt(m)
+        error_hll = NormalDist().inv_cdf((1 + confianza) / 2) * 1.04 / math.sqrt(2 ** rollup['hll_p'])
+        
+        for alias, funcion, col in medidas:
+            if funcion == 'count':
+                select.append(f"SUM(n)::BIGINT AS {alias}")
+            elif funcion == 'sum':
+                cast = '::BIGINT' if (tipos or {}).get(col) in TIPOS_ENTEROS else ''
+                select.append(f"SUM(sum_{col}){cast} AS {alias}")
+            elif funcion == 'avg':
+                select.append(f"SUM(sum_{col}) / SUM(count_{col}) AS {alias}")
+            elif funcion in ('min', 'max'):
+                select.append(f"{funcion.upper()}({funcion}_{col}) AS {alias}")
+            elif col in rollup['dimensiones']:
+                select.append(f"COUNT(DISTINCT {col}) AS {alias}")
+            else:
+                ctes.append(f"h_{alias} AS ({self.sql_hll(rollup, dims, col)})")
+                select.append(f"ANY_VALUE(h_{alias}.est) AS {alias}")
+                select.append(f"ROUND(ANY_VALUE(h_{alias}.est) * {error_hll}, 1) AS {alias}_margen")
+                joins.append(f"JOIN h_{alias} USING ({', '.join(dims)})" if dims else f"CROSS JOIN h_{alias}")
+        
+        sql = f"WITH {', '.join(ctes)}\nSELECT {', '.join(select)}\nFROM r {' '.join(joins)}"
+        if dims:
+            sql += f"\nGROUP BY {', '.join(dims)}"
+        if order_by:
+            sql += f"\nORDER BY {order_by}"
+        if limit:
+            sql += f"\nLIMIT {limit}"
+        return sql
+
+    def sql_agregado(self, tabla, dimensiones, medidas, order_by=None, limit=None, desde=None):
+        """
+        Genera el SQL agregado equivalente sobre los datos crudos. desde
+        reemplaza la vista del FROM (p.ej. la vista podada por zone maps)
+        """
+        funciones = {'count': 'COUNT', 'sum': 'SUM', 'avg': 'AVG', 'min': 'MIN', 'max': 'MAX'}
+        select = [expr if expr == dim else f"{expr} AS {dim}" for dim, expr in dimensiones.items()]
+        
+        for alias, funcion, col in medidas:
+            if funcion == 'count_distinct':
+                select.append(f"COUNT(DISTINCT {self.columna_id(tabla, col)}) AS {alias}")
+            else:
+                select.append(f"{funciones[funcion]}({col}) AS {alias}")
+        
+        sql = f"SELECT {', '.join(select)}\nFROM {desde or tabla}"
+        if dimensiones:
+            sql += f"\nGROUP BY {', '.join(str(i) for i in range(1, len(dimensiones) + 1))}"
+        if order_by:
+            sql += f"\nORDER BY {order_by}"
+        if limit:
+            sql += f"\nLIMIT {limit}"
+        return sql
+
+    def plan_consulta_agregada(self, tabla, dimensiones, medidas, order_by=None, limit=None, filtros=None,
+                               aproximado=None):
+        """
+        Devuelve (sql, rollup) para una consulta agregada; rollup es None si se lee el dataset.
+        Con filtros sobre expresiones derivadas se lee la vista podada por zone maps
+        """
+        if filtros:
+            desde = self.vista_podada(tabla, filtros)
+            return self.sql_agregado(tabla, dimensiones, medidas, order_by, limit, desde=desde), None
+        
+        rollup = self.buscar_rollup(tabla, dimensiones, medidas, aproximado) if self.usar_rollups else None
+        
+        if rollup is not None:
+            fuente = self.fuente_rollup_con_delta(tabla, rollup, dimensiones, medidas)
+            sql = self.sql_desde_rollup(rollup, dimensiones, medidas, order_by, limit, fuente=fuente,
+                                        tipos=self.tipos_columnas(tabla))
+            return sql, rollup
+        return self.sql_agregado(tabla, dimensiones, medidas, order_by, limit), None
+
+    def fuente_rollup_con_delta(self, tabla, rollup, dimensiones, medidas):
+        """
+        Fuente de un rollup más los parciales de los archivos de la ingesta
+        escritos después de él, en el mismo formato (ver sql_parcial), para
+        que la respuesta incluya los eventos recientes. None si no hay
+        archivos nuevos. Los COUNT(DISTINCT) de columnas que el rollup guarda
+        como dimensión se agrupan también por ella en el delta
+        """
+        archivos = self.archivos_stream(tabla)
+        if not archivos:
+            return None
+        
+        dims_delta = dict(dimensiones)
+        for _, funcion, col in medidas:
+            if funcion == 'count_distinct' and col not in dims_delta and col in rollup['dimensiones']:
+                dims_delta[col] = rollup['dimensiones'][col]
+        
+        info = self.datasets[tabla]
+        lista = ', '.join("'" + a.replace("'", "''") + "'" for a in archivos)
+        desde = f"({self.select_vista(info)} FROM read_parquet([{lista}], {info.get('opciones_lectura', self.opciones_lectura(info))}))"
+        delta = sql_parcial(desde, dims_delta, medidas, lambda col: self.columna_id(tabla, col))
+        return f"(SELECT * FROM read_parquet('{Path(rollup['file']).as_posix()}') UNION ALL BY NAME ({delta}))"
+
+    def sql_lote(self, tabla, consultas):
+        """
+        Combina varias consultas agregadas sobre la misma vista en un único
+        scan con GROUPING SETS. Cada consulta recibe en consulta['lote'] el
+        identificador de su grouping set y el nombre interno de sus medidas.
+        
+        Devuelve None si las dimensiones de las consultas no son compatibles.
+        """
+        funciones = {'count': 'COUNT', 'sum': 'SUM', 'avg': 'AVG', 'min': 'MIN', 'max': 'MAX'}
+        dimensiones = {}
+        medidas = {}
         
-        # 1. Resumen general
-        sql_resumen = """
-        SELECT 
-            COUNT(*) as total_ordenes,
-            SUM(total) as revenue_total,
-            AVG(total) as ticket_promedio,
-            COUNT(DISTINCT cliente_id) as clientes_unicos,
-            COUNT(DISTINCT categoria) as categorias
-        FROM ventas
-        """
-        
-        resumen = self.ejecutar_consulta(sql_resumen, "Resumen general de ventas")
-        if resumen is not None:
-            print(resumen.to_string(index=False))
-        
-        # 2. Ventas por categoría
-        print(f"\n📊 Top categorías por revenue:")
-        sql_categoria = """
-        SELECT 
-            categoria,
-            COUNT(*) as ordenes,
-            SUM(total) as revenue,
-            AVG(total) as ticket_promedio
-        FROM ventas 
-        GROUP BY categoria 
-        ORDER BY revenue DESC
-        """
-        
-        cat_result = self.ejecutar_consulta(sql_categoria)
-        if cat_result is not None:
-            print(cat_result.to_string(index=False))
-        
-        # 3. Tendencia temporal (si hay columna fecha)
+        for consulta in consultas:
+            for dim, expr in consulta['dimensiones'].items():
+                if dim in dimensiones and self.normalizar_sql(dimensiones[dim]) != self.normalizar_sql(expr):
+                    return None
+                dimensiones[dim] = expr
+            for _, funcion, col in consulta['medidas']:
+                if funcion == 'count_distinct':
+                    expr = f"COUNT(DISTINCT {self.columna_id(tabla, col)})"
+                else:
+                    expr = f"{funciones[funcion]}({col})"
+                medidas.setdefault(expr, f"__m{len(medidas)}")
+        
+        dims = list(dimensiones)
+        grouping = f"GROUPING({', '.join(dimensiones.values())})" if dims else "0"
+        sets = []
+        
+        for consulta in consultas:
+            # GROUPING() pone a 1 el bit de cada dimensión no agrupada (la primera es el bit más alto)
+            grupo = sum(1 << (len(dims) - 1 - i) for i, dim in enumerate(dims) if dim not in consulta['dimensiones'])
+            alias_medidas = []
+            for alias, funcion, col in consulta['medidas']:
+                expr = f"COUNT(DISTINCT {self.columna_id(tabla, col)})" if funcion == 'count_distinct' else f"{funciones[funcion]}({col})"
+                alias_medidas.append((alias, medidas[expr]))
+            consulta['lote'] = {'grupo': grupo, 'medidas': alias_medidas}
+            sets.append(f"({', '.join(dimensiones[dim] for dim in consulta['dimensiones'])})")
+        
+        select = [f"{expr} AS {dim}" for dim, expr in dimensiones.items()]
+        select += [f"{expr} AS {alias}" for expr, alias in medidas.items()]
+        select.append(f"{grouping} AS __grupo")
+        
+        return f"SELECT {', '.join(select)}\nFROM {tabla}\nGROUP BY GROUPING SETS ({', '.join(dict.fromkeys(sets))})"
+
+    def separar_lote(self, tabla, consulta):
+        """Extrae de un resultado de GROUPING SETS (pyarrow.Table) las filas y columnas de una consulta"""
+        select = list(consulta['dimensiones'])
+        select += [f"{interna} AS {alias}" for alias, interna in consulta['lote']['medidas']]
+        
+        sql = f"SELECT {', '.join(select)} FROM lote WHERE __grupo = {consulta['lote']['grupo']}"
+        if consulta.get('order_by'):
+            sql += f" ORDER BY {consulta['order_by']}"
+        if consulta.get('limit'):
+            sql += f" LIMIT {consulta['limit']}"
+        
+        cursor = self.conn.cursor()
         try:
-            print(f"\n📈 Ventas por mes:")
-            sql_temporal = """
-            SELECT 
-                strftime(fecha, '%Y-%m') as mes,
-                COUNT(*) as ordenes,
-                SUM(total) as revenue
-            FROM ventas 
-            GROUP BY strftime(fecha, '%Y-%m')
-            ORDER BY mes
-            """
+            cursor.register('lote', tabla)
+            return lector_arrow(cursor.execute(sql)).read_all()
+        finally:
+            cursor.close()
+
+    def zona_admite(self, zona, operador, valor):
+        """True si un row group con esta zona puede contener filas que cumplan la condición"""
+        minimo, maximo, valores = zona.get('min'), zona.get('max'), zona.get('valores')
+        if minimo is None:
+            return False  # row group sin valores no nulos
+        
+        try:
+            if operador == '=':
+                return valor in valores if valores is not None else minimo <= valor <= maximo
+            if operador == 'in':
+                if valores is not None:
+                    return any(v in valores for v in valor)
+                return any(minimo <= v <= maximo for v in valor)
+            if operador == 'between':
+                return valor[0] <= maximo and valor[1] >= minimo
+            if operador == '<':
+                return minimo < valor
+            if operador == '<=':
+                return minimo <= valor
+            if operador == '>':
+                return maximo > valor
+            if operador == '>=':
+                return maximo >= valor
+        except TypeError:
+            pass  # tipos no comparables: no se poda
+        return True
+
+    def podar_por_zonas(self, tabla, condiciones):
+        """
+        Selecciona los archivos y row groups de un dataset que pueden cumplir
+        condiciones sobre expresiones derivadas, según los zone maps guardados
+        por el conversor.
+        
+        Args:
+            condiciones: Lista de (alias, operador, valor) con operador en
+                =, in, between, <, <=, >, >= y alias una expresión registrada
+                (p.ej. ('mes', '=', '2024-03') o ('banda_salario', '>=', 4))
+        
+        Returns:
+            Dict archivo -> lista de row groups (None = todos)
+        """
+        zonas = self.zonas.get(tabla) or {}
+        por_archivo = {
+            str(Path(self.datasets[tabla]['path']) / ruta): row_groups
+            for ruta, row_groups in zonas.get('archivos', {}).items()
+        }
+        
+        seleccion = {}
+        for archivo in sorted(glob.glob(f"{self.datasets[tabla]['path']}/**/*.parquet", recursive=True)):
+            row_groups = por_archivo.get(archivo)
+            if row_groups is None:
+                seleccion[archivo] = None  # sin zone map (archivo nuevo): se lee entero
+                continue
             
-            temporal_result = self.ejecutar_consulta(sql_temporal)
-            if temporal_result is not None:
-                print(temporal_result.to_string(index=False))
-                
-        except:
-            print("⚠️  No se pudo analizar tendencia temporal")
-        
-        # 4. Top productos
-        print(f"\n🏆 Top 10 productos:")
-        sql_productos = """
-        SELECT 
-            producto,
-            COUNT(*) as ventas,
-            SUM(total) as revenue
-        FROM ventas 
-        GROUP BY producto 
-        ORDER BY revenue DESC 
-        LIMIT 10
-        """
-        
-        productos_result = self.ejecutar_consulta(sql_productos)
-        if productos_result is not None:
-            print(productos_result.to_string(index=False))
+            vivos = [
+                rg['row_group'] for rg in row_groups
+                if all(
+                    alias not in rg['zonas'] or self.zona_admite(rg['zonas'][alias], operador, valor)
+                    for alias, operador, valor in condiciones
+                )
+            ]
+            if vivos:
+                seleccion[archivo] = None if len(vivos) == len(row_groups) else vivos
+        
+        return seleccion
 
-    def analisis_exploratorio_empleados(self):
-        """Análisis exploratorio específico para empleados"""
-        print(f"\n👥 ANÁLISIS DE EMPLEADOS")
-        print("=" * 40)
+    def literal_sql(self, valor):
+        """Literal SQL de un valor de condición"""
+        if isinstance(valor, str):
+            return "'" + valor.replace("'", "''") + "'"
+        return repr(valor)
+
+    def condicion_sql(self, expr, operador, valor):
+        """WHERE de una condición (alias, operador, valor) sobre su expresión"""
+        if operador == 'in':
+            return f"({expr}) IN ({', '.join(self.literal_sql(v) for v in valor)})"
+        if operador == 'between':
+            return f"({expr}) BETWEEN {self.literal_sql(valor[0])} AND {self.literal_sql(valor[1])}"
+        return f"({expr}) {operador} {self.literal_sql(valor)}"
+
+    def vista_podada(self, tabla, condiciones):
+        """
+        Crea la vista <tabla>_zonas con solo los archivos y row groups que
+        pueden cumplir las condiciones (ver podar_por_zonas) más el WHERE de
+        las expresiones. Los archivos descartados no se listan y, en los
+        parciales, el filtro por file_row_number sobre los rangos de los row
+        groups vivos hace que DuckDB salte el resto.
+        
+        Returns:
+            Nombre de la vista
+        """
+        info = self.datasets[tabla]
+        zonas = self.zonas.get(tabla) or {}
+        expresiones = zonas.get('expresiones', {})
+        desconocidas = [alias for alias, _, _ in condiciones if alias not in expresiones]
+        if desconocidas:
+            raise ValueError(f"Expresiones sin zone map en {tabla}: {desconocidas}")
+        
+        seleccion = self.podar_por_zonas(tabla, condiciones)
+        where = ' AND '.join(self.condicion_sql(expresiones[alias], op, valor) for alias, op, valor in condiciones)
+        opciones = f"{info.get('opciones_lectura', self.opciones_lectura(info))}, file_row_number = true"
+        
+        def lista(archivos):
+            return "[" + ', '.join("'" + a.replace("'", "''") + "'" for a in archivos) + "]"
+        
+        # Archivos completos en un único scan; los parciales con sus rangos de filas
+        completos = [archivo for archivo, rgs in seleccion.items() if rgs is None]
+        scans = [f"SELECT * FROM read_parquet({lista(completos)}, {opciones})"] if completos else []
+        por_archivo = {
+            str(Path(info['path']) / ruta): row_groups for ruta, row_groups in zonas.get('archivos', {}).items()
+        }
+        for archivo, rgs in seleccion.items():
+            if rgs is None:
+                continue
+            inicio, rangos = 0, []
+            for rg in por_archivo[archivo]:
+                if rg['row_group'] in rgs:
+                    rangos.append(f"file_row_number BETWEEN {inicio} AND {inicio + rg['rows'] - 1}")
+                inicio += rg['rows']
+            scans.append(f"SELECT * FROM read_parquet({lista([archivo])}, {opciones}) WHERE {' OR '.join(rangos)}")
+        
+        nombre = f"{tabla}_zonas"
+        if scans:
+            fuente = '\n UNION ALL BY NAME \n'.join(scans)
+            # El WHERE va sobre las columnas de la vista (dinero en DECIMAL, IDs como texto), no las crudas
+            self.conn.execute(f"""
+            CREATE OR REPLACE TEMP VIEW {nombre} AS
+            SELECT * FROM ({self.select_vista(info, excluir=['file_row_number'])} FROM ({fuente})) WHERE {where}
+            """)
+        else:
+            # Ningún row group puede cumplir las condiciones
+            self.conn.execute(f"CREATE OR REPLACE TEMP VIEW {nombre} AS SELECT * FROM {tabla} WHERE false")
+        
+        total = sum(len(rgs) for rgs in zonas.get('archivos', {}).values())
+        leidos = sum(len(rgs) if rgs is not None else len(por_archivo.get(a, [None])) for a, rgs in seleccion.items())
+        print(f"🗺️  Zone maps: {len(seleccion)}/{info['count']} archivos, {leidos}/{total} row groups")
+        return nombre
+
+    def consulta_agregada(self, tabla, dimensiones, medidas, order_by=None, limit=None, descripcion="", formato="pandas",
+                          filtros=None, aproximado=None):
+        """
+        Ejecuta una consulta GROUP BY, respondiéndola desde un rollup cuando
+        alguno cubre las dimensiones y medidas pedidas
+        
+        Args:
+            tabla: Vista del dataset
+            dimensiones: Dict nombre -> expresión SQL de agrupación
+            medidas: Lista de (alias, funcion, columna) con funcion en
+                count, sum, avg, min, max, count_distinct
+            order_by: Cláusula ORDER BY opcional
+            limit: LIMIT opcional
+            formato: 'pandas' o 'arrow' (ver ejecutar_consulta)
+            filtros: Lista de (alias, operador, valor) sobre expresiones derivadas
+                registradas (ver podar_por_zonas)
+            aproximado: Admitir COUNT(DISTINCT) estimados con HLL desde un rollup,
+                con su <alias>_margen (por defecto modo_aproximado)
+        """
+        sql, rollup = self.plan_consulta_agregada(tabla, dimensiones, medidas, order_by, limit, filtros, aproximado)
+        
+        if rollup is not None:
+            print(self.mensaje_rollup(tabla, rollup))
+        
+        return self.ejecutar_consulta(sql, descripcion, formato)
+
+    def mensaje_rollup(self, tabla, rollup):
+        """Línea de consola de una consulta respondida desde un rollup (y los archivos nuevos de la ingesta)"""
+        nuevos = len(self.archivos_stream(tabla))
+        return (f"⚡ Respondida desde rollup '{rollup['nombre']}' ({rollup['rows']:,} grupos"
+                f"{f' + {nuevos} archivo(s) de la ingesta' if nuevos else ''})")
+
+    def particiones_dataset(self, tabla):
+        """Archivos del dataset agrupados por directorio de partición (p.ej. año=2025/categoria=ropa)"""
+        path = Path(self.datasets[tabla]['path'])
+        particiones = {}
+        for archivo in sorted(glob.glob(f"{path}/**/*.parquet", recursive=True)):
+            particiones.setdefault(Path(archivo).parent.relative_to(path).as_posix(), []).append(archivo)
+        return particiones
+
+    def executor_distribuido(self, workers=None):
+        """ScatterGatherExecutor con workers procesos, reutilizado entre consultas"""
+        workers = workers or self.perfil['threads']
+        if workers not in self.executors:
+            self.executors[workers] = ScatterGatherExecutor(workers)
+        return self.executors[workers]
+
+    def consulta_distribuida(self, tabla, dimensiones, medidas, order_by=None, limit=None, workers=None,
+                             descripcion="", formato="pandas", aproximado=None):
+        """
+        Ejecuta una consulta agregada en scatter-gather: las particiones del
+        dataset se reparten entre procesos worker que calculan parciales
+        combinables (n, sum/count/min/max, sketches HLL) y el coordinador los
+        combina como si fueran un rollup. avg se combina como sum/count.
+        COUNT(DISTINCT) es exacto: los workers agrupan también por la columna
+        y el coordinador cuenta sus valores distintos. En modo aproximado se
+        estima con los sketches HLL (parciales más pequeños) y lleva
+        <alias>_margen.
+        
+        Args: ver consulta_agregada; workers es el número de procesos
+        """
+        if aproximado is None:
+            aproximado = self.modo_aproximado
+        if descripcion:
+            print(f"🔍 {descripcion}")
+        
+        info = self.datasets[tabla]
+        executor = self.executor_distribuido(workers)
+        opciones = info.get('opciones_lectura', self.opciones_lectura(info))
+        
+        dims_parcial = dict(dimensiones)
+        if not aproximado:
+            for _, funcion, col in medidas:
+                if funcion == 'count_distinct' and col not in dims_parcial:
+                    dims_parcial[col] = self.columna_id(tabla, col)
+        
+        start_time = time.time()
+        consultas = []
+        for archivos in executor.asignar(self.particiones_dataset(tabla)):
+            lista = ', '.join("'" + a.replace("'", "''") + "'" for a in archivos)
+            desde = f"({self.select_vista(info)} FROM read_parquet([{lista}], {opciones}))"
+            consultas.append(sql_parcial(desde, dims_parcial, medidas, lambda col: self.columna_id(tabla, col)))
+        
+        parciales = executor.ejecutar(consultas)
+        scatter_s = time.time() - start_time
+        
+        combinado = pa.concat_tables([p['tabla'] for p in parciales], promote_options='default')
+        sql = self.sql_desde_rollup(
+            {'hll_p': HLL_P, 'dimensiones': list(dims_parcial)}, dimensiones, medidas, order_by, limit, fuente='parciales'
+        )
+        cursor = self.conn.cursor()
+        try:
+            cursor.register('parciales', combinado)
+            tabla_resultado = lector_arrow(cursor.execute(sql)).read_all()
+        finally:
+            cursor.close()
+        
+        print(f"🔀 Scatter-gather: {len(parciales)} workers, {combinado.num_rows:,} parciales, "
+              f"worker más lento {max(p['segundos'] for p in parciales) * 1000:.1f}ms, "
+              f"total {(time.time() - start_time) * 1000:.1f}ms (gather {(time.time() - start_time - scatter_s) * 1000:.1f}ms)")
+        
+        return tabla_resultado if formato == 'arrow' else tabla_resultado.to_pandas()
+
+    def archivos_bucket(self, tabla, bucket):
+        """Archivos de un bucket del dataset (uno por partición más los de la ingesta)"""
+        spec = self.buckets.get(tabla) or {}
+        self.sincronizar_archivos(tabla)
+        return [archivo for archivo in self.datasets[tabla]['files'] if es_archivo_de_bucket(archivo, spec['patron'], bucket)]
+
+    def bucket_de(self, tabla, valor):
+        """
+        Bucket de un valor de la clave, evaluando la misma expresión que usó
+        el conversor. Los IDs compactados se pasan como string ('CUST-00755')
+        o como entero
+        """
+        spec = self.buckets.get(tabla) or {}
+        if not spec:
+            raise ValueError(f"'{tabla}' no tiene bucketing (ver buckets.BUCKETS_POR_DEFECTO en los conversores)")
+        
+        id_spec = self.id_columns.get(tabla, {}).get(spec['columna'])
+        if id_spec and isinstance(valor, str):
+            if not valor.startswith(id_spec['prefix']) or not valor[len(id_spec['prefix']):].isdigit():
+                return None
+            valor = int(valor[len(id_spec['prefix']):])
+        
+        cursor = self.conn.cursor()
+        try:
+            return cursor.execute(
+                f"SELECT {spec['expresion']} FROM (SELECT {self.literal_sql(valor)} AS \"{spec['columna']}\")"
+            ).fetchone()[0]
+        finally:
+            cursor.close()
+
+    def fuente_bucket(self, tabla, bucket):
+        """Subconsulta con las filas de un bucket, con las mismas columnas que la vista"""
+        archivos = self.archivos_bucket(tabla, bucket)
+        if not archivos:
+            return f"(SELECT * FROM {tabla} WHERE false)"
+        info = self.datasets[tabla]
+        lista = ', '.join("'" + a.replace("'", "''") + "'" for a in archivos)
+        return f"({self.select_vista(info)} FROM read_parquet([{lista}], {info['opciones_lectura']}))"
+
+    def sql_por_clave(self, tabla, valores, columnas="*"):
+        """
+        SQL de una búsqueda por la columna de bucketing que lee solo los
+        archivos de los buckets de los valores
+        
+        Returns:
+            (sql, buckets leídos)
+        """
+        valores = valores if isinstance(valores, (list, tuple, set)) else [valores]
+        columna = self.buckets.get(tabla, {}).get('columna')
+        buckets = sorted({b for b in (self.bucket_de(tabla, v) for v in valores) if b is not None})
+        
+        # IDs compactados pasados como entero: filtrar por <col>_num
+        if all(isinstance(v, int) for v in valores):
+            columna = self.columna_id(tabla, columna)
+        filtro = f'"{columna}" IN ({", ".join(self.literal_sql(v) for v in valores)})'
+        fuentes = [self.fuente_bucket(tabla, b) for b in buckets] or [f"(SELECT * FROM {tabla} WHERE false)"]
+        sql = '\nUNION ALL\n'.join(f"SELECT {columnas} FROM {fuente} WHERE {filtro}" for fuente in fuentes)
+        return sql, buckets
+
+    def consulta_por_clave(self, tabla, valores, columnas="*", descripcion="", formato="pandas"):
+        """
+        Búsqueda puntual por la columna de bucketing: solo se leen los
+        archivos de los buckets de los valores pedidos
+        
+        Args:
+            tabla: Vista del dataset (con bucketing en su metadata)
+            valores: Valor o lista de valores de la clave
+            columnas: Columnas del SELECT
+            formato: 'pandas' o 'arrow' (ver ejecutar_consulta)
+        """
+        sql, buckets = self.sql_por_clave(tabla, valores, columnas)
+        print(f"🪣 Buckets: {len(buckets)}/{self.buckets[tabla]['buckets']} "
+              f"({sum(len(self.archivos_bucket(tabla, b)) for b in buckets)}/{self.datasets[tabla]['count']} archivos)")
+        return self.ejecutar_consulta(sql, descripcion, formato)
+
+    def consulta_por_buckets(self, sql, tablas, order_by=None, limit=None, max_concurrencia=None,
+                             descripcion="", formato="pandas"):
+        """
+        Ejecuta una consulta bucket a bucket en paralelo (joins y agregaciones
+        por la columna de bucketing): en cada ejecución las tablas se sustituyen
+        por las filas de un mismo bucket y los resultados se concatenan. Solo es
+        correcto si la consulta agrupa o hace join por la clave de bucketing,
+        porque cada bucket contiene todas las filas de sus claves.
+        
+        Args:
+            sql: Consulta sobre las vistas de tablas
+            tablas: Vistas con el mismo número de buckets y la misma expresión
+            order_by: ORDER BY sobre el resultado combinado
+            limit: LIMIT sobre el resultado combinado
+            max_concurrencia: Buckets simultáneos (por defecto los threads del perfil)
+            formato: 'pandas' o 'arrow'
+        """
+        specs = [self.buckets.get(tabla) or {} for tabla in tablas]
+        if not all(specs):
+            raise ValueError(f"Tablas sin bucketing: {[t for t, s in zip(tablas, specs) if not s]}")
+        if len({(s['buckets'], s['expresion'].replace(f'"{s["columna"]}"', '')) for s in specs}) > 1:
+            raise ValueError("Las tablas deben tener el mismo número de buckets y el mismo tipo de clave")
+        
+        if descripcion:
+            print(f"🔍 {descripcion}")
+        
+        start_time = time.time()
+        consultas = []
+        for bucket in range(specs[0]['buckets']):
+            sql_bucket = sql
+            for tabla in tablas:
+                sql_bucket = re.sub(rf'\b{re.escape(tabla)}\b', lambda _: self.fuente_bucket(tabla, bucket), sql_bucket)
+            consultas.append(sql_bucket)
+        
+        executor = ConcurrentReportExecutor(self, max_concurrencia or self.perfil['threads'], self.perfilador)
+        parciales = executor.ejecutar(consultas)
+        errores = [p['error'] for p in parciales if p['error']]
+        if errores:
+            raise RuntimeError(errores[0])
+        
+        combinado = pa.concat_tables([p['tabla'] for p in parciales], promote_options='default')
+        if order_by or limit:
+            cursor = self.conn.cursor()
+            try:
+                cursor.register('parciales', combinado)
+                combinado = lector_arrow(cursor.execute(
+                    f"SELECT * FROM parciales"
+                    f"{f' ORDER BY {order_by}' if order_by else ''}{f' LIMIT {limit}' if limit else ''}"
+                )).read_all()
+            finally:
+                cursor.close()
+        
+        print(f"🪣 {len(consultas)} buckets en paralelo, bucket más lento "
+              f"{max(p['ejecucion_s'] for p in parciales) * 1000:.1f}ms, total {(time.time() - start_time) * 1000:.1f}ms")
+        return combinado if formato == 'arrow' else combinado.to_pandas()
+
+    def fuente_muestra(self, tabla):
+        """
+        SQL de la muestra de un dataset con las columnas __estrato, __pob y __mue.
+        Usa la muestra estratificada persistida o, si no existe, un muestreo
+        por bloques (row groups) de la vista con fraccion_muestreo.
+        """
+        muestra = (self.aproximados.get(tabla) or {}).get('muestra')
+        if muestra and Path(muestra['file']).exists():
+            return f"SELECT * FROM read_parquet('{Path(muestra['file']).as_posix()}')", 'muestra estratificada'
+        
+        total = self.conteos.get(tabla)
+        if total is None:
+            total = self.conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+        # Al menos ~100K filas: el muestreo por bloques descarta vectores completos
+        porcentaje = max(self.fraccion_muestreo, min(1.0, 100_000 / max(total, 1))) * 100
+        return (f"SELECT *, '' AS __estrato, {total}::BIGINT AS __pob, COUNT(*) OVER () AS __mue "
+                f"FROM {tabla} USING SAMPLE {porcentaje:g}% (system)"), f"muestreo por bloques {porcentaje:g}%"
+
+    def sql_aproximado(self, tabla, dimensiones, medidas, order_by=None, limit=None, confianza=0.95):
+        """
+        Reescribe una consulta agregada sobre la muestra del dataset con
+        estimadores Horvitz-Thompson estratificados. Cada medida devuelve
+        además <alias>_margen, la semiamplitud del intervalo de confianza
+        (min/max no tienen margen).
+        """
+        z = NormalDist().inv_cdf((1 + confianza) / 2)
+        fuente, _ = self.fuente_muestra(tabla)
+        dims = list(dimensiones)
+        select_dims = [f"{expr} AS {dim}" for dim, expr in dimensiones.items()]
+        
+        # Parciales por dimensión y estrato
+        parciales = ["ANY_VALUE(__pob)::DOUBLE AS pob", "ANY_VALUE(__mue)::DOUBLE AS mue", "COUNT(*) AS c"]
+        columnas = list(dict.fromkeys(col for _, funcion, col in medidas if funcion != 'count'))
+        for i, col in enumerate(columnas):
+            parciales += [f"SUM({col})::DOUBLE AS sx{i}", f"SUM({col}::DOUBLE * {col})::DOUBLE AS sxx{i}",
+                          f"COUNT({col}) AS cx{i}", f"MIN({col}) AS mn{i}", f"MAX({col}) AS mx{i}"]
+        
+        # Varianza estratificada de un total: sum_h N_h^2 (1 - n_h/N_h) s_h^2 / n_h
+        # (pob = N_h filas del estrato, mue = n_h filas muestreadas)
+        def varianza(suma, suma_cuadrados):
+            s2 = f"(({suma_cuadrados}) - ({suma}) * ({suma}) / mue) / NULLIF(mue - 1, 0)"
+            return f"SUM(pob * pob * (1 - mue / pob) * COALESCE({s2}, 0) / mue)"
+        
+        totales = []
+        select = list(dims)
+        for alias, funcion, col in medidas:
+            i = columnas.index(col) if col in columnas else None
+            if funcion == 'count':
+                select += [f"ROUND(SUM(pob / mue * c))::BIGINT AS {alias}",
+                           f"{z} * sqrt({varianza('c', 'c')}) AS {alias}_margen"]
+            elif funcion == 'sum':
+                select += [f"SUM(pob / mue * sx{i}) AS {alias}", f"{z} * sqrt({varianza(f'sx{i}', f'sxx{i}')}) AS {alias}_margen"]
+            elif funcion == 'avg':
+                # Estimador de razón, varianza por linealización z = x - R
+                totales.append(f"SUM(pob / mue * sx{i}) / NULLIF(SUM(pob / mue * cx{i}), 0) AS r{i}, SUM(pob / mue * cx{i}) AS tc{i}")
+                sz = f"(sx{i} - r{i} * cx{i})"
+                szz = f"(sxx{i} - 2 * r{i} * sx{i} + r{i} * r{i} * cx{i})"
+                select += [f"ANY_VALUE(r{i}) AS {alias}", f"{z} * sqrt({varianza(sz, szz)}) / ANY_VALUE(tc{i}) AS {alias}_margen"]
+            elif funcion == 'min':
+                select += [f"MIN(mn{i}) AS {alias}", f"NULL AS {alias}_margen"]
+            elif funcion == 'max':
+                select += [f"MAX(mx{i}) AS {alias}", f"NULL AS {alias}_margen"]
+        
+        ctes = [f"m AS ({fuente})",
+                f"g AS (SELECT {', '.join(select_dims + ['__estrato'] + parciales)} FROM m GROUP BY ALL)"]
+        desde = "g"
+        if totales:
+            por_dims = f" GROUP BY {', '.join(dims)}" if dims else ""
+            ctes.append(f"t AS (SELECT {', '.join(dims + totales)} FROM g{por_dims})")
+            condicion = ' AND '.join(f"g.{d} IS NOT DISTINCT FROM t.{d}" for d in dims) or "true"
+            desde = f"g JOIN t ON {condicion}"
+            select = [f"g.{s}" if s in dims else s for s in select]
+        
+        sql = f"WITH {', '.join(ctes)}\nSELECT {', '.join(select)}\nFROM {desde}"
+        if dims:
+            sql += f"\nGROUP BY {', '.join(f'g.{d}' for d in dims)}"
+        if order_by:
+            sql += f"\nORDER BY {order_by}"
+        if limit:
+            sql += f"\nLIMIT {limit}"
+        return sql
+
+    def cargar_sketches(self, tabla):
+        """Sketches HLL y de percentiles guardados en la conversión (None si no hay)"""
+        descriptor = (self.aproximados.get(tabla) or {}).get('sketches')
+        if not descriptor or not Path(descriptor['file']).exists():
+            return None
+        with open(descriptor['file'], 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def distintos_aproximados(self, tabla, columna, confianza=0.95):
+        """
+        Estima COUNT(DISTINCT columna) desde el sketch HLL del dataset.
+        Devuelve (estimación, margen) o None si no hay sketch.
+        """
+        sketches = self.cargar_sketches(tabla)
+        if not sketches or columna not in sketches['hll']:
+            return None
+        
+        registros = sketches['hll'][columna]
+        m = len(registros)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimacion = alpha * m * m / sum(2.0 ** -r for r in registros)
+        vacios = registros.count(0)
+        if estimacion <= 2.5 * m and vacios:
+            estimacion = m * math.log(m / vacios)
+        
+        margen = NormalDist().inv_cdf((1 + confianza) / 2) * 1.04 / math.sqrt(m) * estimacion
+        return round(estimacion), margen
+
+    def percentiles_aproximados(self, tabla, columna, percentiles=(0.5, 0.9, 0.95, 0.99)):
+        """
+        Percentiles de una columna interpolados desde el resumen de 101 puntos
+        guardado en la conversión. El intervalo es el de los percentiles
+        vecinos de la rejilla (error de rango <= 1%).
+        """
+        sketches = self.cargar_sketches(tabla)
+        if not sketches or columna not in sketches['quantiles']:
+            return None
+        
+        rejilla = sketches['percentiles']
+        valores = sketches['quantiles'][columna]['values']
+        filas = []
+        for p in percentiles:
+            j = min(int(p * (len(rejilla) - 1)), len(rejilla) - 2)
+            peso = (p - rejilla[j]) / (rejilla[j + 1] - rejilla[j])
+            filas.append({
+                'percentil': p,
+                'valor': valores[j] + peso * (valores[j + 1] - valores[j]),
+                'minimo': valores[j],
+                'maximo': valores[j + 1] if peso > 0 else valores[j]
+            })
+        return pd.DataFrame(filas)
+
+    def consulta_aproximada(self, tabla, dimensiones, medidas, order_by=None, limit=None, descripcion="",
+                            confianza=0.95, formato="pandas"):
+        """
+        Responde una consulta agregada en modo aproximado: desde un rollup si
+        alguno la cubre (exacto salvo COUNT DISTINCT con HLL, con su margen), desde los sketches para COUNT DISTINCT sin
+        dimensiones y, en otro caso, desde la muestra con márgenes de error.
+        Las consultas que no se pueden aproximar se ejecutan exactas.
+        """
+        rollup = self.buscar_rollup(tabla, dimensiones, medidas, aproximado=True) if self.usar_rollups else None
+        if rollup is not None:
+            return self.consulta_agregada(tabla, dimensiones, medidas, order_by, limit, descripcion, formato,
+                                          aproximado=True)
+        
+        distintos = [m for m in medidas if m[1] == 'count_distinct']
+        if distintos and dimensiones:
+            return self.consulta_agregada(tabla, dimensiones, medidas, order_by, limit, descripcion, formato)
         
-        # 1. Resumen por departamento
-        sql_departamentos = """
-        SELECT 
-            departamento,
-            COUNT(*) as empleados,
-            AVG(salario_anual) as salario_promedio,
-            AVG(performance_score) as performance_promedio,
-            AVG(satisfaccion_laboral) as satisfaccion_promedio
-        FROM empleados 
-        GROUP BY departamento 
-        ORDER BY salario_promedio DESC
-        """
-        
-        dept_result = self.ejecutar_consulta(sql_departamentos, "Análisis por departamento")
-        if dept_result is not None:
-            print(dept_result.round(2).to_string(index=False))
-        
-        # 2. Correlación salario vs performance
-        print(f"\n💰 Correlación salario vs performance:")
-        sql_correlacion = """
-        SELECT 
-            CASE 
+        estimados = {}
+        for alias, _, col in distintos:
+            estimados[alias] = self.distintos_aproximados(tabla, col, confianza)
+            if estimados[alias] is None:
+                return self.consulta_agregada(tabla, dimensiones, medidas, order_by, limit, descripcion, formato)
+        
+        _, origen = self.fuente_muestra(tabla)
+        print(f"≈ Aproximada desde {origen} (confianza {confianza:.0%})")
+        resto = [m for m in medidas if m[1] != 'count_distinct']
+        resultado = self.ejecutar_consulta(
+            self.sql_aproximado(tabla, dimensiones, resto or [('__filas', 'count', '*')], order_by, limit, confianza),
+            descripcion
+        )
+        if resultado is None:
+            return None
+        
+        if not resto:
+            resultado = resultado.drop(columns=['__filas', '__filas_margen'])
+        for alias, (estimacion, margen) in estimados.items():
+            resultado[alias] = estimacion
+            resultado[f"{alias}_margen"] = margen
+        
+        return pa.Table.from_pandas(resultado, preserve_index=False) if formato == 'arrow' else resultado
+
+    def consultas_ventas(self):
+        """Consultas predefinidas del análisis de ventas"""
+        return [
+            {
+                'descripcion': "Resumen general de ventas",
+                'tabla': 'ventas', 'dimensiones': {},
+                'medidas': [('total_ordenes', 'count', '*'),
+                            ('revenue_total', 'sum', 'total'),
+                            ('ticket_promedio', 'avg', 'total'),
+                            ('clientes_unicos', 'count_distinct', 'cliente_id'),
+                            ('categorias', 'count_distinct', 'categoria')]
+            },
+            {
+                'titulo': "📊 Top categorías por revenue:",
+                'tabla': 'ventas', 'dimensiones': {'categoria': 'categoria'},
+                'medidas': [('ordenes', 'count', '*'),
+                            ('revenue', 'sum', 'total'),
+                            ('ticket_promedio', 'avg', 'total')],
+                'order_by': "revenue DESC"
+            },
+            {
+                'titulo': "📈 Ventas por mes:",
+                'tabla': 'ventas', 'dimensiones': {'mes': "strftime(fecha, '%Y-%m')"},
+                'medidas': [('ordenes', 'count', '*'),
+                            ('revenue', 'sum', 'total')],
+                'order_by': "mes",
+                'aviso': "⚠️  No se pudo analizar tendencia temporal"
+            },
+            {
+                'titulo': "🏆 Top 10 productos:",
+                'tabla': 'ventas', 'dimensiones': {'producto': 'producto'},
+                'medidas': [('ventas', 'count', '*'),
+                            ('revenue', 'sum', 'total')],
+                'order_by': "revenue DESC", 'limit': 10
+            }
+        ]
+
+    def consultas_empleados(self):
+        """Consultas predefinidas del análisis de empleados"""
+        performance_nivel = """CASE 
                 WHEN performance_score >= 4.5 THEN 'Excelente (4.5+)'
                 WHEN performance_score >= 3.5 THEN 'Bueno (3.5-4.5)'
                 WHEN performance_score >= 2.5 THEN 'Regular (2.5-3.5)'
                 ELSE 'Bajo (<2.5)'
-            END as performance_nivel,
-            COUNT(*) as empleados,
-            AVG(salario_anual) as salario_promedio
-        FROM empleados 
-        GROUP BY 1 
-        ORDER BY salario_promedio DESC
-        """
-        
-        corr_result = self.ejecutar_consulta(sql_correlacion)
-        if corr_result is not None:
-            print(corr_result.to_string(index=False))
-        
-        # 3. Distribución de edad y experiencia
-        print(f"\n📊 Distribución de edad y experiencia:")
-        sql_distribucion = """
-        SELECT 
-            CASE 
+            END"""
+        rango_edad = """CASE 
                 WHEN edad < 30 THEN '< 30 años'
                 WHEN edad < 40 THEN '30-39 años'
                 WHEN edad < 50 THEN '40-49 años'
                 ELSE '50+ años'
-            END as rango_edad,
-            COUNT(*) as empleados,
-            AVG(años_experiencia) as experiencia_promedio,
-            AVG(salario_anual) as salario_promedio
-        FROM empleados 
-        GROUP BY 1 
-        ORDER BY experiencia_promedio
-        """
+            END"""
+        
+        return [
+            {
+                'descripcion': "Análisis por departamento",
+                'tabla': 'empleados', 'dimensiones': {'departamento': 'departamento'},
+                'medidas': [('empleados', 'count', '*'),
+                            ('salario_promedio', 'avg', 'salario_anual'),
+                            ('performance_promedio', 'avg', 'performance_score'),
+                            ('satisfaccion_promedio', 'avg', 'satisfaccion_laboral')],
+                'order_by': "salario_promedio DESC",
+                'redondeo': 2
+            },
+            {
+                'titulo': "💰 Correlación salario vs performance:",
+                'tabla': 'empleados', 'dimensiones': {'performance_nivel': performance_nivel},
+                'medidas': [('empleados', 'count', '*'),
+                            ('salario_promedio', 'avg', 'salario_anual')],
+                'order_by': "salario_promedio DESC"
+            },
+            {
+                'titulo': "📊 Distribución de edad y experiencia:",
+                'tabla': 'empleados', 'dimensiones': {'rango_edad': rango_edad},
+                'medidas': [('empleados', 'count', '*'),
+                            ('experiencia_promedio', 'avg', 'años_experiencia'),
+                            ('salario_promedio', 'avg', 'salario_anual')],
+                'order_by': "experiencia_promedio",
+                'redondeo': 2
+            }
+        ]
+
+    def consultas_marketing(self):
+        """Consultas predefinidas del análisis de marketing"""
+        return [
+            {
+                'descripcion': "Performance por canal",
+                'tabla': 'marketing', 'dimensiones': {'canal': 'canal'},
+                'medidas': [('campañas', 'count', '*'),
+                            ('inversion_total', 'sum', 'gasto_real'),
+                            ('conversiones_totales', 'sum', 'conversiones'),
+                            ('ctr_promedio', 'avg', 'ctr'),
+                            ('roas_promedio', 'avg', 'roas')],
+                'order_by': "inversion_total DESC",
+                'redondeo': 2
+            },
+            {
+                'titulo': "💰 ROI por tipo de campaña:",
+                'tabla': 'marketing', 'dimensiones': {'tipo_campaña': 'tipo_campaña'},
+                'medidas': [('campañas', 'count', '*'),
+                            ('roas_promedio', 'avg', 'roas'),
+                            ('ctr_promedio', 'avg', 'ctr'),
+                            ('inversion_total', 'sum', 'gasto_real')],
+                'order_by': "roas_promedio DESC",
+                'redondeo': 2
+            },
+            {
+                'titulo': "🎯 Eficiencia por audiencia objetivo:",
+                'tabla': 'marketing', 'dimensiones': {'audiencia_objetivo': 'audiencia_objetivo'},
+                'medidas': [('campañas', 'count', '*'),
+                            ('conversiones_promedio', 'avg', 'conversiones'),
+                            ('cpc_promedio', 'avg', 'cpc'),
+                            ('roas_promedio', 'avg', 'roas')],
+                'order_by': "roas_promedio DESC",
+                'redondeo': 2
+            }
+        ]
+
+    def secciones_analisis(self):
+        """Secciones del análisis completo (título, consultas) según los datasets cargados"""
+        secciones = []
+        if 'ventas' in self.datasets:
+            secciones.append(("🛍️  ANÁLISIS DE VENTAS", self.consultas_ventas()))
+        if 'empleados' in self.datasets:
+            secciones.append(("👥 ANÁLISIS DE EMPLEADOS", self.consultas_empleados()))
+        if 'marketing' in self.datasets:
+            secciones.append(("📈 ANÁLISIS DE MARKETING", self.consultas_marketing()))
+        return secciones
+
+    def mostrar_resultado(self, consulta, resultado):
+        """Imprime el resultado de una consulta predefinida"""
+        if resultado is None:
+            if consulta.get('aviso'):
+                print(consulta['aviso'])
+            return
+        if consulta.get('redondeo') is not None:
+            resultado = resultado.round(consulta['redondeo'])
+        print(resultado.to_string(index=False))
+
+    def ejecutar_seccion(self, titulo, consultas):
+        """Ejecuta secuencialmente las consultas de una sección del análisis"""
+        print(f"\n{titulo}")
+        print("=" * 40)
         
-        dist_result = self.ejecutar_consulta(sql_distribucion)
-        if dist_result is not None:
-            print(dist_result.round(2).to_string(index=False))
+        consultar = self.consulta_aproximada if self.modo_aproximado else self.consulta_agregada
+        for consulta in consultas:
+            if consulta.get('titulo'):
+                print(f"\n{consulta['titulo']}")
+            resultado = consultar(
+                consulta['tabla'], consulta['dimensiones'], consulta['medidas'],
+                order_by=consulta.get('order_by'), limit=consulta.get('limit'),
+                descripcion=consulta.get('descripcion', "")
+            )
+            self.mostrar_resultado(consulta, resultado)
+
+    def analisis_exploratorio_ventas(self):
+        """Análisis exploratorio específico para ventas"""
+        self.ejecutar_seccion("🛍️  ANÁLISIS DE VENTAS", self.consultas_ventas())
+
+    def analisis_exploratorio_empleados(self):
+        """Análisis exploratorio específico para empleados"""
+        self.ejecutar_seccion("👥 ANÁLISIS DE EMPLEADOS", self.consultas_empleados())
 
     def analisis_exploratorio_marketing(self):
         """Análisis exploratorio específico para marketing"""
-        print(f"\n📈 ANÁLISIS DE MARKETING")
-        print("=" * 40)
+        self.ejecutar_seccion("📈 ANÁLISIS DE MARKETING", self.consultas_marketing())
+
+    def ejecutar_analisis_concurrente(self, max_concurrencia=None):
+        """
+        Ejecuta todas las consultas predefinidas de forma concurrente y las
+        imprime en el orden del análisis secuencial, seguidas de los tiempos
+        de cola y ejecución de cada una.
+        
+        Args:
+            max_concurrencia: Tamaño del pool (por defecto self.max_concurrencia)
+        """
+        secciones = self.secciones_analisis()
+        pendientes = []
         
-        # 1. Performance por canal
-        sql_canales = """
-        SELECT 
-            canal,
-            COUNT(*) as campañas,
-            SUM(gasto_real) as inversion_total,
-            SUM(conversiones) as conversiones_totales,
-            AVG(ctr) as ctr_promedio,
-            AVG(roas) as roas_promedio
-        FROM marketing 
-        GROUP BY canal 
-        ORDER BY inversion_total DESC
-        """
-        
-        canales_result = self.ejecutar_consulta(sql_canales, "Performance por canal")
-        if canales_result is not None:
-            print(canales_result.round(2).to_string(index=False))
-        
-        # 2. ROI por tipo de campaña
-        print(f"\n💰 ROI por tipo de campaña:")
-        sql_roi = """
-        SELECT 
-            tipo_campaña,
-            COUNT(*) as campañas,
-            AVG(roas) as roas_promedio,
-            AVG(ctr) as ctr_promedio,
-            SUM(gasto_real) as inversion_total
-        FROM marketing 
-        GROUP BY tipo_campaña 
-        ORDER BY roas_promedio DESC
-        """
-        
-        roi_result = self.ejecutar_consulta(sql_roi)
-        if roi_result is not None:
-            print(roi_result.round(2).to_string(index=False))
-        
-        # 3. Eficiencia por audiencia
-        print(f"\n🎯 Eficiencia por audiencia objetivo:")
-        sql_audiencia = """
-        SELECT 
-            audiencia_objetivo,
-            COUNT(*) as campañas,
-            AVG(conversiones) as conversiones_promedio,
-            AVG(cpc) as cpc_promedio,
-            AVG(roas) as roas_promedio
-        FROM marketing 
-        GROUP BY audiencia_objetivo 
-        ORDER BY roas_promedio DESC
-        """
-        
-        aud_result = self.ejecutar_consulta(sql_audiencia)
-        if aud_result is not None:
-            print(aud_result.round(2).to_string(index=False))
-
-    def consultas_interactivas(self):
+        # Planificación en el hilo principal: rollups, accesos y caché no son thread-safe
+        for _, consultas in secciones:
+            for consulta in consultas:
+                sql, rollup = self.plan_consulta_agregada(
+                    consulta['tabla'], consulta['dimensiones'], consulta['medidas'],
+                    consulta.get('order_by'), consulta.get('limit')
+                )
+                consulta['sql'] = sql
+                consulta['rollup'] = rollup
+                
+                for nombre in self.datasets_consulta(sql):
+                    info = self.datasets[nombre]
+                    if not info.get('remoto'):
+                        self.materializador.registrar_acceso(nombre, info, self.select_vista(info, excluir=['filename']))
+                
+                consulta['archivos'] = self.archivos_consulta(sql) if self.cache is not None else None
+                tabla = self.cache.obtener(sql, consulta['archivos']) if consulta['archivos'] else None
+                if tabla is not None:
+                    consulta['desde_cache'] = True
+                    consulta['ejecucion'] = {'tabla': tabla, 'error': None, 'cola_s': 0.0, 'ejecucion_s': 0.0}
+                else:
+                    consulta['desde_cache'] = False
+                    pendientes.append(consulta)
+        
+        # Las consultas sobre la misma vista sin rollup comparten un único scan
+        trabajos = []
+        por_tabla = {}
+        for consulta in pendientes:
+            if consulta['rollup'] is None and self.compartir_scans:
+                por_tabla.setdefault(consulta['tabla'], []).append(consulta)
+            else:
+                trabajos.append((consulta['sql'], [consulta]))
+        
+        for tabla, consultas in por_tabla.items():
+            sql_lote = self.sql_lote(tabla, consultas) if len(consultas) > 1 else None
+            if sql_lote is None:
+                trabajos += [(consulta['sql'], [consulta]) for consulta in consultas]
+            else:
+                print(f"🔗 {len(consultas)} consultas sobre {tabla} combinadas en un scan (GROUPING SETS)")
+                trabajos.append((sql_lote, consultas))
+        
+        executor = ConcurrentReportExecutor(self, max_concurrencia or self.max_concurrencia, self.perfilador)
+        start_time = time.time()
+        ejecuciones = executor.ejecutar([sql for sql, _ in trabajos])
+        tiempo_total = time.time() - start_time
+        
+        for (_, consultas), ejecucion in zip(trabajos, ejecuciones):
+            for consulta in consultas:
+                consulta['ejecucion'] = dict(ejecucion)
+                if ejecucion['error'] is not None:
+                    continue
+                if 'lote' in consulta:
+                    consulta['ejecucion']['tabla'] = self.separar_lote(ejecucion['tabla'], consulta)
+                if consulta['archivos']:
+                    self.cache.guardar(consulta['sql'], consulta['archivos'], consulta['ejecucion']['tabla'],
+                                       ejecucion['ejecucion_s'] / len(consultas))
+        
+        tiempos = []
+        for titulo, consultas in secciones:
+            print(f"\n{titulo}")
+            print("=" * 40)
+            
+            for consulta in consultas:
+                if consulta.get('titulo'):
+                    print(f"\n{consulta['titulo']}")
+                if consulta.get('descripcion'):
+                    print(f"🔍 {consulta['descripcion']}")
+                if consulta['rollup'] is not None:
+                    print(self.mensaje_rollup(consulta['tabla'], consulta['rollup']))
+                
+                ejecucion = consulta['ejecucion']
+                if ejecucion['error'] is not None:
+                    print(f"❌ Error en consulta: {ejecucion['error']}")
+                    resultado = None
+                else:
+                    resultado = ejecucion['tabla'].to_pandas()
+                    if consulta['desde_cache']:
+                        print(f"♻️  Resultado desde caché: {len(resultado)} filas")
+                self.mostrar_resultado(consulta, resultado)
+                
+                tiempos.append({
+                    'consulta': consulta.get('titulo') or consulta.get('descripcion'),
+                    'origen': 'caché' if consulta['desde_cache'] else ('rollup' if consulta['rollup'] else ('lote' if 'lote' in consulta else 'parquet')),
+                    'cola_ms': round(ejecucion['cola_s'] * 1000, 2),
+                    'ejecucion_ms': round(ejecucion['ejecucion_s'] * 1000, 2)
+                })
+        
+        tiempos = pd.DataFrame(tiempos)
+        if not tiempos.empty:
+            print(f"\n⏱️  TIEMPOS DE CONSULTA ({executor.max_workers} en paralelo)")
+            print("=" * 40)
+            print(tiempos.to_string(index=False))
+            print(f"Total: {tiempo_total * 1000:.2f} ms en {len(trabajos)} scans "
+                  f"(más lento {max((e['ejecucion_s'] for e in ejecuciones), default=0) * 1000:.2f} ms)")
+        return tiempos
+
+    def mostrar_paginado(self, reader, filas_por_pagina=50, start_time=None):
+        """
+        Imprime un RecordBatchReader página a página sin materializar el
+        resultado. Enter muestra la siguiente página; 'q' o Ctrl+C cancelan
+        la consulta y descartan el resto.
+        """
+        mostradas = 0
+        start_time = start_time or time.time()
+        
+        try:
+            for batch in reader:
+                if batch.num_rows == 0:
+                    continue
+                
+                # DuckDB puede entregar lotes mayores que la página pedida
+                for offset in range(0, batch.num_rows, filas_por_pagina):
+                    pagina = batch.slice(offset, filas_por_pagina)
+                    if mostradas == 0:
+                        print(f"⏱️  Primera página en {(time.time() - start_time) * 1000:.1f} ms")
+                    else:
+                        respuesta = input(f"-- {mostradas:,} filas mostradas. [Enter] siguiente, 'q' cortar: ").strip().lower()
+                        if respuesta.startswith('q'):
+                            raise KeyboardInterrupt
+                    
+                    print(pagina.to_pandas().to_string(index=False))
+                    mostradas += pagina.num_rows
+            
+        except KeyboardInterrupt:
+            self.conn.interrupt()
+            print(f"\n⏹️  Consulta cancelada tras {mostradas:,} filas")
+        finally:
+            reader.close()
+        
+        if mostradas == 0:
+            print("✅ Consulta ejecutada exitosamente (sin resultados)")
+        else:
+            print(f"✅ {mostradas:,} filas")
+
+    def consultas_interactivas(self, filas_por_pagina=50):
         """Modo interactivo para ejecutar consultas personalizadas"""
         print(f"\n💻 MODO CONSULTAS INTERACTIVAS")
         print("=" * 40)
@@ -308,6 +2405,10 @@ class DuckDBParquetAnalyzer:
         print("  'help' - Ver comandos disponibles")
         print("  'tables' - Ver tablas disponibles")
         print("  'schema <tabla>' - Ver esquema de una tabla")
+        print("  'stats <tabla>' - Ver estadísticas del catálogo")
+        print("  'page <n>' - Filas por página de resultados")
+        print("  'aprox on|off' - Modo aproximado (muestras y sketches)")
+        print("  'percentiles <tabla> <columna>' - Percentiles aproximados")
         print("  'exit' - Salir del modo interactivo")
         
         while True:
@@ -318,7 +2419,8 @@ class DuckDBParquetAnalyzer:
                     break
                 elif query.lower() == 'help':
                     print("Comandos disponibles:")
-                    print("  tables, schema <tabla>, exit")
+                    print("  tables, schema <tabla>, stats <tabla>, page <n>, aprox on|off,")
+                    print("  percentiles <tabla> <columna>, exit")
                     print("  O cualquier consulta SQL válida")
                 elif query.lower() == 'tables':
                     tables = self.conn.execute("SHOW TABLES").fetchdf()
@@ -330,12 +2432,30 @@ class DuckDBParquetAnalyzer:
                     if schema is not None:
                         print(f"📊 Esquema de {tabla}:")
                         print(schema.to_string(index=False))
+                elif query.lower().startswith('stats '):
+                    tabla = query.split(' ', 1)[1]
+                    print(f"📈 Estadísticas de {tabla}:")
+                    print(self.obtener_estadisticas(tabla).to_string(index=False))
+                elif query.lower().startswith('aprox '):
+                    self.modo_aproximado = query.split(' ', 1)[1].strip().lower() == 'on'
+                    print(f"≈ Modo aproximado {'activado' if self.modo_aproximado else 'desactivado'}")
+                elif query.lower().startswith('percentiles '):
+                    partes = query.split()
+                    percentiles = self.percentiles_aproximados(partes[1], partes[2]) if len(partes) == 3 else None
+                    if percentiles is None:
+                        print("⚠️  Uso: percentiles <tabla> <columna> (requiere sketches de la conversión)")
+                    else:
+                        print(percentiles.to_string(index=False))
+                elif query.lower().startswith('page '):
+                    filas_por_pagina = max(1, int(query.split(' ', 1)[1]))
+                    print(f"📄 {filas_por_pagina} filas por página")
                 elif query:
-                    resultado = self.ejecutar_consulta(query)
-                    if resultado is not None and not resultado.empty:
-                        print(resultado.to_string(index=False))
-                    elif resultado is not None:
-                        print("✅ Consulta ejecutada exitosamente (sin resultados)")
+                    start_time = time.time()
+                    reader = self.consulta_stream(query, batch_size=filas_por_pagina)
+                    if reader is not None:
+                        self.mostrar_paginado(reader, filas_por_pagina, start_time)
+                        if self.perfilador is not None:
+                            self.perfilador.registrar(query, time.time() - start_time, self.ruta_perfil, 'stream')
                         
             except KeyboardInterrupt:
                 print("\n👋 Saliendo del modo interactivo...")
@@ -359,7 +2479,9 @@ class DuckDBParquetAnalyzer:
                 tables = self.conn.execute("SHOW TABLES").fetchdf()
                 f.write("## 📋 TABLAS DISPONIBLES\n\n")
                 for tabla in tables['name']:
-                    count = self.conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+                    count = self.conteos.get(tabla)
+                    if count is None:
+                        count = self.conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
                     f.write(f"- **{tabla}**: {count:,} registros\n")
                 f.write("\n")
                 
@@ -374,6 +2496,17 @@ class DuckDBParquetAnalyzer:
             except Exception as e:
                 f.write(f"Error generando información de tablas: {e}\n\n")
             
+            # Estadísticas de la caché de resultados
+            if self.cache is not None:
+                stats = self.cache.resumen()
+                f.write("## ♻️ CACHÉ DE RESULTADOS\n\n")
+                f.write(f"- **Aciertos**: {stats['hits']} ({stats['hit_rate']:.1%})\n")
+                f.write(f"- **Fallos**: {stats['misses']}\n")
+                f.write(f"- **Invalidaciones**: {stats['invalidations']}\n")
+                f.write(f"- **Expulsiones LRU**: {stats['evictions']}\n")
+                f.write(f"- **Tiempo ahorrado**: {stats['time_saved']:.3f}s\n")
+                f.write(f"- **Entradas**: {stats['entries']} ({stats['size_mb']:.2f} MB)\n\n")
+            
             f.write("## 🔍 CONSULTAS SUGERIDAS\n\n")
             f.write("### Ventas\n")
             f.write("```sql\n")
@@ -399,7 +2532,18 @@ class DuckDBParquetAnalyzer:
             f.write("FROM marketing GROUP BY canal ORDER BY roi_promedio DESC;\n")
             f.write("```\n\n")
         
+            if self.perfilador is not None and self.perfilador.registros:
+                f.write("## 🔬 PERFILADO\n\n")
+                f.write(f"Log estructurado: `{self.perfilador.log_file}`\n\n")
+                f.write("### Consultas más lentas\n")
+                f.write(f"```\n{self.perfilador.consultas_lentas().to_string(index=False)}\n```\n\n")
+                f.write("### Operadores más lentos\n")
+                f.write(f"```\n{self.perfilador.operadores_lentos().round(3).to_string(index=False)}\n```\n\n")
+        
         print(f"📄 Reporte guardado: {reporte_file}")
+        if self.cache is not None:
+            stats = self.cache.resumen()
+            print(f"♻️  Caché: {stats['hits']} aciertos ({stats['hit_rate']:.1%}), {stats['time_saved']:.3f}s ahorrados")
 
     def ejecutar_analisis_completo(self):
         """Ejecuta análisis completo de todos los datasets"""
@@ -416,14 +2560,14 @@ class DuckDBParquetAnalyzer:
         self.crear_vistas(datasets)
         
         # Análisis específicos por tipo
-        if 'ventas' in datasets:
-            self.analisis_exploratorio_ventas()
-        
-        if 'empleados' in datasets:
-            self.analisis_exploratorio_empleados()
+        if (self.max_concurrencia > 1 or self.compartir_scans) and not self.modo_aproximado:
+            self.ejecutar_analisis_concurrente()
+        else:
+            for titulo, consultas in self.secciones_analisis():
+                self.ejecutar_seccion(titulo, consultas)
         
-        if 'marketing' in datasets:
-            self.analisis_exploratorio_marketing()
+        if self.perfilador is not None:
+            self.perfilador.mostrar_resumen()
         
         # Generar reporte
         self.generar_reporte_completo()
@@ -434,9 +2578,36 @@ class DuckDBParquetAnalyzer:
             self.consultas_interactivas()
 
     def __del__(self):
-        """Cierra la conexión DuckDB"""
+        """Cierra la conexión DuckDB, los procesos worker y persiste el índice de la caché de bloques"""
+        for executor in getattr(self, 'executors', {}).values():
+            executor.cerrar()
+        if getattr(self, 'block_cache', None) is not None:
+            self.block_cache.cerrar()
         if hasattr(self, 'conn'):
             self.conn.close()
+        if getattr(self, 'perfilador', None) is not None:
+            self.perfilador.cerrar()
+
+def parse_args():
+    """Argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Analizador Parquet con DuckDB")
+    parser.add_argument("--parquet-dir", default="parquet_data", help="Directorio con los datasets Parquet")
+    parser.add_argument("--db-file", default=":memory:", help="Archivo DuckDB (catálogo persistente)")
+    parser.add_argument("--perfil", help="Perfil de recursos en JSON (threads, memory_limit, temp_directory, ...)")
+    parser.add_argument("--threads", type=int, help="Threads de DuckDB (por defecto según cgroup/CPU)")
+    parser.add_argument("--memory-limit", help="Límite de memoria de DuckDB, p.ej. '8GB'")
+    parser.add_argument("--temp-dir", help="Directorio de spill a disco")
+    parser.add_argument("--concurrencia", type=int, default=4, help="Consultas simultáneas del análisis (1 = secuencial)")
+    parser.add_argument("--sin-scan-compartido", action="store_true", help="Un scan por consulta en el análisis completo")
+    parser.add_argument("--perfilado", metavar="LOG", help="Guardar el perfil JSON de cada consulta en un log JSONL")
+    parser.add_argument("--aproximado", action="store_true", help="Análisis aproximado desde muestras y sketches")
+    parser.add_argument("--sin-cache", action="store_true", help="Desactivar la caché de resultados")
+    parser.add_argument("--servidor", action="store_true", help="Servidor HTTP de consultas de larga duración")
+    parser.add_argument("--host", default="127.0.0.1", help="Host del servidor")
+    parser.add_argument("--port", type=int, default=8765, help="Puerto del servidor")
+    parser.add_argument("--cursores", type=int, default=4, help="Cursores del pool del servidor")
+    parser.add_argument("--block-cache-mb", type=int, default=1024, help="Tamaño máximo de la caché de bloques de datasets remotos")
+    return parser.parse_args()
 
 def main():
     """Función principal"""
@@ -448,11 +2619,39 @@ def main():
         import duckdb
         print(f"✅ DuckDB version: {duckdb.__version__}")
         
+        args = parse_args()
+        
+        # Perfil de recursos: archivo JSON + overrides de la línea de comandos
+        config = {}
+        if args.perfil:
+            with open(args.perfil, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        if args.threads:
+            config['threads'] = args.threads
+        if args.memory_limit:
+            config['memory_limit'] = args.memory_limit
+        if args.temp_dir:
+            config['temp_directory'] = args.temp_dir
+        
         # Crear analizador
-        analyzer = DuckDBParquetAnalyzer()
+        analyzer = DuckDBParquetAnalyzer(
+            parquet_dir=args.parquet_dir,
+            db_file=args.db_file,
+            cache_dir=None if args.sin_cache else ".duckdb_cache",
+            perfil=config,
+            max_concurrencia=args.concurrencia,
+            compartir_scans=not args.sin_scan_compartido,
+            log_perfilado=args.perfilado,
+            modo_aproximado=args.aproximado,
+            block_cache_mb=args.block_cache_mb
+        )
         
-        # Ejecutar análisis
-        analyzer.ejecutar_analisis_completo()
+        if args.servidor:
+            analyzer.crear_vistas(analyzer.detectar_datasets())
+            ServidorConsultas(analyzer, args.host, args.port, args.cursores).iniciar()
+        else:
+            # Ejecutar análisis
+            analyzer.ejecutar_analisis_completo()
         
         print(f"\n🎉 ¡ANÁLISIS COMPLETADO!")
         
@@ -0,0 +1,161 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import duckdb
+import pyarrow as pa
+
+# Misma precisión y hash que los sketches de los rollups (parquet/rollups.py),
+# para que el coordinador combine los parciales con el mismo SQL
+HLL_P = 12
+
+# Conexión DuckDB propia de cada proceso worker
+_conn = None
+
+
+def iniciar_worker(threads):
+    """Inicializador de cada worker: una conexión DuckDB que se reutiliza entre tareas"""
+    global _conn
+    _conn = duckdb.connect()
+    _conn.execute(f"SET threads TO {int(threads)}")
+
+
+def calcular_parcial(sql):
+    """
+    Ejecuta el SQL parcial en el worker y devuelve (Arrow IPC, segundos, pid).
+    El resultado viaja serializado en IPC para no depender de pickle de Arrow.
+    """
+    start_time = time.time()
+    resultado = _conn.execute(sql)
+    if hasattr(resultado, 'to_arrow_reader'):
+        tabla = resultado.to_arrow_reader().read_all()
+    else:
+        tabla = resultado.fetch_record_batch().read_all()
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabla.schema) as writer:
+        writer.write_table(tabla)
+    return sink.getvalue().to_pybytes(), time.time() - start_time, os.getpid()
+
+
+def sql_parcial(desde, dimensiones, medidas, columna_id=None):
+    """
+    SQL de los agregados parciales combinables de una consulta sobre un
+    subconjunto de particiones: n (filas), sum/count/min/max por columna y un
+    sketch HLL (lista de {i, r}) por columna de COUNT(DISTINCT). Es el mismo
+    formato que los rollups, así que avg se combina como sum/count.
+
+    Args:
+        desde: Expresión FROM (tabla o subconsulta) con los datos del worker
+        dimensiones: Dict nombre -> expresión SQL de agrupación
+        medidas: Lista de (alias, funcion, columna)
+        columna_id: Función columna -> expresión a hashear en COUNT(DISTINCT)
+    """
+    dims = list(dimensiones)
+    columnas = list(dict.fromkeys(
+        col for _, funcion, col in medidas if funcion in ('sum', 'avg', 'min', 'max') and col not in dims
+    ))
+    distintos = list(dict.fromkeys(
+        col for _, funcion, col in medidas if funcion == 'count_distinct' and col not in dims
+    ))
+
+    select_base = [f'{expr} AS "{dim}"' for dim, expr in dimensiones.items()]
+    select_base += [f'"{col}"' for col in columnas]
+    select_base += [f'{columna_id(col) if columna_id else col} AS "__d_{col}"' for col in distintos]
+    dims_sql = ', '.join(f'"{dim}"' for dim in dims)
+    pre = f"{dims_sql}, " if dims else ""
+
+    agregados = ['COUNT(*) AS n']
+    for col in columnas:
+        agregados += [
+            f'SUM("{col}") AS "sum_{col}"',
+            f'COUNT("{col}") AS "count_{col}"',
+            f'MIN("{col}") AS "min_{col}"',
+            f'MAX("{col}") AS "max_{col}"'
+        ]
+
+    ctes = [f"base AS (SELECT {', '.join(select_base) or '1 AS __uno'} FROM {desde})"]
+    ctes.append(f"agg AS (SELECT {pre}{', '.join(agregados)} FROM base{' GROUP BY ALL' if dims else ''})")
+    joins = []
+    for col in distintos:
+        # Registro i = bits bajos del hash, r = posición del primer 1 en los 32 bits siguientes
+        ctes.append(f"""hll_{col} AS (
+            SELECT {pre}list({{'i': i, 'r': r}} ORDER BY i) AS "hll_{col}"
+            FROM (
+                SELECT {pre}i, MAX(r)::UTINYINT AS r
+                FROM (
+                    SELECT {pre}(hash(v) & {2**HLL_P - 1})::USMALLINT AS i,
+                        CASE WHEN w = 0 THEN 33 ELSE 32 - floor(log2(w))::INTEGER END AS r
+                    FROM (SELECT {pre}"__d_{col}" AS v, (hash("__d_{col}") >> {HLL_P}) & {2**32 - 1} AS w
+                          FROM base WHERE "__d_{col}" IS NOT NULL)
+                )
+                GROUP BY ALL
+            )
+            {'GROUP BY ALL' if dims else ''}
+        )""")
+        joins.append(f"LEFT JOIN hll_{col} USING ({dims_sql})" if dims else f"CROSS JOIN hll_{col}")
+
+    hll_cols = ''.join(f', hll_{col}."hll_{col}"' for col in distintos)
+    return f"WITH {', '.join(ctes)}\nSELECT agg.*{hll_cols}\nFROM agg {' '.join(joins)}"
+
+
+class ScatterGatherExecutor:
+    """
+    Reparte las particiones de un dataset entre procesos worker, cada uno con
+    su propia conexión DuckDB, y devuelve sus agregados parciales para que el
+    coordinador los combine. En una sola máquina permite medir el escalado de
+    1 a N workers; el reparto por particiones es el mismo que entre máquinas.
+    """
+
+    def __init__(self, workers=None, threads_por_worker=1):
+        """
+        Args:
+            workers: Procesos worker (por defecto uno por CPU)
+            threads_por_worker: Threads DuckDB de cada worker
+        """
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=iniciar_worker,
+            initargs=(threads_por_worker,)
+        )
+
+    def calentar(self):
+        """Arranca todos los procesos worker (importar duckdb) antes de medir"""
+        list(self.pool.map(calcular_parcial, ["SELECT 1"] * self.workers))
+
+    def asignar(self, particiones):
+        """
+        Reparte particiones {nombre: [archivos]} entre los workers equilibrando
+        bytes (la partición más grande primero al worker menos cargado)
+
+        Returns:
+            Lista (una por worker con trabajo) de listas de archivos
+        """
+        def tamaño(archivos):
+            return sum(os.path.getsize(a) for a in archivos)
+
+        cargas = [[0, []] for _ in range(self.workers)]
+        for nombre in sorted(particiones, key=lambda p: tamaño(particiones[p]), reverse=True):
+            carga = min(cargas, key=lambda c: c[0])
+            carga[0] += tamaño(particiones[nombre])
+            carga[1].extend(particiones[nombre])
+        return [archivos for _, archivos in cargas if archivos]
+
+    def ejecutar(self, consultas):
+        """
+        Ejecuta los SQL parciales en los workers
+
+        Returns:
+            Lista de dicts con tabla (pyarrow.Table), segundos y pid, en orden
+        """
+        resultados = []
+        for datos, segundos, pid in self.pool.map(calcular_parcial, consultas):
+            tabla = pa.ipc.open_stream(pa.py_buffer(datos)).read_all()
+            resultados.append({'tabla': tabla, 'segundos': segundos, 'pid': pid})
+        return resultados
+
+    def cerrar(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
@@ -37,7 +37,7 @@ WHERE salario_anual > 80000;
 -- Filtros múltiples
 SELECT * 
 FROM read_parquet('parquet_compressed/empleados_gzip/*/data.parquet')
-WHERE departamento = 'departamento=it' 
+WHERE departamento = 'it'  -- columna de partición: solo abre departamento=it/
   AND performance_score >= 4.0
   AND años_experiencia > 3;
 
@@ -64,7 +64,7 @@ FROM read_parquet('parquet_compressed/empleados_gzip/*/data.parquet');
 
 -- Agrupar por departamento
 SELECT 
-    REPLACE(departamento, 'departamento=', '') as dept,
+    departamento as dept,
     COUNT(*) as empleados,
     ROUND(AVG(salario_anual), 0) as salario_promedio,
     ROUND(AVG(performance_score), 2) as performance_promedio
@@ -76,7 +76,7 @@ ORDER BY salario_promedio DESC;
 SELECT 
     nombre, 
     apellido,
-    REPLACE(departamento, 'departamento=', '') as dept,
+    departamento as dept,
     salario_anual,
     performance_score
 FROM read_parquet('parquet_compressed/empleados_gzip/*/data.parquet')
@@ -89,7 +89,7 @@ LIMIT 10;
 SELECT 
     nombre,
     apellido,
-    REPLACE(departamento, 'departamento=', '') as dept,
+    departamento as dept,
     salario_anual,
     RANK() OVER (PARTITION BY departamento ORDER BY salario_anual DESC) as ranking_dept
 FROM read_parquet('parquet_compressed/empleados_gzip/*/data.parquet')
@@ -109,7 +109,7 @@ ORDER BY salario_anual DESC;
 SELECT 
     nombre,
     apellido,
-    REPLACE(departamento, 'departamento=', '') as dept,
+    departamento as dept,
     salario_anual,
     ROUND(AVG(salario_anual) OVER (PARTITION BY departamento), 0) as promedio_dept,
     salario_anual - AVG(salario_anual) OVER (PARTITION BY departamento) as diferencia_promedio
@@ -266,15 +266,32 @@ ORDER BY tier;
 -- ===== 9. CONSULTAS DE MÚLTIPLES ARCHIVOS/DATASETS =====
 
 -- Crear vistas temporales para facilitar consultas
+-- Las columnas de partición hive se declaran con su tipo para podar directorios
 CREATE OR REPLACE VIEW empleados AS 
-SELECT * FROM read_parquet('parquet_compressed/empleados_gzip/*/data.parquet');
+SELECT * FROM read_parquet('parquet_compressed/empleados_gzip/*/data.parquet',
+                           hive_partitioning = true, hive_types = {'departamento': VARCHAR});
 
 CREATE OR REPLACE VIEW ventas AS 
-SELECT * FROM read_parquet('parquet_compressed/ventas_gzip/*/data.parquet');
-
--- Consulta cruzada (ejemplo conceptual)
--- Si tuviéramos IDs relacionados entre empleados y ventas:
-/*
+SELECT * FROM read_parquet('parquet_compressed/ventas_gzip/*/data.parquet',
+                           hive_partitioning = true, hive_types = {'categoria': VARCHAR});
+
+-- Con el layout de data-parquet.py (año=/categoria=) el año es INTEGER:
+-- solo se abren los archivos de año=2024/categoria=ropa/
+SELECT COUNT(*), SUM(total)
+FROM read_parquet('parquet_data/ventas/**/*.parquet',
+                  hive_partitioning = true, hive_types = {'año': INTEGER, 'categoria': VARCHAR})
+WHERE año = 2024 AND categoria = 'ropa';
+
+-- Consultas cruzadas sobre el modelo estrella
+-- (data-synthetic-producer.py --estrella: dimensiones clientes, productos,
+-- tiendas, campañas y empleados con claves foráneas en ventas).
+-- En los Parquet las claves compactadas son enteros (vendedor_id = empleado_id);
+-- en las vistas del analizador el entero es <col>_num
+CREATE OR REPLACE VIEW clientes AS SELECT * FROM read_parquet('parquet_data/clientes/*.parquet');
+CREATE OR REPLACE VIEW productos AS SELECT * FROM read_parquet('parquet_data/productos/*.parquet');
+CREATE OR REPLACE VIEW tiendas AS SELECT * FROM read_parquet('parquet_data/tiendas/*.parquet');
+
+-- Ventas de tienda física por departamento del vendedor
 SELECT 
     e.departamento,
     COUNT(DISTINCT e.empleado_id) as empleados,
@@ -283,8 +300,28 @@ SELECT
 FROM empleados e
 LEFT JOIN ventas v ON e.empleado_id = v.vendedor_id
 GROUP BY e.departamento
-ORDER BY revenue_total DESC;
-*/
+ORDER BY revenue_total DESC NULLS LAST;
+
+-- Revenue por segmento de cliente y marca
+SELECT c.segmento, p.marca, COUNT(*) as ventas, SUM(v.total) as revenue
+FROM ventas v
+JOIN clientes c ON v.cliente_id = c.cliente_id
+JOIN productos p ON v.producto_id = p.producto_id
+GROUP BY c.segmento, p.marca
+ORDER BY revenue DESC
+LIMIT 20;
+
+-- ROAS real de cada canal de marketing (ventas atribuidas / gasto)
+SELECT m.canal, SUM(a.revenue) / SUM(m.gasto_real) as roas_real
+FROM read_parquet('parquet_data/marketing/**/*.parquet', hive_partitioning = true) m
+JOIN (SELECT campaña_id, SUM(total) as revenue FROM ventas WHERE campaña_id IS NOT NULL GROUP BY 1) a
+  ON m.campaña_id = a.campaña_id
+GROUP BY m.canal
+ORDER BY roas_real DESC;
+
+-- Integridad referencial: ventas con cliente inexistente (debe ser 0)
+SELECT COUNT(*) as huerfanas
+FROM ventas v ANTI JOIN clientes c ON v.cliente_id = c.cliente_id;
 
 -- ===== 10. CONSULTAS DE RENDIMIENTO Y OPTIMIZACIÓN =====
 
@@ -373,7 +410,7 @@ FROM empleados;
 
 -- Reporte por departamento para presentación
 SELECT 
-    REPLACE(departamento, 'departamento=', '') as "Departamento",
+    departamento as "Departamento",
     COUNT(*) as "Empleados",
     '$' || FORMAT('{:,.0f}', ROUND(AVG(salario_anual), 0)) as "Salario Promedio",
     ROUND(AVG(performance_score), 2) as "Performance",
@@ -0,0 +1,391 @@
+import json
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import duckdb
+import pyarrow as pa
+
+# Solo se aceptan consultas de lectura
+SQL_LECTURA = re.compile(r'^\s*(SELECT|WITH|FROM|DESCRIBE|SHOW|SUMMARIZE|EXPLAIN)\b', re.IGNORECASE)
+PREFIJO_EXPLAIN = re.compile(r'^\s*EXPLAIN(\s+ANALYZE)?\b', re.IGNORECASE)
+
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+
+
+def es_consulta_lectura(sql):
+    """
+    Indica si el SQL es una única sentencia de lectura. cursor.execute
+    ejecuta todas las sentencias del texto, así que basta una segunda
+    ('SELECT 1; CREATE OR REPLACE VIEW ...') para alterar las vistas
+    compartidas por todos los clientes. EXPLAIN ANALYZE ejecuta la
+    sentencia explicada: también tiene que ser de lectura.
+    """
+    try:
+        sentencias = duckdb.extract_statements(sql)
+    except duckdb.Error:
+        return False
+    if len(sentencias) != 1:
+        return False
+
+    sentencia = sentencias[0]
+    if sentencia.type == duckdb.StatementType.EXPLAIN:
+        return es_consulta_lectura(PREFIJO_EXPLAIN.sub('', sentencia.query, count=1))
+    # PRAGMA también se parsea como SELECT: el prefijo descarta lo que no es consulta
+    return sentencia.type == duckdb.StatementType.SELECT and bool(SQL_LECTURA.match(sentencia.query))
+
+
+class PoolCursores:
+    """
+    Pool acotado de cursores de una conexión DuckDB. Los cursores comparten
+    la base de datos (vistas, caché de metadata Parquet, tablas materializadas)
+    y se reutilizan entre solicitudes para no pagar su creación en cada una.
+    Cada cursor se guarda junto al archivo donde escribe su perfil: se
+    configuran en el hilo principal y se usan en los hilos de las solicitudes.
+    """
+
+    def __init__(self, conn, tamaño=4, perfilador=None):
+        """conn: conexión DuckDB, o el analizador (sus cursores registran los datasets remotos)"""
+        self.tamaño = max(1, int(tamaño))
+        self.libres = queue.Queue()
+        for _ in range(self.tamaño):
+            cursor = conn.cursor()
+            ruta_perfil = perfilador.configurar(cursor) if perfilador is not None else None
+            self.libres.put((cursor, ruta_perfil))
+
+    @contextmanager
+    def cursor(self, timeout=30):
+        """Presta (cursor, archivo de perfil); espera hasta timeout segundos si están todos en uso"""
+        prestado = self.libres.get(timeout=timeout)
+        try:
+            yield prestado
+        finally:
+            self.libres.put(prestado)
+
+    def cerrar(self):
+        while not self.libres.empty():
+            cursor, _ = self.libres.get_nowait()
+            cursor.close()
+
+
+class SalidaChunked:
+    """Objeto tipo archivo que escribe en el socket con Transfer-Encoding: chunked"""
+
+    def __init__(self, wfile):
+        self.wfile = wfile
+        self.closed = False
+
+    def write(self, datos):
+        datos = bytes(datos)
+        if datos and not self.closed:
+            self.wfile.write(f"{len(datos):X}\r\n".encode('ascii') + datos + b"\r\n")
+        return len(datos)
+
+    def flush(self):
+        self.wfile.flush()
+
+    def close(self):
+        if not self.closed:
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+            self.closed = True
+
+    def abortar(self):
+        """Deja la respuesta sin el chunk final: el cliente la ve incompleta, no truncada en silencio"""
+        self.closed = True
+
+
+class ServidorConsultas:
+    """
+    Servidor HTTP local de larga duración sobre un DuckDBParquetAnalyzer
+    ya inicializado: las vistas, la caché de metadata Parquet y la caché de
+    resultados quedan calientes entre solicitudes y cada consulta usa un
+    cursor del pool. Los resultados se envían como stream Arrow IPC por lotes.
+
+    Endpoints:
+        GET  /health     estado y uptime
+        GET  /datasets   vistas, registros y esquema
+        GET  /stats      solicitudes, latencias, pool y caché
+        POST /query      {"sql", "formato": "arrow"|"json", "batch_size", "cache"}
+        POST /agregada   {"tabla", "dimensiones", "medidas", "order_by", "limit", "filtros", "formato"}
+    """
+
+    def __init__(self, analyzer, host="127.0.0.1", port=8765, cursores=4, max_cache_mb=64):
+        """
+        Args:
+            analyzer: DuckDBParquetAnalyzer con las vistas ya creadas
+            cursores: Tamaño del pool de cursores (consultas simultáneas)
+            max_cache_mb: Tamaño máximo de un resultado para guardarlo en la caché
+        """
+        self.analyzer = analyzer
+        self.host = host
+        self.port = port
+        self.pool = PoolCursores(analyzer, cursores, analyzer.perfilador)
+        self.max_cache_bytes = max_cache_mb * 1024**2
+        # La conexión principal (vistas podadas) y la caché no son seguras entre threads
+        self.lock_conexion = threading.Lock()
+        self.lock_cache = threading.Lock()
+        self.lock_stats = threading.Lock()
+        self.inicio = time.time()
+        self.stats = {'solicitudes': 0, 'errores': 0, 'cache_hits': 0, 'latencias_ms': []}
+        self.httpd = None
+
+    def registrar_solicitud(self, elapsed, error=False, cache_hit=False):
+        with self.lock_stats:
+            self.stats['solicitudes'] += 1
+            self.stats['errores'] += int(error)
+            self.stats['cache_hits'] += int(cache_hit)
+            # Ventana de las últimas 1000 latencias para los percentiles
+            self.stats['latencias_ms'] = self.stats['latencias_ms'][-999:] + [elapsed * 1000]
+
+    def resumen(self):
+        """Estadísticas del servidor"""
+        with self.lock_stats:
+            latencias = sorted(self.stats['latencias_ms'])
+            stats = {k: v for k, v in self.stats.items() if k != 'latencias_ms'}
+
+        def percentil(p):
+            return round(latencias[min(len(latencias) - 1, int(p * len(latencias)))], 3) if latencias else None
+
+        stats.update({
+            'uptime_s': round(time.time() - self.inicio, 1),
+            'latencia_p50_ms': percentil(0.50),
+            'latencia_p95_ms': percentil(0.95),
+            'latencia_p99_ms': percentil(0.99),
+            'pool': {'tamaño': self.pool.tamaño, 'libres': self.pool.libres.qsize()}
+        })
+        if self.analyzer.cache is not None:
+            with self.lock_cache:
+                stats['cache'] = self.analyzer.cache.resumen()
+        return stats
+
+    def datasets(self):
+        """Vistas disponibles con su número de registros y esquema"""
+        resultado = []
+        with self.pool.cursor() as (cursor, _):
+            for nombre, info in self.analyzer.datasets.items():
+                esquema = cursor.execute(f"DESCRIBE {nombre}").fetchall()
+                resultado.append({
+                    'nombre': nombre,
+                    'registros': self.analyzer.conteos.get(nombre),
+                    'archivos': info['count'],
+                    'columnas': [{'nombre': fila[0], 'tipo': fila[1]} for fila in esquema]
+                })
+        return resultado
+
+    def desde_cache(self, sql):
+        """Devuelve (tabla cacheada o None, archivos de la consulta o None)"""
+        if self.analyzer.cache is None:
+            return None, None
+        archivos = self.analyzer.archivos_consulta(sql)
+        if archivos is None:
+            return None, None
+        with self.lock_cache:
+            return self.analyzer.cache.obtener(sql, archivos), archivos
+
+    def guardar_en_cache(self, sql, archivos, lotes, esquema, exec_time):
+        with self.lock_cache:
+            self.analyzer.cache.guardar(sql, archivos, pa.Table.from_batches(lotes, schema=esquema), exec_time)
+
+    def ejecutar(self, sql, enviar, batch_size=100_000, usar_cache=True, conexion=None):
+        """
+        Ejecuta una consulta y entrega sus lotes a enviar(reader). Los
+        resultados de hasta max_cache_mb se guardan en la caché mientras se
+        envían, sin materializarlos antes de responder.
+
+        Args:
+            conexion: Conexión a usar en lugar de un cursor del pool (la
+                principal del analizador, con su archivo de perfil)
+        """
+        tabla, archivos = self.desde_cache(sql) if usar_cache else (None, None)
+        if tabla is not None:
+            enviar(pa.RecordBatchReader.from_batches(tabla.schema, tabla.to_batches(batch_size)))
+            return True
+
+        def consumir(cursor, ruta_perfil):
+            start_time = time.time()
+            resultado = cursor.execute(sql)
+            # fetch_record_batch está deprecado en las versiones recientes de DuckDB
+            if hasattr(resultado, 'to_arrow_reader'):
+                reader = resultado.to_arrow_reader(batch_size)
+            else:
+                reader = resultado.fetch_record_batch(batch_size)
+            lotes, tamaño = [], 0
+
+            def lotes_enviados():
+                nonlocal tamaño
+                for lote in reader:
+                    if archivos is not None:
+                        tamaño += lote.nbytes
+                        if tamaño <= self.max_cache_bytes:
+                            lotes.append(lote)
+                    yield lote
+                # Guardar antes de cerrar el stream: la siguiente solicitud del cliente ya la encuentra
+                if archivos is not None and tamaño <= self.max_cache_bytes:
+                    self.guardar_en_cache(sql, archivos, lotes, reader.schema, time.time() - start_time)
+
+            enviar(pa.RecordBatchReader.from_batches(reader.schema, lotes_enviados()))
+            if self.analyzer.perfilador is not None:
+                self.analyzer.perfilador.registrar(sql, time.time() - start_time, ruta_perfil)
+
+        if conexion is not None:
+            consumir(conexion, self.analyzer.ruta_perfil)
+        else:
+            with self.pool.cursor() as (cursor, ruta_perfil):
+                consumir(cursor, ruta_perfil)
+        return False
+
+    def plan_agregada(self, peticion):
+        """SQL de una consulta agregada (rollup, vista podada o datos crudos)"""
+        tabla = peticion['tabla']
+        if tabla not in self.analyzer.datasets:
+            raise KeyError(f"Dataset desconocido: {tabla}")
+        medidas = [tuple(m) for m in peticion.get('medidas', [])]
+        filtros = [tuple(f) for f in peticion.get('filtros') or []]
+        sql, _ = self.analyzer.plan_consulta_agregada(
+            tabla, peticion.get('dimensiones', {}), medidas,
+            peticion.get('order_by'), peticion.get('limit'), filtros or None
+        )
+        return sql
+
+    def crear_handler(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 para keep-alive y respuestas chunked
+            protocol_version = "HTTP/1.1"
+            # Stream Arrow en curso: tras sus cabeceras ya no se puede enviar otra respuesta
+            salida = None
+
+            def log_message(self, format, *args):
+                pass
+
+            def responder_json(self, datos, status=200):
+                cuerpo = json.dumps(datos, ensure_ascii=False, default=str).encode('utf-8')
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def leer_peticion(self):
+                longitud = int(self.headers.get('Content-Length') or 0)
+                return json.loads(self.rfile.read(longitud) or b'{}')
+
+            def enviar_resultado(self, formato, batch_size):
+                """Devuelve la función que escribe un RecordBatchReader en la respuesta"""
+                def enviar(reader):
+                    if formato == 'json':
+                        tabla = reader.read_all()
+                        self.responder_json({
+                            'columnas': tabla.column_names,
+                            'filas': [list(fila.values()) for fila in tabla.to_pylist()]
+                        })
+                        return
+
+                    self.send_response(200)
+                    self.send_header("Content-Type", ARROW_STREAM)
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    self.salida = SalidaChunked(self.wfile)
+                    # Sin context manager: si falla un lote no se escribe el fin de stream Arrow
+                    writer = pa.ipc.new_stream(self.salida, reader.schema)
+                    for lote in reader:
+                        writer.write_batch(lote)
+                    writer.close()
+                    self.salida.close()
+                    self.salida = None
+                return enviar
+
+            def responder_error(self, mensaje, status):
+                """Respuesta JSON de error o, si el stream ya había empezado, cortarlo y cerrar la conexión"""
+                if self.salida is None:
+                    self.responder_json({'error': mensaje}, status)
+                    return
+                print(f"❌ Error a mitad del stream de {self.path}: {mensaje}")
+                self.salida.abortar()
+                self.salida = None
+                self.close_connection = True
+
+            def do_GET(self):
+                start_time = time.time()
+                try:
+                    if self.path == '/health':
+                        self.responder_json({'status': 'ok', 'uptime_s': round(time.time() - servidor.inicio, 1)})
+                    elif self.path == '/datasets':
+                        self.responder_json(servidor.datasets())
+                    elif self.path == '/stats':
+                        self.responder_json(servidor.resumen())
+                    else:
+                        self.responder_json({'error': f"Ruta desconocida: {self.path}"}, 404)
+                    servidor.registrar_solicitud(time.time() - start_time)
+                except Exception as e:
+                    servidor.registrar_solicitud(time.time() - start_time, error=True)
+                    self.responder_json({'error': str(e)}, 500)
+
+            def do_POST(self):
+                start_time = time.time()
+                try:
+                    peticion = self.leer_peticion()
+                    formato = peticion.get('formato', 'arrow')
+                    batch_size = int(peticion.get('batch_size', 100_000))
+                    enviar = self.enviar_resultado(formato, batch_size)
+
+                    if self.path == '/query':
+                        sql = peticion.get('sql', '')
+                        if not es_consulta_lectura(sql):
+                            raise ValueError("Solo se acepta una consulta de lectura por solicitud (SELECT, WITH, DESCRIBE, ...)")
+                        hit = servidor.ejecutar(sql, enviar, batch_size, peticion.get('cache', True))
+                    elif self.path == '/agregada':
+                        if peticion.get('filtros'):
+                            # La vista podada es temporal de la conexión principal
+                            with servidor.lock_conexion:
+                                sql = servidor.plan_agregada(peticion)
+                                hit = servidor.ejecutar(sql, enviar, batch_size, False, servidor.analyzer.conn)
+                        else:
+                            sql = servidor.plan_agregada(peticion)
+                            hit = servidor.ejecutar(sql, enviar, batch_size, peticion.get('cache', True))
+                    else:
+                        self.responder_json({'error': f"Ruta desconocida: {self.path}"}, 404)
+                        return
+
+                    servidor.registrar_solicitud(time.time() - start_time, cache_hit=hit)
+                except (ValueError, KeyError, json.JSONDecodeError) as e:
+                    servidor.registrar_solicitud(time.time() - start_time, error=True)
+                    self.responder_error(str(e), 400)
+                except queue.Empty:
+                    servidor.registrar_solicitud(time.time() - start_time, error=True)
+                    self.responder_error("Todos los cursores están ocupados", 503)
+                except Exception as e:
+                    servidor.registrar_solicitud(time.time() - start_time, error=True)
+                    self.responder_error(str(e), 500)
+
+        return Handler
+
+    def iniciar(self):
+        """Atiende solicitudes hasta Ctrl+C"""
+        self.httpd = ThreadingHTTPServer((self.host, self.port), self.crear_handler())
+        self.httpd.daemon_threads = True
+
+        print(f"\n🌐 Servidor de consultas en http://{self.host}:{self.port}")
+        print(f"   🔌 Pool de {self.pool.tamaño} cursores, {len(self.analyzer.datasets)} vistas calientes")
+        print(f"   📡 POST /query, POST /agregada, GET /datasets, GET /stats (Ctrl+C para detener)")
+
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            print(f"\n🛑 Deteniendo servidor...")
+        finally:
+            self.detener()
+
+    def detener(self):
+        if self.httpd is not None:
+            self.httpd.server_close()
+            self.httpd = None
+        self.pool.cerrar()
+        stats = self.resumen()
+        print(f"📊 {stats['solicitudes']} solicitudes, {stats['errores']} errores, "
+              f"p50 {stats['latencia_p50_ms']}ms, p95 {stats['latencia_p95_ms']}ms")
@@ -0,0 +1,493 @@
+import atexit
+import hashlib
+import io
+import json
+import os
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+import pyarrow as pa
+import pyarrow.fs as pafs
+
+# Bytes finales de cada Parquet que se leen de una vez al precargar footers
+TAMAÑO_FOOTER = 64 * 1024
+
+
+class LocalObjectStore:
+    """
+    Almacén de objetos sobre un directorio local con la interfaz del
+    almacén S3: listados y lecturas por rango, cada una contada como una
+    petición. latencia_ms simula la latencia por petición de un almacén
+    remoto (sustituto local tipo MinIO para pruebas y benchmarks).
+    """
+
+    def __init__(self, root, latencia_ms=0):
+        self.root = Path(root)
+        self.latencia_s = latencia_ms / 1000
+        self.lock = threading.Lock()
+        self.stats = {'peticiones': 0, 'bytes': 0}
+
+    def __repr__(self):
+        return f"local://{self.root}" + (f"?latencia_ms={self.latencia_s * 1000:g}" if self.latencia_s else "")
+
+    def peticion(self, nbytes=0):
+        if self.latencia_s:
+            time.sleep(self.latencia_s)
+        with self.lock:
+            self.stats['peticiones'] += 1
+            self.stats['bytes'] += nbytes
+
+    def listar(self, prefijo=""):
+        """Lista recursiva (una petición): {clave: {'tamaño', 'version'}}"""
+        self.peticion()
+        base = self.root / prefijo
+        objetos = {}
+        for archivo in sorted(base.rglob("*")) if base.exists() else []:
+            if archivo.is_file():
+                stat = archivo.stat()
+                objetos[archivo.relative_to(self.root).as_posix()] = {
+                    'tamaño': stat.st_size,
+                    'version': f"{stat.st_mtime_ns}-{stat.st_size}"
+                }
+        return objetos
+
+    def leer_rango(self, clave, offset, longitud):
+        """Lee longitud bytes desde offset (una petición)"""
+        with open(self.root / clave, 'rb') as f:
+            f.seek(offset)
+            datos = f.read(longitud)
+        self.peticion(len(datos))
+        return datos
+
+    def subir(self, archivo_local, clave):
+        """Sube un archivo local como objeto"""
+        destino = self.root / clave
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = destino.with_name(f".{destino.name}.tmp")
+        with open(archivo_local, 'rb') as origen, open(tmp_file, 'wb') as f:
+            while bloque := origen.read(8 * 1024**2):
+                f.write(bloque)
+        os.replace(tmp_file, destino)
+        self.peticion(destino.stat().st_size)
+
+
+class S3ObjectStore:
+    """
+    Almacén S3 o compatible (MinIO, Ceph, R2) mediante pyarrow.fs.S3FileSystem.
+    Las credenciales y el endpoint se toman de los argumentos o de las
+    variables AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_REGION y
+    AWS_ENDPOINT_URL.
+    """
+
+    def __init__(self, bucket, prefijo="", endpoint=None, access_key=None, secret_key=None, region=None):
+        endpoint = endpoint or os.environ.get('AWS_ENDPOINT_URL')
+        opciones = {
+            'access_key': access_key or os.environ.get('AWS_ACCESS_KEY_ID'),
+            'secret_key': secret_key or os.environ.get('AWS_SECRET_ACCESS_KEY'),
+            'region': region or os.environ.get('AWS_REGION', 'us-east-1')
+        }
+        if endpoint:
+            url = urlparse(endpoint)
+            opciones['endpoint_override'] = url.netloc or url.path
+            opciones['scheme'] = url.scheme or 'https'
+        self.fs = pafs.S3FileSystem(**{k: v for k, v in opciones.items() if v})
+        self.bucket = bucket
+        self.prefijo = prefijo.strip('/')
+        self.lock = threading.Lock()
+        self.stats = {'peticiones': 0, 'bytes': 0}
+        self.infos = {}
+
+    def __repr__(self):
+        return f"s3://{self.bucket}/{self.prefijo}"
+
+    def ruta(self, clave):
+        return '/'.join(p for p in (self.bucket, self.prefijo, clave) if p)
+
+    def peticion(self, nbytes=0):
+        with self.lock:
+            self.stats['peticiones'] += 1
+            self.stats['bytes'] += nbytes
+
+    def listar(self, prefijo=""):
+        """Lista recursiva (ListObjectsV2 paginado): {clave: {'tamaño', 'version'}}"""
+        base = self.ruta(prefijo)
+        inicio = len(self.ruta('')) + 1
+        infos = self.fs.get_file_info(pafs.FileSelector(base, recursive=True, allow_not_found=True))
+        self.peticion()
+        objetos = {}
+        for info in infos:
+            if info.type == pafs.FileType.File:
+                clave = info.path[inicio:]
+                self.infos[clave] = info
+                objetos[clave] = {'tamaño': info.size, 'version': f"{info.mtime_ns}-{info.size}"}
+        return objetos
+
+    def leer_rango(self, clave, offset, longitud):
+        """GET con cabecera Range; el FileInfo del listado evita un HEAD por archivo"""
+        with self.fs.open_input_file(self.infos.get(clave) or self.ruta(clave)) as f:
+            datos = f.read_at(longitud, offset)
+        self.peticion(len(datos))
+        return datos
+
+    def subir(self, archivo_local, clave):
+        pafs.copy_files(str(archivo_local), self.ruta(clave), destination_filesystem=self.fs)
+        self.peticion(Path(archivo_local).stat().st_size)
+
+
+def abrir_almacenamiento(uri):
+    """
+    Almacén de objetos a partir de una URI:
+        s3://bucket/prefijo              S3 o compatible (AWS_ENDPOINT_URL para MinIO)
+        local:///ruta?latencia_ms=20     directorio local con latencia simulada
+    """
+    url = urlparse(str(uri))
+    if url.scheme == 's3':
+        return S3ObjectStore(url.netloc, url.path)
+    if url.scheme == 'local':
+        latencia = float(parse_qs(url.query).get('latencia_ms', ['0'])[0])
+        return LocalObjectStore(url.netloc + url.path, latencia)
+    raise ValueError(f"URI de almacenamiento no soportada: {uri}")
+
+
+def es_uri_remota(ruta):
+    return urlparse(str(ruta)).scheme in ('s3', 'local')
+
+
+def subir_directorio(directorio, almacen, prefijo=None, hilos=8):
+    """Sube un directorio (datasets, metadata y auxiliares) al almacén en paralelo"""
+    directorio = Path(directorio)
+    prefijo = directorio.name if prefijo is None else prefijo
+    archivos = [a for a in sorted(directorio.rglob("*")) if a.is_file()]
+
+    def subir(archivo):
+        almacen.subir(archivo, '/'.join(p for p in (prefijo, archivo.relative_to(directorio).as_posix()) if p))
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        list(pool.map(subir, archivos))
+    return len(archivos)
+
+
+class BlockCache:
+    """
+    Caché LRU en disco de bloques de tamaño fijo de objetos remotos.
+
+    Cada bloque se indexa por clave + versión (tamaño y mtime del objeto),
+    así que un objeto reescrito no reutiliza bloques viejos. Los bloques que
+    faltan para una lectura se piden agrupados en rangos contiguos, uniendo
+    huecos pequeños, para minimizar peticiones. El índice se persiste cada
+    pocas escrituras y al cerrar (cerrar() o al salir del proceso), así que
+    los bloques se reutilizan entre ejecuciones.
+    """
+
+    def __init__(self, cache_dir=".block_cache", tamaño_bloque=256 * 1024, max_mb=1024, hueco_max=512 * 1024):
+        """
+        Args:
+            tamaño_bloque: Bytes por bloque
+            max_mb: Tamaño máximo de la caché antes de expulsar bloques (LRU)
+            hueco_max: Bytes no pedidos entre dos rangos por debajo de los cuales
+                se unen en una sola petición
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.tamaño_bloque = tamaño_bloque
+        self.max_bytes = max_mb * 1024**2
+        self.hueco_bloques = max(0, hueco_max // tamaño_bloque)
+        self.index_file = self.cache_dir / "index.json"
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'peticiones': 0, 'evictions': 0}
+        self.cambios = 0
+        self.cambios_guardados = 0
+        self.index = self.cargar_indice()
+        # max_mb puede ser menor que en la ejecución anterior
+        self.expulsar()
+        self.cambios += self.stats['evictions']
+        atexit.register(self.cerrar)
+
+    def cargar_indice(self):
+        """
+        Índice de la ejecución anterior reconciliado con los bloques en disco.
+        Sin índice (o ilegible) se reconstruye desde los .blk: sus nombres ya
+        son la clave del bloque. Con índice se descartan las entradas sin
+        archivo y se borran los .blk que no están en él (escritos después del
+        último guardado de un proceso que no cerró), que de otro modo nunca
+        se reutilizarían ni contarían para max_mb.
+        """
+        index = None
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+            except Exception:
+                index = None
+
+        bloques = {archivo.stem: archivo for archivo in self.cache_dir.glob("*.blk")}
+        for tmp_file in self.cache_dir.glob("*.tmp*"):
+            tmp_file.unlink(missing_ok=True)
+
+        if index is None:
+            index = {}
+            for key, archivo in bloques.items():
+                stat = archivo.stat()
+                index[key] = {'bytes': stat.st_size, 'last_access': stat.st_mtime}
+            self.cambios += int(bool(index))
+            return index
+
+        vivos = {key: entry for key, entry in index.items() if key in bloques}
+        huerfanos = [archivo for key, archivo in bloques.items() if key not in vivos]
+        for archivo in huerfanos:
+            archivo.unlink(missing_ok=True)
+        self.cambios += int(bool(huerfanos) or len(vivos) != len(index))
+        return vivos
+
+    def guardar_indice(self):
+        """Persiste el índice de forma atómica"""
+        tmp_file = self.index_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_file, self.index_file)
+        self.cambios_guardados = self.cambios
+
+    def cerrar(self):
+        """Persiste el índice si hay escrituras sin guardar"""
+        with self.lock:
+            if self.cambios != self.cambios_guardados:
+                self.guardar_indice()
+
+    def clave_bloque(self, clave, version, i):
+        return hashlib.sha256(f"{clave}|{version}|{self.tamaño_bloque}|{i}".encode('utf-8')).hexdigest()[:32]
+
+    def bloque_local(self, key):
+        """Contenido de un bloque cacheado o None"""
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        try:
+            with open(self.cache_dir / f"{key}.blk", 'rb') as f:
+                datos = f.read()
+        except OSError:
+            self.index.pop(key, None)
+            return None
+        entry['last_access'] = time.time()
+        return datos
+
+    def guardar_bloque(self, key, datos):
+        tmp_file = self.cache_dir / f"{key}.tmp{threading.get_ident()}"
+        with open(tmp_file, 'wb') as f:
+            f.write(datos)
+        os.replace(tmp_file, self.cache_dir / f"{key}.blk")
+        self.index[key] = {'bytes': len(datos), 'last_access': time.time()}
+
+    def expulsar(self):
+        """Expulsa los bloques menos usados hasta respetar el tamaño máximo"""
+        total = sum(e['bytes'] for e in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            total -= self.index.pop(key)['bytes']
+            (self.cache_dir / f"{key}.blk").unlink(missing_ok=True)
+            self.stats['evictions'] += 1
+
+    def rangos_faltantes(self, faltan):
+        """Agrupa índices de bloque faltantes en rangos [inicio, fin] uniendo huecos pequeños"""
+        rangos = []
+        for i in faltan:
+            if rangos and i - rangos[-1][1] - 1 <= self.hueco_bloques:
+                rangos[-1][1] = i
+            else:
+                rangos.append([i, i])
+        return rangos
+
+    def leer(self, almacen, clave, version, tamaño, offset, longitud):
+        """Lee [offset, offset + longitud) de un objeto a través de la caché"""
+        longitud = max(0, min(longitud, tamaño - offset))
+        if longitud == 0:
+            return b""
+
+        primero = offset // self.tamaño_bloque
+        ultimo = (offset + longitud - 1) // self.tamaño_bloque
+        bloques = {}
+        with self.lock:
+            for i in range(primero, ultimo + 1):
+                datos = self.bloque_local(self.clave_bloque(clave, version, i))
+                if datos is not None:
+                    bloques[i] = datos
+            self.stats['hits'] += len(bloques)
+
+        faltan = [i for i in range(primero, ultimo + 1) if i not in bloques]
+        if faltan:
+            descargados = {}
+            rangos = self.rangos_faltantes(faltan)
+            for inicio, fin in rangos:
+                desde = inicio * self.tamaño_bloque
+                hasta = min(tamaño, (fin + 1) * self.tamaño_bloque)
+                datos = almacen.leer_rango(clave, desde, hasta - desde)
+                for i in range(inicio, fin + 1):
+                    descargados[i] = datos[(i - inicio) * self.tamaño_bloque:(i - inicio + 1) * self.tamaño_bloque]
+
+            with self.lock:
+                self.stats['misses'] += len(faltan)
+                self.stats['peticiones'] += len(rangos)
+                for i, datos in descargados.items():
+                    self.guardar_bloque(self.clave_bloque(clave, version, i), datos)
+                bloques.update(descargados)
+                self.expulsar()
+                self.cambios += 1
+                # El índice se persiste cada pocas escrituras, no en cada lectura
+                if self.cambios % 32 == 0:
+                    self.guardar_indice()
+
+        datos = b"".join(bloques[i] for i in range(primero, ultimo + 1))
+        inicio = offset - primero * self.tamaño_bloque
+        return datos[inicio:inicio + longitud]
+
+    def limpiar(self):
+        """Elimina todos los bloques"""
+        with self.lock:
+            for key in list(self.index):
+                (self.cache_dir / f"{key}.blk").unlink(missing_ok=True)
+            self.index = {}
+            self.cambios += 1
+            self.guardar_indice()
+
+    def resumen(self):
+        bloques = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'hit_rate': self.stats['hits'] / bloques if bloques else 0.0,
+            'bloques': len(self.index),
+            'size_mb': sum(e['bytes'] for e in self.index.values()) / 1024**2
+        }
+
+
+class ArchivoRemoto(io.RawIOBase):
+    """Archivo de solo lectura con seek sobre un objeto remoto, leído a través de la BlockCache"""
+
+    def __init__(self, almacen, cache, clave, objeto):
+        self.almacen = almacen
+        self.cache = cache
+        self.clave = clave
+        self.tamaño = objeto['tamaño']
+        self.version = objeto['version']
+        self.posicion = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.posicion, io.SEEK_END: self.tamaño}[whence]
+        self.posicion = max(0, base + offset)
+        return self.posicion
+
+    def tell(self):
+        return self.posicion
+
+    def size(self):
+        return self.tamaño
+
+    def readinto(self, buffer):
+        datos = self.cache.leer(self.almacen, self.clave, self.version, self.tamaño, self.posicion, len(buffer))
+        buffer[:len(datos)] = datos
+        self.posicion += len(datos)
+        return len(datos)
+
+
+class AlmacenFileSystemHandler(pafs.FileSystemHandler):
+    """
+    Filesystem pyarrow de solo lectura sobre un almacén de objetos y su
+    BlockCache. Los datasets de pyarrow (y DuckDB al escanearlos) leen los
+    Parquet remotos con lecturas por rango cacheadas; los metadatos de los
+    archivos salen del listado inicial, sin peticiones por archivo.
+    """
+
+    def __init__(self, almacen, cache, objetos):
+        self.almacen = almacen
+        self.cache = cache
+        self.objetos = objetos
+
+    def get_type_name(self):
+        return "almacen"
+
+    def normalize_path(self, path):
+        return path.strip('/')
+
+    def get_file_info(self, paths):
+        infos = []
+        for path in paths:
+            path = path.strip('/')
+            objeto = self.objetos.get(path)
+            if objeto is not None:
+                infos.append(pafs.FileInfo(path, pafs.FileType.File, size=objeto['tamaño']))
+            elif any(clave.startswith(path + '/') for clave in self.objetos):
+                infos.append(pafs.FileInfo(path, pafs.FileType.Directory))
+            else:
+                infos.append(pafs.FileInfo(path, pafs.FileType.NotFound))
+        return infos
+
+    def get_file_info_selector(self, selector):
+        base = selector.base_dir.strip('/')
+        prefijo = f"{base}/" if base else ""
+        infos = {}
+        for clave, objeto in self.objetos.items():
+            if not clave.startswith(prefijo):
+                continue
+            partes = clave[len(prefijo):].split('/')
+            if len(partes) == 1:
+                infos[clave] = pafs.FileInfo(clave, pafs.FileType.File, size=objeto['tamaño'])
+            elif selector.recursive:
+                infos[clave] = pafs.FileInfo(clave, pafs.FileType.File, size=objeto['tamaño'])
+                for i in range(1, len(partes)):
+                    directorio = prefijo + '/'.join(partes[:i])
+                    infos[directorio] = pafs.FileInfo(directorio, pafs.FileType.Directory)
+            else:
+                directorio = prefijo + partes[0]
+                infos[directorio] = pafs.FileInfo(directorio, pafs.FileType.Directory)
+        return list(infos.values())
+
+    def abrir(self, path):
+        path = path.strip('/')
+        if path not in self.objetos:
+            raise FileNotFoundError(path)
+        return pa.PythonFile(ArchivoRemoto(self.almacen, self.cache, path, self.objetos[path]), mode='r')
+
+    def open_input_file(self, path):
+        return self.abrir(path)
+
+    def open_input_stream(self, path):
+        return self.abrir(path)
+
+    def solo_lectura(self, *args, **kwargs):
+        raise NotImplementedError("Almacén de solo lectura")
+
+    create_dir = delete_dir = delete_dir_contents = delete_root_dir_contents = solo_lectura
+    delete_file = move = copy_file = open_output_stream = open_append_stream = solo_lectura
+
+
+def precargar_footers(almacen, cache, objetos, claves, hilos=16):
+    """
+    Lee en paralelo los footers de los Parquet (últimos TAMAÑO_FOOTER bytes
+    en una petición; el resto si el footer es mayor) para que abrir los
+    datasets no haga una petición secuencial por archivo
+
+    Returns:
+        Bytes de footer por clave
+    """
+    def footer(clave):
+        tamaño = objetos[clave]['tamaño']
+        version = objetos[clave]['version']
+        cola = cache.leer(almacen, clave, version, tamaño, max(0, tamaño - TAMAÑO_FOOTER), TAMAÑO_FOOTER)
+        if len(cola) < 8 or cola[-4:] != b'PAR1':
+            raise ValueError(f"{clave} no es un archivo Parquet")
+        longitud = struct.unpack('<I', cola[-8:-4])[0] + 8
+        if longitud > len(cola):
+            cache.leer(almacen, clave, version, tamaño, tamaño - longitud, longitud - len(cola))
+        return clave, longitud
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        return dict(pool.map(footer, claves))
@@ -0,0 +1,68 @@
+import duckdb
+import pandas as pd
+
+# Bucketing sugerido: ventas por cliente (análisis por cliente y joins por
+# cliente_id con otros datasets distribuidos con la misma clave y buckets,
+# como la dimensión clientes del modelo estrella)
+BUCKETS_POR_DEFECTO = {'ventas': ('cliente_id', 16), 'clientes': ('cliente_id', 16)}
+
+# Nombre de los archivos de cada bucket dentro de cada partición
+PATRON_ARCHIVO = "bucket_{:05d}.parquet"
+
+
+def expresion_bucket(columna, numeric, buckets):
+    """
+    Expresión SQL DuckDB del bucket de una fila. No usa hash() de DuckDB,
+    que puede cambiar entre versiones: hash multiplicativo de Knuth para
+    claves enteras y md5 para el resto.
+
+    Del hash multiplicativo se toman los bits altos (h * buckets) >> 32: los
+    bajos no mezclan la clave (con un multiplicador impar, h % 16 == k % 16)
+    y unas claves múltiplo de buckets acabarían todas en el mismo bucket
+    """
+    if numeric:
+        return (f'CAST(((((CAST("{columna}" AS HUGEINT) * 2654435761) & 4294967295) * {buckets}) >> 32) '
+                f'AS INTEGER)')
+    return f'CAST(md5_number(CAST("{columna}" AS VARCHAR)) % {buckets} AS INTEGER)'
+
+
+def especificacion_buckets(df, columna, buckets):
+    """
+    Spec de bucketing para la metadata: columna, número de buckets y la
+    expresión con la que el analizador calcula el bucket de un valor
+
+    Returns:
+        {'columna', 'buckets', 'expresion', 'patron'} o {} si la columna no existe
+    """
+    if columna not in df.columns:
+        print(f"   ⚠️  Columna de bucketing '{columna}' no encontrada")
+        return {}
+
+    numeric = pd.api.types.is_integer_dtype(df[columna])
+    return {
+        'columna': columna,
+        'buckets': int(buckets),
+        'expresion': expresion_bucket(columna, numeric, buckets),
+        'patron': PATRON_ARCHIVO
+    }
+
+
+def dividir_en_buckets(df, spec):
+    """
+    Reparte las filas de una partición por bucket, ordenadas por la clave
+    dentro de cada bucket (joins por rangos y zone maps más selectivos)
+
+    Returns:
+        Lista de (bucket, DataFrame) sin los buckets vacíos
+    """
+    conn = duckdb.connect()
+    conn.register('particion', df[[spec['columna']]])
+    asignados = conn.execute(f"SELECT {spec['expresion']} FROM particion").fetchnumpy()
+    conn.close()
+
+    bucket_col = next(iter(asignados.values()))
+    partes = []
+    for bucket in sorted(set(bucket_col.tolist())):
+        parte = df[bucket_col == bucket].sort_values(spec['columna'], kind='stable')
+        partes.append((bucket, parte))
+    return partes
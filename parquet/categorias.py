@@ -0,0 +1,46 @@
+import pandas as pd
+
+# Columnas de texto con pocos valores distintos (categoria, metodo_pago,
+# canal, nivel, estado...) se guardan como diccionario Arrow
+MAX_CATEGORIAS = 256
+MAX_RATIO_CATEGORIAS = 0.5
+
+
+def columnas_categoricas(df, excluir=(), max_categorias=MAX_CATEGORIAS, max_ratio=MAX_RATIO_CATEGORIAS):
+    """
+    Columnas de texto de baja cardinalidad: como mucho max_categorias valores
+    distintos y no más de max_ratio valores distintos por fila. Las fechas en
+    texto (columnas 'fecha*') no se incluyen
+    """
+    columnas = []
+    for col in df.columns:
+        if col in excluir or col.endswith('_id') or 'fecha' in col.lower():
+            continue
+        if df[col].dtype.name != 'category' and df[col].dtype != 'object' \
+                and not pd.api.types.is_string_dtype(df[col]):
+            continue
+
+        distintos = df[col].nunique(dropna=True)
+        if 0 < distintos <= max_categorias and distintos <= max_ratio * len(df):
+            columnas.append(col)
+    return columnas
+
+
+def categorizar_columnas(df, excluir=()):
+    """
+    Convierte las columnas de baja cardinalidad a category de pandas, que
+    pyarrow escribe como dictionary<int8/int16, string>: el esquema Arrow
+    guardado en el Parquet hace que pd.read_parquet las devuelva como
+    category y el analizador las carga como ENUM en las tablas nativas.
+
+    Returns:
+        (df, spec) donde spec es {columna: [categorías ordenadas]}
+    """
+    spec = {}
+    for col in columnas_categoricas(df, excluir):
+        valores = df[col].astype('string')
+        categorias = sorted(valores.dropna().unique().tolist())
+        df[col] = pd.Categorical(valores, categories=categorias)
+        spec[col] = categorias
+        print(f"   🏷️  {col}: {len(categorias)} valores -> category (diccionario)")
+    return df, spec
@@ -6,22 +6,52 @@ from datetime import datetime
 import glob
 from pathlib import Path
 
+from id_encoding import compactar_columnas_id, opciones_escritura_ids
+from rollups import construir_rollups
+from muestras import construir_muestra, construir_sketches
+from zonas import construir_zonas
+from categorias import categorizar_columnas
+from dinero import columnas_dinero, a_decimal, para_escritura, opciones_escritura_dinero
+from buckets import especificacion_buckets, dividir_en_buckets
+from almacenamiento import abrir_almacenamiento, subir_directorio
+
 class ParquetCompressionConverter:
     """
     Conversor CSV a Parquet con múltiples opciones de compresión
     Soporta: snappy, gzip, brotli, lz4, zstd, none
     """
     
-    def __init__(self, output_dir="parquet_compressed", compression="snappy"):
+    def __init__(self, output_dir="parquet_compressed", compression="snappy", compactar_ids=True, rollups=True, muestras=True, zonas=True, almacenamiento=None, categorias=True, dinero=None, buckets=None):
         """
         Inicializa el conversor con compresión específica
         
         Args:
             output_dir: Directorio de salida
             compression: Tipo de compresión ('snappy', 'gzip', 'brotli', 'lz4', 'zstd', 'none')
+            compactar_ids: Guardar IDs tipo 'ORD-00001' como prefijo + entero delta
+            rollups: Construir tablas pre-agregadas (ver rollups.ROLLUP_SPECS)
+            muestras: Guardar muestra estratificada y sketches para el modo aproximado
+            zonas: Guardar zone maps por row group de las expresiones derivadas
+            almacenamiento: URI del almacén de objetos al que subir el resultado
+                (s3://bucket/prefijo o local:///ruta); None lo deja solo en output_dir
+            categorias: Mantener las columnas de texto de baja cardinalidad como
+                diccionario (category en pandas, ENUM en tablas DuckDB) en lugar de string
+            dinero: Columnas monetarias en punto fijo: 'decimal' (DECIMAL(18,2) en
+                Parquet) o 'centimos' (int64 escalado); None las deja en coma flotante
+            buckets: Dict tipo de dataset -> (columna, número de buckets) para repartir
+                las filas de cada partición en archivos por hash de la columna
+                (p.ej. buckets.BUCKETS_POR_DEFECTO)
         """
         self.output_dir = Path(output_dir)
         self.compression = compression
+        self.compactar_ids = compactar_ids
+        self.rollups = rollups
+        self.muestras = muestras
+        self.zonas = zonas
+        self.almacenamiento = almacenamiento
+        self.categorias = categorias
+        self.dinero = dinero
+        self.buckets = buckets or {}
         self.output_dir.mkdir(exist_ok=True)
         
         # Información sobre tipos de compresión
@@ -160,10 +190,13 @@ class ParquetCompressionConverter:
         for col in df.columns:
             original_dtype = df[col].dtype
             
-            # Category a string para compatibilidad
+            # Category: se mantiene como diccionario o a string para compatibilidad
             if df[col].dtype.name == 'category':
-                df[col] = df[col].astype('string')
-                print(f"   📊 {col}: category -> string")
+                if self.categorias:
+                    print(f"   📊 {col}: category (diccionario)")
+                else:
+                    df[col] = df[col].astype('string')
+                    print(f"   📊 {col}: category -> string")
             
             # Optimizar enteros manteniendo compatibilidad
             elif 'int' in str(df[col].dtype):
@@ -288,6 +321,19 @@ class ParquetCompressionConverter:
         print(f"   ✅ {len(particiones)} partición(es) creadas")
         return particiones
 
+    def especificacion_particiones(self, dataset_type, particiones):
+        """
+        Columnas de partición hive (nombre, tipo y columna con el valor) que se
+        declaran en la metadata. Las particiones por chunk no son hive.
+        """
+        if not particiones or '=' not in particiones[0]['path']:
+            return []
+        
+        columnas = {'ventas': 'categoria', 'empleados': 'departamento', 'marketing': 'canal'}
+        if dataset_type not in columnas:
+            return []
+        return [{'name': columnas[dataset_type], 'type': 'VARCHAR', 'columna': columnas[dataset_type]}]
+
     def convertir_con_compression(self, csv_file, run_comparison=False):
         """Convierte CSV a Parquet con compresión específica"""
         print(f"\n🔄 Procesando: {csv_file}")
@@ -302,6 +348,13 @@ class ParquetCompressionConverter:
                 dataset_type = 'empleados'
             elif 'marketing' in filename or 'campaña' in filename:
                 dataset_type = 'marketing'
+            # Dimensiones del modelo estrella (dim_clientes_*.csv, ...)
+            elif 'cliente' in filename:
+                dataset_type = 'clientes'
+            elif 'producto' in filename:
+                dataset_type = 'productos'
+            elif 'tienda' in filename:
+                dataset_type = 'tiendas'
             else:
                 dataset_type = 'otros'
             
@@ -317,11 +370,34 @@ class ParquetCompressionConverter:
                 muestra = df.sample(min(10000, len(df)))
                 self.comparar_compresiones(muestra, f"{dataset_type}_muestra")
             
+            # Compactar columnas de ID antes de optimizar tipos
+            id_spec = {}
+            if self.compactar_ids:
+                df, id_spec = compactar_columnas_id(df)
+            
+            # Columnas monetarias en punto fijo (exactas en rollups y sin float32)
+            dinero_spec = {}
+            if self.dinero:
+                dinero_spec = columnas_dinero(df, dataset_type, self.dinero)
+                df = a_decimal(df, dinero_spec)
+            
             # Optimizar
             df = self.optimizar_dataframe(df)
             
+            # Columnas de baja cardinalidad como diccionario Arrow
+            categorias_spec = {}
+            if self.categorias:
+                df, categorias_spec = categorizar_columnas(df, excluir=id_spec)
+            
+            # Distribución por hash de la clave en buckets
+            bucket_spec = {}
+            if dataset_type in self.buckets:
+                columna, n = self.buckets[dataset_type]
+                bucket_spec = especificacion_buckets(df, columna, n)
+            
             # Crear particiones
             particiones = self.crear_particiones_by_compression(df, dataset_type)
+            partitioning = self.especificacion_particiones(dataset_type, particiones)
             
             # Directorio de salida
             output_dataset_dir = self.output_dir / f"{dataset_type}_{self.compression}"
@@ -335,7 +411,6 @@ class ParquetCompressionConverter:
             total_start_time = time.time()
             
             for i, particion in enumerate(particiones):
-                data = particion['data']
                 path = particion['path']
                 
                 # Crear directorio
@@ -344,34 +419,70 @@ class ParquetCompressionConverter:
                     full_path.mkdir(parents=True, exist_ok=True)
                     parquet_file = full_path / f"data.parquet"
                 else:
+                    full_path = output_dataset_dir
                     parquet_file = output_dataset_dir / f"{Path(csv_file).stem}.parquet"
                 
-                # Escribir con compresión específica
-                start_time = time.time()
+                # Con bucketing, un archivo por bucket dentro de la partición
+                destinos = [(parquet_file, particion['data'])]
+                if bucket_spec:
+                    destinos = [
+                        (full_path / bucket_spec['patron'].format(bucket), parte)
+                        for bucket, parte in dividir_en_buckets(particion['data'], bucket_spec)
+                    ]
                 
-                try:
-                    data.to_parquet(
-                        parquet_file,
-                        engine='pyarrow',
-                        compression=self.compression if self.compression != 'none' else None,
-                        index=False,
-                        # Configuraciones adicionales para compresión
-                        row_group_size=10000,  # Optimizar para compresión
-                        data_page_size=1024*1024  # 1MB pages
-                    )
+                for parquet_file, data in destinos:
+                    # Escribir con compresión específica
+                    start_time = time.time()
+                
+                    try:
+                        para_escritura(data, dinero_spec).to_parquet(
+                            parquet_file,
+                            engine='pyarrow',
+                            compression=self.compression if self.compression != 'none' else None,
+                            index=False,
+                            # Configuraciones adicionales para compresión
+                            row_group_size=10000,  # Optimizar para compresión
+                            data_page_size=1024*1024,  # 1MB pages
+                            **opciones_escritura_ids(data, id_spec),
+                            **opciones_escritura_dinero(dinero_spec)
+                        )
                     
-                    write_time = time.time() - start_time
-                    file_size = parquet_file.stat().st_size / (1024**2)
-                    parquet_size_mb += file_size
-                    archivos_generados.append(str(parquet_file))
+                        write_time = time.time() - start_time
+                        file_size = parquet_file.stat().st_size / (1024**2)
+                        parquet_size_mb += file_size
+                        archivos_generados.append(str(parquet_file))
                     
-                    print(f"   ✅ {parquet_file.name} ({len(data):,} reg, {file_size:.2f}MB, {write_time:.2f}s)")
+                        print(f"   ✅ {parquet_file.name} ({len(data):,} reg, {file_size:.2f}MB, {write_time:.2f}s)")
                     
-                except Exception as e:
-                    print(f"   ❌ Error: {e}")
+                    except Exception as e:
+                        print(f"   ❌ Error: {e}")
             
             total_time = time.time() - total_start_time
             
+            # Rollups pre-agregados para el analizador
+            rollups = []
+            if self.rollups:
+                rollups = construir_rollups(
+                    df, dataset_type, self.output_dir / '_rollups' / output_dataset_dir.name, particiones=partitioning,
+                    base_dir=self.output_dir
+                )
+            
+            # Muestra estratificada y sketches para el modo aproximado del analizador
+            aproximado = {}
+            if self.muestras:
+                aproximado_dir = self.output_dir / '_aproximado' / output_dataset_dir.name
+                aproximado = {
+                    'muestra': construir_muestra(df, dataset_type, aproximado_dir, particiones=partitioning,
+                                                 base_dir=self.output_dir),
+                    'sketches': construir_sketches(df, dataset_type, aproximado_dir, particiones=partitioning,
+                                                   base_dir=self.output_dir)
+                }
+            
+            # Zone maps de expresiones derivadas (mes, bandas, niveles) por row group
+            zone_maps = {}
+            if self.zonas:
+                zone_maps = construir_zonas(archivos_generados, dataset_type, output_dataset_dir, dinero=dinero_spec)
+            
             # Metadata
             compression_ratio = ((csv_size_mb - parquet_size_mb) / csv_size_mb * 100) if csv_size_mb > 0 else 0
             
@@ -396,6 +507,14 @@ class ParquetCompressionConverter:
                     'space_saved_mb': round(csv_size_mb - parquet_size_mb, 2)
                 },
                 'compression_details': self.compression_info.get(self.compression, {}),
+                'id_columns': id_spec,
+                'categorias': categorias_spec,
+                'dinero': dinero_spec,
+                'bucketing': bucket_spec,
+                'partitioning': partitioning,
+                'rollups': rollups,
+                'aproximado': aproximado,
+                'zone_maps': zone_maps,
                 'files': archivos_generados
             }
             
@@ -440,6 +559,12 @@ class ParquetCompressionConverter:
         if resultados:
             self.crear_reporte_compression(resultados)
         
+        # Publicar en el almacén de objetos (output_dir queda como staging local)
+        if resultados and self.almacenamiento:
+            almacen = abrir_almacenamiento(self.almacenamiento)
+            subidos = subir_directorio(self.output_dir, almacen)
+            print(f"☁️  {subidos} archivos subidos a {almacen!r}")
+        
         return resultados
 
     def crear_reporte_compression(self, resultados):
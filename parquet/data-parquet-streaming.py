@@ -0,0 +1,85 @@
+import argparse
+import time
+from pathlib import Path
+
+from streaming import MicroBatchIngestor
+
+
+def parse_args():
+    """Argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Ingesta en micro-lotes de eventos NDJSON/CSV a un dataset Parquet")
+    parser.add_argument("--parquet-dir", default="parquet_data", help="Directorio con los datasets")
+    parser.add_argument("--dataset", default="ventas", help="Dataset destino (ya convertido, con su metadata)")
+    parser.add_argument("--directorio", nargs="+", default=[], help="Directorios con archivos .ndjson/.jsonl/.csv a seguir")
+    parser.add_argument("--socket", help="Socket local para eventos NDJSON: host:puerto (TCP) o ruta de un socket Unix")
+    parser.add_argument("--max-filas", type=int, default=200_000, help="Filas que fuerzan la escritura de un lote")
+    parser.add_argument("--max-mb", type=float, default=64, help="Memoria acumulada que fuerza la escritura de un lote")
+    parser.add_argument("--max-segundos", type=float, default=2.0, help="Latencia máxima hasta que el analizador ve un evento")
+    parser.add_argument("--max-cola", type=int, default=32, help="Bloques de 1MB pendientes antes de frenar a las fuentes")
+    parser.add_argument("--compression", default="snappy", help="Codec de los archivos escritos")
+    parser.add_argument("--duracion", type=float, help="Segundos de ingesta (por defecto hasta Ctrl+C)")
+    parser.add_argument("--intervalo-estado", type=float, default=10, help="Segundos entre resúmenes de progreso")
+    return parser.parse_args()
+
+
+def main():
+    """Función principal"""
+    args = parse_args()
+
+    print("💧 INGESTA EN MICRO-LOTES A PARQUET")
+    print("=" * 40)
+
+    if not args.directorio and not args.socket:
+        print("❌ Indicar al menos una fuente (--directorio o --socket)")
+        return
+
+    dataset_dir = Path(args.parquet_dir) / args.dataset
+    try:
+        ingestor = MicroBatchIngestor(
+            dataset_dir,
+            max_filas=args.max_filas,
+            max_mb=args.max_mb,
+            max_segundos=args.max_segundos,
+            max_cola=args.max_cola,
+            compression=args.compression
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+
+    print(f"📁 Destino: {dataset_dir} ({len(ingestor.particiones)} columna(s) de partición"
+          f"{', ' + str(ingestor.buckets['buckets']) + ' buckets' if ingestor.buckets else ''})")
+    print(f"⚙️  Lotes: {args.max_filas:,} filas / {args.max_mb}MB / {args.max_segundos}s, cola de {args.max_cola} bloques")
+
+    for directorio in args.directorio:
+        ingestor.seguir_directorio(directorio)
+    if args.socket:
+        ingestor.escuchar_socket(args.socket)
+    ingestor.iniciar()
+
+    start_time = time.time()
+    try:
+        while True:
+            restante = None if args.duracion is None else args.duracion - (time.time() - start_time)
+            if restante is not None and restante <= 0:
+                break
+            time.sleep(args.intervalo_estado if restante is None else min(args.intervalo_estado, restante))
+            resumen = ingestor.resumen()
+            print(f"📈 {resumen['eventos']:,} eventos, {resumen['lotes']} lotes, {resumen['rechazados']} rechazados, "
+                  f"{resumen.get('eventos_s') or 0:,.0f} eventos/s, cola {ingestor.cola.qsize()}/{args.max_cola}")
+    except KeyboardInterrupt:
+        print(f"\n🛑 Deteniendo ingesta...")
+    finally:
+        ingestor.detener()
+
+    resumen = ingestor.resumen()
+    print(f"\n✅ Ingesta completada en {time.time() - start_time:.1f}s")
+    print(f"   📊 {resumen['eventos']:,} eventos en {resumen['lotes']} lotes ({resumen['archivos']} archivos, "
+          f"{resumen['mb_escritos']:.2f}MB), {resumen['rechazados']} rechazados")
+    if resumen.get('eventos_s'):
+        print(f"   ⚡ {resumen['eventos_s']:,.0f} eventos/s (capacidad {resumen['capacidad_eventos_s']:,.0f}/s), "
+              f"latencia máxima {resumen['max_latencia_s']:.2f}s, buffer máximo {resumen['max_buffer_mb']:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
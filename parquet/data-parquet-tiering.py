@@ -0,0 +1,100 @@
+import argparse
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from tiering import PartitionTieringManager
+
+
+def parse_args():
+    """Argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Tiering caliente/frío de particiones Parquet")
+    parser.add_argument("--parquet-dir", default="parquet_data", help="Directorio con los datasets")
+    parser.add_argument("--datasets", nargs="+", help="Datasets a procesar (por defecto todos)")
+    parser.add_argument("--codec-caliente", default="snappy", help="Codec de las particiones calientes")
+    parser.add_argument("--codec-frio", default="zstd", choices=["zstd", "brotli", "gzip"], help="Codec de las particiones frías")
+    parser.add_argument("--nivel-frio", type=int, help="Nivel de compresión del codec frío")
+    parser.add_argument("--dias-calientes", type=int, default=30, help="Antigüedad máxima de una partición caliente")
+    parser.add_argument("--min-accesos", type=int, default=3, help="Lecturas en la ventana que hacen caliente una partición")
+    parser.add_argument("--ventana-dias", type=int, default=7, help="Ventana de las estadísticas de acceso")
+    parser.add_argument("--log-accesos", help="Log JSONL del perfilado del analizador (data-duckdb.py --perfilado)")
+    parser.add_argument("--mb-por-segundo", type=float, default=50, help="Límite de lectura de la recompresión (0 = sin límite)")
+    parser.add_argument("--intervalo", type=float, help="Repetir cada N segundos en segundo plano hasta Ctrl+C")
+    parser.add_argument("--plan", action="store_true", help="Solo mostrar la clasificación y el plan")
+    return parser.parse_args()
+
+
+def main():
+    """Función principal"""
+    args = parse_args()
+
+    print("🌡️  TIERING DE PARTICIONES PARQUET")
+    print("=" * 40)
+
+    parquet_dir = Path(args.parquet_dir)
+    datasets = args.datasets or sorted(
+        d.name for d in parquet_dir.iterdir() if d.is_dir() and not d.name.startswith('_')
+    ) if parquet_dir.exists() else []
+    if not datasets:
+        print(f"❌ No hay datasets en {parquet_dir}")
+        return
+
+    gestores = []
+    for dataset in datasets:
+        gestor = PartitionTieringManager(
+            parquet_dir / dataset,
+            codec_caliente=args.codec_caliente,
+            codec_frio=args.codec_frio,
+            nivel_frio=args.nivel_frio,
+            dias_calientes=args.dias_calientes,
+            min_accesos=args.min_accesos,
+            ventana_dias=args.ventana_dias,
+            log_accesos=args.log_accesos,
+            mb_por_segundo=args.mb_por_segundo or None
+        )
+        gestores.append(gestor)
+
+        clasificacion = gestor.clasificar()
+        print(f"\n📊 {dataset}: {len(clasificacion)} particiones")
+        print(pd.DataFrame([
+            {
+                'particion': particion or '.',
+                'tier': info['tier'],
+                'accesos': info['accesos'],
+                'antiguedad_dias': info['antiguedad_dias'],
+                'codec': gestor.codec_archivo(info['archivos'][0]),
+                'MB': round(sum(a.stat().st_size for a in info['archivos']) / 1024**2, 2)
+            }
+            for particion, info in clasificacion.items()
+        ]).to_string(index=False))
+        print(f"   📋 {len(gestor.planificar())} archivos a recomprimir")
+
+    if args.plan:
+        return
+
+    print(f"\n🔄 Recomprimiendo en segundo plano ({args.mb_por_segundo or '∞'} MB/s)...")
+    start_time = time.time()
+    for gestor in gestores:
+        gestor.iniciar(args.intervalo)
+
+    try:
+        for gestor in gestores:
+            while gestor.hilo is not None and gestor.hilo.is_alive():
+                gestor.hilo.join(timeout=0.5)
+    except KeyboardInterrupt:
+        print(f"\n🛑 Deteniendo recompresión...")
+    finally:
+        for gestor in gestores:
+            gestor.detener()
+
+    antes = sum(e['bytes_antes'] for g in gestores for e in g.estado.values() if e.get('recomprimido_at'))
+    despues = sum(e['bytes'] for g in gestores for e in g.estado.values() if e.get('recomprimido_at'))
+    print(f"\n✅ Tiering completado en {time.time() - start_time:.1f}s")
+    if antes:
+        print(f"🗜️  Archivos recomprimidos: {antes / 1024**2:.2f}MB → {despues / 1024**2:.2f}MB "
+              f"({(1 - despues / antes) * 100:.1f}% ahorro)")
+
+
+if __name__ == "__main__":
+    main()
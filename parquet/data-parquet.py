@@ -5,13 +5,47 @@ from datetime import datetime
 import glob
 from pathlib import Path
 
+from id_encoding import compactar_columnas_id, opciones_escritura_ids
+from rollups import construir_rollups
+from muestras import construir_muestra, construir_sketches
+from zonas import construir_zonas
+from categorias import categorizar_columnas
+from dinero import columnas_dinero, a_decimal, para_escritura, opciones_escritura_dinero
+from buckets import especificacion_buckets, dividir_en_buckets
+from almacenamiento import abrir_almacenamiento, subir_directorio
+
 class RobustCSVToParquetConverter:
     """
     Conversor CSV a Parquet ultrarrrobosto que evita problemas de tipos de datos
     """
     
-    def __init__(self, output_dir="parquet_data"):
+    def __init__(self, output_dir="parquet_data", compactar_ids=True, rollups=True, muestras=True, zonas=True, almacenamiento=None, categorias=True, dinero=None, buckets=None):
+        """
+        Args:
+            output_dir: Directorio de salida
+            compactar_ids: Guardar IDs tipo 'ORD-00001' como prefijo + entero delta
+            rollups: Construir tablas pre-agregadas (ver rollups.ROLLUP_SPECS)
+            muestras: Guardar muestra estratificada y sketches para el modo aproximado
+            zonas: Guardar zone maps por row group de las expresiones derivadas
+            almacenamiento: URI del almacén de objetos al que subir el resultado
+                (s3://bucket/prefijo o local:///ruta); None lo deja solo en output_dir
+            categorias: Mantener las columnas de texto de baja cardinalidad como
+                diccionario (category en pandas, ENUM en tablas DuckDB) en lugar de string
+            dinero: Columnas monetarias en punto fijo: 'decimal' (DECIMAL(18,2) en
+                Parquet) o 'centimos' (int64 escalado); None las deja en coma flotante
+            buckets: Dict tipo de dataset -> (columna, número de buckets) para repartir
+                las filas de cada partición en archivos por hash de la columna
+                (p.ej. buckets.BUCKETS_POR_DEFECTO)
+        """
         self.output_dir = Path(output_dir)
+        self.compactar_ids = compactar_ids
+        self.rollups = rollups
+        self.muestras = muestras
+        self.zonas = zonas
+        self.almacenamiento = almacenamiento
+        self.categorias = categorias
+        self.dinero = dinero
+        self.buckets = buckets or {}
         self.output_dir.mkdir(exist_ok=True)
         print(f"✅ Conversor robusto inicializado")
         print(f"📁 Directorio de salida: {self.output_dir}")
@@ -23,10 +57,13 @@ class RobustCSVToParquetConverter:
         for col in df.columns:
             original_dtype = df[col].dtype
             
-            # Convertir category a string
+            # Category: se mantiene como diccionario o se convierte a string
             if df[col].dtype.name == 'category':
-                df[col] = df[col].astype('string')
-                print(f"   📊 {col}: category -> string")
+                if self.categorias:
+                    print(f"   📊 {col}: category (diccionario)")
+                else:
+                    df[col] = df[col].astype('string')
+                    print(f"   📊 {col}: category -> string")
             
             # Convertir int32/int64 problemáticos
             elif 'int' in str(df[col].dtype):
@@ -124,6 +161,24 @@ class RobustCSVToParquetConverter:
         print(f"   ✅ {len(particiones)} partición(es) creadas")
         return particiones
 
+    def especificacion_particiones(self, dataset_type, particiones):
+        """
+        Columnas de partición hive (nombre, tipo y columna con el valor) que se
+        declaran en la metadata para que el analizador las lea tipadas
+        """
+        if not particiones or not particiones[0]['path']:
+            return []
+        
+        specs = {
+            'ventas': [
+                {'name': 'año', 'type': 'INTEGER', 'columna': 'año'},
+                {'name': 'categoria', 'type': 'VARCHAR', 'columna': 'categoria_clean'}
+            ],
+            'empleados': [{'name': 'departamento', 'type': 'VARCHAR', 'columna': 'departamento_clean'}],
+            'marketing': [{'name': 'canal', 'type': 'VARCHAR', 'columna': 'canal_clean'}]
+        }
+        return specs.get(dataset_type, [])
+
     def convertir_csv_robusto(self, csv_file):
         """Convierte CSV a Parquet de manera ultrarrrobusta"""
         print(f"\n🔄 Procesando: {csv_file}")
@@ -137,6 +192,13 @@ class RobustCSVToParquetConverter:
                 dataset_type = 'empleados'
             elif 'marketing' in filename or 'campaña' in filename:
                 dataset_type = 'marketing'
+            # Dimensiones del modelo estrella (dim_clientes_*.csv, ...)
+            elif 'cliente' in filename:
+                dataset_type = 'clientes'
+            elif 'producto' in filename:
+                dataset_type = 'productos'
+            elif 'tienda' in filename:
+                dataset_type = 'tiendas'
             else:
                 dataset_type = 'otros'
             
@@ -150,8 +212,31 @@ class RobustCSVToParquetConverter:
             # Limpiar tipos
             df = self.limpiar_tipos_para_parquet(df)
             
+            # Compactar columnas de ID (prefijo en metadata + entero delta)
+            id_spec = {}
+            if self.compactar_ids:
+                df, id_spec = compactar_columnas_id(df)
+            
+            # Columnas monetarias en punto fijo (exactas en rollups y sin float32)
+            dinero_spec = {}
+            if self.dinero:
+                dinero_spec = columnas_dinero(df, dataset_type, self.dinero)
+                df = a_decimal(df, dinero_spec)
+            
+            # Columnas de baja cardinalidad como diccionario Arrow
+            categorias_spec = {}
+            if self.categorias:
+                df, categorias_spec = categorizar_columnas(df, excluir=id_spec)
+            
+            # Distribución por hash de la clave en buckets
+            bucket_spec = {}
+            if dataset_type in self.buckets:
+                columna, n = self.buckets[dataset_type]
+                bucket_spec = especificacion_buckets(df, columna, n)
+            
             # Crear particiones
             particiones = self.crear_particiones_seguras(df, dataset_type)
+            partitioning = self.especificacion_particiones(dataset_type, particiones)
             
             # Preparar directorio
             output_dataset_dir = self.output_dir / dataset_type
@@ -163,7 +248,6 @@ class RobustCSVToParquetConverter:
             archivos_generados = []
             
             for i, particion in enumerate(particiones):
-                data = particion['data']
                 path = particion['path']
                 
                 # Crear directorio de partición
@@ -172,34 +256,70 @@ class RobustCSVToParquetConverter:
                     full_path.mkdir(parents=True, exist_ok=True)
                     parquet_file = full_path / f"data.parquet"
                 else:
+                    full_path = output_dataset_dir
                     parquet_file = output_dataset_dir / f"{Path(csv_file).stem}.parquet"
                 
-                # Escribir Parquet con configuración segura
-                try:
-                    data.to_parquet(
-                        parquet_file, 
-                        engine='pyarrow',
-                        compression='snappy',
-                        index=False
-                    )
-                    
-                    file_size = parquet_file.stat().st_size / (1024**2)
-                    parquet_size_mb += file_size
-                    archivos_generados.append(str(parquet_file))
-                    
-                    print(f"   ✅ {parquet_file} ({len(data):,} registros, {file_size:.2f}MB)")
-                    
-                except Exception as e:
-                    print(f"   ❌ Error escribiendo {parquet_file}: {e}")
-                    # Fallback: escribir sin compresión
+                # Con bucketing, un archivo por bucket dentro de la partición
+                destinos = [(parquet_file, particion['data'])]
+                if bucket_spec:
+                    destinos = [
+                        (full_path / bucket_spec['patron'].format(bucket), parte)
+                        for bucket, parte in dividir_en_buckets(particion['data'], bucket_spec)
+                    ]
+                
+                for parquet_file, data in destinos:
+                    # Escribir Parquet con configuración segura
                     try:
-                        data.to_parquet(parquet_file, engine='pyarrow', index=False)
+                        para_escritura(data, dinero_spec).to_parquet(
+                            parquet_file, 
+                            engine='pyarrow',
+                            compression='snappy',
+                            index=False,
+                            **opciones_escritura_ids(data, id_spec),
+                            **opciones_escritura_dinero(dinero_spec)
+                        )
+                    
                         file_size = parquet_file.stat().st_size / (1024**2)
                         parquet_size_mb += file_size
                         archivos_generados.append(str(parquet_file))
-                        print(f"   ✅ {parquet_file} (sin compresión)")
-                    except Exception as e2:
-                        print(f"   ❌ Error fatal: {e2}")
+                    
+                        print(f"   ✅ {parquet_file} ({len(data):,} registros, {file_size:.2f}MB)")
+                    
+                    except Exception as e:
+                        print(f"   ❌ Error escribiendo {parquet_file}: {e}")
+                        # Fallback: escribir sin compresión
+                        try:
+                            para_escritura(data, dinero_spec).to_parquet(parquet_file, engine='pyarrow', index=False)
+                            file_size = parquet_file.stat().st_size / (1024**2)
+                            parquet_size_mb += file_size
+                            archivos_generados.append(str(parquet_file))
+                            print(f"   ✅ {parquet_file} (sin compresión)")
+                        except Exception as e2:
+                            print(f"   ❌ Error fatal: {e2}")
+            
+            # Rollups pre-agregados para el analizador
+            rollups = []
+            if self.rollups:
+                rollups = construir_rollups(
+                    df, dataset_type, self.output_dir / '_rollups' / dataset_type, particiones=partitioning,
+                    base_dir=self.output_dir
+                )
+            
+            # Muestra estratificada y sketches para el modo aproximado del analizador
+            aproximado = {}
+            if self.muestras:
+                aproximado_dir = self.output_dir / '_aproximado' / dataset_type
+                aproximado = {
+                    'muestra': construir_muestra(df, dataset_type, aproximado_dir, particiones=partitioning,
+                                                 base_dir=self.output_dir),
+                    'sketches': construir_sketches(df, dataset_type, aproximado_dir, particiones=partitioning,
+                                                   base_dir=self.output_dir)
+                }
+            
+            # Zone maps de expresiones derivadas (mes, bandas, niveles) por row group
+            zone_maps = {}
+            if self.zonas:
+                zone_maps = construir_zonas(archivos_generados, dataset_type, output_dataset_dir, dinero=dinero_spec)
             
             # Crear metadata
             metadata = {
@@ -220,6 +340,14 @@ class RobustCSVToParquetConverter:
                 'schema': {
                     col: str(df[col].dtype) for col in df.columns
                 },
+                'id_columns': id_spec,
+                'categorias': categorias_spec,
+                'dinero': dinero_spec,
+                'bucketing': bucket_spec,
+                'partitioning': partitioning,
+                'rollups': rollups,
+                'aproximado': aproximado,
+                'zone_maps': zone_maps,
                 'files': archivos_generados
             }
             
@@ -265,6 +393,12 @@ class RobustCSVToParquetConverter:
         if resultados:
             self.crear_reporte_final(resultados)
         
+        # Publicar en el almacén de objetos (output_dir queda como staging local)
+        if resultados and self.almacenamiento:
+            almacen = abrir_almacenamiento(self.almacenamiento)
+            subidos = subir_directorio(self.output_dir, almacen)
+            print(f"☁️  {subidos} archivos subidos a {almacen!r}")
+        
         return resultados
 
     def crear_reporte_final(self, resultados):
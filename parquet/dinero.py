@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Columnas monetarias por tipo de dataset
+COLUMNAS_DINERO = {
+    'ventas': ['precio_unitario', 'total'],
+    'empleados': ['salario_anual'],
+    'marketing': ['presupuesto', 'gasto_real']
+}
+
+# Céntimos; con precisión 18 el DECIMAL se guarda como INT64 en Parquet
+ESCALA = 2
+PRECISION = 18
+
+MODOS_DINERO = ('decimal', 'centimos')
+
+
+def columnas_dinero(df, dataset_type, modo, escala=ESCALA):
+    """
+    Columnas monetarias del dataset que se pueden guardar en punto fijo sin
+    pérdida: numéricas y con todos sus valores exactos a la escala
+
+    Args:
+        modo: 'decimal' (DECIMAL(18, escala) en Parquet) o 'centimos'
+            (int64 escalado por 10^escala; la vista del analizador lo
+            devuelve como DECIMAL)
+
+    Returns:
+        spec {columna: {'modo', 'escala'}}
+    """
+    if modo not in MODOS_DINERO:
+        raise ValueError(f"Modo de dinero no soportado: {modo} (usar {', '.join(MODOS_DINERO)})")
+
+    spec = {}
+    for col in COLUMNAS_DINERO.get(dataset_type, []):
+        if col not in df.columns or not pd.api.types.is_numeric_dtype(df[col]):
+            continue
+
+        escalados = df[col].dropna().astype('float64') * 10**escala
+        if not np.allclose(escalados, np.round(escalados), rtol=0, atol=1e-6):
+            print(f"   ⚠️  {col}: valores con más de {escala} decimales, se mantiene en coma flotante")
+            continue
+        spec[col] = {'modo': modo, 'escala': escala}
+    return spec
+
+
+def a_decimal(df, spec):
+    """
+    Convierte las columnas del spec a decimal exacto (ArrowDtype decimal128):
+    rollups y muestras se calculan sobre el valor exacto y la optimización de
+    tipos no las reduce a float32
+    """
+    for col, info in spec.items():
+        valores = pa.array(df[col].astype('float64').round(info['escala']), from_pandas=True)
+        df[col] = pd.Series(
+            pd.arrays.ArrowExtensionArray(valores.cast(pa.decimal128(PRECISION, info['escala']), safe=False)),
+            index=df.index
+        )
+        print(f"   💶 {col}: -> {info['modo']} (escala {info['escala']})")
+    return df
+
+
+def para_escritura(df, spec):
+    """Columnas 'centimos' del spec como int64 escalado; las 'decimal' se escriben tal cual"""
+    centimos = {
+        col: pd.Series(
+            (df[col].astype('float64') * 10**info['escala']).round().astype('Int64'), index=df.index
+        )
+        for col, info in spec.items() if info['modo'] == 'centimos' and col in df.columns
+    }
+    return df.assign(**centimos) if centimos else df
+
+
+def opciones_escritura_dinero(spec):
+    """Kwargs para to_parquet: DECIMAL con precisión <= 18 guardado como INT64"""
+    if any(info['modo'] == 'decimal' for info in spec.values()):
+        return {'store_decimal_as_integer': True}
+    return {}
+
+
+def sql_valor_dinero(col, escala=ESCALA):
+    """Expresión SQL DuckDB que reconstruye el DECIMAL de una columna en céntimos"""
+    return f'CAST("{col}" AS DECIMAL({PRECISION}, 0)) * {Decimal(1).scaleb(-escala)}'
@@ -0,0 +1,67 @@
+import pandas as pd
+
+# Identificadores tipo 'ORD-00001', 'CUST-00042', 'EMP-00001', 'CAMP-00001'
+ID_PATTERN = r'^([A-Za-z]+-)(\d+)$'
+
+
+def compactar_columnas_id(df):
+    """
+    Separa las columnas de ID con formato PREFIJO-NNNNN en un prefijo constante
+    y una columna entera (int64) que se escribe con codificación delta.
+
+    Solo se compactan las columnas cuyo round-trip es exacto: un único prefijo
+    por columna y un padding de ceros consistente. Las claves foráneas opcionales
+    (nulos) se guardan como Int64 con nulos.
+
+    Returns:
+        (df, spec) donde spec es {columna: {'prefix': str, 'width': int}}
+    """
+    spec = {}
+
+    for col in df.columns:
+        if not col.endswith('_id'):
+            continue
+        if df[col].dtype != 'object' and not pd.api.types.is_string_dtype(df[col]):
+            continue
+
+        valores = df[col].astype('string')
+        presentes = valores.dropna()
+        if presentes.empty:
+            continue
+
+        partes = presentes.str.extract(ID_PATTERN)
+        if partes[0].isna().any() or partes[0].nunique() != 1:
+            continue
+
+        prefix = partes[0].iloc[0]
+        digitos = partes[1]
+        width = int(digitos.str.len().min())
+        numeros = digitos.astype('int64')
+
+        # Verificar que el string original se puede reconstruir exactamente
+        reconstruido = prefix + numeros.astype('string').str.zfill(width)
+        if not (reconstruido == presentes).all():
+            continue
+
+        df[col] = numeros.reindex(df.index).astype('Int64') if len(presentes) < len(valores) else numeros
+        spec[col] = {'prefix': prefix, 'width': width}
+        print(f"   🆔 {col}: '{prefix}{'0' * width}' -> int64 (delta)")
+
+    return df, spec
+
+
+def opciones_escritura_ids(df, spec):
+    """
+    Kwargs para to_parquet que escriben las columnas de ID compactadas con
+    DELTA_BINARY_PACKED (incompatible con diccionario) y mantienen el
+    diccionario en el resto de columnas.
+    """
+    columnas_id = [col for col in spec if col in df.columns]
+    if not columnas_id:
+        return {}
+
+    return {
+        'use_dictionary': [col for col in df.columns if col not in columnas_id],
+        'column_encoding': {col: 'DELTA_BINARY_PACKED' for col in columnas_id}
+    }
+
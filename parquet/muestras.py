@@ -0,0 +1,155 @@
+import json
+import duckdb
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from rollups import HLL_P, valores_particion
+
+# Columna de estratificación de la muestra por tipo de dataset
+ESTRATOS = {
+    'ventas': 'categoria',
+    'empleados': 'departamento',
+    'marketing': 'canal'
+}
+
+# Columnas con sketch HLL de valores distintos
+DISTINTOS = {
+    'ventas': ['cliente_id', 'orden_id', 'producto'],
+    'empleados': ['empleado_id', 'cargo'],
+    'marketing': ['campaña_id']
+}
+
+# Percentiles guardados por columna numérica (resumen equi-depth de 101 puntos)
+PERCENTILES = [i / 100 for i in range(101)]
+
+# Columnas auxiliares de las particiones que no se resumen
+COLUMNAS_EXCLUIDAS = {'año', 'mes'}
+
+
+def construir_muestra(df, dataset_type, output_dir, fraccion=0.01, minimo_estrato=1000,
+                      compression='zstd', particiones=None, seed=42, base_dir=None):
+    """
+    Escribe una muestra estratificada del dataset en output_dir/muestra.parquet.
+
+    Cada estrato aporta max(fraccion * N_h, minimo_estrato) filas (o todas si
+    tiene menos). Las filas llevan __estrato, __pob (filas del estrato) y __mue
+    (filas muestreadas del estrato) para que el analizador calcule estimadores
+    Horvitz-Thompson y sus intervalos de confianza.
+
+    Args:
+        particiones: Especificación de particiones hive; sus columnas se guardan
+            con el valor del directorio, igual que las expone el analizador
+        base_dir: Directorio de los datasets; la ruta de la muestra se guarda
+            relativa a él
+
+    Returns:
+        Descriptor de la muestra para la metadata, o None si el dataset está vacío
+    """
+    if df.empty:
+        return None
+
+    if particiones:
+        df = df.assign(**{p['name']: valores_particion(df, p) for p in particiones})
+
+    columna = ESTRATOS.get(dataset_type)
+    if columna not in df.columns:
+        columna = None
+    estratos = df[columna].astype('string').fillna('') if columna else pd.Series('', index=df.index)
+
+    rng = np.random.default_rng(seed)
+    indices = []
+    resumen = {}
+    for valor, grupo in estratos.groupby(estratos, sort=True).groups.items():
+        N = len(grupo)
+        n = min(N, max(int(round(fraccion * N)), minimo_estrato))
+        indices.append(rng.choice(np.asarray(grupo), size=n, replace=False))
+        resumen[valor] = {'N': N, 'n': n}
+
+    muestra = df.loc[np.sort(np.concatenate(indices))].copy()
+    muestra['__estrato'] = estratos.loc[muestra.index].values
+    muestra['__pob'] = muestra['__estrato'].map(lambda v: resumen[v]['N']).astype('int64')
+    muestra['__mue'] = muestra['__estrato'].map(lambda v: resumen[v]['n']).astype('int64')
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    muestra_file = output_dir / "muestra.parquet"
+    muestra.to_parquet(muestra_file, engine='pyarrow', compression=compression, index=False)
+
+    print(f"   🎯 Muestra estratificada: {len(muestra):,} de {len(df):,} filas ({len(resumen)} estratos)")
+    return {
+        'file': (muestra_file.relative_to(base_dir) if base_dir else muestra_file).as_posix(),
+        'rows': len(muestra),
+        'total_rows': len(df),
+        'fraccion': fraccion,
+        'estrato': columna,
+        'estratos': resumen
+    }
+
+
+def construir_sketches(df, dataset_type, output_dir, particiones=None, base_dir=None):
+    """
+    Calcula sketches HLL (precisión HLL_P, mismo hash que los rollups) de las
+    columnas de DISTINTOS y un resumen de 101 percentiles de cada columna
+    numérica. Se guardan en output_dir/sketches.json.
+
+    Args:
+        base_dir: Directorio de los datasets; la ruta de los sketches se guarda
+            relativa a él
+
+    Returns:
+        Descriptor de los sketches para la metadata
+    """
+    if df.empty:
+        return None
+
+    if particiones:
+        df = df.assign(**{p['name']: valores_particion(df, p) for p in particiones})
+
+    conn = duckdb.connect()
+    conn.register('src', df)
+
+    hll = {}
+    for col in DISTINTOS.get(dataset_type, []):
+        if col not in df.columns:
+            continue
+        registros = conn.execute(f"""
+            SELECT (hash("{col}") & {2**HLL_P - 1})::INTEGER AS i,
+                   MAX(CASE WHEN w = 0 THEN 33 ELSE 32 - floor(log2(w))::INTEGER END) AS r
+            FROM (SELECT "{col}", (hash("{col}") >> {HLL_P}) & {2**32 - 1} AS w FROM src WHERE "{col}" IS NOT NULL)
+            GROUP BY 1
+        """).fetchall()
+        densos = [0] * 2**HLL_P
+        for i, r in registros:
+            densos[i] = int(r)
+        hll[col] = densos
+
+    cuantiles = {}
+    for col in df.columns:
+        if col in COLUMNAS_EXCLUIDAS or col.endswith('_id') or col.endswith('_clean'):
+            continue
+        if not pd.api.types.is_numeric_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col]):
+            continue
+        valores = df[col].dropna()
+        if valores.empty:
+            continue
+        cuantiles[col] = {
+            'count': int(len(valores)),
+            'values': [float(v) for v in np.quantile(valores.astype('float64'), PERCENTILES)]
+        }
+
+    conn.close()
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sketches_file = output_dir / "sketches.json"
+    with open(sketches_file, 'w', encoding='utf-8') as f:
+        json.dump({'hll_p': HLL_P, 'hll': hll, 'percentiles': PERCENTILES, 'quantiles': cuantiles}, f)
+
+    print(f"   📐 Sketches: HLL {list(hll)}, percentiles de {len(cuantiles)} columnas")
+    return {
+        'file': (sketches_file.relative_to(base_dir) if base_dir else sketches_file).as_posix(),
+        'hll_p': HLL_P,
+        'hll': list(hll),
+        'quantiles': list(cuantiles)
+    }
@@ -0,0 +1,211 @@
+import duckdb
+from pathlib import Path
+
+# Precisión de los sketches HyperLogLog: 2^12 registros (~1.6% de error)
+HLL_P = 12
+
+# Conjuntos de dimensiones pre-agregados por tipo de dataset.
+# Las expresiones de las dimensiones son SQL DuckDB y se guardan en la
+# metadata para que el analizador pueda reconocer consultas equivalentes.
+ROLLUP_SPECS = {
+    'ventas': [
+        {
+            'nombre': 'ventas_por_categoria',
+            'dimensiones': {'categoria': 'categoria'},
+            'medidas': ['total'],
+            'distintos': ['cliente_id']
+        },
+        {
+            'nombre': 'ventas_por_mes',
+            'dimensiones': {'mes': "strftime(fecha, '%Y-%m')"},
+            'medidas': ['total'],
+            'distintos': ['cliente_id']
+        },
+        {
+            'nombre': 'ventas_por_producto',
+            'dimensiones': {'producto': 'producto'},
+            'medidas': ['total'],
+            'distintos': []
+        }
+    ],
+    'empleados': [
+        {
+            'nombre': 'empleados_por_departamento',
+            'dimensiones': {'departamento': 'departamento'},
+            'medidas': ['salario_anual', 'performance_score', 'satisfaccion_laboral'],
+            'distintos': []
+        },
+        {
+            'nombre': 'empleados_por_performance',
+            'dimensiones': {
+                'performance_nivel': """CASE
+                WHEN performance_score >= 4.5 THEN 'Excelente (4.5+)'
+                WHEN performance_score >= 3.5 THEN 'Bueno (3.5-4.5)'
+                WHEN performance_score >= 2.5 THEN 'Regular (2.5-3.5)'
+                ELSE 'Bajo (<2.5)'
+            END"""
+            },
+            'medidas': ['salario_anual'],
+            'distintos': []
+        },
+        {
+            'nombre': 'empleados_por_edad',
+            'dimensiones': {
+                'rango_edad': """CASE
+                WHEN edad < 30 THEN '< 30 años'
+                WHEN edad < 40 THEN '30-39 años'
+                WHEN edad < 50 THEN '40-49 años'
+                ELSE '50+ años'
+            END"""
+            },
+            'medidas': ['años_experiencia', 'salario_anual'],
+            'distintos': []
+        }
+    ],
+    'marketing': [
+        {
+            'nombre': 'marketing_por_canal',
+            'dimensiones': {'canal': 'canal'},
+            'medidas': ['gasto_real', 'conversiones', 'ctr', 'roas'],
+            'distintos': []
+        },
+        {
+            'nombre': 'marketing_por_tipo',
+            'dimensiones': {'tipo_campaña': 'tipo_campaña'},
+            'medidas': ['gasto_real', 'ctr', 'roas'],
+            'distintos': []
+        },
+        {
+            'nombre': 'marketing_por_audiencia',
+            'dimensiones': {'audiencia_objetivo': 'audiencia_objetivo'},
+            'medidas': ['conversiones', 'cpc', 'roas'],
+            'distintos': []
+        }
+    ]
+}
+
+
+def sql_rollup(spec):
+    """
+    Genera el SQL que calcula un rollup sobre la tabla 'src'.
+
+    Cada grupo guarda parciales combinables: n (filas), sum/count/min/max por
+    medida y un sketch HLL disperso (lista de {i, r}) por columna distinta.
+    """
+    dims = list(spec['dimensiones'])
+    columnas = [c for c in spec['medidas'] + spec['distintos'] if c not in dims]
+
+    select_base = [f'{expr} AS "{dim}"' for dim, expr in spec['dimensiones'].items()]
+    select_base += [f'"{col}"' for col in columnas]
+    dims_sql = ', '.join(f'"{dim}"' for dim in dims)
+
+    agregados = ['COUNT(*) AS n']
+    for col in spec['medidas']:
+        agregados += [
+            f'SUM("{col}") AS "sum_{col}"',
+            f'COUNT("{col}") AS "count_{col}"',
+            f'MIN("{col}") AS "min_{col}"',
+            f'MAX("{col}") AS "max_{col}"'
+        ]
+
+    ctes = [f"base AS (SELECT {', '.join(select_base)} FROM src)"]
+    joins = []
+    for col in spec['distintos']:
+        # Registro i = bits bajos del hash, r = posición del primer 1 en los 32 bits siguientes
+        ctes.append(f"""hll_{col} AS (
+            SELECT {dims_sql}, list({{'i': i, 'r': r}} ORDER BY i) AS "hll_{col}"
+            FROM (
+                SELECT {dims_sql}, i, MAX(r)::UTINYINT AS r
+                FROM (
+                    SELECT {dims_sql},
+                        (hash("{col}") & {2**HLL_P - 1})::USMALLINT AS i,
+                        CASE WHEN w = 0 THEN 33 ELSE 32 - floor(log2(w))::INTEGER END AS r
+                    FROM (SELECT {dims_sql}, "{col}", (hash("{col}") >> {HLL_P}) & {2**32 - 1} AS w
+                          FROM base WHERE "{col}" IS NOT NULL)
+                )
+                GROUP BY ALL
+            )
+            GROUP BY ALL
+        )""")
+        joins.append(f'LEFT JOIN hll_{col} USING ({dims_sql})')
+
+    hll_cols = ''.join(f', ANY_VALUE("hll_{col}") AS "hll_{col}"' for col in spec['distintos'])
+
+    return f"""
+    WITH {', '.join(ctes)},
+    agg AS (SELECT {dims_sql}, {', '.join(agregados)} FROM base GROUP BY ALL)
+    SELECT agg.*{hll_cols}
+    FROM agg {' '.join(joins)}
+    GROUP BY ALL
+    ORDER BY {dims_sql}
+    """
+
+
+def valores_particion(df, particion):
+    """Valor de directorio hive de una columna de partición (p.ej. 'Google Ads' -> 'google_ads')"""
+    valores = df[particion['columna']]
+    if particion['type'] == 'VARCHAR':
+        valores = valores.astype('string').str.lower().str.replace(' ', '_')
+    return valores
+
+
+def construir_rollups(df, dataset_type, output_dir, compression='zstd', particiones=None, base_dir=None):
+    """
+    Construye las tablas de rollup configuradas para el tipo de dataset y las
+    escribe como Parquet en output_dir.
+
+    Args:
+        particiones: Especificación de particiones hive del dataset. Sus columnas
+            se agregan con el valor del directorio, igual que las expone el analizador
+        base_dir: Directorio de los datasets. La ruta de cada rollup se guarda
+            relativa a él (como los zone maps), no al directorio de trabajo
+
+    Returns:
+        Lista de descriptores para guardar en la metadata del dataset
+    """
+    specs = ROLLUP_SPECS.get(dataset_type, [])
+    if not specs:
+        return []
+
+    if particiones:
+        df = df.assign(**{p['name']: valores_particion(df, p) for p in particiones})
+
+    print(f"🧊 Construyendo rollups para {dataset_type}...")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    conn = duckdb.connect()
+    conn.register('src', df)
+
+    rollups = []
+    for spec in specs:
+        columnas = spec['medidas'] + spec['distintos']
+        faltantes = [c for c in columnas if c not in df.columns]
+        if faltantes:
+            print(f"   ⚠️  {spec['nombre']}: faltan columnas {faltantes}")
+            continue
+
+        rollup_file = output_dir / f"{spec['nombre']}.parquet"
+        try:
+            conn.execute(f"""
+            COPY ({sql_rollup(spec)}) TO '{rollup_file.as_posix()}'
+            (FORMAT parquet, COMPRESSION {compression})
+            """)
+
+            filas = conn.execute(f"SELECT COUNT(*) FROM read_parquet('{rollup_file.as_posix()}')").fetchone()[0]
+            rollups.append({
+                'nombre': spec['nombre'],
+                'dimensiones': spec['dimensiones'],
+                'medidas': spec['medidas'],
+                'distintos': spec['distintos'],
+                'hll_p': HLL_P,
+                'rows': filas,
+                'file': (rollup_file.relative_to(base_dir) if base_dir else rollup_file).as_posix()
+            })
+            print(f"   ✅ {rollup_file.name} ({filas:,} grupos)")
+
+        except Exception as e:
+            print(f"   ❌ Error en rollup {spec['nombre']}: {e}")
+
+    conn.close()
+    return rollups
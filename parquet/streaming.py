@@ -0,0 +1,660 @@
+import fnmatch
+import io
+import json
+import os
+import queue
+import re
+import socket
+import socketserver
+import threading
+import time
+from pathlib import Path
+
+import duckdb
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.json as pajson
+import pyarrow.parquet as pq
+
+# Archivos escritos por la ingesta: 'stream-<sesión>-<lote>.parquet' o, en
+# datasets con bucketing, 'bucket_00003.stream-<sesión>-<lote>.parquet'.
+# Se escriben a un temporal oculto ('.<nombre>.tmp') y se publican con un
+# rename atómico: ni el analizador ni el tiering ven archivos a medias
+PREFIJO_STREAM = "stream-"
+PATRON_STREAM = f"*{PREFIJO_STREAM}*.parquet"
+
+# Formato de los archivos de los directorios seguidos según su extensión
+FORMATOS = {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.json': 'ndjson', '.csv': 'csv'}
+
+# Tamaño de los bloques que las fuentes encolan (líneas completas)
+BYTES_POR_BLOQUE = 1024**2
+
+
+def es_archivo_stream(nombre):
+    """Indica si un archivo Parquet lo escribió la ingesta"""
+    return fnmatch.fnmatch(Path(nombre).name, PATRON_STREAM)
+
+
+def nombre_archivo_stream(sesion, lote, patron_bucket=None, bucket=None):
+    """Nombre de un archivo de la ingesta; con bucketing lleva delante el del bucket"""
+    nombre = f"{PREFIJO_STREAM}{sesion}-{lote:06d}.parquet"
+    if patron_bucket is None:
+        return nombre
+    return f"{Path(patron_bucket.format(bucket)).stem}.{nombre}"
+
+
+def es_archivo_de_bucket(nombre, patron_bucket, bucket):
+    """Indica si un archivo es del bucket: el del conversor o uno de la ingesta"""
+    base = patron_bucket.format(bucket)
+    nombre = Path(nombre).name
+    return nombre == base or (nombre.startswith(f"{Path(base).stem}.{PREFIJO_STREAM}") and nombre.endswith('.parquet'))
+
+
+class MicroBatchIngestor:
+    """
+    Ingesta continua en micro-lotes hacia un dataset Parquet ya convertido.
+
+    Las fuentes (directorios NDJSON/CSV seguidos como tail -f, un socket
+    local con NDJSON o agregar() desde el propio proceso) encolan bloques de
+    líneas completas en una cola acotada: si la escritura no da abasto las
+    fuentes se bloquean en lugar de acumular memoria. Un único consumidor
+    parsea cada bloque a Arrow, lo normaliza al esquema de los archivos del
+    conversor (IDs compactados, dinero, diccionarios y columnas de
+    partición) y lo acumula hasta superar max_filas, max_mb o max_segundos.
+    Entonces escribe un archivo por partición (y bucket) con el mismo layout
+    que el conversor, que el analizador ve en su siguiente consulta.
+
+    Los offsets de los archivos seguidos se guardan después de escribir cada
+    lote: tras una caída se reanuda desde el último lote escrito (entrega
+    al menos una vez). Los eventos del socket no se pueden reenviar.
+    """
+
+    def __init__(self, dataset_dir, max_filas=200_000, max_mb=64, max_segundos=2.0, max_cola=32,
+                 compression='snappy'):
+        """
+        Args:
+            dataset_dir: Directorio del dataset (p.ej. parquet_data/ventas), con
+                la metadata y al menos un archivo del conversor
+            max_filas: Filas acumuladas que fuerzan la escritura de un lote
+            max_mb: Memoria Arrow acumulada que fuerza la escritura de un lote
+            max_segundos: Antigüedad máxima del evento más antiguo sin escribir
+                (latencia hasta que el analizador lo ve)
+            max_cola: Bloques de BYTES_POR_BLOQUE pendientes de parsear antes
+                de bloquear a las fuentes
+            compression: Codec de los archivos escritos
+        """
+        self.dataset_dir = Path(dataset_dir)
+        self.max_filas = max_filas
+        self.max_bytes = max_mb * 1024**2
+        self.max_segundos = max_segundos
+        self.compression = compression
+        self.cola = queue.Queue(maxsize=max_cola)
+
+        self.metadata = self.cargar_metadata()
+        if not self.metadata:
+            raise ValueError(f"{self.dataset_dir} no tiene metadata: convertir antes un CSV del dataset")
+        self.esquema = self.esquema_destino()
+        self.derivadas = self.columnas_derivadas()
+        self.id_columns = {c: s for c, s in (self.metadata.get('id_columns') or {}).items() if c in self.esquema.names}
+        self.dinero = {c: s for c, s in (self.metadata.get('dinero') or {}).items() if c in self.esquema.names}
+        self.particiones = self.metadata.get('partitioning') or []
+        self.buckets = self.metadata.get('bucketing') or {}
+        self.tipos_entrada = self.esquema_entrada()
+        self.conn = duckdb.connect()
+
+        # Estado junto a los demás auxiliares ('_' = ignorado por el analizador)
+        self.estado_dir = self.dataset_dir.parent / '_streaming'
+        self.offsets_file = self.estado_dir / f"{self.dataset_dir.name}_offsets.json"
+        self.log_file = self.estado_dir / f"{self.dataset_dir.name}.jsonl"
+        self.offsets = self.cargar_offsets()
+        self.posiciones = dict(self.offsets)
+        self.sesion = int(time.time() * 1000)
+        self.lote = 0
+
+        self.buffer = []
+        self.filas_buffer = 0
+        self.bytes_buffer = 0
+        self.inicio_buffer = None
+        self.offsets_pendientes = {}
+
+        self.stats = {
+            'eventos': 0, 'rechazados': 0, 'lotes': 0, 'archivos': 0, 'mb_escritos': 0.0,
+            'max_buffer_mb': 0.0, 'max_latencia_s': 0.0, 'ocupado_s': 0.0, 'inicio': None, 'ultimo_lote': None
+        }
+        self.detener_evento = threading.Event()
+        self.hilos = []
+        self.servidores = []
+
+    def cargar_metadata(self):
+        """Metadata JSON más reciente escrita por los conversores"""
+        archivos = sorted(self.dataset_dir.glob("*metadata*.json"), key=lambda f: f.stat().st_mtime)
+        if not archivos:
+            return {}
+        with open(archivos[-1], 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def esquema_destino(self):
+        """
+        Esquema Arrow de los archivos del conversor. Los diccionarios pasan a
+        índices int32: un lote puede traer más valores distintos que la
+        conversión original (el índice no forma parte del esquema Parquet)
+        """
+        archivos = sorted(a for a in self.dataset_dir.rglob("*.parquet") if not es_archivo_stream(a))
+        if not archivos:
+            raise ValueError(f"{self.dataset_dir} no tiene archivos Parquet del conversor")
+
+        campos = []
+        for campo in pq.read_schema(archivos[0]).remove_metadata():
+            if pa.types.is_dictionary(campo.type):
+                campo = campo.with_type(pa.dictionary(pa.int32(), campo.type.value_type))
+            campos.append(campo)
+        return pa.schema(campos)
+
+    def columnas_derivadas(self):
+        """
+        Columnas que el conversor deriva de otras y no llegan en los eventos:
+        año/mes de fecha y <col>_clean (valor de directorio de partición)
+        """
+        derivadas = {}
+        for nombre in self.esquema.names:
+            if nombre in ('año', 'mes') and 'fecha' in self.esquema.names:
+                derivadas[nombre] = 'fecha'
+            elif nombre.endswith('_clean') and nombre[:-len('_clean')] in self.esquema.names:
+                derivadas[nombre] = nombre[:-len('_clean')]
+        return derivadas
+
+    def esquema_entrada(self):
+        """
+        Tipos con los que se parsean los eventos, como en los CSV de origen:
+        IDs, fechas y categorías como texto y dinero como número decimal
+        """
+        campos = []
+        for campo in self.esquema:
+            if campo.name in self.derivadas:
+                continue
+            tipo = campo.type
+            if campo.name in self.id_columns or pa.types.is_dictionary(tipo) or pa.types.is_timestamp(tipo) \
+                    or pa.types.is_large_string(tipo):
+                tipo = pa.string()
+            elif campo.name in self.dinero or pa.types.is_decimal(tipo):
+                tipo = pa.float64()
+            campos.append(pa.field(campo.name, tipo))
+        return pa.schema(campos)
+
+    def cargar_offsets(self):
+        if not self.offsets_file.exists():
+            return {}
+        try:
+            with open(self.offsets_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def guardar_offsets(self):
+        """Persiste los offsets confirmados de forma atómica"""
+        self.estado_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.offsets_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.offsets, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.offsets_file)
+
+    def encolar(self, bloque):
+        """Encola un bloque; bloquea mientras la cola esté llena (False si se detiene la ingesta)"""
+        while not self.detener_evento.is_set():
+            try:
+                self.cola.put(bloque, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def agregar(self, eventos):
+        """
+        Encola eventos desde el propio proceso: lista de dicts, DataFrame o
+        pyarrow.Table con las columnas de los CSV de origen
+        """
+        if isinstance(eventos, list):
+            eventos = pa.Table.from_pylist(eventos)
+        elif not isinstance(eventos, pa.Table):
+            eventos = pa.Table.from_pandas(eventos, preserve_index=False)
+
+        columnas = [c for c in eventos.column_names if c in self.tipos_entrada.names]
+        tabla = pa.table({c: eventos.column(c).cast(self.tipos_entrada.field(c).type) for c in columnas})
+        return self.encolar({'tabla': tabla, 'recibido': time.time()})
+
+    def leer_nuevos(self, archivo, formato):
+        """
+        Encola las líneas completas añadidas a un archivo desde la última
+        lectura (como mucho un bloque). La cabecera de los CSV se recuerda
+        por archivo
+
+        Returns:
+            Bytes leídos
+        """
+        clave = str(archivo)
+        posicion = self.posiciones.get(clave) or {'offset': 0, 'cabecera': None}
+        tamaño = archivo.stat().st_size
+        if tamaño < posicion['offset']:
+            # Archivo truncado o reemplazado: se relee desde el principio
+            posicion = {'offset': 0, 'cabecera': None}
+        if tamaño == posicion['offset']:
+            return 0
+
+        with open(archivo, 'rb') as f:
+            f.seek(posicion['offset'])
+            datos = f.read(BYTES_POR_BLOQUE)
+            # Una línea más larga que el bloque se lee entera
+            while b'\n' not in datos and f.tell() < tamaño:
+                datos += f.read(BYTES_POR_BLOQUE)
+
+        fin = datos.rfind(b'\n')
+        if fin < 0:
+            return 0  # el productor aún está escribiendo la línea
+        datos = datos[:fin + 1]
+        offset = posicion['offset'] + len(datos)
+
+        cabecera = posicion['cabecera']
+        if formato == 'csv' and cabecera is None:
+            linea, _, datos = datos.partition(b'\n')
+            cabecera = linea.decode('utf-8').lstrip('\ufeff') + '\n'
+
+        self.posiciones[clave] = {'offset': offset, 'cabecera': cabecera}
+        self.encolar({
+            'datos': datos,
+            'formato': formato,
+            'cabecera': cabecera,
+            'origen': (clave, self.posiciones[clave]),
+            'recibido': time.time()
+        })
+        return offset - posicion['offset']
+
+    def seguir_directorio(self, directorio, intervalo_s=0.2):
+        """
+        Sigue en un hilo los archivos NDJSON/CSV de un directorio (ver
+        FORMATOS): los existentes desde su último offset confirmado y los que
+        aparezcan después. Sin datos nuevos espera intervalo_s
+        """
+        directorio = Path(directorio)
+
+        def ciclo():
+            while not self.detener_evento.is_set():
+                leidos = 0
+                archivos = sorted(directorio.iterdir()) if directorio.exists() else []
+                for archivo in archivos:
+                    formato = FORMATOS.get(archivo.suffix.lower())
+                    if formato is not None and archivo.is_file():
+                        leidos += self.leer_nuevos(archivo, formato)
+                if not leidos:
+                    self.detener_evento.wait(intervalo_s)
+
+        hilo = threading.Thread(target=ciclo, name=f"tail-{directorio.name}", daemon=True)
+        hilo.start()
+        self.hilos.append(hilo)
+        print(f"👀 Siguiendo {directorio} ({', '.join(sorted(FORMATOS))})")
+        return hilo
+
+    def escuchar_socket(self, direccion, intervalo_s=0.2):
+        """
+        Acepta eventos NDJSON por un socket local: 'host:puerto' (TCP) o la
+        ruta de un socket Unix. Cada conexión se encola por bloques de líneas
+        completas, como mucho cada intervalo_s; con la cola llena se deja de
+        leer y el control de flujo de TCP frena al emisor
+        """
+        ingestor = self
+
+        class Manejador(socketserver.BaseRequestHandler):
+            def handle(self):
+                self.request.settimeout(intervalo_s)
+                pendiente = bytearray()
+                inicio = None
+                while not ingestor.detener_evento.is_set():
+                    try:
+                        datos = self.request.recv(1 << 16)
+                        if not datos:
+                            break
+                        pendiente += datos
+                        inicio = inicio or time.time()
+                    except socket.timeout:
+                        pass
+
+                    fin = pendiente.rfind(b'\n')
+                    if fin >= 0 and (len(pendiente) >= BYTES_POR_BLOQUE or time.time() - inicio >= intervalo_s):
+                        ingestor.encolar({'datos': bytes(pendiente[:fin + 1]), 'formato': 'ndjson', 'recibido': inicio})
+                        del pendiente[:fin + 1]
+                        inicio = time.time() if pendiente else None
+
+                if pendiente.strip():
+                    ingestor.encolar({'datos': bytes(pendiente) + b'\n', 'formato': 'ndjson', 'recibido': inicio})
+
+        if ':' in direccion:
+            host, puerto = direccion.rsplit(':', 1)
+            socketserver.ThreadingTCPServer.allow_reuse_address = True
+            servidor = socketserver.ThreadingTCPServer((host or '127.0.0.1', int(puerto)), Manejador)
+        else:
+            if os.path.exists(direccion):
+                os.unlink(direccion)
+            servidor = socketserver.ThreadingUnixStreamServer(direccion, Manejador)
+        servidor.daemon_threads = True
+
+        hilo = threading.Thread(target=servidor.serve_forever, kwargs={'poll_interval': 0.2},
+                                name=f"socket-{direccion}", daemon=True)
+        hilo.start()
+        self.servidores.append(servidor)
+        self.hilos.append(hilo)
+        print(f"🔌 Escuchando NDJSON en {direccion}")
+        return servidor
+
+    def parsear(self, bloque):
+        """Tabla Arrow de un bloque NDJSON o CSV con los tipos de esquema_entrada"""
+        if 'tabla' in bloque:
+            return bloque['tabla']
+        if bloque['formato'] == 'ndjson':
+            return pajson.read_json(io.BytesIO(bloque['datos']), parse_options=pajson.ParseOptions(
+                explicit_schema=self.tipos_entrada, unexpected_field_behavior='ignore'
+            ))
+        return pacsv.read_csv(
+            io.BytesIO(bloque['cabecera'].encode('utf-8') + bloque['datos']),
+            convert_options=pacsv.ConvertOptions(
+                column_types={c.name: c.type for c in self.tipos_entrada}, strings_can_be_null=True
+            )
+        )
+
+    def normalizar(self, tabla):
+        """
+        Convierte los eventos al esquema de los archivos del conversor.
+        Las filas con un ID que no respeta el prefijo y el ancho de la
+        metadata o sin valor en las columnas de partición se descartan
+
+        Returns:
+            (tabla, filas descartadas)
+        """
+        n = tabla.num_rows
+        validas = []
+
+        def entrada(nombre):
+            if nombre in tabla.column_names:
+                return tabla.column(nombre)
+            return pa.chunked_array([pa.nulls(n, self.tipos_entrada.field(nombre).type)])
+
+        columnas = {}
+        for campo in self.esquema:
+            nombre = campo.name
+            if nombre in self.derivadas:
+                continue
+            valores = entrada(nombre)
+
+            if nombre in self.id_columns and not pa.types.is_integer(valores.type):
+                # Mismo round-trip que compactar_columnas_id: prefijo + dígitos con el ancho mínimo
+                spec = self.id_columns[nombre]
+                ancho = spec['width']
+                patron = f"^{re.escape(spec['prefix'])}(\\d{{{ancho}}}|[1-9]\\d{{{ancho},}})$"
+                correctos = pc.match_substring_regex(valores, patron)
+                validas.append(pc.or_kleene(correctos, pc.is_null(valores)))
+                digitos = pc.if_else(correctos, pc.utf8_slice_codeunits(valores, len(spec['prefix'])), None)
+                columnas[nombre] = digitos.cast(campo.type)
+            elif nombre in self.dinero and self.dinero[nombre]['modo'] == 'centimos':
+                escala = self.dinero[nombre]['escala']
+                columnas[nombre] = pc.round(pc.multiply(valores.cast(pa.float64()), 10**escala)).cast(campo.type)
+            elif pa.types.is_decimal(campo.type):
+                escala = campo.type.scale
+                columnas[nombre] = pc.round(valores.cast(pa.float64()), escala).cast(campo.type, safe=False)
+            elif pa.types.is_dictionary(campo.type):
+                columnas[nombre] = valores.cast(campo.type.value_type).cast(campo.type)
+            else:
+                columnas[nombre] = valores.cast(campo.type)
+
+        for nombre, origen in self.derivadas.items():
+            tipo = self.esquema.field(nombre).type
+            if nombre == 'año':
+                columnas[nombre] = pc.year(columnas[origen]).cast(tipo)
+            elif nombre == 'mes':
+                columnas[nombre] = pc.month(columnas[origen]).cast(tipo)
+            else:
+                texto = entrada(origen).cast(pa.string())
+                columnas[nombre] = pc.replace_substring(pc.utf8_lower(texto), ' ', '_').cast(tipo)
+
+        for particion in self.particiones:
+            validas.append(pc.is_valid(columnas[particion['columna']]))
+
+        resultado = pa.table([columnas[c] for c in self.esquema.names], schema=self.esquema)
+        if not validas:
+            return resultado, 0
+
+        mascara = validas[0]
+        for otra in validas[1:]:
+            mascara = pc.and_(mascara, otra)
+        mascara = pc.fill_null(mascara, False)
+        descartadas = n - pc.sum(mascara).as_py() if n else 0
+        return (resultado.filter(mascara) if descartadas else resultado), descartadas
+
+    def procesar(self, bloque):
+        """Parsea y normaliza un bloque y lo acumula en el buffer del lote"""
+        if bloque.get('datos') is not None and not bloque['datos'].strip():
+            tabla, descartadas = None, 0
+        else:
+            try:
+                tabla, descartadas = self.normalizar(self.parsear(bloque))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, ValueError) as e:
+                if 'datos' not in bloque:
+                    raise
+                tabla, descartadas = self.procesar_por_lineas(bloque, e)
+
+        if bloque.get('origen'):
+            clave, posicion = bloque['origen']
+            self.offsets_pendientes[clave] = dict(posicion)
+        self.stats['rechazados'] += descartadas
+        if tabla is None or tabla.num_rows == 0:
+            return
+
+        self.stats['inicio'] = self.stats['inicio'] or bloque['recibido']
+        self.inicio_buffer = min(self.inicio_buffer or bloque['recibido'], bloque['recibido'])
+        self.buffer.append(tabla)
+        self.filas_buffer += tabla.num_rows
+        self.bytes_buffer += tabla.nbytes
+        self.stats['eventos'] += tabla.num_rows
+        self.stats['max_buffer_mb'] = max(self.stats['max_buffer_mb'], round(self.bytes_buffer / 1024**2, 2))
+
+    def procesar_por_lineas(self, bloque, error):
+        """Bloque con líneas mal formadas: se parsea línea a línea descartando las erróneas"""
+        tablas = []
+        descartadas = 0
+        for linea in bloque['datos'].splitlines(keepends=True):
+            if not linea.strip():
+                continue
+            try:
+                tabla, malas = self.normalizar(self.parsear({**bloque, 'datos': linea}))
+                tablas.append(tabla)
+                descartadas += malas
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, ValueError):
+                descartadas += 1
+
+        print(f"   ⚠️  Bloque con errores ({str(error).splitlines()[0][:120]}): {descartadas} evento(s) descartados")
+        return (pa.concat_tables(tablas) if tablas else None), descartadas
+
+    def lote_listo(self):
+        """Indica si el buffer supera algún umbral de escritura"""
+        if not self.buffer:
+            return False
+        return (self.filas_buffer >= self.max_filas or self.bytes_buffer >= self.max_bytes
+                or time.time() - self.inicio_buffer >= self.max_segundos)
+
+    def dividir_por_particion(self, tabla):
+        """Lista de (ruta hive, filas) con los mismos directorios que el conversor"""
+        if not self.particiones:
+            return [('', tabla)]
+
+        claves = {}
+        for particion in self.particiones:
+            valores = tabla.column(particion['columna'])
+            if particion['type'] == 'VARCHAR':
+                valores = pc.replace_substring(pc.utf8_lower(valores.cast(pa.string())), ' ', '_')
+            claves[particion['name']] = valores.cast(pa.string())
+        claves = pa.table(claves)
+
+        partes = []
+        for fila in sorted(claves.group_by(claves.column_names).aggregate([]).to_pylist(), key=lambda f: list(f.values())):
+            mascara = None
+            for nombre, valor in fila.items():
+                igual = pc.equal(claves.column(nombre), valor)
+                mascara = igual if mascara is None else pc.and_(mascara, igual)
+            partes.append(('/'.join(f"{nombre}={valor}" for nombre, valor in fila.items()), tabla.filter(mascara)))
+        return partes
+
+    def dividir_por_bucket(self, tabla):
+        """Lista de (bucket, filas ordenadas por la clave) con la expresión de la metadata"""
+        columna = self.buckets['columna']
+        self.conn.register('lote', tabla.select([columna]))
+        try:
+            asignados = next(iter(self.conn.execute(f"SELECT {self.buckets['expresion']} FROM lote").fetchnumpy().values()))
+        finally:
+            self.conn.unregister('lote')
+
+        partes = []
+        for bucket in sorted(set(asignados.tolist())):
+            parte = tabla.filter(pa.array(asignados == bucket)).sort_by(columna)
+            partes.append((bucket, parte))
+        return partes
+
+    def opciones_escritura(self):
+        """Mismos encodings que el conversor: IDs en DELTA_BINARY_PACKED y DECIMAL como INT64"""
+        opciones = {}
+        if self.id_columns:
+            opciones['use_dictionary'] = [c for c in self.esquema.names if c not in self.id_columns]
+            opciones['column_encoding'] = {c: 'DELTA_BINARY_PACKED' for c in self.id_columns}
+        if any(pa.types.is_decimal(campo.type) for campo in self.esquema):
+            opciones['store_decimal_as_integer'] = True
+        return opciones
+
+    def escribir_archivo(self, destino, tabla):
+        """Escribe a un temporal oculto, lo sincroniza a disco y lo publica con un rename atómico"""
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = destino.with_name(f".{destino.name}.tmp")
+        pq.write_table(tabla, tmp_file, compression=self.compression, **self.opciones_escritura())
+        with open(tmp_file, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_file, destino)
+        return destino.stat().st_size
+
+    def escribir_lote(self):
+        """
+        Escribe el buffer como un archivo por partición (y bucket), confirma
+        los offsets de las fuentes y registra el lote en el log JSONL
+
+        Returns:
+            Lista de archivos escritos
+        """
+        if not self.buffer:
+            if self.offsets_pendientes:
+                self.offsets.update(self.offsets_pendientes)
+                self.offsets_pendientes = {}
+                self.guardar_offsets()
+            return []
+
+        start_time = time.time()
+        tabla = pa.concat_tables(self.buffer)
+        self.lote += 1
+
+        archivos = []
+        bytes_escritos = 0
+        for ruta, parte in self.dividir_por_particion(tabla):
+            directorio = self.dataset_dir / ruta if ruta else self.dataset_dir
+            destinos = [(nombre_archivo_stream(self.sesion, self.lote), parte)]
+            if self.buckets:
+                destinos = [
+                    (nombre_archivo_stream(self.sesion, self.lote, self.buckets['patron'], bucket), filas)
+                    for bucket, filas in self.dividir_por_bucket(parte)
+                ]
+            for nombre, filas in destinos:
+                bytes_escritos += self.escribir_archivo(directorio / nombre, filas)
+                archivos.append(str(directorio / nombre))
+
+        latencia = time.time() - self.inicio_buffer
+        self.offsets.update(self.offsets_pendientes)
+        self.offsets_pendientes = {}
+        self.guardar_offsets()
+
+        registro = {
+            'lote': self.lote,
+            'sesion': self.sesion,
+            'timestamp': time.time(),
+            'filas': tabla.num_rows,
+            'archivos': len(archivos),
+            'mb': round(bytes_escritos / 1024**2, 3),
+            'escritura_s': round(time.time() - start_time, 3),
+            'latencia_s': round(latencia, 3)
+        }
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+        self.stats['lotes'] += 1
+        self.stats['archivos'] += len(archivos)
+        self.stats['mb_escritos'] = round(self.stats['mb_escritos'] + bytes_escritos / 1024**2, 3)
+        self.stats['max_latencia_s'] = max(self.stats['max_latencia_s'], round(latencia, 3))
+        self.stats['ultimo_lote'] = time.time()
+
+        self.buffer = []
+        self.filas_buffer = 0
+        self.bytes_buffer = 0
+        self.inicio_buffer = None
+        print(f"   💧 Lote {self.lote}: {tabla.num_rows:,} eventos → {len(archivos)} archivo(s), "
+              f"{bytes_escritos / 1024**2:.2f}MB, latencia {latencia:.2f}s")
+        return archivos
+
+    def ejecutar(self):
+        """Bucle del consumidor: procesa bloques y escribe lotes hasta detener() y vaciar la cola"""
+        while not (self.detener_evento.is_set() and self.cola.empty()):
+            espera = 0.5
+            if self.buffer:
+                espera = max(0.01, self.inicio_buffer + self.max_segundos - time.time())
+            try:
+                bloque = self.cola.get(timeout=espera)
+            except queue.Empty:
+                bloque = None
+
+            start_time = time.time()
+            if bloque is not None:
+                self.procesar(bloque)
+            if self.lote_listo():
+                self.escribir_lote()
+            self.stats['ocupado_s'] += time.time() - start_time
+
+        start_time = time.time()
+        self.escribir_lote()
+        self.stats['ocupado_s'] += time.time() - start_time
+
+    def iniciar(self):
+        """Lanza el consumidor en un hilo de fondo (las fuentes se añaden con seguir_directorio/escuchar_socket)"""
+        self.detener_evento.clear()
+        hilo = threading.Thread(target=self.ejecutar, name=f"ingesta-{self.dataset_dir.name}", daemon=True)
+        hilo.start()
+        self.hilos.insert(0, hilo)
+        return hilo
+
+    def detener(self):
+        """Detiene las fuentes, escribe lo pendiente y espera a los hilos"""
+        self.detener_evento.set()
+        for servidor in self.servidores:
+            servidor.shutdown()
+            servidor.server_close()
+        for hilo in self.hilos:
+            hilo.join()
+        self.servidores = []
+        self.hilos = []
+
+    def resumen(self):
+        """
+        Métricas de la ingesta. eventos_s se mide desde el primer evento hasta
+        el último lote escrito (incluye las esperas de max_segundos);
+        capacidad_eventos_s sobre el tiempo ocupado del consumidor (parseo,
+        normalización y escritura), el ritmo máximo sostenible
+        """
+        resumen = {k: v for k, v in self.stats.items() if k not in ('inicio', 'ultimo_lote', 'ocupado_s')}
+        resumen['ocupado_s'] = round(self.stats['ocupado_s'], 3)
+        if self.stats['ocupado_s'] > 0:
+            resumen['capacidad_eventos_s'] = round(self.stats['eventos'] / self.stats['ocupado_s'], 1)
+        if self.stats['inicio'] and self.stats['ultimo_lote']:
+            duracion = self.stats['ultimo_lote'] - self.stats['inicio']
+            resumen['duracion_s'] = round(duracion, 3)
+            resumen['eventos_s'] = round(self.stats['eventos'] / duracion, 1) if duracion > 0 else None
+        return resumen
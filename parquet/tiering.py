@@ -0,0 +1,283 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pyarrow.parquet as pq
+
+# Nivel de compresión por defecto del tier frío
+NIVELES_FRIOS = {'zstd': 19, 'brotli': 11, 'gzip': 9}
+
+
+class PartitionTieringManager:
+    """
+    Mantiene las particiones calientes (recientes o consultadas con
+    frecuencia) en un codec rápido y recomprime las frías con un codec de
+    alta compresión.
+
+    La recompresión se hace archivo a archivo en segundo plano, limitada en
+    MB/s, conservando row groups, esquema y encodings (las estadísticas y
+    los zone maps siguen siendo válidos) y sustituyendo cada archivo de
+    forma atómica: las consultas en curso siguen leyendo el archivo anterior.
+    """
+
+    def __init__(self, dataset_dir, codec_caliente='snappy', codec_frio='zstd', nivel_frio=None,
+                 dias_calientes=30, min_accesos=3, ventana_dias=7, log_accesos=None, mb_por_segundo=50):
+        """
+        Args:
+            dataset_dir: Directorio del dataset (p.ej. parquet_data/ventas)
+            codec_caliente: Codec de las particiones calientes
+            codec_frio: Codec de las particiones frías (zstd, brotli, gzip)
+            nivel_frio: Nivel de compresión del codec frío (por defecto NIVELES_FRIOS)
+            dias_calientes: Antigüedad máxima de los datos de una partición caliente
+            min_accesos: Lecturas en la ventana que hacen caliente una partición
+            ventana_dias: Ventana de las estadísticas de acceso
+            log_accesos: Log JSONL del perfilado del analizador (--perfilado), con
+                los archivos leídos por cada consulta
+            mb_por_segundo: Límite de lectura de la recompresión (None sin límite)
+        """
+        self.dataset_dir = Path(dataset_dir)
+        self.codec_caliente = codec_caliente
+        self.codec_frio = codec_frio
+        self.nivel_frio = nivel_frio if nivel_frio is not None else NIVELES_FRIOS.get(codec_frio)
+        self.dias_calientes = dias_calientes
+        self.min_accesos = min_accesos
+        self.ventana_dias = ventana_dias
+        self.log_accesos = Path(log_accesos) if log_accesos else None
+        self.mb_por_segundo = mb_por_segundo
+
+        # Estado junto a los demás auxiliares ('_' = ignorado por el analizador)
+        self.estado_file = self.dataset_dir.parent / '_tiering' / f"{self.dataset_dir.name}.json"
+        self.estado = self.cargar_estado()
+        self.detener_evento = threading.Event()
+        self.hilo = None
+
+    def cargar_estado(self):
+        if not self.estado_file.exists():
+            return {}
+        try:
+            with open(self.estado_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def guardar_estado(self):
+        """Persiste el estado de forma atómica"""
+        self.estado_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.estado_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.estado, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.estado_file)
+
+    def particiones(self):
+        """Archivos del dataset agrupados por directorio de partición"""
+        particiones = {}
+        for archivo in sorted(self.dataset_dir.rglob("*.parquet")):
+            particiones.setdefault(archivo.parent.relative_to(self.dataset_dir).as_posix(), []).append(archivo)
+        return particiones
+
+    def accesos(self):
+        """Lecturas por partición en la ventana, según el log de perfilado"""
+        conteo = {}
+        if self.log_accesos is None or not self.log_accesos.exists():
+            return conteo
+
+        desde = datetime.now() - timedelta(days=self.ventana_dias)
+        base = self.dataset_dir.resolve()
+        with open(self.log_accesos, 'r', encoding='utf-8') as f:
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                    if datetime.fromisoformat(registro['timestamp']) < desde:
+                        continue
+                except (ValueError, KeyError):
+                    continue
+
+                particiones = set()
+                for archivo in registro.get('files') or []:
+                    ruta = Path(archivo).resolve()
+                    if base in ruta.parents:
+                        particiones.add(ruta.parent.relative_to(base).as_posix())
+                for particion in particiones:
+                    conteo[particion] = conteo.get(particion, 0) + 1
+        return conteo
+
+    def antiguedad_dias(self, particion, archivos):
+        """
+        Antigüedad de los datos de una partición: por sus claves de fecha
+        (año=/mes=) si las tiene; si no, desde la última escritura del
+        conversor (las recompresiones no cuentan)
+        """
+        claves = dict(re.findall(r'([^/=]+)=([^/]+)', particion))
+        if 'año' in claves and claves['año'].isdigit():
+            año = int(claves['año'])
+            mes = int(claves['mes']) if claves.get('mes', '').isdigit() else 12
+            fin = datetime(año + (mes == 12), mes % 12 + 1, 1)
+            return max(0, (datetime.now() - fin).days)
+
+        escrituras = []
+        for archivo in archivos:
+            entrada = self.estado.get(str(archivo))
+            mtime = archivo.stat().st_mtime
+            if entrada and entrada.get('mtime') == mtime:
+                mtime = entrada['mtime_origen']
+            escrituras.append(mtime)
+        return (time.time() - max(escrituras)) / 86400
+
+    def codec_archivo(self, archivo):
+        """Codec del archivo (el de la primera columna del primer row group)"""
+        metadata = pq.ParquetFile(archivo).metadata
+        if metadata.num_row_groups == 0:
+            return None
+        return metadata.row_group(0).column(0).compression.lower()
+
+    def clasificar(self):
+        """
+        Tier de cada partición
+
+        Returns:
+            Dict partición -> {'tier', 'accesos', 'antiguedad_dias', 'archivos'}
+        """
+        accesos = self.accesos()
+        clasificacion = {}
+        for particion, archivos in self.particiones().items():
+            edad = self.antiguedad_dias(particion, archivos)
+            n = accesos.get(particion, 0)
+            caliente = edad <= self.dias_calientes or n >= self.min_accesos
+            clasificacion[particion] = {
+                'tier': 'caliente' if caliente else 'fria',
+                'accesos': n,
+                'antiguedad_dias': round(edad, 1),
+                'archivos': archivos
+            }
+        return clasificacion
+
+    def planificar(self):
+        """Archivos cuyo codec no corresponde a su tier: lista de (archivo, tier, codec, nivel)"""
+        plan = []
+        for particion, info in self.clasificar().items():
+            if info['tier'] == 'caliente':
+                codec, nivel = self.codec_caliente, None
+            else:
+                codec, nivel = self.codec_frio, self.nivel_frio
+            for archivo in info['archivos']:
+                if self.codec_archivo(archivo) != codec:
+                    plan.append((archivo, info['tier'], codec, nivel))
+        return plan
+
+    def opciones_encoding(self, metadata):
+        """use_dictionary y column_encoding que reproducen los encodings del archivo"""
+        diccionario, delta = [], {}
+        for i in range(metadata.num_columns):
+            columna = metadata.row_group(0).column(i)
+            if 'DELTA_BINARY_PACKED' in columna.encodings:
+                delta[columna.path_in_schema] = 'DELTA_BINARY_PACKED'
+            elif any('DICTIONARY' in encoding for encoding in columna.encodings):
+                diccionario.append(columna.path_in_schema)
+        return {'use_dictionary': diccionario or False, 'column_encoding': delta or None}
+
+    def recomprimir(self, archivo, codec, nivel=None):
+        """
+        Reescribe un archivo con otro codec, row group a row group, y lo
+        sustituye con os.replace. Respeta mb_por_segundo de lectura.
+
+        Returns:
+            (bytes antes, bytes después)
+        """
+        archivo = Path(archivo)
+        origen = pq.ParquetFile(archivo)
+        metadata = origen.metadata
+        antes = archivo.stat().st_size
+        mtime_origen = archivo.stat().st_mtime
+        entrada = self.estado.get(str(archivo))
+        if entrada and entrada.get('mtime') == mtime_origen:
+            mtime_origen = entrada['mtime_origen']
+
+        tmp_file = archivo.with_name(f".{archivo.name}.tiering.tmp")
+        start_time = time.time()
+        leidos = 0
+        try:
+            with pq.ParquetWriter(tmp_file, origen.schema_arrow, compression=codec, compression_level=nivel,
+                                  **self.opciones_encoding(metadata)) as writer:
+                for i in range(metadata.num_row_groups):
+                    if self.detener_evento.is_set():
+                        raise InterruptedError("Recompresión detenida")
+                    tabla = origen.read_row_group(i)
+                    writer.write_table(tabla, row_group_size=max(1, tabla.num_rows))
+
+                    # Limitar el ritmo para no competir con las consultas
+                    row_group = metadata.row_group(i)
+                    leidos += sum(row_group.column(j).total_compressed_size for j in range(row_group.num_columns))
+                    if self.mb_por_segundo:
+                        espera = leidos / (self.mb_por_segundo * 1024**2) - (time.time() - start_time)
+                        if espera > 0:
+                            self.detener_evento.wait(espera)
+
+            with open(tmp_file, 'rb') as f:
+                os.fsync(f.fileno())
+            os.replace(tmp_file, archivo)
+        finally:
+            tmp_file.unlink(missing_ok=True)
+
+        despues = archivo.stat().st_size
+        self.estado[str(archivo)] = {
+            'codec': codec,
+            'nivel': nivel,
+            'bytes_antes': antes,
+            'bytes': despues,
+            'mtime': archivo.stat().st_mtime,
+            'mtime_origen': mtime_origen,
+            'recomprimido_at': datetime.now().isoformat(timespec='seconds')
+        }
+        self.guardar_estado()
+        return antes, despues
+
+    def ejecutar(self, plan=None):
+        """Aplica el plan (por defecto el actual) y devuelve el resumen"""
+        plan = self.planificar() if plan is None else plan
+        resumen = {'archivos': 0, 'bytes_antes': 0, 'bytes_despues': 0, 'errores': 0}
+
+        for archivo, tier, codec, nivel in plan:
+            if self.detener_evento.is_set():
+                break
+            try:
+                antes, despues = self.recomprimir(archivo, codec, nivel)
+            except InterruptedError:
+                break
+            except Exception as e:
+                print(f"   ❌ {archivo}: {e}")
+                resumen['errores'] += 1
+                continue
+            resumen['archivos'] += 1
+            resumen['bytes_antes'] += antes
+            resumen['bytes_despues'] += despues
+            print(f"   {'🔥' if tier == 'caliente' else '🧊'} {archivo.relative_to(self.dataset_dir)}: "
+                  f"{codec}{'' if nivel is None else f'-{nivel}'} {antes / 1024:.0f}KB → {despues / 1024:.0f}KB")
+
+        return resumen
+
+    def iniciar(self, intervalo_s=None):
+        """
+        Lanza la recompresión en un hilo de fondo. Con intervalo_s se vuelve
+        a clasificar y recomprimir periódicamente hasta detener()
+        """
+        def ciclo():
+            while not self.detener_evento.is_set():
+                self.ejecutar()
+                if intervalo_s is None or self.detener_evento.wait(intervalo_s):
+                    break
+
+        self.detener_evento.clear()
+        self.hilo = threading.Thread(target=ciclo, name=f"tiering-{self.dataset_dir.name}", daemon=True)
+        self.hilo.start()
+        return self.hilo
+
+    def detener(self):
+        """Detiene el hilo de fondo; el archivo en curso no se sustituye"""
+        self.detener_evento.set()
+        if self.hilo is not None:
+            self.hilo.join()
+            self.hilo = None
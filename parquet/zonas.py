@@ -0,0 +1,115 @@
+import duckdb
+import pyarrow.parquet as pq
+from pathlib import Path
+
+from rollups import ROLLUP_SPECS
+from dinero import sql_valor_dinero
+
+# Expresiones derivadas adicionales (bandas) por tipo de dataset. Las
+# dimensiones calculadas de los rollups (mes, niveles, rangos) se registran
+# automáticamente
+EXPRESIONES_EXTRA = {
+    'ventas': {
+        'banda_total': "CAST(floor(total / 500) AS INTEGER)"
+    },
+    'empleados': {
+        'banda_salario': "CAST(floor(salario_anual / 25000) AS INTEGER)"
+    },
+    'marketing': {
+        'mes_inicio': "strftime(fecha_inicio, '%Y-%m')",
+        'banda_gasto': "CAST(floor(gasto_real / 10000) AS INTEGER)"
+    }
+}
+
+# Hasta cuántos valores distintos se guardan por row group (si hay más, solo min/max)
+MAX_VALORES = 64
+
+
+def expresiones_zonas(dataset_type):
+    """Expresiones derivadas registradas para un tipo de dataset (alias -> SQL)"""
+    expresiones = {}
+    for spec in ROLLUP_SPECS.get(dataset_type, []):
+        for dim, expr in spec['dimensiones'].items():
+            if ' '.join(expr.split()) != dim:
+                expresiones[dim] = ' '.join(expr.split())
+    expresiones.update(EXPRESIONES_EXTRA.get(dataset_type, {}))
+    return expresiones
+
+
+def zonas_archivo(parquet_file, expresiones, dinero=None):
+    """
+    Calcula min/max (y los valores si son pocos) de cada expresión derivada
+    en cada row group de un archivo Parquet.
+
+    Las expresiones que no se pueden evaluar sobre el archivo (columna ausente
+    o de otro tipo) se omiten. Las columnas monetarias guardadas en céntimos
+    (spec dinero) se evalúan con su valor, como en la vista del analizador.
+
+    Returns:
+        Lista de {'row_group', 'rows', 'zonas': {alias: {min, max, valores?}}}
+    """
+    archivo = pq.ParquetFile(parquet_file)
+    conn = duckdb.connect()
+    row_groups = []
+
+    centimos = [
+        f'{sql_valor_dinero(col, info["escala"])} AS "{col}"'
+        for col, info in (dinero or {}).items() if info['modo'] == 'centimos'
+    ]
+
+    for i in range(archivo.metadata.num_row_groups):
+        conn.register('rg_archivo' if centimos else 'rg', archivo.read_row_group(i))
+        if centimos:
+            conn.execute(f"CREATE OR REPLACE VIEW rg AS SELECT * REPLACE ({', '.join(centimos)}) FROM rg_archivo")
+        zonas = {}
+        for alias, expr in expresiones.items():
+            try:
+                minimo, maximo, distintos, valores = conn.execute(f"""
+                    SELECT MIN(v), MAX(v), COUNT(DISTINCT v), list(DISTINCT v ORDER BY v)
+                    FROM (SELECT {expr} AS v FROM rg)
+                """).fetchone()
+            except duckdb.Error:
+                continue
+            zona = {'min': minimo, 'max': maximo}
+            if distintos <= MAX_VALORES:
+                zona['valores'] = [v for v in valores if v is not None]
+            zonas[alias] = zona
+        row_groups.append({
+            'row_group': i,
+            'rows': archivo.metadata.row_group(i).num_rows,
+            'zonas': zonas
+        })
+        conn.unregister('rg_archivo' if centimos else 'rg')
+
+    conn.close()
+    return row_groups
+
+
+def construir_zonas(archivos, dataset_type, base_dir, dinero=None):
+    """
+    Zone maps por row group de las expresiones derivadas del dataset para
+    guardar en la metadata (manifiesto) del dataset.
+
+    Args:
+        archivos: Archivos Parquet escritos
+        base_dir: Directorio del dataset; las rutas se guardan relativas a él
+        dinero: Spec de las columnas monetarias (ver dinero.columnas_dinero)
+
+    Returns:
+        {'expresiones': {alias: sql}, 'archivos': {ruta relativa: [row groups]}}
+    """
+    expresiones = expresiones_zonas(dataset_type)
+    if not expresiones or not archivos:
+        return {}
+
+    resultado = {'expresiones': expresiones, 'archivos': {}}
+    for archivo in archivos:
+        try:
+            ruta = Path(archivo).relative_to(base_dir).as_posix()
+            resultado['archivos'][ruta] = zonas_archivo(archivo, expresiones, dinero)
+        except Exception as e:
+            print(f"   ⚠️  Zone maps de {archivo}: {e}")
+
+    total = sum(len(rgs) for rgs in resultado['archivos'].values())
+    print(f"   🗺️  Zone maps: {len(expresiones)} expresiones en {total} row groups")
+    return resultado
@@ -0,0 +1,61 @@
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Los módulos auxiliares se importan por nombre desde su directorio, como en los scripts
+for directorio in ("duckdb", "parquet", "data-synthetic-producer"):
+    sys.path.insert(0, str(ROOT / directorio))
+
+
+def cargar_script(ruta, nombre):
+    """Importa un script del repo (los nombres con guiones no son importables)"""
+    spec = importlib.util.spec_from_file_location(nombre, ROOT / ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+@pytest.fixture(scope="session")
+def analizador_mod():
+    return cargar_script("duckdb/data-duckdb.py", "analizador")
+
+
+@pytest.fixture(scope="session")
+def conversor_mod():
+    return cargar_script("parquet/data-parquet.py", "conversor")
+
+
+@pytest.fixture(scope="session")
+def generador_mod():
+    return cargar_script("data-synthetic-producer/data-synthetic-producer.py", "generador")
+
+
+# CSV de cada dataset: (método del generador, nombre del archivo)
+CSV_DATASETS = {
+    'ventas': ('generar_dataset_ventas', "ventas_ecommerce"),
+    'empleados': ('generar_dataset_empleados', "empleados_rrhh"),
+    'marketing': ('generar_dataset_marketing', "campañas_marketing")
+}
+
+
+@pytest.fixture(scope="session")
+def convertir_datasets(generador_mod, conversor_mod):
+    """Devuelve una función que genera y convierte datasets en un directorio (como el quick start)"""
+    def convertir(directorio, registros=3000, datasets=('ventas',), **opciones):
+        anterior = os.getcwd()
+        os.chdir(directorio)
+        try:
+            generador = generador_mod.DatasetGeneratorFaker()
+            for dataset in datasets:
+                metodo, nombre = CSV_DATASETS[dataset]
+                generador.guardar_csv(getattr(generador, metodo)(registros), nombre)
+            conversor_mod.RobustCSVToParquetConverter(output_dir="parquet_data", **opciones).convertir_todos_robustamente()
+        finally:
+            os.chdir(anterior)
+        return Path(directorio) / "parquet_data"
+    return convertir
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from almacenamiento import BlockCache, LocalObjectStore
+
+TAMAÑO_BLOQUE = 4096
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    objetos = tmp_path / "objetos"
+    objetos.mkdir()
+    (objetos / "datos.bin").write_bytes(os.urandom(TAMAÑO_BLOQUE * 10))
+    return LocalObjectStore(objetos)
+
+
+def leer_todo(cache, almacen):
+    objeto = almacen.listar()["datos.bin"]
+    return cache.leer(almacen, "datos.bin", objeto['version'], objeto['tamaño'], 0, objeto['tamaño'])
+
+
+def test_indice_persistido_al_cerrar_se_reutiliza(tmp_path, almacen):
+    cache = BlockCache(tmp_path / "cache", tamaño_bloque=TAMAÑO_BLOQUE)
+    datos = leer_todo(cache, almacen)
+    cache.cerrar()
+    peticiones = almacen.stats['peticiones']
+
+    otra = BlockCache(tmp_path / "cache", tamaño_bloque=TAMAÑO_BLOQUE)
+    assert leer_todo(otra, almacen) == datos
+    # Solo la petición de listado: todos los bloques vienen de disco
+    assert almacen.stats['peticiones'] == peticiones + 1
+    assert otra.stats['hits'] == 10 and otra.stats['misses'] == 0
+
+
+def test_indice_se_reconstruye_desde_los_bloques(tmp_path, almacen):
+    cache = BlockCache(tmp_path / "cache", tamaño_bloque=TAMAÑO_BLOQUE)
+    leer_todo(cache, almacen)
+    # Proceso que no llegó a guardar el índice
+    (tmp_path / "cache" / "index.json").unlink(missing_ok=True)
+
+    otra = BlockCache(tmp_path / "cache", tamaño_bloque=TAMAÑO_BLOQUE)
+    assert otra.resumen()['bloques'] == 10
+    leer_todo(otra, almacen)
+    assert otra.stats['misses'] == 0
+
+
+def test_bloques_fuera_del_indice_se_borran_y_max_mb_se_respeta(tmp_path, almacen):
+    cache = BlockCache(tmp_path / "cache", tamaño_bloque=TAMAÑO_BLOQUE)
+    leer_todo(cache, almacen)
+    cache.cerrar()
+    huerfano = tmp_path / "cache" / f"{'0' * 32}.blk"
+    huerfano.write_bytes(b"x" * TAMAÑO_BLOQUE)
+
+    otra = BlockCache(tmp_path / "cache", tamaño_bloque=TAMAÑO_BLOQUE, max_mb=TAMAÑO_BLOQUE * 4 / 1024**2)
+    assert not huerfano.exists()
+    assert otra.resumen()['bloques'] == 4
+    assert len(list((tmp_path / "cache").glob("*.blk"))) == 4
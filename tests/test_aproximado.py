@@ -0,0 +1,65 @@
+import pytest
+
+# Confianza alta: los datos son aleatorios en cada ejecución y el test no debe fallar por azar
+CONFIANZA = 0.999
+
+
+@pytest.fixture(scope="module")
+def analyzer(tmp_path_factory, convertir_datasets, analizador_mod):
+    # Más filas por categoría que el mínimo por estrato: la muestra no es el dataset completo
+    parquet_dir = convertir_datasets(tmp_path_factory.mktemp("aproximado"), registros=40_000)
+    analyzer = analizador_mod.DuckDBParquetAnalyzer(
+        parquet_dir=str(parquet_dir), usar_rollups=False, cache_dir=None, block_cache_dir=None
+    )
+    analyzer.crear_vistas(analyzer.detectar_datasets())
+    yield analyzer
+    analyzer.conn.close()
+
+
+def test_estimadores_de_la_muestra_contienen_el_valor_exacto(analyzer):
+    medidas = [('ordenes', 'count', '*'), ('revenue', 'sum', 'total'), ('ticket', 'avg', 'total')]
+    sql = analyzer.sql_aproximado('ventas', {'categoria': 'categoria'}, medidas, order_by='categoria',
+                                  confianza=CONFIANZA)
+    estimado = analyzer.conn.execute(sql).fetchdf()
+    exacto = analyzer.conn.execute(
+        "SELECT categoria, COUNT(*) AS ordenes, SUM(total) AS revenue, AVG(total) AS ticket "
+        "FROM ventas GROUP BY 1 ORDER BY 1"
+    ).fetchdf()
+
+    assert list(estimado['categoria']) == list(exacto['categoria'])
+    assert (estimado['revenue_margen'] > 0).all()
+    for alias in ('ordenes', 'revenue', 'ticket'):
+        error = (estimado[alias].astype(float) - exacto[alias].astype(float)).abs()
+        assert (error <= estimado[f'{alias}_margen'] + 1e-6).all(), alias
+
+
+def test_distintos_desde_el_sketch(analyzer):
+    for columna in ('orden_id', 'cliente_id'):
+        exacto = analyzer.conn.execute(f"SELECT COUNT(DISTINCT {columna}) FROM ventas").fetchone()[0]
+        estimacion, margen = analyzer.distintos_aproximados('ventas', columna, CONFIANZA)
+        assert abs(estimacion - exacto) <= margen, columna
+
+
+def test_distintos_con_pocos_valores_usan_linear_counting(analyzer, monkeypatch):
+    # Sin la corrección de rango pequeño el estimador HLL daría ~0.7 * 4096 para un puñado de valores
+    exacto = analyzer.conn.execute("SELECT COUNT(DISTINCT producto) FROM ventas").fetchone()[0]
+    estimacion, _ = analyzer.distintos_aproximados('ventas', 'producto')
+    assert abs(estimacion - exacto) <= 1
+
+    m = 2**12
+    for registros, esperado in (([0] * m, 0), ([1] * 3 + [0] * (m - 3), 3)):
+        monkeypatch.setattr(analyzer, 'cargar_sketches', lambda tabla: {'hll': {'producto': registros}})
+        assert analyzer.distintos_aproximados('ventas', 'producto')[0] == esperado
+
+
+def test_percentiles_desde_el_resumen(analyzer):
+    percentiles = (0.5, 0.9, 0.905, 0.99)
+    resumen = analyzer.percentiles_aproximados('ventas', 'total', percentiles)
+    exactos = analyzer.conn.execute(
+        f"SELECT quantile_cont(total, {list(percentiles)}) FROM ventas"
+    ).fetchone()[0]
+
+    for fila, exacto in zip(resumen.itertuples(), exactos):
+        assert fila.minimo - 1e-6 <= float(exacto) <= fila.maximo + 1e-6
+        if fila.minimo == fila.maximo:
+            assert fila.valor == pytest.approx(float(exacto))
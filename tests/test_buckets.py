@@ -0,0 +1,35 @@
+import duckdb
+import pandas as pd
+import pytest
+
+from buckets import dividir_en_buckets, especificacion_buckets
+
+
+def buckets_de(claves, buckets):
+    spec = especificacion_buckets(pd.DataFrame({'k': claves}), 'k', buckets)
+    conn = duckdb.connect()
+    conn.register('claves', pd.DataFrame({'k': claves}))
+    asignados = conn.execute(f"SELECT {spec['expresion']} AS b FROM claves").df()['b']
+    conn.close()
+    return asignados
+
+
+@pytest.mark.parametrize("buckets", [16, 7])
+@pytest.mark.parametrize("paso", [1, 16, 1024])
+def test_claves_con_paso_se_reparten_en_todos_los_buckets(buckets, paso):
+    n = 10_000
+    conteos = buckets_de(list(range(0, n * paso, paso)), buckets).value_counts()
+    assert set(conteos.index) == set(range(buckets))
+    assert conteos.max() < 1.2 * n / buckets
+
+
+def test_claves_negativas_en_rango():
+    asignados = buckets_de(list(range(-5000, 5000)), 16)
+    assert asignados.between(0, 15).all()
+
+
+def test_dividir_en_buckets_conserva_las_filas():
+    df = pd.DataFrame({'cliente_id': range(0, 32_000, 16), 'total': 1.0})
+    partes = dividir_en_buckets(df, especificacion_buckets(df, 'cliente_id', 16))
+    assert len(partes) == 16
+    assert sum(len(parte) for _, parte in partes) == len(df)
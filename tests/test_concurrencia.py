@@ -0,0 +1,57 @@
+import duckdb
+import pytest
+
+
+@pytest.fixture(scope="module")
+def analyzer(tmp_path_factory, convertir_datasets, analizador_mod):
+    parquet_dir = convertir_datasets(tmp_path_factory.mktemp("concurrencia"))
+    analyzer = analizador_mod.DuckDBParquetAnalyzer(
+        parquet_dir=str(parquet_dir), usar_rollups=False, cache_dir=None, block_cache_dir=None
+    )
+    analyzer.crear_vistas(analyzer.detectar_datasets())
+    yield analyzer
+    analyzer.conn.close()
+
+
+CONSULTAS = [
+    "SELECT categoria, COUNT(*) AS n, SUM(total) AS total FROM ventas GROUP BY 1 ORDER BY 1",
+    "SELECT COUNT(DISTINCT cliente_id) AS clientes FROM ventas",
+    "SELECT canal, AVG(total) AS ticket FROM ventas GROUP BY 1 ORDER BY 1",
+    "SELECT metodo_pago, MAX(total) AS maximo FROM ventas GROUP BY 1 ORDER BY 1",
+    "SELECT año, COUNT(*) AS n FROM ventas GROUP BY 1 ORDER BY 1"
+]
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_resultados_en_orden_de_envio(analyzer, analizador_mod, max_workers):
+    executor = analizador_mod.ConcurrentReportExecutor(analyzer, max_workers=max_workers)
+    resultados = executor.ejecutar(CONSULTAS)
+
+    assert len(resultados) == len(CONSULTAS)
+    for sql, resultado in zip(CONSULTAS, resultados):
+        assert resultado['error'] is None
+        assert resultado['cola_s'] >= 0 and resultado['ejecucion_s'] >= 0
+        esperado = analizador_mod.lector_arrow(analyzer.conn.execute(sql)).read_all()
+        assert resultado['tabla'].to_pylist() == esperado.to_pylist()
+
+
+def test_un_error_no_afecta_al_resto(analyzer, analizador_mod):
+    consultas = [CONSULTAS[0], "SELECT * FROM tabla_inexistente", CONSULTAS[1]]
+    resultados = analizador_mod.ConcurrentReportExecutor(analyzer, max_workers=2).ejecutar(consultas)
+
+    assert resultados[1]['tabla'] is None
+    assert 'tabla_inexistente' in resultados[1]['error']
+    assert resultados[0]['error'] is None and resultados[0]['tabla'].num_rows > 0
+    assert resultados[2]['error'] is None and resultados[2]['tabla'].num_rows == 1
+
+
+def test_con_conexion_duckdb(analizador_mod):
+    conn = duckdb.connect()
+    conn.execute("CREATE TABLE t AS SELECT range AS x FROM range(1000)")
+    consultas = [f"SELECT SUM(x) FROM t WHERE x % {k} = 0" for k in range(1, 9)]
+    resultados = analizador_mod.ConcurrentReportExecutor(conn, max_workers=4).ejecutar(consultas)
+
+    assert [r['tabla'].column(0)[0].as_py() for r in resultados] == \
+        [sum(x for x in range(1000) if x % k == 0) for k in range(1, 9)]
+    assert analizador_mod.ConcurrentReportExecutor(conn).ejecutar([]) == []
+    conn.close()
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from distribuciones import cargar_distribuciones, validar_distribuciones, PRESETS
+
+
+@pytest.mark.parametrize("preset", list(PRESETS))
+def test_presets_validos(preset):
+    assert validar_distribuciones(cargar_distribuciones(preset)) is PRESETS[preset]
+
+
+@pytest.mark.parametrize("distribuciones, mensaje", [
+    ({'empleados': {'salario_anual': {'tipo': 'lognormal'}}}, "dataset 'empleados'"),
+    ({'marketing': {}}, "dataset 'marketing'"),
+    ({'ventas': {'salario_anual': {'tipo': 'lognormal'}}}, "salario_anual"),
+    ({'ventas': {'total': {'tipo': 'zipf'}}}, "total"),
+    ({'ventas': {'categoria': {'tipo': 'pareto'}}}, "pareto"),
+])
+def test_json_con_distribuciones_que_no_se_aplican(tmp_path, distribuciones, mensaje):
+    archivo = tmp_path / "distribuciones.json"
+    archivo.write_text(json.dumps(distribuciones), encoding='utf-8')
+    with pytest.raises(ValueError, match=mensaje):
+        cargar_distribuciones(str(archivo))
+
+
+def test_generador_rechaza_datasets_sin_distribuciones(generador_mod):
+    with pytest.raises(ValueError):
+        generador_mod.DatasetGeneratorFaker(distribuciones={'empleados': {'edad': {'tipo': 'normal'}}})
+
+
+def test_ventas_sesgadas(generador_mod):
+    generador = generador_mod.DatasetGeneratorFaker(distribuciones=cargar_distribuciones('sesgadas'))
+    ventas = generador.generar_dataset_ventas(20_000)
+    assert ventas['categoria'].value_counts(normalize=True)['Electrónicos'] == pytest.approx(0.60, abs=0.02)
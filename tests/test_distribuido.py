@@ -0,0 +1,37 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def analyzer(tmp_path_factory, convertir_datasets, analizador_mod):
+    parquet_dir = convertir_datasets(tmp_path_factory.mktemp("distribuido"))
+    analyzer = analizador_mod.DuckDBParquetAnalyzer(
+        parquet_dir=str(parquet_dir), usar_rollups=False, cache_dir=None, block_cache_dir=None
+    )
+    analyzer.crear_vistas(analyzer.detectar_datasets())
+    yield analyzer
+    for executor in analyzer.executors.values():
+        executor.cerrar()
+    analyzer.executors.clear()
+    analyzer.conn.close()
+
+
+MEDIDAS = [('revenue', 'sum', 'total'), ('ordenes', 'count', '*'), ('clientes', 'count_distinct', 'cliente_id')]
+
+
+def test_scatter_gather_coincide_con_conexion_unica(analyzer):
+    dimensiones = {'categoria': 'categoria'}
+    esperado = analyzer.consulta_agregada('ventas', dimensiones, MEDIDAS, order_by='categoria')
+    obtenido = analyzer.consulta_distribuida('ventas', dimensiones, MEDIDAS, order_by='categoria', workers=2)
+
+    assert list(obtenido['categoria']) == list(esperado['categoria'])
+    assert list(obtenido['ordenes']) == list(esperado['ordenes'])
+    assert list(obtenido['clientes']) == list(esperado['clientes'])
+    assert 'clientes_margen' not in obtenido.columns
+    assert obtenido['revenue'].astype(float).round(2).tolist() == esperado['revenue'].astype(float).round(2).tolist()
+
+
+def test_distintos_estimados_con_margen_en_modo_aproximado(analyzer):
+    obtenido = analyzer.consulta_distribuida('ventas', {}, MEDIDAS, workers=2, aproximado=True)
+    exacto = analyzer.conn.execute("SELECT COUNT(DISTINCT cliente_id) FROM ventas").fetchone()[0]
+    assert obtenido['clientes_margen'].iloc[0] > 0
+    assert abs(obtenido['clientes'].iloc[0] - exacto) <= 2 * obtenido['clientes_margen'].iloc[0]
@@ -0,0 +1,61 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def analyzer(tmp_path_factory, convertir_datasets, analizador_mod):
+    parquet_dir = convertir_datasets(tmp_path_factory.mktemp("lotes"))
+    analyzer = analizador_mod.DuckDBParquetAnalyzer(
+        parquet_dir=str(parquet_dir), usar_rollups=False, cache_dir=None, block_cache_dir=None
+    )
+    analyzer.crear_vistas(analyzer.detectar_datasets())
+    yield analyzer
+    analyzer.conn.close()
+
+
+def filas(tabla):
+    """Filas con los números redondeados (el orden de suma del scan combinado puede variar)"""
+    return [{k: round(float(v), 6) if isinstance(v, float) else v for k, v in fila.items()} for fila in tabla.to_pylist()]
+
+
+def sin_lote(analyzer, analizador_mod, consulta):
+    sql = analyzer.sql_agregado('ventas', consulta['dimensiones'], consulta['medidas'],
+                                consulta.get('order_by'), consulta.get('limit'))
+    return analizador_mod.lector_arrow(analyzer.conn.execute(sql)).read_all()
+
+
+def test_grouping_sets_coincide_con_consultas_separadas(analyzer, analizador_mod):
+    # La primera consulta fija el orden de las dimensiones (categoria es el bit más alto de GROUPING);
+    # las demás agrupan por subconjuntos con las dimensiones en otro orden
+    consultas = [
+        {'dimensiones': {'categoria': 'categoria', 'canal': 'canal'},
+         'medidas': [('n', 'count', '*'), ('revenue', 'sum', 'total')], 'order_by': 'categoria, canal'},
+        {'dimensiones': {'canal': 'canal'},
+         'medidas': [('revenue', 'sum', 'total'), ('clientes', 'count_distinct', 'cliente_id')], 'order_by': 'canal'},
+        {'dimensiones': {'categoria': 'categoria'},
+         'medidas': [('ticket', 'avg', 'total'), ('maximo', 'max', 'total')], 'order_by': 'ticket DESC', 'limit': 3},
+        {'dimensiones': {'metodo_pago': 'metodo_pago', 'categoria': 'categoria'},
+         'medidas': [('minimo', 'min', 'total')], 'order_by': 'metodo_pago, categoria'},
+        {'dimensiones': {}, 'medidas': [('n', 'count', '*'), ('clientes', 'count_distinct', 'cliente_id')]}
+    ]
+    sql = analyzer.sql_lote('ventas', consultas)
+    assert sql is not None and 'GROUPING SETS' in sql
+    lote = analizador_mod.lector_arrow(analyzer.conn.execute(sql)).read_all()
+
+    grupos = [consulta['lote']['grupo'] for consulta in consultas]
+    assert len(set(grupos)) == len(grupos)
+    # Solo categoria: bits a 1 de canal (2) y metodo_pago (1)
+    assert consultas[2]['lote']['grupo'] == 0b011
+
+    for consulta in consultas:
+        obtenido = analyzer.separar_lote(lote, consulta)
+        esperado = sin_lote(analyzer, analizador_mod, consulta)
+        assert obtenido.column_names == esperado.column_names
+        assert filas(obtenido) == filas(esperado)
+
+
+def test_dimensiones_incompatibles_no_se_combinan(analyzer):
+    consultas = [
+        {'dimensiones': {'periodo': 'año'}, 'medidas': [('n', 'count', '*')]},
+        {'dimensiones': {'periodo': 'mes'}, 'medidas': [('n', 'count', '*')]}
+    ]
+    assert analyzer.sql_lote('ventas', consultas) is None
@@ -0,0 +1,15 @@
+import gc
+
+
+def test_perfilador_no_deja_directorios_temporales(tmp_path, analizador_mod):
+    analyzer = analizador_mod.DuckDBParquetAnalyzer(
+        parquet_dir=str(tmp_path / "vacio"), cache_dir=None, block_cache_dir=None,
+        log_perfilado=str(tmp_path / "perfil.jsonl")
+    )
+    perfil_dir = analyzer.perfilador.perfil_dir
+    analyzer.ejecutar_consulta("SELECT 42 AS x")
+    assert perfil_dir.exists()
+
+    del analyzer
+    gc.collect()
+    assert not perfil_dir.exists()
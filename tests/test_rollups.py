@@ -0,0 +1,64 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def parquet_dir(tmp_path_factory, convertir_datasets):
+    return convertir_datasets(tmp_path_factory.mktemp("conversion"), datasets=('ventas', 'marketing'))
+
+
+@pytest.fixture
+def analyzer(parquet_dir, tmp_path, monkeypatch, analizador_mod):
+    """Analizador lanzado desde otro directorio que el de la conversión"""
+    monkeypatch.chdir(tmp_path)
+    analyzer = analizador_mod.DuckDBParquetAnalyzer(parquet_dir=str(parquet_dir), cache_dir=None, block_cache_dir=None)
+    analyzer.crear_vistas(analyzer.detectar_datasets())
+    yield analyzer
+    analyzer.conn.close()
+
+
+def test_rutas_auxiliares_relativas_al_directorio_de_datasets(parquet_dir, analyzer):
+    metadata = analyzer.datasets['ventas']['metadata']
+    for ruta in [r['file'] for r in metadata['rollups']] + [d['file'] for d in metadata['aproximado'].values()]:
+        assert not ruta.startswith('/')
+        assert (parquet_dir / ruta).exists()
+
+
+def test_rollups_y_modo_aproximado_desde_otro_directorio(analyzer):
+    assert analyzer.buscar_rollup('ventas', {'categoria': 'categoria'}, [('n', 'count', '*')]) is not None
+    assert analyzer.cargar_sketches('ventas') is not None
+    assert analyzer.fuente_muestra('ventas')[1] == 'muestra estratificada'
+
+
+def test_distintos_exactos_fuera_del_modo_aproximado(analyzer):
+    medidas = [('n', 'count', '*'), ('clientes_unicos', 'count_distinct', 'cliente_id')]
+    _, rollup = analyzer.plan_consulta_agregada('ventas', {}, medidas)
+    assert rollup is None
+
+    resultado = analyzer.consulta_agregada('ventas', {}, medidas)
+    exacto = analyzer.conn.execute("SELECT COUNT(DISTINCT cliente_id) FROM ventas").fetchone()[0]
+    assert list(resultado.columns) == ['n', 'clientes_unicos']
+    assert resultado['clientes_unicos'].iloc[0] == exacto
+
+
+def test_distintos_desde_hll_llevan_margen_en_modo_aproximado(analyzer):
+    medidas = [('n', 'count', '*'), ('clientes_unicos', 'count_distinct', 'cliente_id')]
+    _, rollup = analyzer.plan_consulta_agregada('ventas', {}, medidas, aproximado=True)
+    assert rollup is not None
+
+    resultado = analyzer.consulta_aproximada('ventas', {}, medidas)
+    exacto = analyzer.conn.execute("SELECT COUNT(DISTINCT cliente_id) FROM ventas").fetchone()[0]
+    estimacion, margen = resultado['clientes_unicos'].iloc[0], resultado['clientes_unicos_margen'].iloc[0]
+    assert margen > 0
+    assert abs(estimacion - exacto) <= 2 * margen
+
+
+def test_suma_de_columna_entera_desde_rollup_es_bigint(analyzer):
+    medidas = [('conversiones', 'sum', 'conversiones')]
+    sql, rollup = analyzer.plan_consulta_agregada('marketing', {'canal': 'canal'}, medidas)
+    assert rollup is not None
+    assert analyzer.tipos_columnas('marketing')['conversiones'] == 'BIGINT'
+
+    tipo = analyzer.conn.execute(f"SELECT typeof(conversiones) FROM ({sql}) LIMIT 1").fetchone()[0]
+    assert tipo == 'BIGINT'
+    exacto = analyzer.conn.execute("SELECT SUM(conversiones) FROM marketing").fetchone()[0]
+    assert analyzer.conn.execute(f"SELECT SUM(conversiones) FROM ({sql})").fetchone()[0] == exacto
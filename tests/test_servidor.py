@@ -0,0 +1,129 @@
+import json
+import socket
+import threading
+import types
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import duckdb
+import pytest
+
+from servidor import ServidorConsultas, es_consulta_lectura
+
+
+@pytest.fixture
+def servidor():
+    conn = duckdb.connect()
+    # Un thread: el error del test de streaming llega después de enviar los primeros lotes
+    conn.execute("SET threads TO 1")
+    conn.execute("CREATE VIEW ventas AS SELECT * FROM range(3) t(x)")
+    analyzer = types.SimpleNamespace(conn=conn, cursor=conn.cursor, perfilador=None, cache=None,
+                                     datasets={}, conteos={})
+    servidor = ServidorConsultas(analyzer, cursores=2)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), servidor.crear_handler())
+    hilo = threading.Thread(target=httpd.serve_forever, daemon=True)
+    hilo.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", conn
+    httpd.shutdown()
+    httpd.server_close()
+    servidor.pool.cerrar()
+    conn.close()
+
+
+def consultar(url, sql):
+    cuerpo = json.dumps({'sql': sql, 'formato': 'json', 'cache': False}).encode('utf-8')
+    peticion = urllib.request.Request(f"{url}/query", data=cuerpo, method="POST")
+    try:
+        with urllib.request.urlopen(peticion) as respuesta:
+            return respuesta.status, json.loads(respuesta.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 1",
+    "  with a AS (SELECT 1) SELECT * FROM a;",
+    "FROM ventas",
+    "DESCRIBE ventas",
+    "SUMMARIZE ventas",
+    "EXPLAIN SELECT * FROM ventas",
+    "EXPLAIN ANALYZE SELECT * FROM ventas",
+])
+def test_acepta_una_consulta_de_lectura(sql):
+    assert es_consulta_lectura(sql)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 1; CREATE OR REPLACE VIEW ventas AS SELECT 42 AS x",
+    "SELECT 1; SELECT 2",
+    "CREATE TABLE t AS SELECT 1",
+    "EXPLAIN ANALYZE CREATE TABLE t AS SELECT 1",
+    "PRAGMA threads=1",
+    "PRAGMA enable_profiling",
+    "SELEC 1",
+    "",
+])
+def test_rechaza_escrituras_y_varias_sentencias(sql):
+    assert not es_consulta_lectura(sql)
+
+
+def test_query_no_puede_reemplazar_vistas_compartidas(servidor):
+    url, conn = servidor
+    status, respuesta = consultar(url, "SELECT 1; CREATE OR REPLACE VIEW ventas AS SELECT 42 AS x")
+    assert status == 400
+    assert 'error' in respuesta
+
+    status, respuesta = consultar(url, "SELECT * FROM ventas ORDER BY x")
+    assert status == 200
+    assert respuesta['filas'] == [[0], [1], [2]]
+    assert conn.execute("SELECT COUNT(*) FROM ventas").fetchone()[0] == 3
+
+
+def test_error_a_mitad_del_stream_corta_la_conexion(servidor):
+    url, _ = servidor
+    host, puerto = url.removeprefix("http://").split(":")
+    sql = "SELECT CASE WHEN range < 500000 THEN range ELSE error('boom') END AS x FROM range(1000000)"
+    cuerpo = json.dumps({'sql': sql, 'batch_size': 1000, 'cache': False}).encode('utf-8')
+
+    # Socket directo: se lee hasta que el servidor cierra la conexión
+    with socket.create_connection((host, int(puerto)), timeout=30) as sock:
+        sock.sendall(b"POST /query HTTP/1.1\r\nHost: localhost\r\n"
+                     + f"Content-Length: {len(cuerpo)}\r\n\r\n".encode('ascii') + cuerpo)
+        datos = b""
+        while bloque := sock.recv(65536):
+            datos += bloque
+
+    assert datos.startswith(b"HTTP/1.1 200")
+    # Ni una segunda respuesta dentro del cuerpo ni el chunk final: el cliente ve el stream incompleto
+    assert datos.count(b"HTTP/1.1") == 1
+    assert not datos.endswith(b"0\r\n\r\n")
+
+    status, respuesta = consultar(url, "SELECT COUNT(*) AS n FROM ventas")
+    assert status == 200
+    assert respuesta['filas'] == [[3]]
+
+
+def test_perfil_de_consultas_del_servidor(tmp_path, convertir_datasets, analizador_mod):
+    parquet_dir = convertir_datasets(tmp_path)
+    analyzer = analizador_mod.DuckDBParquetAnalyzer(
+        parquet_dir=str(parquet_dir), cache_dir=None, block_cache_dir=None,
+        log_perfilado=str(tmp_path / "perfil.jsonl")
+    )
+    analyzer.crear_vistas(analyzer.detectar_datasets())
+    servidor = ServidorConsultas(analyzer, cursores=2)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), servidor.crear_handler())
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        sql = "SELECT categoria, SUM(total) AS revenue FROM ventas GROUP BY categoria"
+        status, _ = consultar(f"http://127.0.0.1:{httpd.server_address[1]}", sql)
+        assert status == 200
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        servidor.pool.cerrar()
+
+    registro = analyzer.perfilador.registros[-1]
+    assert registro['sql'] == sql
+    assert registro['files_read'] == analyzer.datasets['ventas']['count']
+    assert registro['files']
@@ -0,0 +1,178 @@
+import json
+from decimal import Decimal
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from buckets import BUCKETS_POR_DEFECTO
+from streaming import MicroBatchIngestor, es_archivo_de_bucket, es_archivo_stream
+
+SEMILLA = 2000
+
+
+@pytest.fixture
+def eventos(generador_mod):
+    """Eventos de ventas como en los CSV de origen, con órdenes posteriores a las de la semilla"""
+    def generar(n, desde=SEMILLA + 1):
+        df = pd.DataFrame(generador_mod.DatasetGeneratorFaker().generar_dataset_ventas(n))
+        df['orden_id'] = [f"ORD-{i:05d}" for i in range(desde, desde + n)]
+        return df
+    return generar
+
+
+def escribir_ndjson(archivo, df, modo='w'):
+    with open(archivo, modo, encoding='utf-8') as f:
+        f.write(df.to_json(orient='records', lines=True, force_ascii=False, date_format='iso'))
+
+
+def ingerir(ingestor, archivo, formato='ndjson'):
+    """Lee lo nuevo del archivo, procesa los bloques y escribe un lote (sin hilos)"""
+    while ingestor.leer_nuevos(archivo, formato):
+        while not ingestor.cola.empty():
+            ingestor.procesar(ingestor.cola.get())
+    return ingestor.escribir_lote()
+
+
+def abrir_analyzer(analizador_mod, parquet_dir, **opciones):
+    analyzer = analizador_mod.DuckDBParquetAnalyzer(
+        parquet_dir=str(parquet_dir), cache_dir=None, block_cache_dir=None, **opciones
+    )
+    analyzer.crear_vistas(analyzer.detectar_datasets())
+    return analyzer
+
+
+def test_eventos_ingeridos_visibles_en_el_analizador(tmp_path, convertir_datasets, analizador_mod, eventos):
+    parquet_dir = convertir_datasets(tmp_path, registros=SEMILLA)
+    analyzer = abrir_analyzer(analizador_mod, parquet_dir, usar_rollups=False)
+    n_antes, total_antes = analyzer.conn.execute("SELECT COUNT(*), SUM(total) FROM ventas").fetchone()
+
+    df = eventos(500)
+    escribir_ndjson(tmp_path / "eventos.ndjson", df)
+    ingestor = MicroBatchIngestor(parquet_dir / "ventas")
+    archivos = ingerir(ingestor, tmp_path / "eventos.ndjson")
+
+    assert archivos and all(es_archivo_stream(a) for a in archivos)
+    analyzer.sincronizar_archivos('ventas', forzar=True)
+    analyzer.crear_vistas(analyzer.datasets)
+    n, total = analyzer.conn.execute("SELECT COUNT(*), SUM(total) FROM ventas").fetchone()
+    assert n == n_antes + len(df)
+    assert float(total) == pytest.approx(float(total_antes) + df['total'].sum(), abs=0.01)
+
+
+def test_reanuda_desde_offsets_y_rollup_con_delta(tmp_path, convertir_datasets, analizador_mod, eventos):
+    parquet_dir = convertir_datasets(tmp_path, registros=SEMILLA)
+    archivo = tmp_path / "eventos.ndjson"
+    primeros, segundos = eventos(300), eventos(200, desde=SEMILLA + 301)
+
+    escribir_ndjson(archivo, primeros)
+    ingerir(MicroBatchIngestor(parquet_dir / "ventas"), archivo)
+
+    # Un ingestor nuevo (reinicio) continúa desde el offset confirmado
+    escribir_ndjson(archivo, segundos, modo='a')
+    ingestor = MicroBatchIngestor(parquet_dir / "ventas")
+    assert ingestor.offsets[str(archivo)]['offset'] == len(primeros.to_json(
+        orient='records', lines=True, force_ascii=False, date_format='iso').encode('utf-8'))
+    ingerir(ingestor, archivo)
+    assert ingestor.stats['eventos'] == len(segundos)
+
+    analyzer = abrir_analyzer(analizador_mod, parquet_dir)
+    dimensiones = {'categoria': 'categoria'}
+    medidas = [('ordenes', 'count', '*'), ('revenue', 'sum', 'total')]
+    sql, rollup = analyzer.plan_consulta_agregada('ventas', dimensiones, medidas, order_by='categoria')
+    assert rollup is not None and 'UNION ALL BY NAME' in sql
+
+    obtenido = analyzer.consulta_agregada('ventas', dimensiones, medidas, order_by='categoria')
+    esperado = analyzer.conn.execute(
+        "SELECT categoria, COUNT(*) AS ordenes, SUM(total) AS revenue FROM ventas GROUP BY 1 ORDER BY 1"
+    ).fetchdf()
+    assert list(obtenido['categoria']) == list(esperado['categoria'])
+    assert list(obtenido['ordenes']) == list(esperado['ordenes'])
+    assert obtenido['ordenes'].sum() == SEMILLA + len(primeros) + len(segundos)
+    assert obtenido['revenue'].astype(float).round(2).tolist() == esperado['revenue'].astype(float).round(2).tolist()
+
+
+def test_ids_respetan_prefijo_y_ancho(tmp_path, convertir_datasets, analizador_mod, eventos):
+    parquet_dir = convertir_datasets(tmp_path, registros=SEMILLA)
+    df = eventos(5)
+    df['orden_id'] = ['ORD-123456', 'ORD-09999', 'ORD-0042', 'ORD-012345', 'XYZ-00001']
+    escribir_ndjson(tmp_path / "eventos.ndjson", df)
+
+    ingestor = MicroBatchIngestor(parquet_dir / "ventas")
+    ingerir(ingestor, tmp_path / "eventos.ndjson")
+    assert ingestor.stats['eventos'] == 2
+    assert ingestor.stats['rechazados'] == 3
+
+    analyzer = abrir_analyzer(analizador_mod, parquet_dir, usar_rollups=False)
+    ids = analyzer.conn.execute(
+        "SELECT orden_id FROM ventas WHERE orden_id IN ('ORD-123456', 'ORD-09999') ORDER BY 1"
+    ).fetchall()
+    assert ids == [('ORD-09999',), ('ORD-123456',)]
+
+
+@pytest.mark.parametrize("dinero", ['centimos', 'decimal'])
+def test_dinero_en_punto_fijo(tmp_path, convertir_datasets, analizador_mod, eventos, dinero):
+    parquet_dir = convertir_datasets(tmp_path, registros=SEMILLA, dinero=dinero)
+    analyzer = abrir_analyzer(analizador_mod, parquet_dir, usar_rollups=False)
+    total_antes = analyzer.conn.execute("SELECT SUM(total) FROM ventas").fetchone()[0]
+
+    df = eventos(200)
+    escribir_ndjson(tmp_path / "eventos.ndjson", df)
+    ingestor = MicroBatchIngestor(parquet_dir / "ventas")
+    assert ingestor.dinero or dinero == 'decimal'
+    ingerir(ingestor, tmp_path / "eventos.ndjson")
+
+    analyzer = abrir_analyzer(analizador_mod, parquet_dir, usar_rollups=False)
+    total = analyzer.conn.execute("SELECT SUM(total) FROM ventas").fetchone()[0]
+    esperado = sum(Decimal(str(v)).quantize(Decimal('0.01')) for v in df['total'])
+    assert isinstance(total, Decimal)
+    assert total - total_antes == esperado
+
+
+def test_archivos_por_particion(tmp_path, convertir_datasets, eventos):
+    parquet_dir = convertir_datasets(tmp_path, registros=SEMILLA)
+    escribir_ndjson(tmp_path / "eventos.ndjson", eventos(500))
+    archivos = ingerir(MicroBatchIngestor(parquet_dir / "ventas"), tmp_path / "eventos.ndjson")
+
+    assert len(archivos) > 1
+    for archivo in archivos:
+        claves = dict(parte.split('=', 1) for parte in Path(archivo).relative_to(parquet_dir / "ventas").parts[:-1])
+        tabla = pq.read_table(archivo)
+        assert set(tabla.column('año').to_pylist()) == {int(claves['año'])}
+        assert set(tabla.column('categoria_clean').to_pylist()) == {claves['categoria']}
+
+
+def test_archivos_por_bucket(tmp_path, convertir_datasets, eventos):
+    parquet_dir = convertir_datasets(tmp_path, registros=SEMILLA, buckets=BUCKETS_POR_DEFECTO)
+    escribir_ndjson(tmp_path / "eventos.ndjson", eventos(500))
+    ingestor = MicroBatchIngestor(parquet_dir / "ventas")
+    archivos = ingerir(ingestor, tmp_path / "eventos.ndjson")
+
+    spec = ingestor.buckets
+    assert len(archivos) > 1
+    for archivo in archivos:
+        bucket = int(Path(archivo).name.split('.')[0].rsplit('_', 1)[1])
+        assert es_archivo_de_bucket(archivo, spec['patron'], bucket)
+        asignados = ingestor.conn.execute(
+            f"SELECT DISTINCT {spec['expresion']} FROM read_parquet('{archivo}')"
+        ).fetchall()
+        assert asignados == [(bucket,)]
+        claves = pq.read_table(archivo).column(spec['columna']).to_pylist()
+        assert claves == sorted(claves)
+
+
+def test_lineas_mal_formadas_se_descartan_una_a_una(tmp_path, convertir_datasets, eventos):
+    parquet_dir = convertir_datasets(tmp_path, registros=SEMILLA)
+    archivo = tmp_path / "eventos.ndjson"
+    escribir_ndjson(archivo, eventos(100))
+    with open(archivo, 'a', encoding='utf-8') as f:
+        f.write('{"orden_id": "ORD-99999", "total": \n')
+        f.write(json.dumps({'orden_id': 'ORD-99998', 'fecha': 'no es una fecha', 'categoria': 'Ropa'}) + '\n')
+    escribir_ndjson(archivo, eventos(50, desde=SEMILLA + 101), modo='a')
+
+    ingestor = MicroBatchIngestor(parquet_dir / "ventas")
+    archivos = ingerir(ingestor, archivo)
+    assert ingestor.stats['eventos'] == 150
+    assert ingestor.stats['rechazados'] == 2
+    assert sum(pq.read_metadata(a).num_rows for a in archivos) == 150
@@ -0,0 +1,76 @@
+import os
+import time
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from tiering import PartitionTieringManager
+
+
+def test_recomprime_particiones_frias_sin_cambiar_los_datos(tmp_path, convertir_datasets):
+    parquet_dir = convertir_datasets(tmp_path)
+    # Los datos cubren los últimos 12 meses: el año actual es caliente y el anterior frío
+    manager = PartitionTieringManager(parquet_dir / "ventas", dias_calientes=0, mb_por_segundo=None)
+    clasificacion = manager.clasificar()
+    frias = [p for p, info in clasificacion.items() if info['tier'] == 'fria']
+    assert frias and len(frias) < len(clasificacion)
+
+    antes = {}
+    for info in clasificacion.values():
+        for archivo in info['archivos']:
+            antes[archivo] = (pq.read_table(archivo), pq.ParquetFile(archivo).metadata)
+
+    resumen = manager.ejecutar()
+    assert resumen['errores'] == 0
+    assert resumen['archivos'] == sum(len(clasificacion[p]['archivos']) for p in frias)
+
+    for particion, info in clasificacion.items():
+        codec = 'zstd' if info['tier'] == 'fria' else 'snappy'
+        for archivo in info['archivos']:
+            tabla, metadata = antes[archivo]
+            nueva = pq.ParquetFile(archivo).metadata
+            assert manager.codec_archivo(archivo) == codec
+            assert pq.read_table(archivo).equals(tabla)
+            assert nueva.num_row_groups == metadata.num_row_groups
+            assert [nueva.row_group(i).num_rows for i in range(nueva.num_row_groups)] == \
+                [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+            for j in range(metadata.num_columns):
+                if 'DELTA_BINARY_PACKED' in metadata.row_group(0).column(j).encodings:
+                    assert 'DELTA_BINARY_PACKED' in nueva.row_group(0).column(j).encodings
+
+    # Aplicado el plan, no queda nada por recomprimir
+    assert manager.planificar() == []
+
+
+def test_antiguedad_por_claves_de_fecha(tmp_path):
+    manager = PartitionTieringManager(tmp_path / "ventas")
+    ahora = datetime.now()
+    assert manager.antiguedad_dias('año=2020/mes=2/categoria=ropa', []) == (ahora - datetime(2020, 3, 1)).days
+    assert manager.antiguedad_dias('año=2020/categoria=ropa', []) == (ahora - datetime(2021, 1, 1)).days
+    assert manager.antiguedad_dias(f'año={ahora.year}', []) == 0
+
+
+def test_antiguedad_ignora_mtime_de_claves_y_recompresiones(tmp_path):
+    dataset_dir = tmp_path / "ventas"
+    hace_60_dias = time.time() - 60 * 86400
+    for particion in ('año=2020', 'region=norte'):
+        (dataset_dir / particion).mkdir(parents=True)
+        archivo = dataset_dir / particion / "datos.parquet"
+        pq.write_table(pa.table({'x': list(range(100))}), archivo, compression='snappy')
+        os.utime(archivo, (hace_60_dias, hace_60_dias))
+    # Un archivo recién tocado no rejuvenece una partición con claves de fecha
+    os.utime(dataset_dir / 'año=2020' / "datos.parquet")
+
+    manager = PartitionTieringManager(dataset_dir, dias_calientes=30, mb_por_segundo=None)
+    assert {p: info['tier'] for p, info in manager.clasificar().items()} == {'año=2020': 'fria', 'region=norte': 'fria'}
+
+    resumen = manager.ejecutar()
+    assert resumen['archivos'] == 2
+
+    # La recompresión cambia el mtime, pero la antigüedad sigue siendo la de la escritura original
+    manager = PartitionTieringManager(dataset_dir, dias_calientes=30, mb_por_segundo=None)
+    clasificacion = manager.clasificar()
+    assert clasificacion['region=norte']['tier'] == 'fria'
+    assert round(clasificacion['region=norte']['antiguedad_dias']) == 60
+    assert manager.planificar() == []
@@ -0,0 +1,27 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def analyzer_centimos(tmp_path_factory, convertir_datasets, analizador_mod):
+    """Analizador sobre unas ventas convertidas con el dinero en céntimos"""
+    parquet_dir = convertir_datasets(tmp_path_factory.mktemp("centimos"), dinero='centimos')
+    analyzer = analizador_mod.DuckDBParquetAnalyzer(parquet_dir=str(parquet_dir), cache_dir=None, block_cache_dir=None)
+    analyzer.crear_vistas(analyzer.detectar_datasets())
+    yield analyzer
+    analyzer.conn.close()
+
+
+def test_filtros_de_zonas_usan_el_valor_decimal_en_modo_centimos(analyzer_centimos):
+    analyzer = analyzer_centimos
+    assert analyzer.datasets['ventas']['metadata']['dinero']['total']['modo'] == 'centimos'
+
+    n, suma = analyzer.conn.execute(
+        "SELECT COUNT(*), SUM(total) FROM ventas WHERE CAST(floor(total / 500) AS INTEGER) = 2"
+    ).fetchone()
+    assert n > 0
+
+    resultado = analyzer.consulta_agregada(
+        'ventas', {}, [('n', 'count', '*'), ('revenue', 'sum', 'total')], filtros=[('banda_total', '=', 2)]
+    )
+    assert int(resultado['n'].iloc[0]) == n
+    assert float(resultado['revenue'].iloc[0]) == pytest.approx(float(suma))